@@ -0,0 +1,311 @@
+import asyncio
+import uuid
+from dataclasses import dataclass
+
+import aioredis
+from solana.rpc import commitment
+from solana.rpc.websocket_api import SolanaWsClientProtocol, connect
+from solbot_cache.pool_state import PoolAccountKind, PoolStateCache, decode_pool_account
+from solbot_cache.rayidum import get_preferred_pool
+from solbot_common.config import settings
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.log import logger
+from solbot_common.models.tg_bot.holding import Holding
+from solbot_common.utils.pool import AmmV4PoolKeys
+from solbot_common.utils.utils import get_async_client, get_bonding_curve_pda
+from solbot_db.session import NEW_ASYNC_SESSION, provide_session
+from solders.account_decoder import UiAccountEncoding  # type: ignore
+from solders.commitment_config import CommitmentLevel  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.config import RpcAccountInfoConfig  # type: ignore
+from solders.rpc.requests import AccountSubscribe  # type: ignore
+from solders.rpc.responses import AccountNotification, SubscriptionResult  # type: ignore
+from sqlmodel import select
+
+from cache_preloader.core.protocols import AutoUpdateCacheProtocol
+
+# getMultipleAccounts 单次最多读取的账户数
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+
+@dataclass
+class MirroredAccount:
+    mint: str
+    kind: PoolAccountKind
+    slot: int = 0
+    data: dict | None = None
+
+
+class PoolStateMirror(AutoUpdateCacheProtocol):
+    """池子状态镜像
+
+    订阅持仓和交易过的代币的 bonding curve（未发射）或 Raydium AMM vault（已发射）账户，
+    解码后的储备量保存在内存中并写入 Redis，交易构建通过 PoolStateCache 读取。
+    """
+
+    def __init__(self, redis: aioredis.Redis):
+        self.redis = redis
+        self.store = PoolStateCache(redis)
+        self.rpc_client = get_async_client()
+        self.websocket_url = settings.rpc.rpc_url.replace("https://", "wss://")
+        self.config = settings.pool_state
+        # 账户地址 -> 镜像的账户
+        self.accounts: dict[Pubkey, MirroredAccount] = {}
+        # 代币 -> 需要镜像的账户
+        self._mint_accounts: dict[str, dict[Pubkey, PoolAccountKind]] = {}
+        # 订阅请求 id -> 账户地址，订阅 id -> 账户地址，账户地址 -> 订阅 id
+        self._requests: dict[int, Pubkey] = {}
+        self._subscriptions: dict[int, Pubkey] = {}
+        self._subscription_ids: dict[Pubkey, int] = {}
+        self._websocket: SolanaWsClientProtocol | None = None
+        self._session = ""
+        self._slot = 0
+        self._task: asyncio.Task | None = None
+        self._is_running = False
+
+    def is_running(self) -> bool:
+        return self._is_running
+
+    async def start(self):
+        if self._is_running:
+            return
+        self._is_running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"{self.__class__.__name__} 缓存管理器已启动")
+
+    async def stop(self):
+        if not self._is_running:
+            return
+        self._is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info(f"{self.__class__.__name__} 缓存管理器已停止")
+
+    async def _run(self):
+        while self._is_running:
+            try:
+                async with connect(
+                    self.websocket_url,
+                    ping_timeout=30,
+                    ping_interval=20,
+                    close_timeout=20,
+                ) as websocket:
+                    await self._serve(websocket)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"{self.__class__.__name__} 订阅中断: {e}")
+            finally:
+                self._websocket = None
+                await self._invalidate()
+            # 重连前等待，期间读取方回退到 RPC
+            await asyncio.sleep(1)
+
+    async def _invalidate(self):
+        """订阅中断时立即使所有条目失效，不等待心跳过期"""
+        try:
+            await self.store.heartbeat("", self._slot)
+        except Exception as e:
+            logger.error(f"Failed to invalidate pool state heartbeat: {e}")
+
+    async def _serve(self, websocket: SolanaWsClientProtocol):
+        """在一个连接上建立订阅并处理推送，连接断开时抛出异常"""
+        self._websocket = websocket
+        # 新的连接使用新的 session，之前写入的条目全部失效
+        self._session = uuid.uuid4().hex
+        self._requests.clear()
+        self._subscriptions.clear()
+        self._subscription_ids.clear()
+        self.accounts.clear()
+        await self.store.heartbeat(self._session, self._slot)
+
+        tasks = [
+            asyncio.create_task(self._receive(websocket)),
+            asyncio.create_task(self._maintain()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _maintain(self):
+        """定期同步需要镜像的账户，并写入心跳"""
+        loop = asyncio.get_running_loop()
+        next_sync = 0.0
+        while True:
+            if loop.time() >= next_sync:
+                await self.sync()
+                next_sync = loop.time() + self.config.refresh_interval
+            await self.store.heartbeat(self._session, self._slot)
+            await asyncio.sleep(self.config.heartbeat_interval)
+
+    async def _receive(self, websocket: SolanaWsClientProtocol):
+        async for messages in websocket:
+            for message in messages:
+                if isinstance(message, SubscriptionResult):
+                    account = self._requests.pop(message.id, None)
+                    if account is not None:
+                        self._subscriptions[message.result] = account
+                        self._subscription_ids[account] = message.result
+                elif isinstance(message, AccountNotification):
+                    account = self._subscriptions.get(message.subscription)
+                    if account is None:
+                        continue
+                    value = message.result.value
+                    await self.update(
+                        account, message.result.context.slot, bytes(value.data) if value else None
+                    )
+
+    async def update(self, account: Pubkey, slot: int, data: bytes | None):
+        """更新账户的镜像，忽略比已有数据更旧的 slot"""
+        mirrored = self.accounts.get(account)
+        if mirrored is None or slot < mirrored.slot:
+            return
+        self._slot = max(self._slot, slot)
+        if data is None:
+            # 账户被关闭
+            mirrored.slot, mirrored.data = slot, None
+            await self.store.delete(account)
+            return
+        try:
+            decoded = decode_pool_account(mirrored.kind, data)
+        except Exception as e:
+            logger.error(f"Failed to decode {mirrored.kind.value} {account}: {e}")
+            return
+        mirrored.slot, mirrored.data = slot, decoded
+        await self.store.put(self._session, account, slot, mirrored.kind, decoded)
+        if mirrored.kind == PoolAccountKind.BONDING_CURVE and decoded["complete"]:
+            # 代币已迁移到 Raydium，下次同步时改为镜像池子的 vault
+            self._mint_accounts.pop(mirrored.mint, None)
+
+    @provide_session
+    async def _get_held_mints(self, *, session=NEW_ASYNC_SESSION) -> set[str]:
+        stmt = select(Holding.mint).distinct()
+        return set((await session.execute(stmt)).scalars().all())
+
+    async def _get_account_data(
+        self, accounts: list[Pubkey]
+    ) -> dict[Pubkey, tuple[int, bytes | None]]:
+        """读取账户的原始数据，返回账户 -> (slot, 数据)"""
+        chunks = [
+            accounts[i : i + MAX_ACCOUNTS_PER_REQUEST]
+            for i in range(0, len(accounts), MAX_ACCOUNTS_PER_REQUEST)
+        ]
+        responses = await asyncio.gather(
+            *(
+                self.rpc_client.get_multiple_accounts(chunk, commitment.Processed)
+                for chunk in chunks
+            )
+        )
+        result: dict[Pubkey, tuple[int, bytes | None]] = {}
+        for chunk, response in zip(chunks, responses, strict=True):
+            slot = response.context.slot
+            for account, value in zip(chunk, response.value, strict=True):
+                result[account] = (slot, bytes(value.data) if value is not None else None)
+        return result
+
+    async def _resolve(self, mints: list[str]) -> None:
+        """确定代币需要镜像的账户
+
+        bonding curve 存在且未完成时只镜像 bonding curve，否则镜像 Raydium 池子的 vault。
+        """
+        curves = {
+            mint: get_bonding_curve_pda(Pubkey.from_string(mint), PUMP_FUN_PROGRAM)
+            for mint in mints
+        }
+        curve_data = await self._get_account_data(list(curves.values()))
+        for mint, curve in curves.items():
+            accounts: dict[Pubkey, PoolAccountKind] = {}
+            _, data = curve_data[curve]
+            if data is not None:
+                accounts[curve] = PoolAccountKind.BONDING_CURVE
+                try:
+                    complete = decode_pool_account(PoolAccountKind.BONDING_CURVE, data)["complete"]
+                except Exception:
+                    complete = True
+                if not complete:
+                    self._mint_accounts[mint] = accounts
+                    continue
+            try:
+                pool_data = await get_preferred_pool(mint)
+            except Exception as e:
+                logger.warning(f"Failed to get pool of {mint}: {e}")
+                pool_data = None
+            if pool_data is not None:
+                pool_keys = AmmV4PoolKeys.from_pool_data(
+                    pool_id=pool_data["pool_id"],
+                    amm_data=pool_data["amm_data"],
+                    market_data=pool_data["market_data"],
+                )
+                accounts[pool_keys.quote_vault] = PoolAccountKind.TOKEN_ACCOUNT
+                accounts[pool_keys.base_vault] = PoolAccountKind.TOKEN_ACCOUNT
+            # 没有找到任何账户的代币在下次同步时重试
+            if accounts:
+                self._mint_accounts[mint] = accounts
+
+    async def sync(self) -> None:
+        """按持仓和交易过的代币增减订阅，新订阅的账户读取一次快照"""
+        mints = await self._get_held_mints()
+        mints.update(await self.store.get_tracked_mints(self.config.track_ttl))
+        for mint in set(self._mint_accounts) - mints:
+            del self._mint_accounts[mint]
+        unresolved = [mint for mint in mints if mint not in self._mint_accounts]
+        if unresolved:
+            await self._resolve(unresolved)
+
+        desired = {
+            account: (mint, kind)
+            for mint, accounts in self._mint_accounts.items()
+            for account, kind in accounts.items()
+        }
+        removed = [account for account in self.accounts if account not in desired]
+        added = [account for account in desired if account not in self.accounts]
+        if removed:
+            await self._unsubscribe(removed)
+        if added:
+            for account in added:
+                mint, kind = desired[account]
+                self.accounts[account] = MirroredAccount(mint=mint, kind=kind)
+            # 先订阅再读取快照，读取期间的变更不会丢失
+            await self._subscribe(added)
+            for account, (slot, data) in (await self._get_account_data(added)).items():
+                await self.update(account, slot, data)
+        if removed or added:
+            logger.info(
+                f"Pool state mirror: {len(self.accounts)} accounts, "
+                f"+{len(added)} -{len(removed)}"
+            )
+
+    async def _subscribe(self, accounts: list[Pubkey]) -> None:
+        if self._websocket is None:
+            return
+        config = RpcAccountInfoConfig(
+            encoding=UiAccountEncoding.Base64, commitment=CommitmentLevel.Processed
+        )
+        requests = []
+        for account in accounts:
+            request_id = self._websocket.increment_counter_and_get_id()
+            self._requests[request_id] = account
+            requests.append(AccountSubscribe(account, config, request_id))
+        # 一次发送所有订阅请求
+        await self._websocket.send_data(requests)
+
+    async def _unsubscribe(self, accounts: list[Pubkey]) -> None:
+        for account in accounts:
+            self.accounts.pop(account, None)
+            subscription = self._subscription_ids.pop(account, None)
+            if subscription is None:
+                continue
+            self._subscriptions.pop(subscription, None)
+            if self._websocket is not None:
+                await self._websocket.account_unsubscribe(subscription)
+        await self.store.delete(*accounts)
@@ -1,10 +1,12 @@
 import asyncio
 
+from solbot_common.config import settings
 from solbot_common.log import logger
 from solbot_db.redis import RedisClient
 
 from cache_preloader.caches.blockhash import BlockhashCache
 from cache_preloader.caches.min_balance_rent import MinBalanceRentCache
+from cache_preloader.caches.pool_state import PoolStateMirror
 from cache_preloader.core.protocols import AutoUpdateCacheProtocol
 
 
@@ -18,6 +20,8 @@ class AutoUpdateCacheService:
             MinBalanceRentCache(self.redis_client),
             # RaydiumPoolCache(settings.rpc.rpc_url, self.redis_client, 20),
         ]
+        if settings.pool_state.enable:
+            self.auto_update_caches.append(PoolStateMirror(self.redis_client))
         self._shutdown_event = asyncio.Event()
         self._main_task = None
 
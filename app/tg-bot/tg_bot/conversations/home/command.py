@@ -41,6 +41,7 @@ async def _start(message: types.Message):
             message.from_user.id,
             keypair,
         )
+        await user_service.notify_wallet_changed(wallet_address)
 
         # 生成默认配置
         await setting_service.create_default(
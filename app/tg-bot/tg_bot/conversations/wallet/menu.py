@@ -161,6 +161,9 @@ async def handle_new_private_key(message: Message, state: FSMContext):
                 chat_id=message.from_user.id,
                 wallet_address=new_keypair.pubkey().__str__(),
             )
+        # 事务提交后通知交易服务更新签名私钥
+        await user_service.notify_wallet_deleted(default_pubkey)
+        await user_service.notify_wallet_changed(new_keypair.pubkey().__str__())
     except Exception as e:
         logger.exception(e)
         await message.answer("导入新钱包私钥失败，请重试")
@@ -5,6 +5,7 @@ from aiogram import Bot
 from aiogram.types import LinkPreviewOptions
 from jinja2 import BaseLoader, Environment
 from solbot_cache.token_info import TokenInfoCache
+from solbot_common.cp.base import unique_consumer_name
 from solbot_common.cp.copytrade_event import NotifyCopyTradeConsumer
 from solbot_common.log import logger
 from solbot_common.types.swap import SwapEvent
@@ -56,8 +57,7 @@ class CopyTradeNotify:
         self.bot = bot
         self.consumer = NotifyCopyTradeConsumer(
             redis_client=redis,
-            consumer_group="copytrade_notify",
-            consumer_name="copytrade_notify",
+            consumer_name=unique_consumer_name("copytrade_notify"),
             batch_size=batch_size,
             poll_timeout_ms=poll_timeout_ms,
         )
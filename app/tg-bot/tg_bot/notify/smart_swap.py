@@ -12,6 +12,7 @@ import aioredis
 from aiogram import Bot
 from aiogram.enums import ParseMode
 from solbot_cache.token_info import TokenInfoCache
+from solbot_common.cp.base import unique_consumer_name
 from solbot_common.cp.tx_event import TxEventConsumer
 from solbot_common.log import logger
 from solbot_common.types import TxEvent, TxType
@@ -73,7 +74,7 @@ class SmartWalletSwapAlertNotify:
         self.consumer = TxEventConsumer(
             redis_client=redis,
             consumer_group="swap_notify",
-            consumer_name="swap_notify",
+            consumer_name=unique_consumer_name("swap_notify"),
             batch_size=batch_size,
             poll_timeout_ms=poll_timeout_ms,
         )
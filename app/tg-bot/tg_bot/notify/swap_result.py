@@ -6,6 +6,7 @@ from aiogram.enums import ParseMode
 from aiogram.types import LinkPreviewOptions
 from jinja2 import BaseLoader, Environment
 from solbot_cache.token_info import TokenInfoCache
+from solbot_common.cp.base import unique_consumer_name
 from solbot_common.cp.swap_result import SwapResultConsumer
 from solbot_common.log import logger
 from solbot_common.models.swap_record import TransactionStatus
@@ -65,7 +66,7 @@ class SwapResultNotify:
         self.consumer = SwapResultConsumer(
             redis_client=redis,
             consumer_group="swap_result_notify",
-            consumer_name="swap_result_notify",
+            consumer_name=unique_consumer_name("swap_result_notify"),
             batch_size=batch_size,
             poll_timeout_ms=poll_timeout_ms,
         )
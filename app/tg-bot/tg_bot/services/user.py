@@ -1,4 +1,7 @@
+from solbot_common.cp.user_events import UserEventProducer
+from solbot_common.log import logger
 from solbot_common.models.tg_bot.user import User as UserModel
+from solbot_db.redis import RedisClient
 from solbot_db.session import NEW_ASYNC_SESSION, provide_session
 from solders.keypair import Keypair  # type: ignore
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,6 +17,26 @@ class UserService:
             cls._instance = super().__new__(cls)
         return cls._instance
 
+    def __init__(self) -> None:
+        self.producer = UserEventProducer(RedisClient.get_instance())
+
+    async def notify_wallet_changed(self, pubkey: str) -> None:
+        """通知交易服务钱包已新增或启用，需在事务提交后调用
+
+        通知失败不影响钱包的变更，交易服务未命中时会从数据库读取私钥
+        """
+        try:
+            await self.producer.wallet_changed(pubkey)
+        except Exception as e:
+            logger.error(f"Failed to publish wallet changed event: {pubkey}, cause: {e}")
+
+    async def notify_wallet_deleted(self, pubkey: str) -> None:
+        """通知交易服务钱包已删除或停用，需在事务提交后调用"""
+        try:
+            await self.producer.wallet_deleted(pubkey)
+        except Exception as e:
+            logger.error(f"Failed to publish wallet deleted event: {pubkey}, cause: {e}")
+
     @provide_session
     async def register(
         self,
@@ -0,0 +1,40 @@
+"""交易事件审计
+
+以独立的消费组读取 swap_event:new，记录每一笔交易事件（用户发起和跟单）。
+审计消费组的积压不影响交易消费组的进度。
+"""
+
+import aioredis
+from solbot_common.cp.base import unique_consumer_name
+from solbot_common.cp.swap_event import AUDIT_GROUP, DEAD_LETTER_CHANNEL, SwapEventConsumer
+from solbot_common.log import logger
+from solbot_common.types.swap import SwapEvent
+
+
+class SwapEventAuditor:
+    def __init__(self, redis_client: aioredis.Redis):
+        self.consumer = SwapEventConsumer(
+            redis_client,
+            AUDIT_GROUP,
+            unique_consumer_name(AUDIT_GROUP),
+            max_concurrent_tasks=1,
+            dead_letter_channel=f"{DEAD_LETTER_CHANNEL}:{AUDIT_GROUP}",
+            # 审计不关心消息的新旧，积压的消息也要记录
+            max_process_time=None,
+        )
+        self.consumer.register_callback(self._audit)
+
+    async def _audit(self, swap_event: SwapEvent):
+        source = swap_event.tx_event.signature if swap_event.tx_event is not None else None
+        logger.info(
+            f"[audit] by={swap_event.by} user={swap_event.user_pubkey} "
+            f"{swap_event.swap_mode} {swap_event.input_mint} -> {swap_event.output_mint} "
+            f"amount={swap_event.amount} slippage_bps={swap_event.slippage_bps} "
+            f"source_tx={source} timestamp={swap_event.timestamp}"
+        )
+
+    async def start(self):
+        await self.consumer.start()
+
+    def stop(self):
+        self.consumer.stop()
@@ -4,17 +4,23 @@
 """
 
 import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from functools import partial
 from typing import Literal
 
+from solbot_cache.pool_state import PoolStateCache
+from solbot_common.config import settings
 from solbot_common.constants import SOL_DECIMAL, WSOL
-from solbot_common.cp.copytrade_event import NotifyCopyTradeProducer
+from solbot_common.cp.base import unique_consumer_name
 from solbot_common.cp.swap_event import SwapEventProducer
 from solbot_common.cp.tx_event import TxEventConsumer
 from solbot_common.log import logger
 from solbot_common.models.tg_bot.copytrade import CopyTrade
 from solbot_common.types.swap import SwapEvent
 from solbot_common.types.tx import TxEvent, TxType
-from solbot_common.utils import calculate_auto_slippage
+from solbot_common.utils import calculate_auto_slippage, slippage_bps_from_price_impact
+from solbot_common.utils.quote import quote_batch
 from solbot_db.redis import RedisClient
 from solbot_services.bot_setting import BotSettingService as SettingService
 from solbot_services.copytrade import CopyTradeService
@@ -27,6 +33,17 @@ IGNORED_MINTS = {
 }
 
 
+@dataclass
+class CopyTradeOrder:
+    """一个跟单者待发送的交易"""
+
+    copytrade: CopyTrade
+    amount: int
+    ui_amount: float
+    # None 表示自动滑点，发送前计算
+    slippage_bps: int | None
+
+
 class CopyTradeProcessor:
     """跟单交易"""
 
@@ -35,18 +52,23 @@ class CopyTradeProcessor:
         self.tx_event_consumer = TxEventConsumer(
             redis_client,
             "trading:tx_event",
-            "trading:new_swap_event",
+            unique_consumer_name("trading:new_swap_event"),
+            max_concurrent_tasks=settings.trading.copytrade_concurrency,
+            max_concurrency=settings.trading.copytrade_max_concurrency,
+            lag_threshold=settings.trading.copytrade_lag_threshold,
         )
         self.tx_event_consumer.register_callback(self._process_tx_event)
         self.copytrade_service = CopyTradeService()
         self.setting_service = SettingService()
         self.holding_service = HoldingService()
         self.swap_event_producer = SwapEventProducer(redis_client)
-        self.notify_copytrade_producer = NotifyCopyTradeProducer(redis_client)
+        self.pool_state = PoolStateCache(redis_client) if settings.pool_state.enable else None
 
     async def _process_tx_event(self, tx_event: TxEvent):
         """处理交易事件"""
         logger.info(f"Processing tx event: {tx_event}")
+        if tx_event.trace is not None:
+            tx_event.trace.stamp("tx_event_consumed")
         copytrade_items = await self.copytrade_service.get_by_target_wallet(tx_event.who)
         swap_mode = "ExactIn" if tx_event.tx_direction == "buy" else "ExactOut"
         # buy_pct = 0
@@ -74,37 +96,53 @@ class CopyTradeProcessor:
         program_id = tx_event.program_id
         timestamp = tx_event.timestamp
 
-        tasks = []
-        for copytrade in copytrade_items:
-            coro = self._process_copytrade(
+        if input_mint in IGNORED_MINTS or output_mint in IGNORED_MINTS:
+            logger.info(f"Skipping swap due to ignored mint: {input_mint} {output_mint}")
+            return
+
+        orders = await asyncio.gather(
+            *(
+                self._prepare_copytrade(
+                    swap_mode=swap_mode,
+                    tx_event=tx_event,
+                    sell_pct=sell_pct,
+                    copytrade=copytrade,
+                )
+                for copytrade in copytrade_items
+            )
+        )
+        produce = partial(
+            self._produce_copytrade,
+            swap_mode=swap_mode,
+            tx_event=tx_event,
+            program_id=program_id,
+            sell_pct=sell_pct,
+            input_mint=input_mint,
+            output_mint=output_mint,
+            timestamp=timestamp,
+        )
+        orders = [order for order in orders if order is not None]
+        # 固定滑点的跟单立即发送，不等待自动滑点的报价
+        await asyncio.gather(
+            *(produce(order=order) for order in orders if order.slippage_bps is not None),
+            self._produce_auto_slippage(
+                [order for order in orders if order.slippage_bps is None],
+                produce,
                 swap_mode=swap_mode,
                 tx_event=tx_event,
-                program_id=program_id,
-                sell_pct=sell_pct,
                 input_mint=input_mint,
                 output_mint=output_mint,
-                timestamp=timestamp,
-                copytrade=copytrade,
-            )
-            tasks.append(coro)
-
-        await asyncio.gather(*tasks)
+            ),
+        )
 
-    async def _process_copytrade(
+    async def _prepare_copytrade(
         self,
         swap_mode: Literal["ExactIn", "ExactOut"],
         tx_event: TxEvent,
-        program_id: str | None,
         sell_pct: float,
-        input_mint: str,
-        output_mint: str,
-        timestamp: int,
         copytrade: CopyTrade,
-    ):
-        if input_mint in IGNORED_MINTS or output_mint in IGNORED_MINTS:
-            logger.info(f"Skipping swap due to ignored mint: {input_mint} {output_mint}")
-            return
-
+    ) -> CopyTradeOrder | None:
+        """计算跟单的数量和滑点，自动滑点在所有跟单准备完成后计算"""
         try:
             # 根据不同的根据设置，创建不同的 swap_event
             setting = await self.setting_service.get(copytrade.chat_id, copytrade.owner)
@@ -130,30 +168,114 @@ class CopyTradeProcessor:
                     mint=tx_event.mint,
                     wallet=copytrade.owner,
                 )
-                if balance == 0:
+                if balance.balance == 0:
                     logger.info(f"No holdings for {tx_event.mint}, skip...")
-                    return
+                    return None
 
-                # 自动跟买跟卖
+                # 自动跟买跟卖，数量为最小单位
                 if copytrade.auto_follow:
-                    amount = int(int(balance.balance * balance.decimals) * sell_pct)
-                    ui_amount = amount / balance.decimals
+                    amount = int(balance.balance * 10**balance.decimals * sell_pct)
+                    ui_amount = amount / 10**balance.decimals
                 else:
                     logger.info("Not auto follow, skip...")
-                    return
+                    return None
 
             if copytrade.anti_sandwich:
                 slippage_bps = setting.sandwich_slippage_bps
             elif copytrade.auto_slippage is False:
                 slippage_bps = copytrade.custom_slippage_bps
             else:
-                slippage_bps = await calculate_auto_slippage(
+                slippage_bps = None
+            return CopyTradeOrder(
+                copytrade=copytrade, amount=amount, ui_amount=ui_amount, slippage_bps=slippage_bps
+            )
+        except Exception as e:
+            logger.exception(f"Failed to process copytrade: {e}")
+            # TODO: 通知到用户，跟单交易失败
+            return None
+
+    async def _produce_auto_slippage(
+        self,
+        orders: list[CopyTradeOrder],
+        produce: Callable[..., Awaitable[None]],
+        swap_mode: Literal["ExactIn", "ExactOut"],
+        tx_event: TxEvent,
+        input_mint: str,
+        output_mint: str,
+    ) -> None:
+        """计算自动滑点的跟单的滑点并发送
+
+        池子状态镜像中有储备快照时，在同一个快照上一次计算所有跟单的 price impact，
+        否则逐个请求 Jupiter 报价，每个跟单拿到报价后立即发送，不等待其他跟单。
+        """
+        if not orders:
+            return
+
+        impacts = None
+        if self.pool_state is not None:
+            try:
+                curve = await self.pool_state.get_curve(tx_event.mint)
+                if curve is not None:
+                    batch = quote_batch(
+                        curve, [order.amount for order in orders], tx_event.tx_direction
+                    )
+                    impacts = batch.price_impacts
+            except Exception as e:
+                logger.warning(f"Failed to quote {tx_event.mint} from pool state: {e}")
+
+        if impacts is not None:
+            for order, impact in zip(orders, impacts, strict=True):
+                order.slippage_bps = slippage_bps_from_price_impact(impact)
+            await asyncio.gather(*(produce(order=order) for order in orders))
+            return
+
+        await asyncio.gather(
+            *(
+                self._produce_jupiter_slippage(
+                    order,
+                    produce,
+                    swap_mode=swap_mode,
                     input_mint=input_mint,
                     output_mint=output_mint,
-                    amount=amount,
-                    swap_mode=swap_mode,
                 )
+                for order in orders
+            )
+        )
+
+    async def _produce_jupiter_slippage(
+        self,
+        order: CopyTradeOrder,
+        produce: Callable[..., Awaitable[None]],
+        swap_mode: Literal["ExactIn", "ExactOut"],
+        input_mint: str,
+        output_mint: str,
+    ) -> None:
+        """按 Jupiter 报价计算滑点后发送，报价失败的跟单被跳过"""
+        try:
+            order.slippage_bps = await calculate_auto_slippage(
+                input_mint=input_mint,
+                output_mint=output_mint,
+                amount=order.amount,
+                swap_mode=swap_mode,
+            )
+        except Exception as e:
+            logger.exception(f"Failed to process copytrade: {e}")
+            return
+        await produce(order=order)
 
+    async def _produce_copytrade(
+        self,
+        order: CopyTradeOrder,
+        swap_mode: Literal["ExactIn", "ExactOut"],
+        tx_event: TxEvent,
+        program_id: str | None,
+        sell_pct: float,
+        input_mint: str,
+        output_mint: str,
+        timestamp: int,
+    ):
+        copytrade = order.copytrade
+        try:
             if swap_mode == "ExactOut":
                 amount_pct = sell_pct
                 swap_in_type = "pct"
@@ -162,14 +284,23 @@ class CopyTradeProcessor:
                 swap_in_type = "qty"
 
             priority_fee = copytrade.priority
+            # 源交易的区块时间加上允许的延迟，超过后跟单不再执行
+            if swap_mode == "ExactIn":
+                max_delay = settings.trading.copytrade_buy_max_delay
+            else:
+                max_delay = settings.trading.copytrade_sell_max_delay
+            # 每个跟单独立记录后续环节
+            trace = tx_event.trace.fork() if tx_event.trace is not None else None
+            if trace is not None:
+                trace.stamp("swap_event_produced")
             swap_event = SwapEvent(
                 user_pubkey=copytrade.owner,
                 swap_mode=swap_mode,
                 input_mint=input_mint,
                 output_mint=output_mint,
-                amount=amount,
-                ui_amount=ui_amount,
-                slippage_bps=slippage_bps,
+                amount=order.amount,
+                ui_amount=order.ui_amount,
+                slippage_bps=order.slippage_bps,
                 timestamp=timestamp,
                 priority_fee=priority_fee,
                 program_id=program_id,
@@ -177,11 +308,11 @@ class CopyTradeProcessor:
                 swap_in_type=swap_in_type,
                 by="copytrade",
                 tx_event=tx_event,
+                trace=trace,
+                deadline=timestamp + max_delay,
             )
-            # PERF: 理论上,这两个 producer 是重复的
-            # 只需要在 consumer 处, 使用不同的消费组即可
+            # 交易和跟单通知以不同的消费组读取同一个 stream
             await self.swap_event_producer.produce(swap_event=swap_event)
-            await self.notify_copytrade_producer.produce(data=swap_event)
             logger.info(f"New Copy Trade: {swap_event}")
         except Exception as e:
             logger.exception(f"Failed to process copytrade: {e}")
@@ -194,3 +325,7 @@ class CopyTradeProcessor:
     def stop(self):
         """停止跟单交易"""
         self.tx_event_consumer.stop()
+
+    async def join(self):
+        """等待正在处理的交易事件处理完成"""
+        await self.tx_event_consumer.join()
@@ -3,13 +3,10 @@ from solbot_cache.launch import LaunchCache
 from solbot_common.config import settings
 from solbot_common.constants import PUMP_FUN_PROGRAM, RAY_V4
 from solbot_common.log import logger
-from solbot_common.models.tg_bot.user import User
 from solbot_common.types.swap import SwapEvent
-from solbot_db.session import NEW_ASYNC_SESSION, provide_session
-from solders.keypair import Keypair  # type: ignore
 from solders.signature import Signature  # type: ignore
-from sqlmodel import select
 
+from trading.keypair_vault import KeypairVault
 from trading.swap import SwapDirection, SwapInType
 from trading.transaction import TradingRoute, TradingService
 
@@ -22,14 +19,15 @@ class TradingExecutor:
         self._rpc_client = client
         self._launch_cache = LaunchCache()
         self._trading_service = TradingService(self._rpc_client)
+        # 签名私钥常驻内存，交易时不访问数据库
+        self.keypair_vault = KeypairVault(
+            seal=settings.trading.keypair_vault_seal,
+            reload_interval=settings.trading.keypair_vault_reload_interval,
+        )
 
-    @provide_session
-    async def __get_keypair(self, pubkey: str, *, session=NEW_ASYNC_SESSION) -> Keypair:
-        stmt = select(User.private_key).where(User.pubkey == pubkey).limit(1)
-        private_key = (await session.execute(stmt)).scalar_one_or_none()
-        if not private_key:
-            raise ValueError("Wallet not found")
-        return Keypair.from_bytes(private_key)
+    def get_build_latency(self) -> dict[str, dict[str, float]]:
+        """各路由构建交易的耗时统计（毫秒）"""
+        return self._trading_service.get_build_latency()
 
     async def exec(self, swap_event: SwapEvent) -> Signature | None:
         """执行交易
@@ -56,7 +54,7 @@ class TradingExecutor:
             raise ValueError("swap_mode must be ExactIn or ExactOut")
 
         sig = None
-        keypair = await self.__get_keypair(swap_event.user_pubkey)
+        keypair = await self.keypair_vault.get(swap_event.user_pubkey)
         swap_in_type = SwapInType(swap_event.swap_in_type)
 
         # 检查是否需要使用 Pump 协议进行交易
@@ -94,6 +92,9 @@ class TradingExecutor:
         else:
             raise ValueError(f"Program ID is not supported, {swap_event.program_id}")
 
+        if swap_event.trace is not None:
+            swap_event.trace.stamp("route_selected")
+
         sig = await self._trading_service.use_route(trade_route).swap(
             keypair,
             token_address,
@@ -103,6 +104,7 @@ class TradingExecutor:
             swap_in_type,
             use_jito=settings.trading.use_jito,
             priority_fee=swap_event.priority_fee,
+            trace=swap_event.trace,
         )
 
         return sig
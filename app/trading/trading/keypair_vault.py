@@ -0,0 +1,170 @@
+"""签名密钥缓存
+
+启动时从数据库加载所有启用钱包的私钥并保存在内存中，执行交易时不再访问数据库。
+钱包删除或停用时，tg-bot 发布用户钱包事件，缓存随之移除或重新加载对应的私钥。
+未命中（启动后新增的钱包）时回退到数据库查询启用的钱包，并写入缓存。
+用户钱包事件不持久化，错过的事件由定期重新加载补偿：每 reload_interval 秒
+按启用钱包重建缓存，已删除或停用的钱包随之移除。
+
+seal 为 True 时，私钥与进程启动时随机生成的密钥异或后保存，不以明文形式常驻内存，
+每次取出时还原为 Keypair。
+"""
+
+import asyncio
+import os
+from collections import Counter
+
+from solbot_common.cp.user_events import UserEventConsumer, UserEventType
+from solbot_common.log import logger
+from solbot_common.models.tg_bot.user import User
+from solbot_db.redis import RedisClient
+from solbot_db.session import NEW_ASYNC_SESSION, provide_session
+from solders.keypair import Keypair  # type: ignore
+from sqlmodel import select
+
+KEYPAIR_SIZE = 64
+
+
+class KeypairVault:
+    def __init__(self, seal: bool = False, reload_interval: float = 300) -> None:
+        """
+        Args:
+            seal: 是否以进程密钥异或后保存私钥
+            reload_interval: 重新加载全部私钥的间隔（秒），0 表示只在启动时加载
+        """
+        self.seal = seal
+        self.reload_interval = reload_interval
+        self._process_key = int.from_bytes(os.urandom(KEYPAIR_SIZE), "little") if seal else 0
+        # 钱包地址 -> Keypair（seal 时为异或后的私钥）
+        self._keys: dict[str, Keypair | bytes] = {}
+        self.stats: Counter[str] = Counter()
+        self._events: UserEventConsumer | None = None
+        self._running = False
+
+    def _xor(self, data: bytes) -> bytes:
+        return (int.from_bytes(data, "little") ^ self._process_key).to_bytes(KEYPAIR_SIZE, "little")
+
+    def _seal(self, private_key: bytes) -> tuple[Keypair, Keypair | bytes]:
+        keypair = Keypair.from_bytes(private_key)
+        return keypair, self._xor(private_key) if self.seal else keypair
+
+    def _store(self, pubkey: str, private_key: bytes) -> Keypair:
+        keypair, self._keys[pubkey] = self._seal(private_key)
+        return keypair
+
+    def _load(self, pubkey: str) -> Keypair | None:
+        value = self._keys.get(pubkey)
+        if value is None or isinstance(value, Keypair):
+            return value
+        return Keypair.from_bytes(self._xor(value))
+
+    async def load(self) -> int:
+        """按所有启用钱包的私钥重建缓存，返回加载的钱包数
+
+        不在启用钱包中的缓存（已删除或停用）被移除。
+        """
+        rows = await self._fetch_all()
+        keys = {pubkey: self._seal(private_key)[1] for pubkey, private_key in rows}
+        self.stats["removed"] += len(self._keys.keys() - keys.keys())
+        self._keys = keys
+        logger.info(f"Loaded {len(rows)} keypairs into vault")
+        return len(rows)
+
+    @provide_session
+    async def _fetch_all(self, *, session=NEW_ASYNC_SESSION) -> list[tuple[str, bytes]]:
+        stmt = select(User.pubkey, User.private_key).where(
+            User.is_active == True,
+            User.private_key.is_not(None),  # type: ignore
+        )
+        rows = (await session.execute(stmt)).all()
+        return [(pubkey, private_key) for pubkey, private_key in rows]
+
+    @provide_session
+    async def _fetch(self, pubkey: str, *, session=NEW_ASYNC_SESSION) -> bytes | None:
+        stmt = (
+            select(User.private_key)
+            .where(User.pubkey == pubkey, User.is_active == True)
+            .limit(1)
+        )
+        return (await session.execute(stmt)).scalar_one_or_none()
+
+    async def get(self, pubkey: str) -> Keypair:
+        """取出钱包的 Keypair，未命中时从数据库读取
+
+        Raises:
+            ValueError: 钱包不存在或已停用
+        """
+        keypair = self._load(pubkey)
+        if keypair is not None:
+            self.stats["hit"] += 1
+            return keypair
+
+        self.stats["miss"] += 1
+        private_key = await self._fetch(pubkey)
+        if not private_key:
+            raise ValueError("Wallet not found")
+        return self._store(pubkey, private_key)
+
+    async def refresh(self, pubkey: str) -> None:
+        """重新从数据库读取钱包的私钥，钱包不存在或已停用时移除"""
+        self.remove(pubkey)
+        await self._refresh(pubkey)
+
+    @provide_session
+    async def _refresh(self, pubkey: str, *, session=NEW_ASYNC_SESSION) -> None:
+        stmt = (
+            select(User.private_key)
+            .where(User.pubkey == pubkey, User.is_active == True)
+            .limit(1)
+        )
+        private_key = (await session.execute(stmt)).scalar_one_or_none()
+        if private_key:
+            self._store(pubkey, private_key)
+
+    def remove(self, pubkey: str) -> None:
+        if self._keys.pop(pubkey, None) is not None:
+            self.stats["removed"] += 1
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._keys),
+            "hit": self.stats["hit"],
+            "miss": self.stats["miss"],
+            "removed": self.stats["removed"],
+        }
+
+    async def start(self) -> None:
+        """加载私钥，并按用户钱包事件和 reload_interval 更新缓存，直到 stop 被调用"""
+        self._running = True
+        self._events = UserEventConsumer(RedisClient.get_instance())
+        # 先订阅再加载，加载期间发生的变更不会丢失
+        await self._events.subscribe()
+        await self.load()
+        loop = asyncio.get_running_loop()
+        loaded_at = loop.time()
+        try:
+            while self._running:
+                try:
+                    if self.reload_interval and loop.time() - loaded_at >= self.reload_interval:
+                        loaded_at = loop.time()
+                        await self.load()
+                    event = await self._events.get_event(timeout=0.5)
+                    if event is None:
+                        continue
+                    if event.event_type == UserEventType.DELETE:
+                        self.remove(event.pubkey)
+                    else:
+                        await self.refresh(event.pubkey)
+                    logger.info(f"Keypair vault updated by {event.event_type.value}: {event.pubkey}")
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logger.error(f"Error processing user event: {e}")
+        finally:
+            await self._events.unsubscribe()
+
+    def stop(self) -> None:
+        self._running = False
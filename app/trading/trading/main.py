@@ -3,17 +3,32 @@ import time
 
 import backoff
 import httpx
-from solbot_common.cp.swap_event import SwapEventConsumer
+from solbot_common.config import settings
+from solbot_common.cp.base import unique_consumer_name
+from solbot_common.cp.copytrade_event import NOTIFY_COPYTRADE_GROUP
+from solbot_common.cp.retention import RetentionReporter
+from solbot_common.cp.swap_event import (
+    AUDIT_GROUP,
+    DEAD_LETTER_CHANNEL,
+    SWAP_EVENT_CHANNEL,
+    TRADING_GROUP,
+    SwapEventConsumer,
+)
+from solbot_common.cp.swap_result import SWAP_EVENT_CHANNEL as SWAP_RESULT_CHANNEL
 from solbot_common.cp.swap_result import SwapResultProducer
+from solbot_common.cp.transport import get_transport
 from solbot_common.log import logger
 from solbot_common.prestart import pre_start
 from solbot_common.types.swap import SwapEvent, SwapResult
+from solbot_common.utils.latency import TraceRecorder
 from solbot_common.utils.utils import get_async_client
 from solbot_db.redis import RedisClient
 from solders.signature import Signature  # type: ignore
 
+from trading.audit import SwapEventAuditor
 from trading.copytrade import CopyTradeProcessor
 from trading.executor import TradingExecutor
+from trading.scheduler import DeadlineScheduler
 from trading.settlement import SwapSettlementProcessor
 
 import base64
@@ -36,39 +51,60 @@ class Trading:
         for i in range(self.num_consumers):
             consumer = SwapEventConsumer(
                 self.redis,
-                "trading:swap_event",
-                f"trading:new_swap_event:{i}",  # 为每个消费者创建唯一的名称
+                TRADING_GROUP,
+                # 为每个消费者创建唯一的名称，多个 Trading 副本之间也不重复
+                unique_consumer_name(f"trading:new_swap_event:{i}"),
             )
             consumer.register_callback(self._process_swap_event)
             self.swap_event_consumers.append(consumer)
 
         self.copytrade_processor = CopyTradeProcessor()
+        # 审计以独立的消费组读取交易事件，不影响交易消费组
+        self.auditor = SwapEventAuditor(self.redis) if settings.trading.swap_audit else None
 
         self.swap_result_producer = SwapResultProducer(self.redis)
-        # 添加任务池和信号量
-        self.task_pool = set()
+        # 定期裁剪交易事件相关的 stream（包括经脚本写入的死信队列），输出长度和内存占用
+        self.retention_reporter = RetentionReporter(get_transport(self.redis, settings.db.transport))
+        for stream in (
+            SWAP_EVENT_CHANNEL,
+            SWAP_RESULT_CHANNEL,
+            DEAD_LETTER_CHANNEL,
+            f"{DEAD_LETTER_CHANNEL}:{NOTIFY_COPYTRADE_GROUP}",
+            f"{DEAD_LETTER_CHANNEL}:{AUDIT_GROUP}",
+        ):
+            self.retention_reporter.add_stream(stream)
+        # 汇总跟单交易从链上事件到结算的各环节耗时
+        self.trace_recorder = TraceRecorder()
+        # 输出各路由构建交易耗时分位数的间隔（秒），0 表示不输出
+        self.report_interval = 60
+        self._last_report = time.monotonic()
+        # 交易事件按截止时间最早优先执行，过期的交易事件直接丢弃
         self.max_concurrent_tasks = 10
-        self.semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+        self.scheduler = DeadlineScheduler(
+            self._process_single_swap_event,
+            on_shed=self._record_failed_swap,
+            concurrency=self.max_concurrent_tasks,
+        )
 
     async def _process_single_swap_event(self, swap_event: SwapEvent):
         """处理单个交易事件的核心逻辑"""
-        async with self.semaphore:
-            logger.info(f"Processing swap event: {swap_event}")
-
-            try:
-                sig = await self._execute_swap(swap_event)
-                swap_result = await self._record_swap_result(sig, swap_event)
-                logger.info(f"Successfully processed swap event: {swap_event}")
-                return swap_result
-            except (httpx.ConnectTimeout, httpx.ConnectError):
-                logger.error("Connection error")
-                await self._record_failed_swap(swap_event)
-                return
-            except Exception as e:
-                logger.exception(f"Failed to process swap event: {swap_event}")
-                # 即使发生错误也要记录结果
-                await self._record_failed_swap(swap_event)
-                raise e
+        logger.info(f"Processing swap event: {swap_event}")
+
+        try:
+            sig = await self._execute_swap(swap_event)
+            self._maybe_report()
+            swap_result = await self._record_swap_result(sig, swap_event)
+            logger.info(f"Successfully processed swap event: {swap_event}")
+            return swap_result
+        except (httpx.ConnectTimeout, httpx.ConnectError):
+            logger.error("Connection error")
+            await self._record_failed_swap(swap_event)
+            return
+        except Exception as e:
+            logger.exception(f"Failed to process swap event: {swap_event}")
+            # 即使发生错误也要记录结果
+            await self._record_failed_swap(swap_event)
+            raise e
 
     @backoff.on_exception(
         backoff.expo,
@@ -98,6 +134,7 @@ class Trading:
             return await self._record_failed_swap(swap_event)
 
         swap_record = await self.swap_settlement_processor.process(sig, swap_event)
+        self._finish_trace(swap_event, "settled")
 
         swap_result = SwapResult(
             swap_event=swap_event,
@@ -118,6 +155,7 @@ class Trading:
         
     async def _record_failed_swap(self, swap_event: SwapEvent) -> SwapResult:
         """记录失败的交易结果"""
+        self._finish_trace(swap_event, "failed")
         swap_result = SwapResult(
             swap_event=swap_event,
             user_pubkey=swap_event.user_pubkey,
@@ -127,33 +165,72 @@ class Trading:
         await self.swap_result_producer.produce(swap_result)
         return swap_result
 
+    def _finish_trace(self, swap_event: SwapEvent, stage: str) -> None:
+        trace = swap_event.trace
+        # 结算后发送结果失败时会再次记录为失败，只记录一次
+        if trace is None or "settled" in trace.stamps or "failed" in trace.stamps:
+            return
+        trace.stamp(stage)
+        self.trace_recorder.record(trace)
+        logger.info(
+            f"Trace {trace.trace_id} ({trace.source}, slot {trace.slot}): "
+            f"{trace.breakdown()}, total: {trace.elapsed_ms()}ms"
+        )
+
+    def _maybe_report(self) -> None:
+        """定期输出各路由构建交易的耗时分位数，各环节耗时由 TraceRecorder 定期输出"""
+        if self.report_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        logger.info(f"Build latency: {self.trading_executor.get_build_latency()}")
+
+    def get_shed_stats(self) -> dict:
+        """调度的交易事件数，以及因超过截止时间被丢弃的交易事件数（按发起方统计）"""
+        return self.scheduler.get_stats()
+
     async def _process_swap_event(self, swap_event: SwapEvent):
-        """创建新的任务来处理交易事件"""
-        task = asyncio.create_task(self._process_single_swap_event(swap_event))
-        self.task_pool.add(task)
-        task.add_done_callback(self.task_pool.discard)
+        """按截止时间调度交易事件"""
+        if swap_event.trace is not None:
+            swap_event.trace.stamp("swap_event_consumed")
+        await self.scheduler.submit(swap_event)
 
     async def start(self):
+        self.scheduler.start()
         processor_task = asyncio.create_task(self.copytrade_processor.start())
         # 添加任务完成回调以处理可能的异常
         processor_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
         # 启动所有消费者
-        for consumer in self.swap_event_consumers:
-            await consumer.start()
+        consumers = [consumer.start() for consumer in self.swap_event_consumers]
+        if self.auditor is not None:
+            consumers.append(self.auditor.start())
+        await asyncio.gather(
+            *consumers,
+            self.retention_reporter.start(),
+            self.trading_executor.keypair_vault.start(),
+        )
 
     async def stop(self):
         """优雅关闭所有消费者"""
         # 停止跟单交易
         self.copytrade_processor.stop()
+        await self.copytrade_processor.join()
+        self.retention_reporter.stop()
+        self.trading_executor.keypair_vault.stop()
 
         # 停止所有消费者
         for consumer in self.swap_event_consumers:
             consumer.stop()
-
-        if self.task_pool:
-            logger.info("Waiting for remaining tasks to complete...")
-            await asyncio.gather(*self.task_pool, return_exceptions=True)
-        logger.info("All consumers stopped")
+        if self.auditor is not None:
+            self.auditor.stop()
+
+        logger.info("Waiting for remaining tasks to complete...")
+        await self.scheduler.join()
+        await self.scheduler.stop()
+        logger.info(f"All consumers stopped, scheduler stats: {self.get_shed_stats()}")
+        logger.info(f"Build latency: {self.trading_executor.get_build_latency()}")
 
 
 if __name__ == "__main__":
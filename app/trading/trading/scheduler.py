@@ -0,0 +1,110 @@
+"""交易事件调度
+
+交易事件按截止时间最早优先（EDF）执行：积压时先执行最紧迫的交易，
+已经超过截止时间的交易事件在发起任何 RPC 请求之前直接丢弃（shed）。
+晚到的跟单买入比不买更差，不如把执行机会留给还来得及的交易。
+"""
+
+import asyncio
+import itertools
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+
+from solbot_common.log import logger
+from solbot_common.types.swap import SwapEvent
+
+# 未指定截止时间的交易事件（用户发起）的处理时限，与交易事件 stream 的处理时限一致
+DEFAULT_TTL = 15  # s
+
+
+class DeadlineScheduler:
+    def __init__(
+        self,
+        handler: Callable[[SwapEvent], Awaitable],
+        on_shed: Callable[[SwapEvent], Awaitable] | None = None,
+        concurrency: int = 10,
+        default_ttl: float = DEFAULT_TTL,
+    ) -> None:
+        """
+        Args:
+            handler: 执行交易事件的函数
+            on_shed: 丢弃交易事件时调用，用于记录失败结果
+            concurrency: 同时执行的交易事件数
+            default_ttl: 未指定截止时间的交易事件，从 timestamp 起算的处理时限
+        """
+        self.handler = handler
+        self.on_shed = on_shed
+        self.concurrency = concurrency
+        self.default_ttl = default_ttl
+        self._queue: asyncio.PriorityQueue[tuple[float, int, SwapEvent]] = asyncio.PriorityQueue()
+        # 截止时间相同时按提交顺序执行
+        self._seq = itertools.count()
+        self._workers: list[asyncio.Task] = []
+        self.scheduled = 0
+        self.shed: Counter[str] = Counter()
+
+    def deadline_of(self, swap_event: SwapEvent) -> float:
+        if swap_event.deadline is not None:
+            return swap_event.deadline
+        return swap_event.timestamp + self.default_ttl
+
+    async def submit(self, swap_event: SwapEvent) -> bool:
+        """提交交易事件，已经过期的交易事件直接丢弃，返回是否进入队列"""
+        deadline = self.deadline_of(swap_event)
+        if time.time() > deadline:
+            await self._shed(swap_event, deadline)
+            return False
+        self._queue.put_nowait((deadline, next(self._seq), swap_event))
+        self.scheduled += 1
+        return True
+
+    async def _shed(self, swap_event: SwapEvent, deadline: float) -> None:
+        self.shed[swap_event.by] += 1
+        logger.warning(
+            f"Shedding swap event past deadline by {time.time() - deadline:.2f}s: "
+            f"by={swap_event.by} user={swap_event.user_pubkey} "
+            f"{swap_event.input_mint} -> {swap_event.output_mint}, shed: {dict(self.shed)}"
+        )
+        if self.on_shed is not None:
+            try:
+                await self.on_shed(swap_event)
+            except Exception:
+                logger.exception("Failed to record shed swap event")
+
+    async def _worker(self) -> None:
+        while True:
+            deadline, _, swap_event = await self._queue.get()
+            try:
+                # 等待期间过期的交易事件不再执行，避免无谓的 RPC 请求
+                if time.time() > deadline:
+                    await self._shed(swap_event, deadline)
+                else:
+                    await self.handler(swap_event)
+            except Exception:
+                logger.exception(f"Failed to handle swap event: {swap_event}")
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def join(self) -> None:
+        """等待队列中的交易事件处理完毕"""
+        await self._queue.join()
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_stats(self) -> dict:
+        return {
+            "scheduled": self.scheduled,
+            "queued": self._queue.qsize(),
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+        }
@@ -0,0 +1,79 @@
+"""构建交易时的账户读取
+
+构建交易需要读取的账户（bonding curve、用户的 ATA、池子的 vault）地址都可以在本地推导，
+彼此之间没有依赖。AccountBatch 把它们合并到一次 getMultipleAccounts 请求中，
+其他独立的查询（global account、mint、租金）通过 fan_out 与之并发执行，
+构建交易的 RPC 往返从依次等待变为一次。
+"""
+
+import asyncio
+from collections.abc import Awaitable
+from typing import Any
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Processed
+from solders.account import Account, AccountJSON  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+
+# getMultipleAccounts 单次最多读取的账户数
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+AccountMaybeJSON = Account | AccountJSON
+
+
+class AccountBatch:
+    """在一次 getMultipleAccounts 中读取多个账户
+
+    可解析的账户（SPL token 账户）返回 jsonParsed 格式，其他账户返回原始数据。
+    """
+
+    def __init__(self, rpc_client: AsyncClient, commitment: Commitment = Processed):
+        self.rpc_client = rpc_client
+        self.commitment = commitment
+        self._pubkeys: list[Pubkey] = []
+
+    def add(self, *pubkeys: Pubkey) -> "AccountBatch":
+        for pubkey in pubkeys:
+            if pubkey not in self._pubkeys:
+                self._pubkeys.append(pubkey)
+        return self
+
+    async def fetch(self) -> dict[Pubkey, AccountMaybeJSON | None]:
+        """读取所有账户，不存在的账户为 None"""
+        chunks = [
+            self._pubkeys[i : i + MAX_ACCOUNTS_PER_REQUEST]
+            for i in range(0, len(self._pubkeys), MAX_ACCOUNTS_PER_REQUEST)
+        ]
+        responses = await asyncio.gather(
+            *(
+                self.rpc_client.get_multiple_accounts_json_parsed(chunk, self.commitment)
+                for chunk in chunks
+            )
+        )
+        accounts: dict[Pubkey, AccountMaybeJSON | None] = {}
+        for chunk, response in zip(chunks, responses, strict=True):
+            accounts.update(zip(chunk, response.value, strict=True))
+        return accounts
+
+
+async def fan_out(*aws: Awaitable | None) -> list[Any]:
+    """并发执行互不依赖的查询，None 占位的查询结果为 None"""
+
+    async def _none() -> None:
+        return None
+
+    return list(await asyncio.gather(*(aw if aw is not None else _none() for aw in aws)))
+
+
+def account_bytes(account: AccountMaybeJSON) -> bytes:
+    """账户的原始数据，用于按 layout 解析"""
+    if isinstance(account, AccountJSON):
+        raise ValueError(f"Account owned by {account.owner} is returned as parsed json")
+    return bytes(account.data)
+
+
+def token_amount(account: AccountMaybeJSON) -> dict:
+    """SPL token 账户的 tokenAmount（amount、decimals、uiAmount）"""
+    if not isinstance(account, AccountJSON):
+        raise ValueError("Account is not a parsed token account")
+    return account.data.parsed["info"]["tokenAmount"]
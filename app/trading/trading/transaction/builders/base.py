@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 
 from solana.rpc.async_api import AsyncClient
 from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 
 from trading.swap import SwapDirection, SwapInType
@@ -41,3 +42,7 @@ class TransactionBuilder(ABC):
             VersionedTransaction: 构建好的交易
         """
         pass
+
+    def invalidate_template(self, owner: Pubkey, token_address: str) -> None:
+        """构建或发送交易失败后调用，缓存了指令模板的构建器在这里丢弃对应的模板"""
+        return None
@@ -1,11 +1,15 @@
-from solbot_cache import AccountAmountCache, MintAccountCache
+import struct
+from dataclasses import dataclass, field
+
+from solana.rpc.async_api import AsyncClient
+from solbot_cache import MintAccountCache
+from solbot_cache.pool_state import PoolStateCache
+from solbot_common.config import settings
 from solbot_common.constants import (
     ASSOCIATED_TOKEN_PROGRAM,
-    PUMP_BUY_METHOD,
     PUMP_FUN_ACCOUNT,
     PUMP_FUN_PROGRAM,
     PUMP_GLOBAL_ACCOUNT,
-    PUMP_SELL_METHOD,
     RENT_PROGRAM_ID,
     SOL_DECIMAL,
     SYSTEM_PROGRAM_ID,
@@ -13,28 +17,163 @@ from solbot_common.constants import (
     WSOL,
 )
 from solbot_common.IDL.pumpfun import PumpFunInterface
+from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
+from solbot_common.layouts.mint_account import MintAccount
 from solbot_common.log import logger
-from solbot_common.utils.utils import get_bonding_curve_account, get_global_account
+from solbot_common.utils.quote import PumpCurve
+from solbot_common.utils.utils import (
+    get_associated_bonding_curve,
+    get_bonding_curve_pda,
+    get_global_account,
+)
+from solbot_db.redis import RedisClient
+from solders.instruction import AccountMeta, Instruction  # type: ignore
 from solders.keypair import Keypair  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 from spl.token.instructions import (
     CloseAccountParams,
     close_account,
-    create_associated_token_account,
+    create_idempotent_associated_token_account,
     get_associated_token_address,
 )
 
 from trading.exceptions import BondingCurveNotFound
 from trading.swap import SwapDirection, SwapInType
+from trading.transaction.accounts import AccountBatch, account_bytes, fan_out, token_amount
+from trading.transaction.protocol import TradingRoute
+from trading.transaction.template import TemplateCache
 from trading.tx import build_transaction
-from trading.utils import has_ata, max_amount_with_slippage, min_amount_with_slippage
+from trading.utils import max_amount_with_slippage, min_amount_with_slippage
 
 from .base import TransactionBuilder
 
 
+@dataclass
+class PumpSwapTemplate:
+    bonding_curve: Pubkey
+    associated_bonding_curve: Pubkey
+    fee_recipient: Pubkey
+    # 用户的 token ATA
+    ata: Pubkey
+    # 全局账户中的交易手续费
+    fee_basis_points: int
+    # 交易方向 -> (指令 discriminator, 账户)，第一次构建该方向的指令时记录
+    swap_instructions: dict[str, tuple[bytes, list[AccountMeta]]] = field(default_factory=dict)
+
+
 # Reference: https://github.com/wisarmy/raytx/blob/main/src/pump.rs
 class PumpTransactionBuilder(TransactionBuilder):
+    def __init__(self, rpc_client: AsyncClient):
+        super().__init__(rpc_client)
+        self.templates: TemplateCache[PumpSwapTemplate] = TemplateCache(
+            TradingRoute.PUMP, ttl=settings.trading.swap_template_ttl
+        )
+        self.pool_state = (
+            PoolStateCache(RedisClient.get_instance()) if settings.pool_state.enable else None
+        )
+
+    def invalidate_template(self, owner: Pubkey, token_address: str) -> None:
+        self.templates.invalidate(owner, token_address)
+
+    async def _fetch_accounts(
+        self,
+        owner: Pubkey,
+        mint: Pubkey,
+        template: PumpSwapTemplate | None,
+        swap_direction: SwapDirection,
+        in_type: SwapInType | None,
+    ) -> tuple[PumpSwapTemplate, BondingCurveAccount, int, MintAccount | None]:
+        """读取构建交易需要的账户
+
+        bonding curve 和用户的 ATA 在一次 getMultipleAccounts 中读取，
+        没有模板时并发读取 global account，按数量卖出时并发读取 mint。
+        开启池子状态镜像时 bonding curve 优先从镜像读取，镜像过期时才通过 RPC 读取。
+
+        Returns:
+            模板、bonding curve、卖出时 ATA 中的 token 数量、mint
+        """
+        if template is None:
+            bonding_curve = get_bonding_curve_pda(mint, PUMP_FUN_PROGRAM)
+            ata = get_associated_token_address(owner=owner, mint=mint)
+        else:
+            bonding_curve, ata = template.bonding_curve, template.ata
+
+        bonding_curve_account = None
+        if self.pool_state is not None:
+            bonding_curve_account = await self.pool_state.get_bonding_curve(bonding_curve)
+
+        batch = AccountBatch(self.rpc_client)
+        if bonding_curve_account is None:
+            batch.add(bonding_curve)
+        # 买入总是以幂等的指令创建 ATA，只有卖出需要读取 ATA
+        if swap_direction == SwapDirection.Sell:
+            batch.add(ata)
+        is_sell_qty = swap_direction == SwapDirection.Sell and in_type == SwapInType.Qty
+        accounts, global_account, mint_account, _ = await fan_out(
+            batch.fetch(),
+            get_global_account(self.rpc_client, PUMP_FUN_PROGRAM) if template is None else None,
+            MintAccountCache().get_mint_account(mint) if is_sell_qty else None,
+            # 交易过的代币由镜像保持订阅
+            self.pool_state.track(mint) if self.pool_state and template is None else None,
+        )
+
+        if bonding_curve_account is None:
+            bonding_curve_info = accounts[bonding_curve]
+            if bonding_curve_info is None:
+                raise BondingCurveNotFound("bonding curve account not found")
+            bonding_curve_account = BondingCurveAccount.from_buffer(
+                account_bytes(bonding_curve_info)
+            )
+
+        if template is None:
+            if global_account is None:
+                raise ValueError("global account not found")
+            template = PumpSwapTemplate(
+                bonding_curve=bonding_curve,
+                associated_bonding_curve=get_associated_bonding_curve(bonding_curve, mint),
+                fee_recipient=global_account.fee_recipient,
+                fee_basis_points=global_account.fee_basis_points,
+                ata=ata,
+            )
+
+        in_amount = 0
+        if swap_direction == SwapDirection.Sell:
+            ata_info = accounts[ata]
+            if ata_info is None:
+                raise Exception("in_account not found")
+            in_amount = int(token_amount(ata_info)["amount"])
+        return template, bonding_curve_account, in_amount, mint_account
+
+    def _swap_instruction(
+        self,
+        keypair: Keypair,
+        template: PumpSwapTemplate,
+        swap_direction: SwapDirection,
+        token_amount: int,
+        sol_amount_threshold: int,
+        input_accounts: dict[str, Pubkey],
+    ) -> Instruction:
+        """有模板时只替换指令数据中的两个 u64 参数，不再解析 IDL"""
+        compiled = template.swap_instructions.get(swap_direction.value)
+        if compiled is not None:
+            discriminator, accounts = compiled
+            data = discriminator + struct.pack("<QQ", token_amount, sol_amount_threshold)
+            return Instruction(PUMP_FUN_PROGRAM, data, accounts)
+
+        pumpfun = PumpFunInterface(keypair, self.rpc_client)
+        pump_method = pumpfun.program.methods[swap_direction]
+        instruction = (
+            pump_method.args([token_amount, sol_amount_threshold])
+            .accounts(input_accounts)
+            .instruction()
+        )
+        template.swap_instructions[swap_direction.value] = (
+            bytes(instruction.data)[:8],
+            list(instruction.accounts),
+        )
+        return instruction
+
     async def build_swap_transaction(
         self,
         keypair: Keypair,
@@ -57,47 +196,37 @@ class PumpTransactionBuilder(TransactionBuilder):
         if swap_direction == SwapDirection.Buy:
             token_in = native_mint
             token_out = mint
-            pump_method = PUMP_BUY_METHOD
         elif swap_direction == SwapDirection.Sell:
             token_in = mint
             token_out = native_mint
-            pump_method = PUMP_SELL_METHOD
         else:
             raise ValueError("swap_direction must be buy or sell")
 
-        pump_program = PUMP_FUN_PROGRAM
-        result = await get_bonding_curve_account(self.rpc_client, mint, pump_program)
-        if result is None:
-            raise BondingCurveNotFound("bonding curve account not found")
-        bonding_curve, associated_bonding_curve, bonding_curve_account = result
-
-        global_account = await get_global_account(self.rpc_client, pump_program)
-        if global_account is None:
-            raise ValueError("global account not found")
+        template, bonding_curve_account, in_amount, in_mint = await self._fetch_accounts(
+            owner, mint, self.templates.get(owner, mint), swap_direction, in_type
+        )
 
-        fee_recipient = global_account.fee_recipient
+        if bonding_curve_account.complete:
+            # bonding curve 已完成，token 已迁移到 Raydium
+            self.templates.invalidate(owner, mint)
+            raise BondingCurveNotFound("bonding curve is complete")
 
-        in_ata = get_associated_token_address(owner=owner, mint=token_in)
-        out_ata = get_associated_token_address(owner=owner, mint=token_out)
+        bonding_curve = template.bonding_curve
+        associated_bonding_curve = template.associated_bonding_curve
+        fee_recipient = template.fee_recipient
+        in_ata = template.ata if token_in == mint else get_associated_token_address(owner, token_in)
+        out_ata = template.ata if token_out == mint else get_associated_token_address(owner, token_out)
 
         create_instruction = None
         close_instruction = None
         if swap_direction == SwapDirection.Buy:
-            # 如果 ata 账户不存在，需要创建
-            if not await has_ata(
-                self.rpc_client,
-                owner,
-                token_out,
-            ):
-                create_instruction = create_associated_token_account(owner, owner, token_out)
+            # 模板复用期间 ATA 可能被创建或关闭（例如全部卖出），总是使用幂等的指令创建
+            create_instruction = create_idempotent_associated_token_account(
+                owner, owner, token_out
+            )
 
             amount_specified = int(ui_amount * SOL_DECIMAL)
         elif swap_direction == SwapDirection.Sell:
-            in_amount = await AccountAmountCache().get_amount(in_ata)
-            in_mint = await MintAccountCache().get_mint_account(token_in)
-            if in_mint is None:
-                raise Exception("in_mint not found")
-
             if in_type == SwapInType.Pct:
                 amount_in_pct = min(ui_amount, 1)
                 if amount_in_pct < 0:
@@ -118,6 +247,8 @@ class PumpTransactionBuilder(TransactionBuilder):
                 else:
                     amount_specified = int(in_amount * amount_in_pct)
             elif in_type == SwapInType.Qty:
+                if in_mint is None:
+                    raise Exception("in_mint not found")
                 amount_specified = int(ui_amount * 10**in_mint.decimals)
             else:
                 raise Exception("in_type must be qty or pct")
@@ -130,15 +261,13 @@ class PumpTransactionBuilder(TransactionBuilder):
             / bonding_curve_account.virtual_token_reserves
             / 1000
         )
+        curve = PumpCurve.from_account(bonding_curve_account, template.fee_basis_points)
 
         if swap_direction == SwapDirection.Buy:
             max_sol_cost = max_amount_with_slippage(amount_specified, slippage_bps)
             sol_amount_threshold = max_sol_cost
-            token_amount = (
-                amount_specified
-                * bonding_curve_account.virtual_token_reserves
-                // bonding_curve_account.virtual_sol_reserves
-            )
+            # 扣除手续费后按 bonding curve 计算可买入的数量
+            token_amount = curve.amount_out(amount_specified, "buy")
             input_accounts = {
                 "fee_recipient": fee_recipient,
                 "mint": mint,
@@ -154,11 +283,7 @@ class PumpTransactionBuilder(TransactionBuilder):
                 "program": PUMP_FUN_PROGRAM,
             }
         elif swap_direction == SwapDirection.Sell:
-            sol_output = (
-                amount_specified
-                * bonding_curve_account.virtual_sol_reserves
-                // bonding_curve_account.virtual_token_reserves
-            )
+            sol_output = curve.amount_out(amount_specified, "sell")
             min_sol_cost = min_amount_with_slippage(sol_output, slippage_bps)
             sol_amount_threshold = min_sol_cost
             token_amount = amount_specified
@@ -183,12 +308,13 @@ class PumpTransactionBuilder(TransactionBuilder):
         )
 
         instructions = []
-        pumpfun = PumpFunInterface(keypair, self.rpc_client)
-        pump_method = pumpfun.program.methods[swap_direction]
-        build_swap_instruction = (
-            pump_method.args([token_amount, sol_amount_threshold])
-            .accounts(input_accounts)
-            .instruction()
+        build_swap_instruction = self._swap_instruction(
+            keypair,
+            template,
+            swap_direction,
+            token_amount,
+            sol_amount_threshold,
+            input_accounts,
         )
         logger.debug(f"Build swap input accounts: {input_accounts}")
 
@@ -207,6 +333,12 @@ class PumpTransactionBuilder(TransactionBuilder):
 
         logger.debug(f"Swap instructions: {instructions}")
 
+        if close_instruction is not None:
+            # 卖出全部后 ATA 被关闭
+            self.templates.invalidate(owner, mint)
+        else:
+            self.templates.put(owner, mint, template)
+
         return await build_transaction(
             keypair=keypair,
             instructions=instructions,
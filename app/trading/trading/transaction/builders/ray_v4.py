@@ -1,18 +1,20 @@
 import base64
 import os
+from dataclasses import dataclass
 
 from loguru import logger
+from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Processed
 from solana.rpc.types import TokenAccountOpts
 from solbot_cache import get_min_balance_rent
+from solbot_cache.pool_state import PoolStateCache
 from solbot_cache.rayidum import get_preferred_pool
+from solbot_common.config import settings
 from solbot_common.constants import ACCOUNT_LAYOUT_LEN, SOL_DECIMAL, TOKEN_PROGRAM_ID, WSOL
-from solbot_common.utils.pool import (
-    AmmV4PoolKeys,
-    get_amm_v4_reserves,
-    make_amm_v4_swap_instruction,
-)
-from solbot_common.utils.utils import get_associated_token_address, get_token_balance
+from solbot_common.utils.pool import AmmV4PoolKeys, make_amm_v4_swap_instruction
+from solbot_common.utils.quote import AmmV4Curve, min_amount_out
+from solbot_common.utils.utils import get_associated_token_address
+from solbot_db.redis import RedisClient
 from solders.instruction import Instruction  # type: ignore[reportMissingModuleSource]
 from solders.keypair import Keypair  # type: ignore[reportMissingModuleSource]
 from solders.pubkey import Pubkey  # type: ignore[reportMissingModuleSource]
@@ -25,17 +27,128 @@ from spl.token.instructions import (
     CloseAccountParams,  # type: ignore
     InitializeAccountParams,
     close_account,
-    create_associated_token_account,
+    create_idempotent_associated_token_account,
     initialize_account,
 )
 
 from trading.swap import SwapDirection, SwapInType
+from trading.transaction.accounts import AccountBatch, fan_out, token_amount
+from trading.transaction.protocol import TradingRoute
+from trading.transaction.template import TemplateCache
 from trading.tx import build_transaction
 
 from .base import TransactionBuilder
 
 
+@dataclass
+class RaydiumV4SwapTemplate:
+    pool_keys: AmmV4PoolKeys
+    token_mint: Pubkey
+    # 买入时接收代币的账户，优先使用用户已有的代币账户，否则为 ATA
+    token_account: Pubkey
+
+
 class RaydiumV4TransactionBuilder(TransactionBuilder):
+    def __init__(self, rpc_client: AsyncClient):
+        super().__init__(rpc_client)
+        self.templates: TemplateCache[RaydiumV4SwapTemplate] = TemplateCache(
+            TradingRoute.RAYDIUM_V4, ttl=settings.trading.swap_template_ttl
+        )
+        self.pool_state = (
+            PoolStateCache(RedisClient.get_instance()) if settings.pool_state.enable else None
+        )
+
+    def invalidate_template(self, owner: Pubkey, token_address: str) -> None:
+        self.templates.invalidate(owner, token_address)
+
+    async def _fetch_accounts(
+        self, owner: Pubkey, token_address: str, swap_direction: SwapDirection
+    ) -> tuple[RaydiumV4SwapTemplate, AmmV4Curve, float | None, int]:
+        """读取构建交易需要的账户
+
+        池子的两个 vault 和卖出时用户的 ATA 在一次 getMultipleAccounts 中读取，
+        并发读取租金豁免的最小余额，没有模板的买入同时查询用户已有的代币账户。
+        开启池子状态镜像时 vault 余额优先从镜像读取，镜像过期时才通过 RPC 读取。
+
+        Returns:
+            模板、池子储备量、卖出时的代币余额、租金豁免的最小余额
+        """
+        template = self.templates.get(owner, token_address)
+        if template is None:
+            # 获取池子信息，vault 地址依赖池子信息，需要先于其他查询完成
+            pool_data = await get_preferred_pool(token_address)
+            if pool_data is None:
+                raise ValueError(f"未找到代币 {token_address} 的交易池")
+
+            # 构建池子密钥
+            pool_keys = AmmV4PoolKeys.from_pool_data(
+                pool_id=pool_data["pool_id"],
+                amm_data=pool_data["amm_data"],
+                market_data=pool_data["market_data"],
+            )
+            # 确定代币铸币厂
+            token_mint = (
+                pool_keys.base_mint if pool_keys.base_mint != WSOL else pool_keys.quote_mint
+            )
+        else:
+            pool_keys = template.pool_keys
+            token_mint = template.token_mint
+
+        vault_amounts = None
+        if self.pool_state is not None:
+            vault_amounts = await self.pool_state.get_token_amounts(
+                pool_keys.quote_vault, pool_keys.base_vault
+            )
+
+        # 卖出总是从 ATA 卖出
+        ata = get_associated_token_address(owner, token_mint)
+        batch = AccountBatch(self.rpc_client)
+        if vault_amounts is None:
+            batch.add(pool_keys.quote_vault, pool_keys.base_vault)
+        if swap_direction == SwapDirection.Sell:
+            batch.add(ata)
+        lookup_token_accounts = template is None and swap_direction == SwapDirection.Buy
+        accounts, token_accounts, balance_needed, _ = await fan_out(
+            batch.fetch(),
+            self.rpc_client.get_token_accounts_by_owner(
+                owner, TokenAccountOpts(mint=token_mint), Processed
+            )
+            if lookup_token_accounts
+            else None,
+            get_min_balance_rent(),
+            # 交易过的代币由镜像保持订阅
+            self.pool_state.track(token_mint) if self.pool_state and template is None else None,
+        )
+
+        try:
+            if vault_amounts is None:
+                vault_amounts = [
+                    int(token_amount(accounts[vault])["amount"])  # type: ignore[arg-type]
+                    for vault in (pool_keys.quote_vault, pool_keys.base_vault)
+                ]
+            curve = AmmV4Curve.from_vault_amounts(pool_keys, *vault_amounts)
+        except Exception:
+            # 池子可能已经迁移或关闭
+            self.templates.invalidate(owner, token_address)
+            raise
+
+        if template is None:
+            token_account = ata
+            if token_accounts is not None and token_accounts.value:
+                token_account = token_accounts.value[0].pubkey
+                logger.info(f"找到现有代币账户: {token_account}")
+            template = RaydiumV4SwapTemplate(
+                pool_keys=pool_keys,
+                token_mint=token_mint,
+                token_account=token_account,
+            )
+            self.templates.put(owner, token_address, template)
+
+        token_balance = None
+        if swap_direction == SwapDirection.Sell and accounts[ata] is not None:
+            token_balance = token_amount(accounts[ata])["uiAmount"]
+        return template, curve, token_balance, balance_needed
+
     async def build_buy_instructions(
         self,
         payer_keypair: Keypair,
@@ -56,65 +169,33 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
         """
         logger.info(f"构建购买交易: {token_address}, SOL输入: {sol_in}, 滑点: {slippage_bps}bps")
 
-        # 获取池子信息
-        pool_data = await get_preferred_pool(token_address)
-        if pool_data is None:
-            raise ValueError(f"未找到代币 {token_address} 的交易池")
-
-        # 构建池子密钥
-        pool_keys = AmmV4PoolKeys.from_pool_data(
-            pool_id=pool_data["pool_id"],
-            amm_data=pool_data["amm_data"],
-            market_data=pool_data["market_data"],
+        owner = payer_keypair.pubkey()
+        template, curve, _, balance_needed = await self._fetch_accounts(
+            owner, token_address, SwapDirection.Buy
         )
-
-        # 确定代币铸币厂
-        token_mint = pool_keys.base_mint if pool_keys.base_mint != WSOL else pool_keys.quote_mint
+        pool_keys = template.pool_keys
 
         # 计算交易金额
         amount_in = int(sol_in * SOL_DECIMAL)
 
-        # 获取池子储备量
-        base_reserve, quote_reserve, token_decimal = await get_amm_v4_reserves(pool_keys)
-
-        # 计算预期输出量
-        # 这里使用简化的计算方法，实际应用中可能需要更复杂的计算
-        constant_product = base_reserve * quote_reserve
-        effective_sol_in = sol_in * (1 - (0.25 / 100))  # 考虑0.25%的交易费用
-        new_quote_reserve = quote_reserve + effective_sol_in
-        new_base_reserve = constant_product / new_quote_reserve
-        amount_out = base_reserve - new_base_reserve
-
-        # 应用滑点
-        slippage_adjustment = 1 - (slippage_bps / 10000)  # 转换bps为百分比
-        minimum_amount_out = int(amount_out * slippage_adjustment * (10**token_decimal))
+        # 按池子的手续费和恒定乘积计算预期输出量，并应用滑点
+        amount_out = curve.amount_out(amount_in, "buy")
+        minimum_amount_out = min_amount_out(amount_out, slippage_bps)
 
         logger.info(f"输入金额: {amount_in}, 最小输出金额: {minimum_amount_out}")
 
-        # 检查代币账户是否存在
-        token_account = None
-        token_accounts = await self.rpc_client.get_token_accounts_by_owner(
-            payer_keypair.pubkey(), TokenAccountOpts(mint=token_mint), Processed
-        )
-
+        token_account = template.token_account
         create_token_account_ix = None
-        if token_accounts.value:
-            token_account = token_accounts.value[0].pubkey
-            logger.info(f"找到现有代币账户: {token_account}")
-        else:
-            token_account = get_associated_token_address(payer_keypair.pubkey(), token_mint)
-            create_token_account_ix = create_associated_token_account(
-                payer_keypair.pubkey(), payer_keypair.pubkey(), token_mint
+        if token_account == get_associated_token_address(owner, template.token_mint):
+            # 模板复用期间 ATA 可能被创建或在其他地方关闭，总是使用幂等的指令创建
+            create_token_account_ix = create_idempotent_associated_token_account(
+                owner, owner, template.token_mint
             )
-            logger.info(f"创建新的关联代币账户: {token_account}")
 
         # 创建临时WSOL账户
         seed = base64.urlsafe_b64encode(os.urandom(24)).decode("utf-8")
         wsol_token_account = Pubkey.create_with_seed(payer_keypair.pubkey(), seed, TOKEN_PROGRAM_ID)
 
-        # 获取租金豁免所需的最小余额
-        balance_needed = await get_min_balance_rent()
-
         # 创建WSOL账户指令
         create_wsol_account_ix = create_account_with_seed(
             CreateAccountWithSeedParams(
@@ -205,26 +286,16 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
             f"构建卖出交易: {token_address}, 输入: {ui_amount}{in_type.value}, 滑点: {slippage_bps}bps"
         )
 
-        # 获取池子信息
-        pool_data = await get_preferred_pool(token_address)
-        if pool_data is None:
-            raise ValueError(f"未找到代币 {token_address} 的交易池")
-
-        # 构建池子密钥
-        pool_keys = AmmV4PoolKeys.from_pool_data(
-            pool_id=pool_data["pool_id"],
-            amm_data=pool_data["amm_data"],
-            market_data=pool_data["market_data"],
+        owner = payer_keypair.pubkey()
+        template, curve, token_balance, balance_needed = await self._fetch_accounts(
+            owner, token_address, SwapDirection.Sell
         )
-
-        # 确定代币铸币厂
-        token_mint = pool_keys.base_mint if pool_keys.base_mint != WSOL else pool_keys.quote_mint
+        pool_keys = template.pool_keys
+        token_mint = template.token_mint
 
         # 获取代币账户
-        token_account = get_associated_token_address(payer_keypair.pubkey(), token_mint)
+        token_account = get_associated_token_address(owner, token_mint)
 
-        # 获取代币余额
-        token_balance = await get_token_balance(token_account, self.rpc_client)
         if token_balance is None or token_balance == 0:
             raise ValueError(f"没有可用的代币余额: {token_mint}")
 
@@ -236,33 +307,23 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
             sell_amount = ui_amount
             logger.info(f"卖出数量: {sell_amount}")
 
-        # 获取池子储备量
-        base_reserve, quote_reserve, token_decimal = await get_amm_v4_reserves(pool_keys)
-
-        # 计算预期输出量
-        # 这里使用简化的计算方法，实际应用中可能需要更复杂的计算
-        constant_product = base_reserve * quote_reserve
-        effective_token_in = sell_amount * (1 - (0.25 / 100))  # 考虑0.25%的交易费用
-        new_base_reserve = base_reserve + effective_token_in
-        new_quote_reserve = constant_product / new_base_reserve
-        amount_out = quote_reserve - new_quote_reserve
-
-        # 应用滑点
-        slippage_adjustment = 1 - (slippage_bps / 10000)  # 转换bps为百分比
-        minimum_amount_out = int(amount_out * slippage_adjustment * SOL_DECIMAL)
-
         # 计算输入金额
+        if pool_keys.base_mint == token_mint:
+            token_decimal = pool_keys.base_decimals
+        else:
+            token_decimal = pool_keys.quote_decimals
         amount_in = int(sell_amount * (10**token_decimal))
 
+        # 按池子的手续费和恒定乘积计算预期输出量，并应用滑点
+        amount_out = curve.amount_out(amount_in, "sell")
+        minimum_amount_out = min_amount_out(amount_out, slippage_bps)
+
         logger.info(f"输入金额: {amount_in}, 最小输出金额: {minimum_amount_out}")
 
         # 创建临时WSOL账户
         seed = base64.urlsafe_b64encode(os.urandom(24)).decode("utf-8")
         wsol_token_account = Pubkey.create_with_seed(payer_keypair.pubkey(), seed, TOKEN_PROGRAM_ID)
 
-        # 获取租金豁免所需的最小余额
-        balance_needed = await get_min_balance_rent()
-
         # 创建WSOL账户指令
         create_wsol_account_ix = create_account_with_seed(
             CreateAccountWithSeedParams(
@@ -325,6 +386,8 @@ class RaydiumV4TransactionBuilder(TransactionBuilder):
                 )
             )
             instructions.append(close_token_account_ix)
+            # 代币账户关闭后模板失效
+            self.templates.invalidate(owner, token_address)
 
         return instructions
 
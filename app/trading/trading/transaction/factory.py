@@ -1,7 +1,10 @@
 import asyncio
+import time
 
 from solana.rpc.async_api import AsyncClient
 from solbot_common.log import logger
+from solbot_common.types.trace import TraceContext
+from solbot_common.utils.latency import LatencyHistogram
 from solders.keypair import Keypair  # type: ignore
 from solders.signature import Signature  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
@@ -24,10 +27,22 @@ from trading.transaction.sender import (
 class Swapper:
     """交换服务，协调交换的构建和执行"""
 
-    def __init__(self, builder: TransactionBuilder, sender: TransactionSender):
-        """初始化交换服务"""
+    def __init__(
+        self,
+        builder: TransactionBuilder,
+        sender: TransactionSender,
+        build_latency: LatencyHistogram | None = None,
+    ):
+        """初始化交换服务
+
+        Args:
+            builder (TransactionBuilder): 交易构建器
+            sender (TransactionSender): 交易发送器
+            build_latency (LatencyHistogram | None, optional): 记录构建交易耗时的直方图. Defaults to None.
+        """
         self.builder = builder
         self.sender = sender
+        self.build_latency = build_latency
 
     async def swap(
         self,
@@ -39,6 +54,7 @@ class Swapper:
         in_type: SwapInType | None = None,
         use_jito: bool = False,
         priority_fee: float | None = None,
+        trace: TraceContext | None = None,
     ) -> Signature | None:
         """执行代币交换操作
 
@@ -51,22 +67,35 @@ class Swapper:
             in_type (SwapInType | None, optional): 输入类型. Defaults to None.
             use_jito (bool, optional): 是否使用 Jito. Defaults to False.
             priority_fee (float | None, optional): 优先费用. Defaults to None.
+            trace (TraceContext | None, optional): 链路追踪，记录构建和发送完成的时间点. Defaults to None.
 
         Returns:
             Optional[Signature]: 交易签名，如果交易失败则返回 None
         """
-        transaction = await self.builder.build_swap_transaction(
-            keypair=keypair,
-            token_address=token_address,
-            ui_amount=ui_amount,
-            swap_direction=swap_direction,
-            slippage_bps=slippage_bps,
-            in_type=in_type,
-            use_jito=use_jito,
-            priority_fee=priority_fee,
-        )
-        logger.debug(f"Built swap transaction: {transaction}")
-        signature = await self.sender.send_transaction(transaction)
+        try:
+            start = time.perf_counter()
+            transaction = await self.builder.build_swap_transaction(
+                keypair=keypair,
+                token_address=token_address,
+                ui_amount=ui_amount,
+                swap_direction=swap_direction,
+                slippage_bps=slippage_bps,
+                in_type=in_type,
+                use_jito=use_jito,
+                priority_fee=priority_fee,
+            )
+            if self.build_latency is not None:
+                self.build_latency.record(time.perf_counter() - start)
+            logger.debug(f"Built swap transaction: {transaction}")
+            if trace is not None:
+                trace.stamp("built")
+            signature = await self.sender.send_transaction(transaction)
+        except Exception:
+            # 模板中的账户可能已经失效（池子迁移、ATA 被关闭），下次重新构建
+            self.builder.invalidate_template(keypair.pubkey(), token_address)
+            raise
+        if trace is not None:
+            trace.stamp("sent")
         logger.info(f"Transaction sent successfully: {signature}")
         return signature
 
@@ -195,6 +224,8 @@ class TradingService:
         self._gmgn_sender = GMGNTransactionSender(self._rpc_client)
         self._jito_sender = JitoTransactionSender(self._rpc_client)
         self.default_sender = DefaultTransactionSender(rpc_client)
+        # 路由 -> 构建交易的耗时（只统计构建成功的交易）
+        self.build_latency: dict[TradingRoute, LatencyHistogram] = {}
 
     def select_builder(self, route: TradingRoute) -> TransactionBuilder:
         if route == TradingRoute.PUMP:
@@ -220,4 +251,11 @@ class TradingService:
     def use_route(self, route: TradingRoute, use_jito: bool = False) -> Swapper:
         builder = self.select_builder(route)
         sender = self.select_sender(builder, use_jito)
-        return Swapper(builder, sender)
+        build_latency = self.build_latency.get(route)
+        if build_latency is None:
+            build_latency = self.build_latency[route] = LatencyHistogram()
+        return Swapper(builder, sender, build_latency)
+
+    def get_build_latency(self) -> dict[str, dict[str, float]]:
+        """各路由构建交易的耗时统计（毫秒）"""
+        return {route.value: hist.summary() for route, hist in self.build_latency.items()}
@@ -0,0 +1,81 @@
+"""交易指令模板
+
+同一用户对同一 token、同一路由的交易，用到的账户（池子密钥、bonding curve、ATA）和指令结构都不变，
+每次变化的只有数量、最小输出和 blockhash。模板缓存第一次构建时得到的指令骨架，之后的交易只需要
+填入这些值，省去重新查询池子、查询 ATA、推导 PDA 和解析 IDL 的开销。
+
+模板在以下情况失效：
+- 池子迁移：pump 的 bonding curve 已完成（迁移到 Raydium），或 Raydium 池子的储备量查询失败
+- ATA 关闭：卖出全部并关闭 ATA
+- 使用模板构建或发送交易失败
+- 超过 ttl
+"""
+
+import time
+from collections import Counter, OrderedDict
+from typing import Generic, TypeVar
+
+from solders.pubkey import Pubkey  # type: ignore
+
+from trading.transaction.protocol import TradingRoute
+
+T = TypeVar("T")
+
+TemplateKey = tuple[str, str, TradingRoute]
+
+
+class TemplateCache(Generic[T]):
+    """按 (user, mint, route) 缓存指令模板
+
+    Args:
+        route: 模板所属的交易路由
+        ttl: 模板的有效期（秒），0 表示不缓存
+        maxsize: 最多缓存的模板数，超出后淘汰最久未使用的模板
+    """
+
+    def __init__(self, route: TradingRoute, ttl: float = 300, maxsize: int = 10_000):
+        self.route = route
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # 键 -> (创建时间, 模板)
+        self._templates: OrderedDict[TemplateKey, tuple[float, T]] = OrderedDict()
+        self.stats: Counter[str] = Counter()
+
+    def _key(self, user: Pubkey | str, mint: Pubkey | str) -> TemplateKey:
+        return (str(user), str(mint), self.route)
+
+    def get(self, user: Pubkey | str, mint: Pubkey | str) -> T | None:
+        key = self._key(user, mint)
+        item = self._templates.get(key)
+        if item is None or time.monotonic() - item[0] >= self.ttl:
+            if item is not None:
+                del self._templates[key]
+            self.stats["miss"] += 1
+            return None
+        self._templates.move_to_end(key)
+        self.stats["hit"] += 1
+        return item[1]
+
+    def put(self, user: Pubkey | str, mint: Pubkey | str, template: T) -> None:
+        if self.ttl <= 0:
+            return
+        key = self._key(user, mint)
+        self._templates[key] = (time.monotonic(), template)
+        self._templates.move_to_end(key)
+        if len(self._templates) > self.maxsize:
+            self._templates.popitem(last=False)
+
+    def invalidate(self, user: Pubkey | str, mint: Pubkey | str) -> None:
+        if self._templates.pop(self._key(user, mint), None) is not None:
+            self.stats["invalidated"] += 1
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def get_stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._templates),
+            "hit": self.stats["hit"],
+            "miss": self.stats["miss"],
+            "invalidated": self.stats["invalidated"],
+        }
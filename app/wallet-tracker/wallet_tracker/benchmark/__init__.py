@@ -1,18 +1,26 @@
+from solbot_common.utils.latency import LatencyHistogram
+
 from .decorator import (
+    get_percentiles,
     init,
     record_block_time,
     show_timeline,
     with_fetch_tx,
     with_parse_tx,
+    with_produce_tx,
 )
-from .service import BenchmarkService, benchmark_service
+from .service import STAGES, BenchmarkService, benchmark_service
 
 __all__ = [
+    "STAGES",
     "BenchmarkService",
+    "LatencyHistogram",
     "benchmark_service",
+    "get_percentiles",
     "init",
     "record_block_time",
     "show_timeline",
     "with_fetch_tx",
     "with_parse_tx",
+    "with_produce_tx",
 ]
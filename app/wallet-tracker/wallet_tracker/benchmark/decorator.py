@@ -30,6 +30,18 @@ async def _mark_end_parse(tx_hash: str):
     return data
 
 
+async def _mark_start_produce(tx_hash: str):
+    data = {"tx_hash": tx_hash, "step": "tx_start_produce", "timestamp": time.time()}
+    await benchmark_service.add(data)
+    return data
+
+
+async def _mark_end_produce(tx_hash: str):
+    data = {"tx_hash": tx_hash, "step": "tx_end_produce", "timestamp": time.time()}
+    await benchmark_service.add(data)
+    return data
+
+
 async def init(tx_hash: str):
     await benchmark_service.add(
         {"tx_hash": tx_hash, "step": "tx_detected", "timestamp": time.time()}
@@ -60,14 +72,20 @@ async def show_timeline(tx_hash: str):
     # 解析耗时
     parse_elapsed = _calc_elapsed("tx_start_parse", "tx_end_parse")
 
+    # 发送交易事件耗时
+    produce_elapsed = _calc_elapsed("tx_start_produce", "tx_end_produce")
+
     # 总耗时
-    total_elapsed = _calc_elapsed("block_time", "tx_end_parse")
+    total_elapsed = _calc_elapsed("block_time", "tx_end_produce") or _calc_elapsed(
+        "block_time", "tx_end_parse"
+    )
 
     logger.info(
         f"\n Transaction: {tx_hash}"
         f"\n 发现交易耗时: {detect_elapsed}"
         f"\n 获取交易详情耗时: {fetch_tx_detail_elapsed}"
         f"\n 解析交易耗时: {parse_elapsed}"
+        f"\n 发送交易事件耗时: {produce_elapsed}"
         f"\n 总耗时: {total_elapsed}"
     )
 
@@ -100,3 +118,17 @@ async def with_parse_tx(tx_hash: str):
         logger.info(
             f"Parsing transaction: {tx_hash}, end_time: {end_time}, elapsed: {end_time - start_time}"
         )
+
+
+@asynccontextmanager
+async def with_produce_tx(tx_hash: str):
+    await _mark_start_produce(tx_hash)
+    try:
+        yield
+    finally:
+        await _mark_end_produce(tx_hash)
+
+
+def get_percentiles(percentiles: tuple[float, ...] = (50, 90, 99)) -> dict[str, dict[str, float]]:
+    """各阶段（detect/fetch/parse/produce/total）的延迟分位数（毫秒）"""
+    return benchmark_service.get_percentiles(percentiles)
@@ -1,46 +1,160 @@
-from asyncio.queues import Queue
+import time
+from asyncio.queues import Queue, QueueEmpty, QueueFull
+from collections import OrderedDict
 
 from solbot_common.log import logger
+from solbot_common.utils.latency import LatencyHistogram
 from solbot_db.redis import RedisClient
 
+# 阶段名 -> (开始标记, 结束标记)
+# detect/total 从出块时间开始，Geyser 交易没有出块时间（见 TransactionWorker），不计入这两个阶段
+STAGES: dict[str, tuple[str, str]] = {
+    "detect": ("block_time", "tx_detected"),
+    "fetch": ("tx_start_fetch", "tx_end_fetch"),
+    "parse": ("tx_start_parse", "tx_end_parse"),
+    "produce": ("tx_start_produce", "tx_end_produce"),
+    "total": ("block_time", "tx_end_produce"),
+}
+
 
 class BenchmarkService:
+    """记录交易在各个阶段的时间点
+
+    标记先放入有界队列，由 process 批量通过 pipeline 写入 Redis 并设置过期时间；
+    同时在进程内按阶段维护延迟直方图，可随时通过 get_percentiles 查询。
+
+    Args:
+        batch_size: 每次写入 Redis 的最大标记数
+        ttl: Redis 中时间线的过期时间（秒）
+        maxsize: 队列长度上限，队列满时丢弃标记
+        max_timelines: 进程内最多保留的交易时间线数量
+        report_interval: 输出各阶段延迟分位数的间隔（秒），0 表示不输出
+    """
+
     _instance: "BenchmarkService" = None  # type: ignore
 
-    def __new__(cls):
+    def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
-        self.q = Queue()
+    def __init__(
+        self,
+        batch_size: int = 256,
+        ttl: int = 3600,
+        maxsize: int = 10_000,
+        max_timelines: int = 10_000,
+        report_interval: float = 60,
+    ):
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+        self.q: Queue[dict] = Queue(maxsize)
         self.redis = None
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self.max_timelines = max_timelines
+        self.report_interval = report_interval
+        self.dropped = 0
+        self.timelines: OrderedDict[str, dict[str, float]] = OrderedDict()
+        self.histograms: dict[str, LatencyHistogram] = {
+            stage: LatencyHistogram() for stage in STAGES
+        }
+        self._last_report = time.monotonic()
 
     async def connect_redis(self):
         self.redis = await RedisClient.get_instance()
 
-    async def add(self, item):
-        await self.q.put(item)
+    def add_nowait(self, item: dict) -> None:
+        try:
+            self.q.put_nowait(item)
+        except QueueFull:
+            self.dropped += 1
+
+    async def add(self, item: dict):
+        # 标记不能阻塞交易处理流程，队列满时直接丢弃
+        self.add_nowait(item)
+
+    def _drain(self, first: dict) -> list[dict]:
+        items = [first]
+        while len(items) < self.batch_size:
+            try:
+                items.append(self.q.get_nowait())
+            except QueueEmpty:
+                break
+        return items
+
+    def observe(self, tx_hash: str, step: str, timestamp: float) -> None:
+        """更新进程内的时间线，阶段完成时记录到直方图"""
+        timeline = self.timelines.get(tx_hash)
+        if timeline is None:
+            timeline = self.timelines[tx_hash] = {}
+            if len(self.timelines) > self.max_timelines:
+                self.timelines.popitem(last=False)
+        timeline[step] = timestamp
+
+        for stage, (start, end) in STAGES.items():
+            if step not in (start, end):
+                continue
+            if start in timeline and end in timeline:
+                self.histograms[stage].record(timeline[end] - timeline[start])
+
+    async def _flush(self, items: list[dict]) -> None:
+        timelines: dict[str, dict[str, str]] = {}
+        for item in items:
+            tx_hash = item.get("tx_hash")
+            step = item.get("step")
+            timestamp = item.get("timestamp")
+            if not (tx_hash and step and timestamp):
+                continue
+            self.observe(tx_hash, step, float(timestamp))
+            timelines.setdefault(tx_hash, {})[step] = str(timestamp)
+
+        if not timelines or self.redis is None:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for tx_hash, mapping in timelines.items():
+            key = f"benchmark:{tx_hash}"
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.ttl)
+        await pipe.execute()
 
     async def process(self):
         while True:
             try:
                 assert self.redis is not None, "Redis is not connected"
-                await self.redis.ping()
             except AssertionError:
                 await self.connect_redis()
 
+            item = await self.q.get()
+            items = self._drain(item)
             try:
-                item = await self.q.get()
-                if isinstance(item, dict) and self.redis is not None:
-                    tx_hash = item.get("tx_hash")
-                    step = item.get("step")
-                    timestamp = item.get("timestamp")
-                    if tx_hash and step and timestamp:
-                        await self.redis.hset(f"benchmark:{tx_hash}", step, str(timestamp))
-                self.q.task_done()
+                await self._flush(items)
             except Exception as e:
-                logger.error(f"Error processing item: {e}")
+                logger.error(f"Error processing benchmark items: {e}")
+            finally:
+                for _ in items:
+                    self.q.task_done()
+            self._maybe_report()
+
+    def _maybe_report(self) -> None:
+        if self.report_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        logger.info(f"Benchmark latency: {self.get_percentiles()}, dropped: {self.dropped}")
+
+    def get_percentiles(
+        self, percentiles: tuple[float, ...] = (50, 90, 99)
+    ) -> dict[str, dict[str, float]]:
+        """返回各阶段的延迟统计（毫秒）"""
+        return {stage: hist.summary(percentiles) for stage, hist in self.histograms.items()}
+
+    def reset_histograms(self) -> None:
+        for hist in self.histograms.values():
+            hist.reset()
 
     async def start(self):
         await self.connect_redis()
@@ -51,6 +165,9 @@ class BenchmarkService:
 
     async def get_timeline(self, tx_hash: str) -> dict:
         """Get the timeline of a transaction's processing steps"""
+        timeline = self.timelines.get(tx_hash)
+        if timeline is not None:
+            return {step: str(timestamp) for step, timestamp in timeline.items()}
         if self.redis is None:
             await self.connect_redis()
         assert self.redis is not None, "Redis is not connected"
@@ -59,6 +176,7 @@ class BenchmarkService:
 
     async def clear_timeline(self, tx_hash: str):
         """Clear the timeline data for a specific transaction"""
+        self.timelines.pop(tx_hash, None)
         if self.redis is None:
             await self.connect_redis()
         assert self.redis is not None, "Redis is not connected"
@@ -9,3 +9,5 @@ FAILED_TX_DETAIL_CHANNEL = "tx_detail:failed"
 
 NEW_TX_EVENT_CHANNEL = "tx_event:new"
 FAILED_TX_EVENT_CHANNEL = "tx_event:failed"
+
+GEYSER_SLOT_CHECKPOINT_KEY = "geyser:last_slot"
@@ -0,0 +1,155 @@
+"""Geyser 断线期间的交易补齐
+
+当前使用的 Geyser 协议不支持 `from_slot` 重放，重连后通过
+`getSignaturesForAddress` 查询每个跟踪钱包在检查点之后的交易签名，
+再通过 RPC 获取交易详情补齐处理。
+
+补齐和实时订阅可能同时收到同一笔交易，两条路径共用 SignatureDeduper 去重。
+检查点落后当前 slot 超过 max_slot_gap 时（例如长时间停机后重启）不补齐：
+这些交易早已超出下游的签名去重窗口，重放会再次触发跟单和通知。
+"""
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+
+from solana.rpc.async_api import AsyncClient
+from solbot_common.config import settings
+from solbot_common.log import logger
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+
+from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher
+
+
+class SignatureDeduper:
+    """基于 LRU 的交易签名去重，只保留最近的 `maxsize` 个签名"""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._signatures: OrderedDict[str, None] = OrderedDict()
+
+    def __contains__(self, signature: str) -> bool:
+        return signature in self._signatures
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, signature: str) -> bool:
+        """记录签名，返回该签名是否是第一次出现"""
+        if signature in self._signatures:
+            return False
+        self._signatures[signature] = None
+        if len(self._signatures) > self.maxsize:
+            self._signatures.popitem(last=False)
+        return True
+
+
+class GapBackfiller:
+    """补齐检查点之后错过的交易
+
+    Args:
+        deduper: 与实时订阅共用的签名去重器
+        rpc_client: 用于查询签名的 RPC 客户端
+        fetch: 获取交易详情的函数
+        max_signatures: 每个钱包最多补齐的交易数
+        concurrency: 同时获取交易详情的最大请求数
+        max_slot_gap: 当前 slot 与检查点的最大差值，超过时不补齐，为 0 时不限制
+    """
+
+    def __init__(
+        self,
+        deduper: SignatureDeduper,
+        rpc_client: AsyncClient | None = None,
+        fetch: Callable[[Signature], Awaitable[dict | None]] | None = None,
+        max_signatures: int = 100,
+        concurrency: int = 8,
+        max_slot_gap: int = 9000,
+    ):
+        self.deduper = deduper
+        self.rpc_client = rpc_client or AsyncClient(settings.rpc.rpc_url)
+        self.fetch = fetch or TxDetailRawFetcher(settings.rpc.rpc_url).fetch
+        self.max_signatures = max_signatures
+        self.concurrency = concurrency
+        self.max_slot_gap = max_slot_gap
+
+    async def collect_signatures(self, wallet: Pubkey, from_slot: int) -> list[tuple[int, str]]:
+        """查询钱包在 `from_slot` 之后（不含）成功的交易签名"""
+        signatures: list[tuple[int, str]] = []
+        before: Signature | None = None
+        while len(signatures) < self.max_signatures:
+            resp = await self.rpc_client.get_signatures_for_address(
+                wallet,
+                before=before,
+                limit=min(self.max_signatures, 1000),
+                commitment=settings.rpc.commitment,
+            )
+            infos = resp.value
+            if not infos:
+                break
+            for info in infos:
+                if info.slot <= from_slot:
+                    return signatures
+                if info.err is None:
+                    signatures.append((info.slot, str(info.signature)))
+            before = infos[-1].signature
+        return signatures[: self.max_signatures]
+
+    async def backfill(
+        self,
+        wallets: Iterable[str],
+        from_slot: int,
+        process: Callable[[dict], Awaitable[None]],
+    ) -> int:
+        """补齐所有钱包在 `from_slot` 之后的交易，返回补齐的交易数
+
+        交易按 slot 从旧到新处理，已经处理过的签名会被跳过。
+        `process` 需要将签名记录到去重器中（与实时订阅的处理函数相同）。
+        """
+        if self.max_slot_gap > 0:
+            current_slot = (await self.rpc_client.get_slot(settings.rpc.commitment)).value
+            if current_slot - from_slot > self.max_slot_gap:
+                logger.warning(
+                    f"Skip backfill: checkpoint slot {from_slot} is {current_slot - from_slot} "
+                    f"slots behind {current_slot}, more than {self.max_slot_gap}"
+                )
+                return 0
+        wallets = list(wallets)
+        results = await asyncio.gather(
+            *(self.collect_signatures(Pubkey.from_string(w), from_slot) for w in wallets),
+            return_exceptions=True,
+        )
+        pending: dict[str, int] = {}
+        for wallet, result in zip(wallets, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to collect signatures for {wallet}: {result}")
+                continue
+            for slot, signature in result:
+                if signature not in self.deduper:
+                    pending[signature] = slot
+
+        if not pending:
+            return 0
+        logger.info(f"Backfilling {len(pending)} transactions from slot {from_slot}")
+
+        # 并发获取交易详情，按 slot 顺序处理
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _fetch(signature: str) -> dict | None:
+            async with semaphore:
+                return await self.fetch(Signature.from_string(signature))
+
+        ordered = sorted(pending, key=pending.__getitem__)
+        tx_details = await asyncio.gather(*(_fetch(s) for s in ordered), return_exceptions=True)
+
+        count = 0
+        for signature, tx_detail in zip(ordered, tx_details, strict=True):
+            if isinstance(tx_detail, BaseException) or tx_detail is None:
+                logger.error(f"Failed to fetch backfill transaction {signature}: {tx_detail}")
+                continue
+            # 获取详情期间实时订阅可能已经处理了该交易
+            if signature in self.deduper:
+                continue
+            await process(tx_detail)
+            count += 1
+        return count
@@ -0,0 +1,66 @@
+"""Geyser 处理进度检查点
+
+记录已处理的最大 slot 并定期持久化到 Redis，断线重连或进程重启后
+从该 slot 开始补齐期间错过的交易。
+"""
+
+import asyncio
+
+import aioredis
+from solbot_common.log import logger
+
+from wallet_tracker.constants import GEYSER_SLOT_CHECKPOINT_KEY
+
+
+class SlotCheckpoint:
+    """已处理 slot 的检查点
+
+    更新只修改内存中的值，由 `run` 定期写入 Redis，避免每笔交易一次 Redis 请求。
+
+    Args:
+        redis: Redis 客户端
+        key: 检查点在 Redis 中的 key
+        flush_interval: 持久化间隔（秒）
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        key: str = GEYSER_SLOT_CHECKPOINT_KEY,
+        flush_interval: float = 1.0,
+    ):
+        self.redis = redis
+        self.key = key
+        self.flush_interval = flush_interval
+        self.slot: int | None = None
+        self._flushed_slot: int | None = None
+
+    async def load(self) -> int | None:
+        """从 Redis 读取上次持久化的 slot"""
+        value = await self.redis.get(self.key)
+        if value is not None:
+            self.slot = int(value)
+            self._flushed_slot = self.slot
+        return self.slot
+
+    def update(self, slot: int) -> None:
+        if self.slot is None or slot > self.slot:
+            self.slot = slot
+
+    async def flush(self) -> None:
+        if self.slot is None or self.slot == self._flushed_slot:
+            return
+        slot = self.slot
+        await self.redis.set(self.key, slot)
+        self._flushed_slot = slot
+
+    async def run(self) -> None:
+        """定期持久化检查点"""
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Failed to flush slot checkpoint: {e}")
@@ -0,0 +1,87 @@
+"""Geyser 响应解码进程池
+
+protobuf 反序列化和 base58 编码都是 CPU 密集型操作，在事件循环中执行时，
+多个响应处理协程实际上是串行的，并且会阻塞 gRPC 读取。
+
+DecodePool 将原始的 SubscribeUpdate 字节交给子进程解码，只把精简后的交易详情
+传回主进程，使解码吞吐量随 CPU 核数扩展。
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from solbot_common.log import logger
+from yellowstone_grpc.grpc import geyser_pb2
+
+from wallet_tracker.geyser.decoder import decode_transaction
+
+
+def decode_update(raw: bytes) -> dict | None:
+    """在子进程中执行：解码原始 SubscribeUpdate，非交易更新返回 None"""
+    update = geyser_pb2.SubscribeUpdate.FromString(raw)
+    if update.WhichOneof("update_oneof") != "transaction":
+        return None
+    return decode_transaction(update.transaction)
+
+
+class DecodePool:
+    """基于进程池的解码阶段
+
+    Args:
+        max_workers: 解码进程数
+        max_in_flight: 同时提交给进程池的最大任务数
+    """
+
+    def __init__(self, max_workers: int, max_in_flight: int):
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self._executor: ProcessPoolExecutor | None = None
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        # 统计信息
+        self.in_flight = 0
+        self.decoded = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info(
+                f"Decode pool started, workers: {self.max_workers}, max in flight: {self.max_in_flight}"
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("Decode pool stopped")
+
+    async def decode(self, raw: bytes) -> dict | None:
+        """解码原始响应，超出在途上限时等待"""
+        if self._executor is None:
+            raise RuntimeError("Decode pool is not started")
+
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                tx_detail = await loop.run_in_executor(self._executor, decode_update, raw)
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+        if tx_detail is None:
+            self.skipped += 1
+        else:
+            self.decoded += 1
+        return tx_detail
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "decoded": self.decoded,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
@@ -0,0 +1,92 @@
+"""Geyser 交易解码
+
+直接读取 SubscribeUpdateTransaction 中解析所需的字段（签名者、SOL 余额、
+token 余额、日志），构建与 RPC getTransaction 返回结构一致的精简 dict，
+交由 RawTXParser 解析。
+
+相比 proto -> JSON -> dict 的方式，这里只对签名和签名者做 base58 编码，
+其余 bytes 字段（账户列表、指令数据等）都不做转换。
+"""
+
+import time
+
+import base58
+from yellowstone_grpc.grpc import geyser_pb2
+
+from wallet_tracker.prefilter import SwapPrefilter
+
+
+def _encode(value: bytes) -> str:
+    return base58.b58encode(value).decode("utf-8")
+
+
+def _token_balances(token_balances) -> list[dict]:
+    return [
+        {
+            "accountIndex": token_balance.account_index,
+            "mint": token_balance.mint,
+            "owner": token_balance.owner,
+            "programId": token_balance.program_id,
+            "uiTokenAmount": {
+                "amount": token_balance.ui_token_amount.amount,
+                "decimals": token_balance.ui_token_amount.decimals,
+            },
+        }
+        for token_balance in token_balances
+    ]
+
+
+def decode_transaction(update: geyser_pb2.SubscribeUpdateTransaction) -> dict:
+    """将 Geyser 交易更新解码为精简的 RPC 交易结构
+
+    `accountKeys` 只包含签名者（第一个账户），这是 RawTXParser 唯一使用的账户。
+
+    Args:
+        update: Geyser 推送的交易更新
+
+    Returns:
+        dict: 与 RPC getTransaction 返回结构一致的精简交易详情
+    """
+    info = update.transaction
+    meta = info.meta
+    account_keys = info.transaction.message.account_keys
+    signer = _encode(account_keys[0]) if account_keys else ""
+
+    return {
+        "slot": update.slot,
+        "version": 0,
+        # 只有被确认之后才会有 blockTime, 所以这里设置为当前时间
+        "blockTime": int(time.time()),
+        "transaction": {
+            "signatures": [_encode(info.signature)],
+            "message": {"accountKeys": [signer]},
+        },
+        "meta": {
+            "err": _encode(meta.err.err) if meta.HasField("err") else None,
+            "preBalances": list(meta.pre_balances),
+            "postBalances": list(meta.post_balances),
+            "preTokenBalances": _token_balances(meta.pre_token_balances),
+            "postTokenBalances": _token_balances(meta.post_token_balances),
+            "logMessages": list(meta.log_messages),
+        },
+    }
+
+
+def prefilter_transaction(
+    prefilter: SwapPrefilter, update: geyser_pb2.SubscribeUpdateTransaction
+) -> bool:
+    """在解码之前直接用 protobuf 字段做预过滤，返回交易是否需要继续处理"""
+    info = update.transaction
+    meta = info.meta
+    if len(meta.pre_token_balances) == 0 or len(meta.post_token_balances) == 0:
+        return prefilter.check("", [], [], ())
+
+    account_keys = info.transaction.message.account_keys
+    signer = _encode(account_keys[0]) if account_keys else ""
+    pre_balances = [
+        (b.owner, b.mint, b.program_id, b.ui_token_amount.amount) for b in meta.pre_token_balances
+    ]
+    post_balances = [
+        (b.owner, b.mint, b.program_id, b.ui_token_amount.amount) for b in meta.post_token_balances
+    ]
+    return prefilter.check(signer, pre_balances, post_balances, meta.log_messages)
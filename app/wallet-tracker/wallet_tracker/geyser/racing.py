@@ -0,0 +1,76 @@
+"""多节点 Geyser 订阅的首达去重
+
+同一笔交易会从每个节点各到达一次，只处理第一次到达的交易，
+并统计每个节点领先其他节点的时间，用于评估各节点的延迟。
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass
+class EndpointStats:
+    # 收到的交易数
+    received: int = 0
+    # 首先到达的交易数
+    first: int = 0
+    # 首先到达时领先后续节点的时间（秒）
+    lead_total: float = 0.0
+    lead_count: int = 0
+    lead_max: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "first": self.first,
+            "first_ratio": round(self.first / self.received, 4) if self.received else 0.0,
+            "avg_lead_ms": round(self.lead_total / self.lead_count * 1000, 2)
+            if self.lead_count
+            else 0.0,
+            "max_lead_ms": round(self.lead_max * 1000, 2),
+        }
+
+
+class ArrivalTracker:
+    """记录每个签名第一次到达的节点和时间
+
+    Args:
+        maxsize: 最多记录的签名数，超出后淘汰最早的签名
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._first: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.stats: dict[str, EndpointStats] = {}
+
+    def arrive(self, signature: str, endpoint: str, arrived_at: float) -> bool:
+        """记录一次到达，返回该签名是否是第一次被记录（即是否需要处理）"""
+        stats = self.stats.setdefault(endpoint, EndpointStats())
+        stats.received += 1
+
+        first = self._first.get(signature)
+        if first is None:
+            stats.first += 1
+            self._first[signature] = (endpoint, arrived_at)
+            if len(self._first) > self.maxsize:
+                self._first.popitem(last=False)
+            return True
+
+        first_endpoint, first_arrived_at = first
+        if first_endpoint == endpoint:
+            return False
+        if arrived_at < first_arrived_at:
+            # 并行解码时后到达的交易可能先被处理，统计以到达时间为准
+            self.stats[first_endpoint].first -= 1
+            stats.first += 1
+            self._first[signature] = (endpoint, arrived_at)
+            first_endpoint, first_arrived_at, arrived_at = endpoint, arrived_at, first_arrived_at
+        lead = arrived_at - first_arrived_at
+        first_stats = self.stats[first_endpoint]
+        first_stats.lead_total += lead
+        first_stats.lead_count += 1
+        first_stats.lead_max = max(first_stats.lead_max, lead)
+        return False
+
+    def get_stats(self) -> dict[str, dict]:
+        return {endpoint: stats.to_dict() for endpoint, stats in self.stats.items()}
@@ -0,0 +1,143 @@
+"""单个 Geyser 节点上的订阅流
+
+负责连接、订阅以及断线重连，将收到的响应连同节点名和到达时间放入共享队列。
+连接失败的节点（包括启动时没有连接成功的节点）按退避间隔持续重连，直到被取消。
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator, Callable
+
+from grpc.aio import AioRpcError
+from solbot_common.log import logger
+from yellowstone_grpc.client import GeyserClient
+from yellowstone_grpc.grpc import geyser_pb2
+
+# (节点名, 到达时间, 响应)，启用解码进程池时响应为原始字节
+StreamItem = tuple[str, float, geyser_pb2.SubscribeUpdate | bytes]
+
+
+class GeyserStream:
+    """Geyser 订阅流
+
+    Args:
+        name: 节点名，用于日志和统计
+        endpoint: Geyser 服务地址
+        api_key: Geyser 服务 x-token
+        raw: 是否接收未反序列化的原始字节
+    """
+
+    def __init__(self, name: str, endpoint: str, api_key: str, raw: bool = False):
+        self.name = name
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.raw = raw
+        self.geyser_client: GeyserClient | None = None
+        self.request_queue: asyncio.Queue[geyser_pb2.SubscribeRequest] | None = None
+        self.responses: AsyncGenerator[geyser_pb2.SubscribeUpdate | bytes, None] | None = None
+        self.connected = False
+        self.retry_count = 0
+        self.max_retries = 3
+        self.retry_delay = 5  # seconds
+        # run 中连续重连失败时的最大等待间隔（秒）
+        self.max_retry_delay = 60
+
+    async def connect(self) -> None:
+        """Connect to Geyser service with retry mechanism."""
+        self.retry_count = 0
+        while self.retry_count < self.max_retries:
+            try:
+                self.geyser_client = await GeyserClient.connect(self.endpoint, x_token=self.api_key)
+                self.retry_count = 0  # Reset retry count on successful connection
+                logger.info(f"Successfully connected to Geyser service: {self.name}")
+                return
+            except Exception as e:
+                self.retry_count += 1
+                if self.retry_count >= self.max_retries:
+                    logger.error(
+                        f"Failed to connect to Geyser service {self.name} "
+                        f"after {self.max_retries} attempts: {e}"
+                    )
+                    raise
+                logger.warning(
+                    f"Connection attempt {self.retry_count} to {self.name} failed, "
+                    f"retrying in {self.retry_delay} seconds..."
+                )
+                await asyncio.sleep(self.retry_delay)
+
+    async def subscribe(self, pb_request: geyser_pb2.SubscribeRequest) -> None:
+        """建立订阅流"""
+        if self.geyser_client is None:
+            raise RuntimeError("Geyser client is not connected")
+
+        if self.raw:
+            (
+                self.request_queue,
+                self.responses,
+            ) = await self.geyser_client.subscribe_raw_with_request(pb_request)
+        else:
+            (
+                self.request_queue,
+                self.responses,
+            ) = await self.geyser_client.subscribe_with_request(pb_request)
+        self.connected = True
+
+    async def send(self, pb_request: geyser_pb2.SubscribeRequest) -> None:
+        """在当前的订阅流上发送订阅请求"""
+        if self.request_queue is None:
+            logger.warning(f"Request queue of {self.name} is not initialized, skip request")
+            return
+        await self.request_queue.put(pb_request)
+
+    async def run(
+        self,
+        out: asyncio.Queue[StreamItem],
+        build_request: Callable[[], geyser_pb2.SubscribeRequest],
+        on_disconnect: Callable[["GeyserStream"], None],
+        on_reconnect: Callable[["GeyserStream"], None],
+    ) -> None:
+        """读取响应放入共享队列，断线或尚未连接时重连并重新订阅，直到被取消"""
+        failures = 0
+        while True:
+            if not self.connected:
+                try:
+                    await self.close()
+                    await self.connect()
+                    logger.info(f"Subscribing to account updates on {self.name}...")
+                    await self.subscribe(build_request())
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    failures += 1
+                    delay = min(self.retry_delay * 2**failures, self.max_retry_delay)
+                    logger.error(f"Failed to reconnect {self.name}: {e}, retrying in {delay}s")
+                    await asyncio.sleep(delay)
+                    continue
+                failures = 0
+                on_reconnect(self)
+
+            try:
+                assert self.responses is not None
+                async for response in self.responses:
+                    await out.put((self.name, time.monotonic(), response))
+                logger.warning(f"Geyser stream {self.name} closed by server")
+            except asyncio.CancelledError:
+                break
+            except AioRpcError as e:
+                logger.error(f"Rpc Error from {self.name}: {e._details}")
+            except Exception as e:
+                logger.exception(e)
+
+            self.connected = False
+            on_disconnect(self)
+            logger.info(f"Attempting to reconnect {self.name}...")
+            await asyncio.sleep(self.retry_delay)
+
+    async def close(self) -> None:
+        self.connected = False
+        if self.geyser_client is not None:
+            client, self.geyser_client = self.geyser_client, None
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Failed to close Geyser client {self.name}: {e}")
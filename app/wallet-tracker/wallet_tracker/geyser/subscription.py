@@ -0,0 +1,99 @@
+"""Geyser 订阅管理
+
+Geyser 的订阅请求每次都会完全替换服务器端的订阅状态，所以每次变更都需要
+发送完整的钱包列表。逐个订阅钱包时会频繁地重建并发送请求，钱包数量较多时
+开销是 O(n²)。
+
+SubscriptionManager 只维护钱包集合，将一个时间窗口内的变更合并为一次请求；
+钱包数量超过单个过滤器 `account_include` 的上限时，拆分到多个命名过滤器中。
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+
+from solbot_common.log import logger
+from yellowstone_grpc.grpc import geyser_pb2
+
+FILTER_NAME_PREFIX = "wallets"
+
+
+class SubscriptionManager:
+    """合并订阅变更，按窗口发送完整的订阅请求
+
+    Args:
+        wallets: 初始订阅的钱包
+        max_accounts_per_filter: 单个过滤器 `account_include` 的最大账户数
+        debounce_interval: 合并变更的时间窗口（秒）
+    """
+
+    def __init__(
+        self,
+        wallets: Iterable[str] = (),
+        max_accounts_per_filter: int = 1000,
+        debounce_interval: float = 0.1,
+    ):
+        if max_accounts_per_filter <= 0:
+            raise ValueError("max_accounts_per_filter must be positive")
+        self.wallets: set[str] = set(wallets)
+        self.max_accounts_per_filter = max_accounts_per_filter
+        self.debounce_interval = debounce_interval
+        self._changed = asyncio.Event()
+
+    def __contains__(self, wallet: str) -> bool:
+        return wallet in self.wallets
+
+    def __len__(self) -> int:
+        return len(self.wallets)
+
+    def add(self, wallets: Iterable[str]) -> bool:
+        """添加钱包，返回订阅集合是否发生变化"""
+        before = len(self.wallets)
+        self.wallets.update(wallets)
+        changed = len(self.wallets) != before
+        if changed:
+            self._changed.set()
+        return changed
+
+    def remove(self, wallets: Iterable[str]) -> bool:
+        """移除钱包，返回订阅集合是否发生变化"""
+        before = len(self.wallets)
+        self.wallets.difference_update(wallets)
+        changed = len(self.wallets) != before
+        if changed:
+            self._changed.set()
+        return changed
+
+    def build_request(self) -> geyser_pb2.SubscribeRequest:
+        """构建包含所有钱包的订阅请求
+
+        钱包按 `max_accounts_per_filter` 分片到 `wallets_0`、`wallets_1` ... 过滤器中，
+        没有钱包时只发送 ping 以保持连接。
+        """
+        request = geyser_pb2.SubscribeRequest()
+        if len(self.wallets) == 0:
+            request.ping.id = 1
+            return request
+
+        wallets = sorted(self.wallets)
+        for i, start in enumerate(range(0, len(wallets), self.max_accounts_per_filter)):
+            tx_filter = request.transactions[f"{FILTER_NAME_PREFIX}_{i}"]
+            tx_filter.account_include.extend(wallets[start : start + self.max_accounts_per_filter])
+            tx_filter.failed = False
+        return request
+
+    async def run(self, send: Callable[[geyser_pb2.SubscribeRequest], Awaitable[None]]) -> None:
+        """等待订阅变更，每个时间窗口最多发送一次订阅请求"""
+        while True:
+            await self._changed.wait()
+            # 等待窗口结束，合并窗口内的所有变更
+            await asyncio.sleep(self.debounce_interval)
+            self._changed.clear()
+            request = self.build_request()
+            logger.info(
+                f"Updating subscription: {len(self.wallets)} wallets, "
+                f"{len(request.transactions)} filters"
+            )
+            try:
+                await send(request)
+            except Exception as e:
+                logger.error(f"Failed to send subscribe request: {e}")
@@ -1,69 +1,30 @@
 import asyncio
 import signal
-import time
-from collections.abc import AsyncGenerator, Sequence
+from collections.abc import Sequence
+from functools import partial
 from typing import List
 
 import aioredis
 import base58
-import orjson as json
-from google.protobuf.json_format import _Printer  # type: ignore
-from google.protobuf.json_format import Parse
-from google.protobuf.message import Message
-from grpc.aio import AioRpcError
 from solbot_common.config import settings
 from solbot_common.log import logger
+from solbot_common.types.trace import TraceContext
 from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
-from yellowstone_grpc.client import GeyserClient
-from yellowstone_grpc.types import (SubscribeRequest,
-                                    SubscribeRequestFilterTransactions,
-                                    SubscribeRequestPing)
 
-from wallet_tracker.constants import NEW_TX_DETAIL_CHANNEL
+from wallet_tracker import benchmark
+from wallet_tracker.geyser.backfill import GapBackfiller, SignatureDeduper
+from wallet_tracker.geyser.checkpoint import SlotCheckpoint
+from wallet_tracker.geyser.decode_pool import DecodePool
+from wallet_tracker.geyser.decoder import decode_transaction, prefilter_transaction
+from wallet_tracker.geyser.racing import ArrivalTracker
+from wallet_tracker.geyser.stream import GeyserStream, StreamItem
+from wallet_tracker.geyser.subscription import SubscriptionManager
+from wallet_tracker.prefilter import SwapPrefilter
+from wallet_tracker.tx_worker import TransactionWorker
 from yellowstone_grpc.grpc import geyser_pb2
 
 
-def should_convert_to_base58(value) -> bool:
-    """Check if bytes should be converted to base58."""
-    if not isinstance(value, bytes):
-        return False
-    try:
-        # 尝试解码为字符串，如果成功且没有特殊字符，就用字符串
-        decoded = value.decode("utf-8")
-        # 检查是否包含转义字符或不可打印字符
-        return "\\" in decoded or any(ord(c) < 32 or ord(c) > 126 for c in decoded)
-    except UnicodeDecodeError:
-        # 如果无法解码为字符串，就用 base58
-        return True
-
-
-class Base58Printer(_Printer):
-    def __init__(self) -> None:
-        super().__init__()
-        self.preserve_proto_field_names = True
-
-    def _RenderBytes(self, value):
-        """Renders a bytes value as base58 or utf-8 string."""
-        if should_convert_to_base58(value):
-            return base58.b58encode(value).decode("utf-8")
-        return value.decode("utf-8")
-
-    def _FieldToJsonObject(self, field, value):
-        """Converts field value according to its type."""
-        if field.cpp_type == field.CPPTYPE_BYTES and isinstance(value, bytes):
-            if should_convert_to_base58(value):
-                return base58.b58encode(value).decode("utf-8")
-            return value.decode("utf-8")
-        return super()._FieldToJsonObject(field, value)
-
-
-def proto_to_dict(message: Message) -> dict:
-    """Convert protobuf message to dict with bytes fields encoded as base58 or utf-8."""
-    printer = Base58Printer()
-    return printer._MessageToJsonObject(message)
-
-
 class TransactionDetailSubscriber:
     def __init__(
         self,
@@ -71,122 +32,213 @@ class TransactionDetailSubscriber:
         api_key: str,
         redis_client: aioredis.Redis,
         wallets: Sequence[Pubkey],
+        decode_workers: int = 0,
+        decode_max_in_flight: int = 64,
+        metrics_interval: int = 60,
+        max_accounts_per_filter: int = 1000,
+        subscribe_debounce: float = 0.1,
+        backfill_max_signatures: int = 100,
+        backfill_max_slot_gap: int = 9000,
+        extra_endpoints: Sequence[tuple[str, str]] = (),
+        prefilter: bool = True,
+        require_swap_program: bool = False,
     ):
+        """
+        Args:
+            endpoint: Geyser 服务地址
+            api_key: Geyser 服务 x-token
+            redis_client: Redis 客户端
+            wallets: 初始订阅的钱包
+            decode_workers: 解码进程数，为 0 时在事件循环中解码
+            decode_max_in_flight: 同时在解码进程池中的最大响应数
+            metrics_interval: 队列深度等指标的日志输出间隔（秒）
+            max_accounts_per_filter: 单个过滤器 `account_include` 的最大账户数
+            subscribe_debounce: 合并订阅变更的时间窗口（秒）
+            backfill_max_signatures: 重连后每个钱包最多补齐的交易数，为 0 时不补齐
+            backfill_max_slot_gap: 检查点落后当前 slot 超过该值时不补齐，为 0 时不限制
+            extra_endpoints: 额外的 Geyser 节点 (endpoint, api_key)，
+                与主节点同时订阅，每笔交易只处理最先到达的一次
+            prefilter: 是否在解码前丢弃签名者 token 余额没有变化的交易
+            require_swap_program: 预过滤时是否要求交易调用了 SWAP_PROGRAMS 中的程序
+        """
         self.endpoint = endpoint
         self.api_key = api_key
-        self.geyser_client = None
         self.wallets = wallets
-        self.subscribed_wallets = {str(wallet) for wallet in wallets}
+        self.subscriptions = SubscriptionManager(
+            (str(wallet) for wallet in wallets),
+            max_accounts_per_filter=max_accounts_per_filter,
+            debounce_interval=subscribe_debounce,
+        )
+        self._subscription_task: asyncio.Task | None = None
+        # 断线补齐：记录已处理的 slot，重连后补齐期间错过的交易
+        self.checkpoint = SlotCheckpoint(redis_client)
+        self.deduper = SignatureDeduper()
+        self.backfiller: GapBackfiller | None = None
+        if backfill_max_signatures > 0:
+            self.backfiller = GapBackfiller(
+                self.deduper,
+                max_signatures=backfill_max_signatures,
+                max_slot_gap=backfill_max_slot_gap,
+            )
+        self._checkpoint_task: asyncio.Task | None = None
+        self._backfill_task: asyncio.Task | None = None
         self.redis = redis_client
+        self.tx_worker = TransactionWorker(redis_client)
+        self.prefilter: SwapPrefilter | None = None
+        if prefilter:
+            self.prefilter = SwapPrefilter(require_swap_program)
         self.is_running = False
-        self.retry_count = 0
-        self.max_retries = 3
-        self.retry_delay = 5  # seconds
 
-        self.request_queue: asyncio.Queue[geyser_pb2.SubscribeRequest] | None = None
-        self.responses: AsyncGenerator[geyser_pb2.SubscribeUpdate, None] | None = None
         # 响应处理相关
-        self.response_queue = asyncio.Queue(maxsize=1000)
+        self.response_queue: asyncio.Queue[StreamItem] = asyncio.Queue(maxsize=1000)
         self.worker_nums = 16
         self.workers: list[asyncio.Task] = []
+        # 解码阶段，启用时 gRPC 返回原始字节，由子进程解码
+        self.decode_pool: DecodePool | None = None
+        if decode_workers > 0:
+            self.decode_pool = DecodePool(decode_workers, decode_max_in_flight)
+            # 每个工作协程同时只等待一个解码结果，保证能够填满在途上限
+            self.worker_nums = max(self.worker_nums, decode_max_in_flight)
+        self.metrics_interval = metrics_interval
+        self._metrics_task: asyncio.Task | None = None
+
+        # 多节点订阅，启用解码进程池时接收原始字节
+        endpoints = [(endpoint, api_key), *extra_endpoints]
+        self.streams = [
+            GeyserStream(f"geyser-{i}", url, key, raw=self.decode_pool is not None)
+            for i, (url, key) in enumerate(endpoints)
+        ]
+        self._stream_tasks: list[asyncio.Task] = []
+        self.arrivals = ArrivalTracker()
+        # 所有节点都断开过，重连后需要补齐
+        self._has_gap = False
+
+    def _on_stream_disconnect(self, stream: GeyserStream) -> None:
+        if not any(s.connected for s in self.streams):
+            logger.warning("All Geyser streams are disconnected")
+            self._has_gap = True
+
+    def _on_stream_task_done(self, stream: GeyserStream, task: asyncio.Task) -> None:
+        """订阅流的任务只在停止时被取消，因异常退出时记录错误并计入断线"""
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.opt(exception=task.exception()).error(f"Geyser stream {stream.name} died")
+        if stream.connected:
+            stream.connected = False
+            self._on_stream_disconnect(stream)
+
+    def _on_stream_reconnect(self, stream: GeyserStream) -> None:
+        # 其他节点仍在线时没有遗漏的交易，不需要补齐
+        if self._has_gap:
+            self._has_gap = False
+            self._schedule_backfill()
+
+    def _schedule_backfill(self) -> None:
+        """从检查点开始补齐断线期间错过的交易"""
+        if self.backfiller is None or self.checkpoint.slot is None:
+            return
+        if self._backfill_task is not None and not self._backfill_task.done():
+            logger.info("Backfill is already running")
+            return
+        self._backfill_task = asyncio.create_task(self._backfill(self.checkpoint.slot))
 
-    async def _connect(self) -> None:
-        """Connect to Geyser service with retry mechanism."""
-        while self.retry_count < self.max_retries:
-            try:
-                self.geyser_client = await GeyserClient.connect(self.endpoint, x_token=self.api_key)
-                self.retry_count = 0  # Reset retry count on successful connection
-                logger.info("Successfully connected to Geyser service")
-                return
-            except Exception as e:
-                self.retry_count += 1
-                if self.retry_count >= self.max_retries:
-                    logger.error(
-                        f"Failed to connect to Geyser service after {self.max_retries} attempts: {e}"
-                    )
-                    raise
-                logger.warning(
-                    f"Connection attempt {self.retry_count} failed, retrying in {self.retry_delay} seconds..."
-                )
-                await asyncio.sleep(self.retry_delay)
-
-    async def _reconnect_and_subscribe(self) -> None:
-        logger.info("Attempting to reconnect...")
-        await asyncio.sleep(self.retry_delay)
-        await self._connect()
-
-        if self.geyser_client is None:
-            raise RuntimeError("Geyser client is not connected")
-
-        # Create subscription request
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-
-        # Subscribe to updates
-        logger.info("Subscribing to account updates...")
-        (
-            self.request_queue,
-            self.responses,
-        ) = await self.geyser_client.subscribe_with_request(pb_request)
-
-    def __build_subscribe_request(self) -> SubscribeRequest:
-        logger.info(f"Subscribing to accounts: {self.subscribed_wallets}")
-
-        params = {}
-
-        if len(self.subscribed_wallets) != 0:
-            params["transactions"] = {
-                "key": SubscribeRequestFilterTransactions(
-                    account_include=list(self.subscribed_wallets),
-                    failed=False,
-                )
-            }
-        else:
-            params["ping"] = SubscribeRequestPing(id=1)
-
-        subscribe_request = SubscribeRequest(**params)
-        return subscribe_request
+    async def _backfill(self, from_slot: int) -> None:
+        assert self.backfiller is not None
+        try:
+            count = await self.backfiller.backfill(
+                list(self.subscriptions.wallets), from_slot, self._process_tx_detail
+            )
+            logger.info(f"Backfilled {count} transactions from slot {from_slot}")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.exception(f"Failed to backfill transactions from slot {from_slot}: {e}")
 
-    async def _process_transaction(self, transaction: dict) -> None:
-        """Process and store transaction in Redis."""
-        if self.redis is None:
-            raise Exception("Redis is not connected")
+    async def _send_subscribe_request(self, pb_request: geyser_pb2.SubscribeRequest) -> None:
+        """在所有订阅流上发送订阅请求"""
+        for stream in self.streams:
+            await stream.send(pb_request)
 
+    async def _process_transaction(
+        self,
+        transaction: geyser_pb2.SubscribeUpdateTransaction,
+        endpoint: str,
+        arrived_at: float,
+    ) -> None:
+        """Decode the transaction and hand it to the transaction worker."""
         try:
-            signature = transaction["transaction"]["signature"]
-            # 构建成 rpc 返回的结构，方便统一解析交易数据
-            data = {
-                **transaction["transaction"],
-            }
-            data["slot"] = int(transaction["slot"])
-            data["version"] = 0
-            # 只有被确认之后才会有 blockTime, 所以这里设置为当前时间
-            data["blockTime"] = int(time.time())
-
-            tx_info_json = json.dumps(data)
-            # Store in Redis using LIST structure
-            # 将交易信息添加到列表左端（最新的交易在最前面）
-            await self.redis.lpush(NEW_TX_DETAIL_CHANNEL, tx_info_json)
-            # 保持列表长度在合理范围内（比如最多保留1000条交易记录）
-            # await self.redis.ltrim(NEW_TX_DETAIL_CHANNEL, 0, 999)
-            logger.info(f"Added transaction '{signature}' to queue")
+            # 只对签名编码，重复到达的交易无需解码
+            signature = base58.b58encode(transaction.transaction.signature).decode("utf-8")
+            if not self.arrivals.arrive(signature, endpoint, arrived_at):
+                return
+            if self.prefilter is not None and not prefilter_transaction(
+                self.prefilter, transaction
+            ):
+                logger.debug(f"Drop non-swap transaction '{signature}'")
+                return
+            # 直接从 protobuf 中读取解析所需的字段，无需经过 JSON 和 Redis 中转
+            tx_detail = decode_transaction(transaction)
+            self._start_trace(tx_detail, endpoint, arrived_at)
+            await self._process_tx_detail(tx_detail)
         except Exception as e:
             logger.exception(f"Error processing transaction: {e}")
 
+    @staticmethod
+    def _start_trace(tx_detail: dict, endpoint: str, arrived_at: float) -> None:
+        """以到达时间开始链路追踪，随交易详情传给 TransactionWorker"""
+        trace = TraceContext.start(
+            tx_detail["transaction"]["signatures"][0],
+            f"geyser:{endpoint}",
+            slot=tx_detail["slot"],
+            received_at=arrived_at,
+        )
+        trace.stamp("decoded")
+        tx_detail["trace"] = trace.to_dict()
+
+    async def _process_tx_detail(self, tx_detail: dict) -> None:
+        """Hand the decoded transaction detail to the transaction worker."""
+        signature = tx_detail["transaction"]["signatures"][0]
+        # 实时订阅和断线补齐可能收到同一笔交易
+        if not self.deduper.add(signature):
+            logger.debug(f"Skip duplicate transaction '{signature}'")
+            return
+        logger.info(f"Received transaction '{signature}'")
+        await benchmark.init(signature)
+        await self.tx_worker.process_transaction(tx_detail)
+        self.checkpoint.update(tx_detail["slot"])
+
+    async def _process_raw_response(self, raw: bytes, endpoint: str, arrived_at: float) -> None:
+        """Decode a raw response in the decode pool and process the result."""
+        assert self.decode_pool is not None
+        tx_detail = await self.decode_pool.decode(raw)
+        if tx_detail is None:
+            return
+        signature = tx_detail["transaction"]["signatures"][0]
+        if not self.arrivals.arrive(signature, endpoint, arrived_at):
+            return
+        if self.prefilter is not None and not self.prefilter.check_tx_detail(tx_detail):
+            logger.debug(f"Drop non-swap transaction '{signature}'")
+            return
+        self._start_trace(tx_detail, endpoint, arrived_at)
+        await self._process_tx_detail(tx_detail)
+
     async def _process_response_worker(self):
         """Process responses from the queue."""
         logger.info(f"Starting response worker {id(asyncio.current_task())}")
         while self.is_running:
             try:
-                response = await self.response_queue.get()
+                endpoint, arrived_at, response = await self.response_queue.get()
                 try:
-                    response_dict = proto_to_dict(response)
-                    if "ping" in response_dict:
-                        logger.debug(f"Got ping response: {response_dict}")
-                    if "filters" in response_dict and "transaction" in response_dict:
-                        logger.debug(f"Got transaction response: \n {response_dict}")
-                        await self._process_transaction(response_dict["transaction"])
+                    if isinstance(response, bytes):
+                        await self._process_raw_response(response, endpoint, arrived_at)
+                        continue
+                    update_type = response.WhichOneof("update_oneof")
+                    if update_type == "ping":
+                        logger.debug("Got ping response")
+                    elif update_type == "transaction":
+                        await self._process_transaction(
+                            response.transaction, endpoint, arrived_at
+                        )
                 except Exception as e:
                     logger.error(f"Error processing response: {e}")
                     logger.exception(e)
@@ -198,12 +250,40 @@ class TransactionDetailSubscriber:
             except Exception as e:
                 logger.exception(f"Worker error: {e}")
 
+    def get_metrics(self) -> dict:
+        """获取响应队列深度、解码进程池以及各节点到达的统计信息"""
+        metrics: dict = {
+            "response_queue_size": self.response_queue.qsize(),
+            "response_queue_maxsize": self.response_queue.maxsize,
+        }
+        if self.decode_pool is not None:
+            metrics.update({f"decode_{k}": v for k, v in self.decode_pool.stats().items()})
+        metrics["connected_streams"] = sum(stream.connected for stream in self.streams)
+        metrics["arrivals"] = self.arrivals.get_stats()
+        if self.prefilter is not None:
+            metrics["prefilter"] = self.prefilter.stats()
+        return metrics
+
+    async def _report_metrics(self):
+        """定期输出队列深度指标"""
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.metrics_interval)
+                logger.info(f"Geyser subscriber metrics: {self.get_metrics()}")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error reporting metrics: {e}")
+
     async def _start_workers(self):
         """Start response processing workers."""
+        if self.decode_pool is not None:
+            self.decode_pool.start()
         logger.info(f"Starting {self.worker_nums} response workers")
         self.workers = [
             asyncio.create_task(self._process_response_worker()) for _ in range(self.worker_nums)
         ]
+        self._metrics_task = asyncio.create_task(self._report_metrics())
 
     async def _stop_workers(self):
         """Stop response processing workers."""
@@ -219,6 +299,24 @@ class TransactionDetailSubscriber:
             await asyncio.gather(*self.workers, return_exceptions=True)
         self.workers.clear()
 
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+        for task in (
+            *self._stream_tasks,
+            self._subscription_task,
+            self._backfill_task,
+            self._checkpoint_task,
+        ):
+            if task is not None:
+                task.cancel()
+        self._stream_tasks.clear()
+        self._subscription_task = None
+        self._backfill_task = None
+        self._checkpoint_task = None
+        if self.decode_pool is not None:
+            self.decode_pool.shutdown()
+
     async def start(self) -> None:
         """Start monitoring wallet transactions."""
         logger.info(f"Starting wallet monitor for accounts: {self.wallets}")
@@ -229,43 +327,50 @@ class TransactionDetailSubscriber:
             # 启动工作协程
             await self._start_workers()
 
-            # 初始化连接
-            await self._connect()
-
-            if self.geyser_client is None:
+            # 初始化连接，至少需要一个节点连接成功，其余节点由 stream.run 继续重连
+            results = await asyncio.gather(
+                *(stream.connect() for stream in self.streams), return_exceptions=True
+            )
+            streams = [
+                stream
+                for stream, result in zip(self.streams, results, strict=True)
+                if not isinstance(result, BaseException)
+            ]
+            if not streams:
                 raise Exception("Geyser client is not connected")
 
-            # Create subscription request
-            subscribe_request = SubscribeRequest(ping=SubscribeRequestPing(id=1))
-            pb_request = Parse(subscribe_request.model_dump_json(), geyser_pb2.SubscribeRequest())
-
-            # Subscribe to updates
-            logger.info("Subscribing to account updates...")
-            (
-                self.request_queue,
-                self.responses,
-            ) = await self.geyser_client.subscribe_with_request(pb_request)
-
-            async def _f():
-                """Process responses from the queue."""
-                logger.info(f"Starting response worker {id(asyncio.current_task())}")
-
-                while self.is_running:
-                    try:
-                        async for response in self.responses:
-                            if not self.is_running:
-                                break
-                            await self.response_queue.put(response)
-                    except AioRpcError as e:
-                        logger.error(f"Rpc Error: {e._details}")
-                        await self._reconnect_and_subscribe()
-                    except Exception as e:
-                        logger.exception(e)
-                        await self._reconnect_and_subscribe()
-
-            monitor_task = asyncio.create_task(_f())
-            # 添加任务完成回调以处理可能的异常
-            monitor_task.add_done_callback(lambda t: t.exception() if t.exception() else None)
+            # 读取上次的检查点，进程重启后同样需要补齐
+            try:
+                last_slot = await self.checkpoint.load()
+                logger.info(f"Loaded slot checkpoint: {last_slot}")
+            except Exception as e:
+                logger.error(f"Failed to load slot checkpoint: {e}")
+            self._checkpoint_task = asyncio.create_task(self.checkpoint.run())
+
+            # 一次性订阅所有初始钱包，之后的变更由订阅管理器合并发送
+            logger.info(f"Subscribing to {len(self.subscriptions)} wallets...")
+            pb_request = self.subscriptions.build_request()
+            for stream in streams:
+                try:
+                    await stream.subscribe(pb_request)
+                except Exception as e:
+                    logger.error(f"Failed to subscribe on {stream.name}: {e}")
+            # 所有配置的节点都保持重连
+            for stream in self.streams:
+                task = asyncio.create_task(
+                    stream.run(
+                        self.response_queue,
+                        self.subscriptions.build_request,
+                        self._on_stream_disconnect,
+                        self._on_stream_reconnect,
+                    )
+                )
+                task.add_done_callback(partial(self._on_stream_task_done, stream))
+                self._stream_tasks.append(task)
+            self._subscription_task = asyncio.create_task(
+                self.subscriptions.run(self._send_subscribe_request)
+            )
+            self._schedule_backfill()
         except asyncio.CancelledError:
             logger.info("Monitor cancelled, shutting down...")
         except Exception as e:
@@ -283,13 +388,18 @@ class TransactionDetailSubscriber:
         # 等待所有工作协程完成
         await self._stop_workers()
 
+        # 保存检查点
+        try:
+            await self.checkpoint.flush()
+        except Exception as e:
+            logger.error(f"Error flushing slot checkpoint: {e}")
+
         # 关闭 geyser client
-        if self.geyser_client:
+        for stream in self.streams:
             try:
-                await self.geyser_client.close()
-                self.geyser_client = None
+                await stream.close()
             except Exception as e:
-                logger.error(f"Error closing geyser client: {e}")
+                logger.error(f"Error closing geyser client {stream.name}: {e}")
 
         # 关闭 Redis 连接
         if self.redis:
@@ -301,80 +411,50 @@ class TransactionDetailSubscriber:
 
         logger.info("Wallet monitor stopped")
         
+    def _ensure_subscribed(self) -> None:
+        if all(stream.request_queue is None for stream in self.streams):
+            raise Exception("Request queue is not initialized")
+
     async def subscribe_manywallet_transactions(self, wallets: List[Pubkey]):
         """订阅多个钱包的交易信息。
 
-        每次发送新的订阅请求都会完全替换之前的订阅状态。
-        这是 Geyser API 的设计：它使用 gRPC 的双向流，每个新请求都会更新整个订阅列表。
+        Geyser 的每个订阅请求都会完全替换之前的订阅状态，
+        变更由订阅管理器在时间窗口内合并后发送一次完整的订阅请求。
 
         Args:
             wallets (List[Pubkey]): 要订阅的钱包地址列表
         """
-        if self.request_queue is None:
-            raise Exception("Request queue is not initialized")
+        self._ensure_subscribed()
 
-        # 添加到订阅集合
-        self.subscribed_wallets.update(str(wallet) for wallet in wallets)
+        self.subscriptions.add(str(wallet) for wallet in wallets)
 
-        # 发送订阅请求，包含所有已订阅的钱包
-        # 这个请求会完全替换服务器端之前的订阅状态
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-        await self.request_queue.put(pb_request)
-        
     async def subscribe_wallet_transactions(self, wallet: Pubkey) -> None:
         """订阅钱包的交易信息。
 
-        每次发送新的订阅请求都会完全替换之前的订阅状态。
-        这是 Geyser API 的设计：它使用 gRPC 的双向流，每个新请求都会更新整个订阅列表。
+        Geyser 的每个订阅请求都会完全替换之前的订阅状态，
+        变更由订阅管理器在时间窗口内合并后发送一次完整的订阅请求。
 
         Args:
             wallet (Pubkey): 要订阅的钱包地址
         """
-        if self.request_queue is None:
-            raise Exception("Request queue is not initialized")
+        self._ensure_subscribed()
 
-        if str(wallet) in self.subscribed_wallets:
+        if not self.subscriptions.add([str(wallet)]):
             logger.warning(f"Wallet {wallet} already subscribed")
-            return
-
-        # 添加到订阅集合
-        self.subscribed_wallets.add(str(wallet))
-
-        # 发送订阅请求，包含所有已订阅的钱包
-        # 这个请求会完全替换服务器端之前的订阅状态
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-        await self.request_queue.put(pb_request)
 
     async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None:
         """取消订阅钱包的交易信息。
 
-        每次发送新的订阅请求都会完全替换之前的订阅状态。
-        这是 Geyser API 的设计：它使用 gRPC 的双向流，每个新请求都会更新整个订阅列表。
+        Geyser 的每个订阅请求都会完全替换之前的订阅状态，
+        变更由订阅管理器在时间窗口内合并后发送一次完整的订阅请求。
 
         Args:
             wallet (Pubkey): 要取消订阅的钱包地址
         """
-        if self.request_queue is None:
-            raise Exception("Request queue is not initialized")
+        self._ensure_subscribed()
 
-        if str(wallet) not in self.subscribed_wallets:
+        if not self.subscriptions.remove([str(wallet)]):
             logger.warning(f"Wallet {wallet} not subscribed")
-            return
-
-        # 从订阅集合中移除钱包
-        self.subscribed_wallets.remove(str(wallet))
-
-        # 发送新的订阅请求，只包含剩余的钱包
-        # 这个请求会完全替换服务器端之前的订阅状态
-        subscribe_request = self.__build_subscribe_request()
-        json_str = subscribe_request.model_dump_json()
-        pb_request = Parse(json_str, geyser_pb2.SubscribeRequest())
-        await self.request_queue.put(pb_request)
-
 
 if __name__ == "__main__":
     from solbot_db.redis import RedisClient
@@ -2,6 +2,9 @@ import asyncio
 from collections.abc import Sequence
 
 from solbot_common.config import settings
+from solbot_common.cp.retention import RetentionReporter
+from solbot_common.cp.transport import RedisTransport, get_transport
+from solbot_common.cp.tx_event import NEW_TX_EVENT_CHANNEL
 from solbot_common.log import logger
 from solbot_common.prestart import pre_start
 from solbot_common.types import copytrade
@@ -10,6 +13,12 @@ from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
 
 from wallet_tracker.benchmark import BenchmarkService
+from wallet_tracker.constants import (
+    FAILED_TX_DETAIL_CHANNEL,
+    FAILED_TX_SIGNATURE_CHANNEL,
+    NEW_TX_DETAIL_CHANNEL,
+    NEW_TX_SIGNATURE_CHANNEL,
+)
 from wallet_tracker.tx_monitor import TxMonitor
 from wallet_tracker.tx_worker import TransactionWorker
 
@@ -20,8 +29,18 @@ class WalletTracker:
         self.client = get_async_client()
         self.wallets = init_wallets
         self.transaction_monitor = TxMonitor(self.wallets, mode=settings.monitor.mode)
-        self.transaction_worker = TransactionWorker(self.redis)
+        self.transaction_worker = TransactionWorker(
+            self.redis, batch_size=settings.monitor.worker_batch_size
+        )
         self.benchmark_service = BenchmarkService()
+        # 定期裁剪 stream，输出各队列的长度和内存占用，失败队列始终在 Redis 中
+        self.retention_reporter = RetentionReporter(get_transport(self.redis, settings.db.transport))
+        self.retention_reporter.add_stream(NEW_TX_EVENT_CHANNEL)
+        self.retention_reporter.add_list(NEW_TX_SIGNATURE_CHANNEL)
+        self.retention_reporter.add_list(NEW_TX_DETAIL_CHANNEL)
+        failed_transport = RedisTransport(self.redis)
+        self.retention_reporter.add_list(FAILED_TX_SIGNATURE_CHANNEL, failed_transport)
+        self.retention_reporter.add_list(FAILED_TX_DETAIL_CHANNEL, failed_transport)
 
     # @provide_session
     # async def sync_wallet(self, *, session: AsyncSession = NEW_ASYNC_SESSION):
@@ -59,10 +78,12 @@ class WalletTracker:
         await asyncio.gather(
             self.benchmark_service.start(),
             self.transaction_monitor.start(),
-            self.transaction_worker.start(),
+            self.transaction_worker.start(settings.monitor.worker_num),
+            self.retention_reporter.start(),
         )
 
     async def stop(self):
+        self.retention_reporter.stop()
         await self.transaction_monitor.stop()
         await self.transaction_worker.stop()
         await self.benchmark_service.stop()
@@ -0,0 +1,108 @@
+"""基于交易日志的快速解析
+
+pump.fun 在交易时会通过 `Program data:` 日志输出 TradeEvent（mint、SOL/token 数量、
+用户、买卖方向），无需 getTransaction 即可构建 TxEvent。
+
+只处理买入：卖出需要用户卖出前的持仓来计算卖出比例，而 TradeEvent 中没有该信息，
+仍然走获取交易详情的流程。买入前的持仓由调用方读取用户买入后的 token 余额补全，
+用于区分开仓和加仓。
+"""
+
+import base64
+import binascii
+from collections.abc import Collection, Iterator, Sequence
+
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.layouts.pump_trade_event import (
+    PUMP_TRADE_EVENT_DISCRIMINATOR,
+    PumpTradeEvent,
+)
+from solbot_common.types import TxEvent, TxType
+
+_PUMP_FUN_PROGRAM_ID = str(PUMP_FUN_PROGRAM)
+_PROGRAM_DATA_PREFIX = "Program data: "
+
+
+def iter_program_data(logs: Sequence[str]) -> Iterator[tuple[str | None, bytes]]:
+    """遍历 `Program data:` 日志，返回 (输出该日志的程序, 数据)"""
+    stack: list[str] = []
+    for log in logs:
+        if log.startswith(_PROGRAM_DATA_PREFIX):
+            try:
+                data = base64.b64decode(log[len(_PROGRAM_DATA_PREFIX) :])
+            except (binascii.Error, ValueError):
+                continue
+            yield (stack[-1] if stack else None), data
+            continue
+
+        # Program <id> invoke [n] / Program <id> success / Program <id> failed: ...
+        parts = log.split(" ", 3)
+        if len(parts) < 3 or parts[0] != "Program":
+            continue
+        if parts[2] == "invoke":
+            stack.append(parts[1])
+        elif parts[2] in ("success", "failed:") and stack:
+            stack.pop()
+
+
+def find_pump_trade_events(logs: Sequence[str]) -> list[PumpTradeEvent]:
+    events = []
+    for program_id, data in iter_program_data(logs):
+        if program_id != _PUMP_FUN_PROGRAM_ID:
+            continue
+        if not data.startswith(PUMP_TRADE_EVENT_DISCRIMINATOR):
+            continue
+        try:
+            events.append(PumpTradeEvent.from_buffer(data))
+        except ValueError:
+            continue
+    return events
+
+
+def parse_pump_buy_logs(
+    signature: str, logs: Sequence[str], wallets: Collection[str]
+) -> TxEvent | None:
+    """从日志中解析跟踪钱包在 pump.fun 上的买入
+
+    只有当交易中恰好有一个属于跟踪钱包的 TradeEvent 且为买入时才返回 TxEvent，
+    其余情况返回 None，由调用方回退到获取交易详情的流程。
+
+    TradeEvent 中没有用户买入前的持仓，返回的 TxEvent 记为开仓，
+    调用方需要通过 set_holder_balance 补全买入前的持仓。
+    """
+    events = [event for event in find_pump_trade_events(logs) if str(event.user) in wallets]
+    if len(events) != 1:
+        return None
+    event = events[0]
+    if not event.is_buy:
+        return None
+
+    return TxEvent(
+        signature=signature,
+        who=str(event.user),
+        from_amount=event.sol_amount,
+        from_decimals=9,
+        to_amount=event.token_amount,
+        to_decimals=6,
+        mint=str(event.mint),
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=event.timestamp,
+        pre_token_amount=0,
+        post_token_amount=event.token_amount,
+        program_id=_PUMP_FUN_PROGRAM_ID,
+    )
+
+
+def set_holder_balance(tx_event: TxEvent, balance: int) -> None:
+    """按用户买入后的 token 余额补全买入前的持仓，并区分开仓和加仓
+
+    balance 为包含该笔买入的余额，读取前用户又卖出时可能小于买入数量，按买入数量截断。
+    """
+    post_token_amount = max(balance, tx_event.to_amount)
+    tx_event.pre_token_amount = post_token_amount - tx_event.to_amount
+    tx_event.post_token_amount = post_token_amount
+    if tx_event.pre_token_amount > 0:
+        tx_event.tx_type = TxType.ADD_POSITION
+    else:
+        tx_event.tx_type = TxType.OPEN_POSITION
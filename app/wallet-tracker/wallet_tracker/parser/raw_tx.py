@@ -1,4 +1,6 @@
-from functools import cache
+from collections.abc import Callable
+from functools import wraps
+from typing import TypeVar
 
 import orjson as json
 from solbot_common.constants import SWAP_PROGRAMS, TOKEN_PROGRAM_ID, WSOL
@@ -12,20 +14,41 @@ from wallet_tracker.exceptions import (
 
 from .protocol import TransactionParserInterface
 
+_TOKEN_PROGRAM_ID = str(TOKEN_PROGRAM_ID)
+_WSOL = str(WSOL)
+
+T = TypeVar("T")
+
+
+def _memoize(func: Callable[["RawTXParser"], T]) -> Callable[["RawTXParser"], T]:
+    """按实例缓存结果，缓存随解析器一起释放（functools.cache 会一直持有 self）"""
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(self: "RawTXParser") -> T:
+        try:
+            return self._memo[name]
+        except KeyError:
+            result = self._memo[name] = func(self)
+            return result
+
+    return wrapper
+
 
 class RawTXParser(TransactionParserInterface):
     def __init__(self, tx_detail: dict) -> None:
         self.tx_detail = tx_detail
+        self._memo: dict[str, object] = {}
 
     @classmethod
     def from_json(cls, tx_detail: str) -> "RawTXParser":
         return cls(json.loads(tx_detail))
 
-    @cache
+    @_memoize
     def get_block_time(self) -> int:
         return self.tx_detail["blockTime"]
 
-    @cache
+    @_memoize
     def get_tx_hash(self) -> str:
         txs = self.tx_detail["transaction"]["signatures"]
         if type(txs) is str:
@@ -34,7 +57,7 @@ class RawTXParser(TransactionParserInterface):
             # raise ValueError("multiple txs in one transaction")
         return txs[0]
 
-    @cache
+    @_memoize
     def get_who(self) -> str:
         account_keys = self.tx_detail["transaction"]["message"]["accountKeys"]
         signer = account_keys[0]
@@ -42,48 +65,59 @@ class RawTXParser(TransactionParserInterface):
             return signer
         return signer["pubkey"]
 
-    @cache
+    @_memoize
+    def _index_token_balances(self) -> tuple[dict, dict, str | None]:
+        """一次遍历 token 余额，按 (owner, mint) 建立索引
+
+        Returns:
+            (pre 索引, post 索引, 签名者的交易 token)，索引中保留第一次出现的余额。
+            交易 token 为签名者在 post 中（其次是 pre 中）第一个非 WSOL 的 SPL token。
+        """
+        who = self.get_who()
+        meta = self.tx_detail["meta"]
+        mint = None
+        indexes = []
+        for token_balances in (meta["postTokenBalances"], meta["preTokenBalances"]):
+            index = {}
+            for token_balance in token_balances:
+                owner = token_balance.get("owner")
+                balance_mint = token_balance["mint"]
+                index.setdefault((owner, balance_mint), token_balance)
+                if (
+                    mint is None
+                    and owner == who
+                    and balance_mint != _WSOL
+                    and token_balance.get("programId") == _TOKEN_PROGRAM_ID
+                ):
+                    mint = balance_mint
+            indexes.append(index)
+        post_index, pre_index = indexes
+        return pre_index, post_index, mint
+
+    @_memoize
     def get_mint(self) -> str:
-        token_post_balances = self.tx_detail["meta"]["postTokenBalances"]
-        token_pre_balances = self.tx_detail["meta"]["preTokenBalances"]
-        for token_post_balance in token_post_balances:
-            if token_post_balance["owner"] != self.get_who():
-                continue
-            if token_post_balance["programId"] == str(TOKEN_PROGRAM_ID) and token_post_balance[
-                "mint"
-            ] != str(WSOL):
-                return token_post_balance["mint"]
-
-        for token_pre_balance in token_pre_balances:
-            if token_pre_balance["owner"] != self.get_who():
-                continue
-            if token_pre_balance["programId"] == str(TOKEN_PROGRAM_ID) and token_pre_balance[
-                "mint"
-            ] != str(WSOL):
-                return token_pre_balance["mint"]
-        raise ValueError("mint not found")
-
-    @cache
+        _, _, mint = self._index_token_balances()
+        if mint is None:
+            raise ValueError("mint not found")
+        return mint
+
+    @_memoize
     def get_token_amount_change(self) -> TokenAmountChange:
-        pre_token_balances = self.tx_detail["meta"]["preTokenBalances"]
-        post_token_balances = self.tx_detail["meta"]["postTokenBalances"]
-        who = self.get_who()
-        mint = self.get_mint()
+        pre_index, post_index, _ = self._index_token_balances()
+        key = (self.get_who(), self.get_mint())
 
         pre_token_amount = 0
         post_token_amount = 0
         decimals = 6
-        for pre_token_balance in pre_token_balances:
-            if pre_token_balance["mint"] == mint and pre_token_balance["owner"] == who:
-                pre_token_amount = int(pre_token_balance["uiTokenAmount"]["amount"])
-                decimals = pre_token_balance["uiTokenAmount"]["decimals"]
-                break
-
-        for post_token_balance in post_token_balances:
-            if post_token_balance["mint"] == mint and post_token_balance["owner"] == who:
-                post_token_amount = int(post_token_balance["uiTokenAmount"]["amount"])
-                decimals = post_token_balance["uiTokenAmount"]["decimals"]
-                break
+        pre_token_balance = pre_index.get(key)
+        if pre_token_balance is not None:
+            pre_token_amount = int(pre_token_balance["uiTokenAmount"]["amount"])
+            decimals = pre_token_balance["uiTokenAmount"]["decimals"]
+
+        post_token_balance = post_index.get(key)
+        if post_token_balance is not None:
+            post_token_amount = int(post_token_balance["uiTokenAmount"]["amount"])
+            decimals = post_token_balance["uiTokenAmount"]["decimals"]
 
         return {
             "change_amount": post_token_amount - pre_token_amount,
@@ -92,7 +126,7 @@ class RawTXParser(TransactionParserInterface):
             "post_balance": post_token_amount,
         }
 
-    @cache
+    @_memoize
     def get_sol_amount_change(self) -> SolAmountChange:
         pre_balances = self.tx_detail["meta"]["preBalances"]
         post_balances = self.tx_detail["meta"]["postBalances"]
@@ -108,7 +142,7 @@ class RawTXParser(TransactionParserInterface):
             "post_balance": post_sol_balance,
         }
 
-    @cache
+    @_memoize
     def get_tx_type(self) -> TxType:
         token_amount_change = self.get_token_amount_change()
         change_ui_amount = token_amount_change["change_amount"] / (
@@ -136,7 +170,7 @@ class RawTXParser(TransactionParserInterface):
         else:
             raise ZeroChangeAmountError(pre_balance, post_balance)
 
-    @cache
+    @_memoize
     def get_swap_program_id(self) -> str | None:
         log_messages = self.tx_detail["meta"]["logMessages"]
         for message in log_messages:
@@ -145,7 +179,7 @@ class RawTXParser(TransactionParserInterface):
                     return program_id
         return None
 
-    @cache
+    @_memoize
     def parse(self) -> TxEvent | None:
         # if self.tx_detail["meta"]["status"] is not None:
         #     if "Err" in self.tx_detail["meta"]["status"]:
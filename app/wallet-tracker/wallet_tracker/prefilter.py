@@ -0,0 +1,114 @@
+"""交易预过滤
+
+跟踪钱包的所有交易（转账、关闭 ATA、NFT 等）都会被推送过来，其中大部分
+最终会被 RawTXParser 以 NotSwapTransaction / ZeroChangeAmountError 拒绝。
+
+SwapPrefilter 在入队/解码前用与解析器相同的规则做一次廉价检查：
+签名者在某个非 WSOL 的 token 上余额没有变化时直接丢弃。
+"""
+
+from collections import Counter
+from collections.abc import Iterable
+
+from solbot_common.constants import SWAP_PROGRAMS, TOKEN_PROGRAM_ID, WSOL
+
+# (owner, mint, program_id, amount)
+TokenBalance = tuple[str, str, str, str]
+
+_TOKEN_PROGRAM_ID = str(TOKEN_PROGRAM_ID)
+_WSOL = str(WSOL)
+
+
+def signer_token_changed(
+    signer: str, pre_balances: list[TokenBalance], post_balances: list[TokenBalance]
+) -> bool:
+    """签名者的 token 余额是否发生变化
+
+    与 RawTXParser 的规则一致：先在 post 再在 pre 中找到签名者的第一个非 WSOL token，
+    比较该 token 前后的数量。
+    """
+    if len(pre_balances) == 0 or len(post_balances) == 0:
+        return False
+
+    mint = None
+    for owner, balance_mint, program_id, _ in (*post_balances, *pre_balances):
+        if owner == signer and program_id == _TOKEN_PROGRAM_ID and balance_mint != _WSOL:
+            mint = balance_mint
+            break
+    if mint is None:
+        return False
+
+    def _amount(balances: list[TokenBalance]) -> int:
+        for owner, balance_mint, _, amount in balances:
+            if balance_mint == mint and owner == signer:
+                return int(amount)
+        return 0
+
+    return _amount(pre_balances) != _amount(post_balances)
+
+
+def invokes_swap_program(log_messages: Iterable[str]) -> bool:
+    for message in log_messages:
+        for program_id in SWAP_PROGRAMS:
+            if program_id in message:
+                return True
+    return False
+
+
+class SwapPrefilter:
+    """丢弃不可能是 swap 的交易并统计丢弃数量
+
+    Args:
+        require_swap_program: 是否同时要求交易调用了 SWAP_PROGRAMS 中的程序。
+            未知程序的 swap 会通过第三方路由跟单，所以默认不要求。
+    """
+
+    def __init__(self, require_swap_program: bool = False):
+        self.require_swap_program = require_swap_program
+        self.passed = 0
+        self.dropped: Counter[str] = Counter()
+
+    def check(
+        self,
+        signer: str,
+        pre_balances: list[TokenBalance],
+        post_balances: list[TokenBalance],
+        log_messages: Iterable[str],
+    ) -> bool:
+        """返回交易是否需要继续处理"""
+        if not signer_token_changed(signer, pre_balances, post_balances):
+            self.dropped["no_token_change"] += 1
+            return False
+        if self.require_swap_program and not invokes_swap_program(log_messages):
+            self.dropped["no_swap_program"] += 1
+            return False
+        self.passed += 1
+        return True
+
+    def check_tx_detail(self, tx_detail: dict) -> bool:
+        """检查 RPC getTransaction 格式的交易详情"""
+        try:
+            signer = tx_detail["transaction"]["message"]["accountKeys"][0]
+            if not isinstance(signer, str):
+                signer = signer["pubkey"]
+            meta = tx_detail["meta"]
+            pre_balances = [_from_json(b) for b in meta["preTokenBalances"]]
+            post_balances = [_from_json(b) for b in meta["postTokenBalances"]]
+            log_messages = meta.get("logMessages") or []
+        except (KeyError, IndexError, TypeError):
+            # 格式无法识别时交给解析器处理
+            self.passed += 1
+            return True
+        return self.check(signer, pre_balances, post_balances, log_messages)
+
+    def stats(self) -> dict[str, int]:
+        return {"passed": self.passed, **{f"dropped_{k}": v for k, v in self.dropped.items()}}
+
+
+def _from_json(token_balance: dict) -> TokenBalance:
+    return (
+        token_balance.get("owner", ""),
+        token_balance["mint"],
+        token_balance.get("programId", ""),
+        token_balance["uiTokenAmount"]["amount"],
+    )
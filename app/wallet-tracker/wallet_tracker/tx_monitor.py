@@ -27,6 +27,9 @@ class TxMonitor:
                 settings.rpc.rpc_url,
                 redis,
                 wallets,
+                prefilter=settings.monitor.prefilter,
+                require_swap_program=settings.monitor.require_swap_program,
+                log_fast_path=settings.monitor.log_fast_path,
             )
         elif mode == "geyser":
             self.monitor = GeyserMonitor(
@@ -34,6 +37,18 @@ class TxMonitor:
                 settings.rpc.geyser.api_key,
                 redis,
                 wallets,
+                decode_workers=settings.rpc.geyser.decode_workers,
+                decode_max_in_flight=settings.rpc.geyser.decode_max_in_flight,
+                metrics_interval=settings.rpc.geyser.metrics_interval,
+                max_accounts_per_filter=settings.rpc.geyser.max_accounts_per_filter,
+                subscribe_debounce=settings.rpc.geyser.subscribe_debounce,
+                backfill_max_signatures=settings.rpc.geyser.backfill_max_signatures,
+                backfill_max_slot_gap=settings.rpc.geyser.backfill_max_slot_gap,
+                extra_endpoints=[
+                    (extra.endpoint, extra.api_key) for extra in settings.rpc.geyser.extra_endpoints
+                ],
+                prefilter=settings.monitor.prefilter,
+                require_swap_program=settings.monitor.require_swap_program,
             )
         else:
             raise ValueError("Invalid mode")
@@ -57,9 +72,10 @@ class TxMonitor:
         copytrade_addresses = await CopyTradeService.get_active_wallet_addresses()
         # 合并两个列表
         active_wallet_addresses = list(set(list(monitor_addresses) + list(copytrade_addresses)))
-        for address in active_wallet_addresses:
-            await self.monitor.subscribe_wallet_transactions(Pubkey.from_string(address))
-            logger.debug(f"Subscribed to wallet: {address}")
+        await self.monitor.subscribe_manywallet_transactions(
+            [Pubkey.from_string(address) for address in active_wallet_addresses]
+        )
+        logger.info(f"Subscribed to {len(active_wallet_addresses)} wallets")
 
         # 开始处理事件
         logger.info("Start processing monitor events")
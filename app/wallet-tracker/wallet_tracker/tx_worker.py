@@ -1,10 +1,14 @@
 import asyncio
+from collections import Counter
 
 import aioredis
 import orjson as json
 from aioredis.exceptions import RedisError
+from solbot_common.config import settings
+from solbot_common.cp.transport import RedisTransport, get_transport
 from solbot_common.cp.tx_event import TxEventProducer
 from solbot_common.log import logger
+from solbot_common.types.trace import TraceContext
 
 from wallet_tracker import benchmark
 from wallet_tracker.constants import FAILED_TX_DETAIL_CHANNEL, NEW_TX_DETAIL_CHANNEL
@@ -28,27 +32,45 @@ class TransactionWorker:
     - 清仓
     """
 
-    def __init__(self, redis: aioredis.Redis):
+    def __init__(self, redis: aioredis.Redis, batch_size: int = 1, metrics_interval: int = 60):
+        """
+        Args:
+            redis: Redis 客户端
+            batch_size: 每次出队的最大交易数，阻塞获取一条后再非阻塞地取出剩余的交易
+            metrics_interval: 出队统计的日志输出间隔（秒）
+        """
         self.redis: aioredis.Redis = redis
         self.is_running = False
-        self.lock = asyncio.Lock()
+        self.batch_size = max(batch_size, 1)
+        self.metrics_interval = metrics_interval
+        # 每次出队得到的交易数 -> 次数
+        self.batch_sizes: Counter[int] = Counter()
         self.tx_event_producer = TxEventProducer(redis)
+        # 交易详情队列，失败队列始终写入 Redis 便于排查
+        self.transport = get_transport(redis, settings.db.transport)
+        self.failed_transport = RedisTransport(redis)
 
     async def push_parse_failed_to_redis(self, tx_event: str):
         """解析失败的交易详情放入失败队列"""
         assert self.redis is not None
-        await self.redis.lpush(FAILED_TX_DETAIL_CHANNEL, tx_event)
+        await self.failed_transport.push(FAILED_TX_DETAIL_CHANNEL, tx_event)
 
     async def process_transaction(self, tx_detail: dict):
         """处理单个交易"""
         tx_parser = RawTXParser(tx_detail)
         tx_hash = tx_parser.get_tx_hash()
 
-        # 使用 orjson 的 dumps，它返回 bytes，需要解码为 str
-        tx_detail_text = json.dumps(tx_detail).decode("utf-8")
+        def _tx_detail_text() -> str:
+            # 只在需要记录失败详情时才序列化，避免热路径上的 JSON 开销
+            # 使用 orjson 的 dumps，它返回 bytes，需要解码为 str
+            return json.dumps(tx_detail).decode("utf-8")
+
+        trace_data = tx_detail.get("trace")
         try:
-            block_time = tx_parser.get_block_time()
-            await benchmark.record_block_time(tx_hash, block_time)
+            # Geyser 交易的 blockTime 是收到交易时的时间，不是出块时间，不记录 detect/total 阶段，
+            # 这类交易的链路耗时由 trace 从收到时开始记录
+            if trace_data is None or not trace_data["source"].startswith("geyser:"):
+                await benchmark.record_block_time(tx_hash, tx_parser.get_block_time())
 
             async with benchmark.with_parse_tx(tx_hash):
                 tx_event = tx_parser.parse()
@@ -57,11 +79,16 @@ class TransactionWorker:
             if tx_event.tx_type == 'error_order':
                 return
             elif tx_event is None:
+                tx_detail_text = _tx_detail_text()
                 logger.error(f"Parse tx failed, details: {tx_detail_text}")
                 # 加入到失败队列
                 await self.push_parse_failed_to_redis(tx_detail_text)
                 return
-            await self.tx_event_producer.produce(tx_event)
+            if trace_data is not None:
+                tx_event.trace = TraceContext.from_dict(trace_data)
+                tx_event.trace.stamp("parsed")
+            async with benchmark.with_produce_tx(tx_hash):
+                await self.tx_event_producer.produce(tx_event)
             logger.success(f"New tx event: {tx_hash}")
         except TransactionError as e:
             logger.info(f"Transaction status is not valid, status: {e}")
@@ -75,6 +102,7 @@ class TransactionWorker:
             logger.info(f"Tx amount is zero, details: {tx_hash}")
             return
         except Exception as e:
+            tx_detail_text = _tx_detail_text()
             logger.error(f"Failed to process transaction: {e}, details: {tx_detail_text}")
             logger.exception(e)
             # 加入到失败队列
@@ -82,18 +110,37 @@ class TransactionWorker:
         # finally:
         #     await benchmark.show_timeline(tx_hash)
 
+    async def dequeue(self) -> list[bytes]:
+        """阻塞获取一条交易详情，再非阻塞地取出最多 batch_size - 1 条
+
+        每个 worker 独立等待 Redis，不需要加锁。
+        """
+        items = await self.transport.pop(NEW_TX_DETAIL_CHANNEL, self.batch_size, timeout=1)
+        if not items:  # timeout occurred
+            return []
+        self.batch_sizes[len(items)] += 1
+        return items
+
+    async def _process_raw(self, tx_detail: bytes | str):
+        try:
+            json_data = json.loads(tx_detail)
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid tx detail: {e}")
+            await self.push_parse_failed_to_redis(tx_detail)
+            return
+        await self.process_transaction(json_data)
+
     async def worker(self):
         """单个 worker 协程"""
         while self.is_running:
             try:
                 assert self.redis is not None
-                async with self.lock:
-                    result = await self.redis.brpop(NEW_TX_DETAIL_CHANNEL, timeout=1)
-                    if result is None:  # timeout occurred
-                        continue
-                _, tx_detail = result
-                json_data = json.loads(tx_detail)
-                await self.process_transaction(json_data)
+                items = await self.dequeue()
+                if not items:
+                    continue
+                logger.debug(f"Dequeued {len(items)} tx details")
+                # 同一批次的交易并发处理
+                await asyncio.gather(*(self._process_raw(item) for item in items))
             except RedisError as e:
                 logger.error(f"Failed to push transaction to Redis: {e}")
                 continue
@@ -105,10 +152,32 @@ class TransactionWorker:
                 logger.exception(e)
                 continue
 
+    def get_metrics(self) -> dict:
+        """出队统计：出队次数、交易数以及每次出队得到的交易数分布"""
+        pops = sum(self.batch_sizes.values())
+        items = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "pops": pops,
+            "items": items,
+            "avg_batch_size": round(items / pops, 2) if pops else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+    async def _report_metrics(self):
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.metrics_interval)
+                logger.info(f"Transaction worker metrics: {self.get_metrics()}")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error reporting metrics: {e}")
+
     async def start(self, num_workers: int = 2):
         """启动多个 worker 协程并行处理消息"""
         self.is_running = True
         self.workers = [asyncio.create_task(self.worker()) for _ in range(num_workers)]
+        self.workers.append(asyncio.create_task(self._report_metrics()))
         try:
             await asyncio.gather(*self.workers)
         except asyncio.CancelledError:
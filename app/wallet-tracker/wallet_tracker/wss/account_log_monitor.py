@@ -4,13 +4,21 @@
 """
 
 import asyncio
+import time
+from collections import OrderedDict
 from collections.abc import Sequence
 
 import aioredis
 from _pickle import PicklingError
+from solana.rpc.commitment import Processed
 from solana.rpc.websocket_api import connect
 from solbot_common.config import settings
+from solbot_common.cp.transport import get_transport
+from solbot_common.cp.tx_event import TxEventProducer
 from solbot_common.log import logger
+from solbot_common.types.trace import TraceContext
+from solbot_common.types.tx import TxEvent
+from solbot_common.utils.utils import get_associated_token_address, get_async_client
 from solders.errors import SerdeJSONError  # type: ignore
 from solders.pubkey import Pubkey  # type: ignore
 from solders.rpc.config import RpcTransactionLogsFilterMentions  # type: ignore
@@ -19,6 +27,7 @@ from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
 
 from wallet_tracker import benchmark
 from wallet_tracker.constants import NEW_TX_SIGNATURE_CHANNEL
+from wallet_tracker.parser.log import parse_pump_buy_logs, set_holder_balance
 
 
 class AccountLogMonitor:
@@ -28,6 +37,9 @@ class AccountLogMonitor:
         rpc_endpoint: str,
         redis_client: aioredis.Redis,
         redis_channel: str = NEW_TX_SIGNATURE_CHANNEL,
+        log_fast_path: bool = True,
+        max_traces: int = 10_000,
+        max_fast_path_tasks: int = 1_000,
     ):
         """
         初始化监控器
@@ -36,11 +48,24 @@ class AccountLogMonitor:
             init_wallets: 要监控的钱包地址列表
             rpc_endpoint: Solana RPC 端点
             redis_channel: Redis 发布订阅频道名
+            log_fast_path: 是否直接从日志中解析 pump.fun 买入，跳过获取交易详情
+            max_traces: 等待获取交易详情的链路追踪的最大数量
+            max_fast_path_tasks: 同时从日志构建交易事件的最大任务数，超出时回退到获取交易详情
         """
         self.init_wallets = list(init_wallets)
         self.websocket_url = rpc_endpoint.replace("https://", "wss://")
         self.redis_channel = redis_channel
         self.redis = redis_client
+        self.transport = get_transport(redis_client, settings.db.transport)
+        self.log_fast_path = log_fast_path
+        self.tx_event_producer = TxEventProducer(redis_client)
+        self.rpc_client = get_async_client()
+        # 读取持仓和发送交易事件在独立的任务中执行，不阻塞 websocket 的读取
+        self.max_fast_path_tasks = max_fast_path_tasks
+        self.fast_path_tasks: set[asyncio.Task] = set()
+        # 交易签名 -> 链路追踪，获取交易详情时取出
+        self.max_traces = max_traces
+        self.traces: OrderedDict[str, TraceContext] = OrderedDict()
         self.is_running = False
         # FIXME: 目前采用的是钱包与钱包建立映射关系，是否可能出现多个钱包跟踪同一个目标钱包的情况。其中一个钱包取消了订阅，是否可能导致其他钱包也无法收到消息
         self.subscription_ids = {}  # 新增：存储钱包地址和订阅ID的映射
@@ -64,16 +89,91 @@ class AccountLogMonitor:
         Args:
             message: WebSocket 返回的日志数据
         """
+        received_at = time.monotonic()
         try:
-            signature = str(message.result.value.signature)
-            assert self.redis is not None, "Redis is not connected"
-            # 发送到 Redis
-            await self.redis.lpush(self.redis_channel, signature)
-            await benchmark.init(str(signature))
-            logger.info(f"New tx signature: {signature}")
+            if self.log_fast_path and self.start_log_fast_path(message, received_at):
+                return
+            await self.push_signature(message, received_at)
         except Exception as e:
             logger.error(f"Error processing log: {e}")
 
+    async def push_signature(self, message: LogsNotification, received_at: float) -> None:
+        """将交易签名发送到签名队列，由 worker 获取交易详情"""
+        signature = str(message.result.value.signature)
+        self._remember_trace(
+            TraceContext.start(
+                signature, "wss", slot=message.result.context.slot, received_at=received_at
+            )
+        )
+        await self.transport.push(self.redis_channel, signature)
+        await benchmark.init(signature)
+        logger.info(f"New tx signature: {signature}")
+
+    def _remember_trace(self, trace: TraceContext) -> None:
+        self.traces[trace.trace_id] = trace
+        if len(self.traces) > self.max_traces:
+            self.traces.popitem(last=False)
+
+    def pop_trace(self, signature: str) -> TraceContext | None:
+        """取出收到该交易日志时开始的链路追踪"""
+        return self.traces.pop(signature, None)
+
+    def start_log_fast_path(self, message: LogsNotification, received_at: float) -> bool:
+        """日志可以直接构建交易事件时，启动构建任务并返回 True
+
+        在途任务达到上限时返回 False，回退到获取交易详情
+        """
+        value = message.result.value
+        if value.err is not None or len(self.fast_path_tasks) >= self.max_fast_path_tasks:
+            return False
+        tx_event = parse_pump_buy_logs(str(value.signature), value.logs, self.subscribed_wallets)
+        if tx_event is None:
+            return False
+        task = asyncio.create_task(self.process_log_fast_path(message, tx_event, received_at))
+        self.fast_path_tasks.add(task)
+        task.add_done_callback(self._on_fast_path_done)
+        return True
+
+    def _on_fast_path_done(self, task: asyncio.Task) -> None:
+        self.fast_path_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error(
+                f"Error processing log fast path: {task.exception()}"
+            )
+
+    async def process_log_fast_path(
+        self, message: LogsNotification, tx_event: TxEvent, received_at: float
+    ) -> None:
+        """读取持仓后发送从日志构建的交易事件，读取失败时回退到获取交易详情"""
+        signature = tx_event.signature
+        # 用户已持有该代币时为加仓，需要买入前的持仓
+        balance = await self.get_holder_balance(tx_event.who, tx_event.mint)
+        if balance is None:
+            await self.push_signature(message, received_at)
+            return
+        set_holder_balance(tx_event, balance)
+        tx_event.trace = TraceContext.start(
+            signature, "wss_log", slot=message.result.context.slot, received_at=received_at
+        )
+        tx_event.trace.stamp("parsed")
+        await benchmark.init(signature)
+        async with benchmark.with_produce_tx(signature):
+            await self.tx_event_producer.produce(tx_event)
+        logger.success(f"New tx event from logs: {signature}")
+
+    async def get_holder_balance(self, owner: str, mint: str) -> int | None:
+        """读取用户在该代币 ATA 中的余额（processed，包含刚收到日志的交易）
+
+        读取失败（如 ATA 不是由 Token Program 创建）时返回 None，由调用方回退到获取交易详情
+        """
+        ata = get_associated_token_address(Pubkey.from_string(owner), Pubkey.from_string(mint))
+        try:
+            resp = await self.rpc_client.get_token_account_balance(ata, Processed)
+        except Exception as e:
+            logger.warning(f"Failed to get token balance of {ata}: {e}")
+            return None
+        return int(resp.value.amount)
+
     async def process_subscribe_result(self, message: SubscriptionResult) -> None:
         subscription_id = message.result
         if self.waitting_subscribe_response_wallet is None:
@@ -249,4 +349,6 @@ class AccountLogMonitor:
         """停止监控服务"""
         self.is_running = False
         await self.cleanup()
+        for task in self.fast_path_tasks:
+            task.cancel()
         logger.info("Monitor stopped")
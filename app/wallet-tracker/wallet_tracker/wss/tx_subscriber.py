@@ -6,6 +6,7 @@ from aioredis import Redis
 from aioredis.exceptions import RedisError
 from solana.rpc.async_api import AsyncClient as Client
 from solbot_common.config import settings
+from solbot_common.cp.transport import RedisTransport, get_transport
 from solbot_common.log import logger
 from solders.pubkey import Pubkey  # type: ignore
 from solders.signature import Signature  # type: ignore
@@ -17,6 +18,7 @@ from wallet_tracker.constants import (
     NEW_TX_SIGNATURE_CHANNEL,
 )
 from wallet_tracker.exceptions import NotSwapTransaction, TransactionError
+from wallet_tracker.prefilter import SwapPrefilter
 from wallet_tracker.wss.tx_detail_fetcher import TxDetailRawFetcher
 
 from .account_log_monitor import AccountLogMonitor
@@ -32,10 +34,16 @@ class TransactionDetailSubscriber:
         rpc_endpoint: str,
         redis_client: Redis,
         wallets: Sequence[Pubkey],
+        prefilter: bool = True,
+        require_swap_program: bool = False,
+        log_fast_path: bool = True,
     ):
         self.wallets = wallets
         self.rpc_endpoint = rpc_endpoint
         self.redis = redis_client
+        # 签名队列和交易详情队列，失败队列始终写入 Redis 便于排查
+        self.transport = get_transport(redis_client, settings.db.transport)
+        self.failed_transport = RedisTransport(redis_client)
         self.rpc_client: Client | None = None
         self.is_running = False
         self.fetchers = [
@@ -43,10 +51,15 @@ class TransactionDetailSubscriber:
             for i, endpoint in enumerate(settings.rpc.endpoints)
         ]
         self.lock = asyncio.Lock()
+        # 推送到 Redis 之前丢弃不可能是 swap 的交易
+        self.prefilter: SwapPrefilter | None = None
+        if prefilter:
+            self.prefilter = SwapPrefilter(require_swap_program)
         self.account_log_monitor = AccountLogMonitor(
             self.wallets,
             settings.rpc.rpc_url,
             self.redis,
+            log_fast_path=log_fast_path,
         )
 
     async def fetch_transaction_detail(self, tx_sig: str) -> dict | None:
@@ -99,12 +112,11 @@ class TransactionDetailSubscriber:
             return None
 
     async def push_transaction_to_redis(self, tx_detail: str):
-        assert self.redis is not None
-        await self.redis.lpush(NEW_TX_DETAIL_CHANNEL, tx_detail)
+        await self.transport.push(NEW_TX_DETAIL_CHANNEL, tx_detail)
 
     async def push_failed_transaction_to_redis(self, tx_detail: str):
         assert self.redis is not None
-        await self.redis.lpush(FAILED_TX_SIGNATURE_CHANNEL, tx_detail)
+        await self.failed_transport.push(FAILED_TX_SIGNATURE_CHANNEL, tx_detail)
 
     async def process_transaction(self, tx_sig: str):
         """处理单个交易"""
@@ -116,6 +128,17 @@ class TransactionDetailSubscriber:
             await self.push_failed_transaction_to_redis(tx_sig)
             return
 
+        trace = self.account_log_monitor.pop_trace(tx_sig)
+        if self.prefilter is not None and not self.prefilter.check_tx_detail(tx_detail):
+            logger.info(f"Drop non-swap transaction: {tx_sig}, stats: {self.prefilter.stats()}")
+            await benchmark.show_timeline(tx_sig)
+            return
+
+        if trace is not None:
+            trace.stamp("fetched")
+            # 随交易详情经 Redis 传给 TransactionWorker
+            tx_detail["trace"] = trace.to_dict()
+
         # 使用 orjson 的 dumps，它返回 bytes，需要解码为 str
         tx_detail_text = json.dumps(tx_detail).decode("utf-8")
         try:
@@ -138,12 +161,11 @@ class TransactionDetailSubscriber:
         """单个 worker 协程"""
         while True:
             try:
-                assert self.redis is not None
                 async with self.lock:
-                    result = await self.redis.brpop(NEW_TX_SIGNATURE_CHANNEL, timeout=1)
-                if result is None:
+                    result = await self.transport.pop(NEW_TX_SIGNATURE_CHANNEL, timeout=1)
+                if not result:
                     continue
-                _, tx_sig = result
+                tx_sig = result[0]
                 logger.info(f"Received tx signature: {tx_sig}")
                 await self.process_transaction(tx_sig)
             except RedisError as e:
@@ -191,6 +213,15 @@ class TransactionDetailSubscriber:
         """
         await self.account_log_monitor.waitting_subscribe_wallet.put(wallet)
 
+    async def subscribe_manywallet_transactions(self, wallets: list[Pubkey]) -> None:
+        """订阅多个钱包的交易信息。
+
+        Args:
+            wallets (list[Pubkey]): 要订阅的钱包地址列表
+        """
+        for wallet in wallets:
+            await self.account_log_monitor.waitting_subscribe_wallet.put(wallet)
+
     async def unsubscribe_wallet_transactions(self, wallet: Pubkey) -> None:
         """取消订阅钱包的交易信息。
 
@@ -1,2 +1,5 @@
 BLOCKHASH_CACHE_KEY = "cache_preloader:blockhash"
 MIN_BALANCE_RENT_CACHE_KEY = "cache_preloader:min_balance_rent"
+POOL_STATE_ACCOUNT_PREFIX = "cache_preloader:pool_state:account"
+POOL_STATE_HEARTBEAT_KEY = "cache_preloader:pool_state:heartbeat"
+POOL_STATE_TRACKED_KEY = "cache_preloader:pool_state:tracked"
@@ -1,8 +1,15 @@
+from solbot_common.config import settings
 from solbot_common.constants import PUMP_FUN_PROGRAM
-from solbot_common.utils.utils import get_async_client, get_bonding_curve_account
+from solbot_common.utils.utils import (
+    get_async_client,
+    get_bonding_curve_account,
+    get_bonding_curve_pda,
+)
+from solbot_db.redis import RedisClient
 from solders.pubkey import Pubkey  # type: ignore
 
 from .cached import cached
+from .pool_state import PoolStateCache
 
 
 class LaunchCache:
@@ -19,12 +26,32 @@ class LaunchCache:
     def __repr__(self) -> str:
         return "LaunchCache()"
 
-    @cached(ttl=None, noself=True)
     async def is_pump_token_launched(self, mint: str | Pubkey) -> bool:
         """检查 pump 代币是否已被发射。
 
         通过检查代币的 virtual_sol_reserves 是否为 0 来判断。
         如果为 0，说明代币已经在 Raydium 上发射。
+        开启池子状态镜像时优先读取镜像中的 bonding curve，镜像过期时回退到 RPC 查询。
+
+        Args:
+            mint (str): 代币的 mint 地址
+
+        Returns:
+            bool: 如果代币已发射返回 True，否则返回 False
+        """
+        if settings.pool_state.enable:
+            mint = Pubkey.from_string(mint) if isinstance(mint, str) else mint
+            pool_state = PoolStateCache(RedisClient.get_instance())
+            bonding_curve_account = await pool_state.get_bonding_curve(
+                get_bonding_curve_pda(mint, PUMP_FUN_PROGRAM)
+            )
+            if bonding_curve_account is not None:
+                return bonding_curve_account.virtual_sol_reserves == 0
+        return await self._is_pump_token_launched(mint)
+
+    @cached(ttl=None, noself=True)
+    async def _is_pump_token_launched(self, mint: str | Pubkey) -> bool:
+        """通过 RPC 查询 bonding curve 检查 pump 代币是否已被发射。
 
         Args:
             mint (str): 代币的 mint 地址
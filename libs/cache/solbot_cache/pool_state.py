@@ -0,0 +1,164 @@
+"""池子状态镜像
+
+cache-preloader 订阅持仓和交易过的代币的 bonding curve、Raydium vault 账户，
+将解码后的储备量连同 slot 写入 Redis，交易构建直接读取，不再每次通过 RPC 查询。
+
+账户只在变化时推送，条目本身的写入时间不能说明数据是否最新。
+镜像每次（重新）建立订阅时生成新的 session，条目和心跳都带有 session，
+只有心跳未过期且 session 与心跳一致的条目才有效；
+订阅中断时心跳立即失效，镜像进程退出后心跳过期，读取方都回退到 RPC 查询。
+"""
+
+import struct
+import time
+from dataclasses import asdict
+from enum import Enum
+
+import aioredis
+import orjson as json
+from solbot_common.config import settings
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
+from solbot_common.types.raydium import AmmV4PoolKeys
+from solbot_common.utils.quote import AmmV4Curve, Curve, PumpCurve
+from solbot_common.utils.utils import get_bonding_curve_pda
+from solders.pubkey import Pubkey  # type: ignore
+
+from .constants import (
+    POOL_STATE_ACCOUNT_PREFIX,
+    POOL_STATE_HEARTBEAT_KEY,
+    POOL_STATE_TRACKED_KEY,
+)
+from .rayidum import get_preferred_pool
+
+BONDING_CURVE_SIZE = struct.calcsize("<QQQQQQ?")
+# SPL token 账户中 amount (u64) 的偏移：mint (32) + owner (32)
+TOKEN_ACCOUNT_AMOUNT_OFFSET = 64
+# 条目的过期时间，订阅期间账户没有变化时条目不会重写
+ENTRY_EXPIRATION = 7 * 24 * 3600
+
+
+class PoolAccountKind(str, Enum):
+    BONDING_CURVE = "bonding_curve"
+    TOKEN_ACCOUNT = "token_account"
+
+
+def decode_pool_account(kind: PoolAccountKind, data: bytes) -> dict:
+    """解码账户的原始数据"""
+    if kind == PoolAccountKind.BONDING_CURVE:
+        return asdict(BondingCurveAccount.from_buffer(data[:BONDING_CURVE_SIZE]))
+    offset = TOKEN_ACCOUNT_AMOUNT_OFFSET
+    return {"amount": int.from_bytes(data[offset : offset + 8], "little")}
+
+
+class PoolStateCache:
+    def __init__(self, redis: aioredis.Redis, max_age: float | None = None):
+        """
+        Args:
+            redis: Redis客户端实例
+            max_age: 心跳的最大有效时间（秒），默认使用配置
+        """
+        self.redis = redis
+        self.max_age = settings.pool_state.max_age if max_age is None else max_age
+
+    @staticmethod
+    def _key(account: Pubkey | str) -> str:
+        return f"{POOL_STATE_ACCOUNT_PREFIX}:{account}"
+
+    async def get_accounts(self, *accounts: Pubkey) -> list[dict | None]:
+        """在一次 MGET 中读取心跳和账户，过期或不在镜像中的账户为 None
+
+        Returns:
+            list[dict | None]: 每个账户的 {"slot", "kind", "data"}
+        """
+        values = await self.redis.mget(
+            POOL_STATE_HEARTBEAT_KEY, *(self._key(account) for account in accounts)
+        )
+        if values[0] is None:
+            return [None] * len(accounts)
+        heartbeat = json.loads(values[0])
+        if time.time() - heartbeat["ts"] > self.max_age:
+            return [None] * len(accounts)
+
+        result: list[dict | None] = []
+        for value in values[1:]:
+            entry = json.loads(value) if value is not None else None
+            if entry is None or entry["session"] != heartbeat["session"]:
+                result.append(None)
+            else:
+                result.append(entry)
+        return result
+
+    async def get_bonding_curve(self, bonding_curve: Pubkey) -> BondingCurveAccount | None:
+        """读取镜像中的 bonding curve，过期时返回 None"""
+        (entry,) = await self.get_accounts(bonding_curve)
+        if entry is None or entry["kind"] != PoolAccountKind.BONDING_CURVE:
+            return None
+        return BondingCurveAccount(**entry["data"])
+
+    async def get_token_amounts(self, *token_accounts: Pubkey) -> list[int] | None:
+        """读取镜像中 token 账户（池子 vault）的余额，任一账户过期时返回 None"""
+        entries = await self.get_accounts(*token_accounts)
+        if any(
+            entry is None or entry["kind"] != PoolAccountKind.TOKEN_ACCOUNT for entry in entries
+        ):
+            return None
+        return [entry["data"]["amount"] for entry in entries]  # type: ignore[index]
+
+    async def get_curve(self, mint: Pubkey | str) -> Curve | None:
+        """读取代币当前的储备快照，用于批量报价
+
+        未发射的代币读取 bonding curve，已发射的读取 Raydium 池子的 vault，
+        镜像中没有时返回 None，并记录该代币，镜像在下次同步时订阅。
+        """
+        mint = Pubkey.from_string(mint) if isinstance(mint, str) else mint
+        bonding_curve = await self.get_bonding_curve(
+            get_bonding_curve_pda(mint, PUMP_FUN_PROGRAM)
+        )
+        if bonding_curve is not None and not bonding_curve.complete:
+            return PumpCurve.from_account(bonding_curve)
+
+        pool_data = await get_preferred_pool(mint)
+        if pool_data is not None:
+            pool_keys = AmmV4PoolKeys.from_pool_data(
+                pool_id=pool_data["pool_id"],
+                amm_data=pool_data["amm_data"],
+                market_data=pool_data["market_data"],
+            )
+            amounts = await self.get_token_amounts(pool_keys.quote_vault, pool_keys.base_vault)
+            if amounts is not None:
+                return AmmV4Curve.from_vault_amounts(pool_keys, *amounts)
+        await self.track(mint)
+        return None
+
+    async def track(self, mint: Pubkey | str) -> None:
+        """记录交易过的代币，镜像在 track_ttl 内保持订阅"""
+        await self.redis.zadd(POOL_STATE_TRACKED_KEY, {str(mint): time.time()})
+
+    async def get_tracked_mints(self, ttl: int) -> list[str]:
+        """读取 ttl 秒内交易过的代币，并移除更早的记录"""
+        since = time.time() - ttl
+        await self.redis.zremrangebyscore(POOL_STATE_TRACKED_KEY, "-inf", since)
+        mints = await self.redis.zrangebyscore(POOL_STATE_TRACKED_KEY, since, "+inf")
+        return [mint.decode() if isinstance(mint, bytes) else mint for mint in mints]
+
+    async def put(
+        self,
+        session: str,
+        account: Pubkey,
+        slot: int,
+        kind: PoolAccountKind,
+        data: dict,
+    ) -> None:
+        """写入账户的镜像（由 cache-preloader 调用）"""
+        value = {"session": session, "slot": slot, "kind": kind.value, "data": data}
+        await self.redis.set(self._key(account), json.dumps(value), ex=ENTRY_EXPIRATION)
+
+    async def delete(self, *accounts: Pubkey) -> None:
+        if accounts:
+            await self.redis.delete(*(self._key(account) for account in accounts))
+
+    async def heartbeat(self, session: str, slot: int) -> None:
+        """写入心跳（由 cache-preloader 调用）"""
+        value = {"session": session, "slot": slot, "ts": time.time()}
+        await self.redis.set(POOL_STATE_HEARTBEAT_KEY, json.dumps(value))
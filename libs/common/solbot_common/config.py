@@ -107,11 +107,32 @@ class OKLineConfig(BaseModel):
 
 
 
+class DedupRuleConfig(BaseModel):
+    # 组成去重键的 TxEvent 字段，例如 ["signature"] 或 ["who", "mint", "tx_direction"]
+    fields: list[str]
+    # 去重窗口（秒）
+    window: int
+
+
 class MonitorConfig(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     mode: str = "wss"  # or "geyser"
     wallets: list[Pubkey] = Field(default_factory=list)
+    # 入队前丢弃签名者 token 余额没有变化的交易
+    prefilter: bool = True
+    # 预过滤时是否要求交易调用了 SWAP_PROGRAMS 中的程序，未知程序的 swap 会被丢弃
+    require_swap_program: bool = False
+    # 交易解析 worker 数量
+    worker_num: int = 2
+    # 每次从 Redis 出队的最大交易数
+    worker_batch_size: int = 16
+    # wss 模式下直接从日志中解析 pump.fun 买入，跳过获取交易详情
+    log_fast_path: bool = True
+    # 交易事件写入 stream 前的去重规则，事件需要通过所有规则
+    tx_event_dedup: list[DedupRuleConfig] = [DedupRuleConfig(fields=["signature"], window=3600)]
+    # 本地去重缓存的最大键数，命中时不访问 Redis
+    tx_event_dedup_local_size: int = 100_000
 
     @field_validator("mode", mode="after")
     def validate_mode(cls, value: str) -> str:
@@ -124,10 +145,31 @@ class MonitorConfig(BaseModel):
         return [Pubkey.from_string(wallet) for wallet in value]
 
 
+class GeyserEndpointConfig(BaseModel):
+    endpoint: str
+    api_key: str = ""
+
+
 class GeyserConfig(BaseModel):
     enable: bool = False
     endpoint: str = ""
     api_key: str = ""
+    # 额外的 Geyser 节点，与主节点同时订阅，每笔交易只处理最先到达的一次
+    extra_endpoints: list[GeyserEndpointConfig] = []
+    # 解码进程数，为 0 时在事件循环中解码
+    decode_workers: int = 0
+    # 同时在解码进程池中的最大响应数
+    decode_max_in_flight: int = 64
+    # 队列深度等指标的日志输出间隔（秒）
+    metrics_interval: int = 60
+    # 单个过滤器 account_include 的最大账户数，超过后拆分到多个过滤器
+    max_accounts_per_filter: int = 1000
+    # 合并订阅变更的时间窗口（秒）
+    subscribe_debounce: float = 0.1
+    # 断线重连后每个钱包最多补齐的交易数，为 0 时不补齐
+    backfill_max_signatures: int = 100
+    # 检查点落后当前 slot 超过该值时不补齐（约 1 小时），为 0 时不限制
+    backfill_max_slot_gap: int = 9000
 
 
 class RPCConfig(BaseModel):
@@ -155,6 +197,22 @@ class TradingConfig(BaseModel):
     preflight_check: bool = False
     use_jito: bool = True
     jito_api: str = "https://mainnet.block-engine.jito.wtf"
+    # 跟单同时处理的最大交易事件数，同一目标钱包的交易事件按顺序处理
+    copytrade_concurrency: int = 10
+    # 交易事件积压达到 copytrade_lag_threshold 时自动扩容，最多扩容到 copytrade_max_concurrency
+    copytrade_max_concurrency: int = 40
+    copytrade_lag_threshold: int = 20
+    # 跟单交易的截止时间 = 源交易的区块时间 + 最大延迟（秒），超过截止时间的跟单交易直接丢弃
+    copytrade_buy_max_delay: float = 10
+    copytrade_sell_max_delay: float = 15
+    # 按 (用户, token, 路由) 缓存指令模板的有效期（秒），0 表示不缓存
+    swap_template_ttl: int = 300
+    # 签名私钥在内存中以进程密钥异或后保存
+    keypair_vault_seal: bool = False
+    # 定期按启用钱包重新加载签名私钥的间隔（秒），补偿错过的用户钱包事件，0 表示只在启动时加载
+    keypair_vault_reload_interval: int = 300
+    # 以独立的消费组记录每一笔交易事件
+    swap_audit: bool = False
 
     @field_validator("jito_api", mode="before")
     def validate_jito_api(cls, value: str) -> str:
@@ -175,9 +233,30 @@ class APIConfig(BaseModel):
     shyft_api_key: str
 
 
+class RetentionConfig(BaseModel):
+    # stream 保留最近多少秒的消息，写入时以 XADD MINID ~ 近似裁剪
+    stream_window: int = 3600
+    # 按 stream 名称前缀覆盖保留时间（秒），最长的前缀优先，死信队列默认保留 7 天
+    stream_windows: dict[str, int] = {"swap_event:dlq": 7 * 24 * 3600}
+    # stream 条数上限，由后台任务以 XTRIM MAXLEN ~ 兜底，防止突发流量占满内存
+    stream_maxlen: int = 100_000
+    # 列表（队列）的长度上限，超出时丢弃最旧的消息
+    list_maxlen: int = 10_000
+    # 按列表名称前缀覆盖长度上限
+    list_maxlens: dict[str, int] = {}
+    # 后台任务裁剪 stream、输出各频道长度和内存占用的间隔（秒），0 表示不运行
+    report_interval: int = 300
+
+
 class DBConfig(BaseModel):
     mysql: MySQLDsn = Field(..., alias="mysql_url")
     redis: RedisDsn = Field(..., alias="redis_url")
+    # stream 消息的编码方式，json 便于调试，msgpack 体积约为 json 的一半
+    stream_codec: Literal["json", "msgpack"] = "json"
+    # 服务之间的消息传输方式，memory 仅在所有服务运行在同一个进程中时可用
+    transport: Literal["redis", "memory"] = "redis"
+    # stream 和列表的保留策略
+    retention: RetentionConfig = RetentionConfig()
 
     @property
     def mysql_url(self):
@@ -235,6 +314,20 @@ class SentryConfig(BaseModel):
     traces_sample_rate: float = 1.0
 
 
+class PoolStateConfig(BaseModel):
+    # 是否启用池子状态镜像：cache-preloader 订阅 bonding curve 和 AMM vault 账户，
+    # 交易构建优先读取镜像中的储备量
+    enable: bool = False
+    # 镜像心跳超过该时间（秒）未更新时视为过期，回退到 RPC 查询
+    max_age: float = 5
+    # 心跳写入间隔（秒）
+    heartbeat_interval: float = 1
+    # 重新计算需要镜像的代币（持仓与交易过的代币）的间隔（秒）
+    refresh_interval: int = 10
+    # 交易过的代币在多长时间（秒）内保持镜像
+    track_ttl: int = 24 * 3600
+
+
 class Settings(TomlSettings):
     model_config = SettingsConfigDict(
         env_file_encoding="utf-8",
@@ -253,6 +346,7 @@ class Settings(TomlSettings):
     tg_bot: TgBotConfig
     sentry: SentryConfig
     okline: OKLineConfig
+    pool_state: PoolStateConfig = PoolStateConfig()
 
 class LazySettings:
     _instance = None
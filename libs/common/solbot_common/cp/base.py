@@ -1,12 +1,18 @@
 import asyncio
+import os
+import socket
 import time
 from collections.abc import Callable, Coroutine
+from functools import partial
 from typing import Any, Generic, Protocol, TypeVar
 
 import aioredis
 from loguru import logger
 from typing_extensions import Self
 
+from .codec import Codec, decode_fields, encode_fields, get_codec
+from .transport import RedisTransport, Transport
+
 
 class DataProtocol(Protocol):
     def to_json(self) -> str: ...
@@ -18,11 +24,27 @@ class DataProtocol(Protocol):
 T = TypeVar("T", bound=DataProtocol)
 MAX_PROCESS_TIME = 15
 
+def unique_consumer_name(prefix: str) -> str:
+    """生成进程唯一的消费者名，同一消费组可以运行多个副本"""
+    return f"{prefix}:{socket.gethostname()}:{os.getpid()}"
+
 
 class Producer(Generic[T]):
-    def __init__(self, redis_client: aioredis.Redis, channel: str) -> None:
+    def __init__(
+        self,
+        redis_client: aioredis.Redis | None,
+        channel: str,
+        codec: Codec | None = None,
+        transport: Transport | None = None,
+    ) -> None:
         self.redis = redis_client
         self.channel = channel
+        if codec is None:
+            from solbot_common.config import settings
+
+            codec = get_codec(settings.db.stream_codec)
+        self.codec = codec
+        self.transport = transport or RedisTransport(redis_client)
 
     async def produce(self, data: T) -> None:
         """Produces a swap event to Redis Stream.
@@ -30,10 +52,9 @@ class Producer(Generic[T]):
         Args:
             swap_event: Swap event data as string
         """
-        await self.redis.xadd(
-            name=self.channel,
-            fields={"data": data.to_json(), "timestamp": int(time.time())},
-            maxlen=10000,  # Keep last 10k events
+        await self.transport.append(
+            self.channel,
+            {**encode_fields(data, self.codec), "timestamp": int(time.time())},
         )
 
 
@@ -42,13 +63,25 @@ class Consumer(Generic[T]):
         self,
         channel: str,
         data_class: type[T],
-        redis_client: aioredis.Redis,
+        redis_client: aioredis.Redis | None,
         consumer_group: str,
         consumer_name: str,
         batch_size: int = 10,
         poll_timeout_ms: int = 5000,
         max_retries: int = 3,
         dead_letter_channel: str | None = None,
+        concurrency: int = 1,
+        key_func: Callable[[T], str] | None = None,
+        max_concurrency: int | None = None,
+        lag_threshold: int | None = None,
+        lag_check_interval: float = 5,
+        max_process_time: float | None = MAX_PROCESS_TIME,
+        claim_min_idle_ms: int = 60_000,
+        maintenance_interval: float = 10,
+        dead_consumer_timeout: float = 300,
+        transport: Transport | None = None,
+        shared_stream: bool = False,
+        filter_func: Callable[[T], bool] | None = None,
     ) -> None:
         """Initialize the transaction event consumer.
 
@@ -60,10 +93,28 @@ class Consumer(Generic[T]):
             poll_timeout_ms: Timeout in milliseconds for blocking read
             max_retries: Maximum number of retries for failed messages
             dead_letter_channel: Channel name for dead letter queue
+            concurrency: 同时处理的最大消息数，1 表示逐条处理
+            key_func: 从消息中取出顺序键（如用户公钥、目标钱包），相同键的消息按到达顺序处理，
+                不同键的消息并发处理；为 None 时不保证顺序
+            max_concurrency: 积压时自动扩容的并发上限，为 None 时不扩容
+            lag_threshold: 消费组积压的消息数达到该值时扩容
+            lag_check_interval: 检查积压的间隔（秒）
+            max_process_time: 消息的最长等待时间（秒），超过后移入死信队列，为 None 时不检查
+            claim_min_idle_ms: 其他消费者的待处理消息空闲超过该时间（毫秒）后由本消费者认领
+            maintenance_interval: 心跳、认领空闲消息和清理失效消费者的间隔（秒）
+            dead_consumer_timeout: 消费者超过该时间（秒）没有心跳且没有待处理消息时从消费组中删除
+            transport: 消息传输后端，为 None 时使用 redis_client
+            shared_stream: stream 是否由多个消费组共同消费。共享时移入死信队列不删除原消息，
+                也不能重试（重试会重新写入 stream，其他消费组会再收到一次）
+            filter_func: 返回 False 的消息直接确认、不交给 callback，用于共享 stream 中
+                只处理部分消息的消费组
         """
+        if shared_stream and max_retries > 0:
+            raise ValueError("Retries are not supported on a shared stream, set max_retries=0")
         self.channel = channel
         self.data_class = data_class
         self.redis = redis_client
+        self.transport = transport or RedisTransport(redis_client)
         self.consumer_group = consumer_group
         self.consumer_name = consumer_name
         self.batch_size = batch_size
@@ -72,46 +123,40 @@ class Consumer(Generic[T]):
         self.dead_letter_channel = dead_letter_channel or f"{channel}:dead"
         self.is_running = False
         self.callback: Callable[[T], Coroutine[Any, Any, None]] | None = None
+        self.max_process_time = max_process_time
+        self.shared_stream = shared_stream
+        self.filter_func = filter_func
+        # --- 多副本 ---
+        self.claim_min_idle_ms = claim_min_idle_ms
+        self.maintenance_interval = maintenance_interval
+        self.dead_consumer_timeout = dead_consumer_timeout
+        # 正在处理的消息 ID，认领时跳过
+        self._processing: set[str] = set()
+        # --- 并发处理 ---
+        self.key_func = key_func
+        self.base_concurrency = max(concurrency, 1)
+        self.concurrency = self.base_concurrency
+        self.max_concurrency = max(max_concurrency or self.base_concurrency, self.base_concurrency)
+        self.lag_threshold = lag_threshold
+        self.lag_check_interval = lag_check_interval
+        self.task_pool: set[asyncio.Task] = set()
+        # 顺序键 -> 该键最后一条消息的处理任务
+        self._key_tails: dict[str, asyncio.Task] = {}
+        # 正在处理的消息数，不超过 concurrency
+        self._in_flight = 0
+        # 已分发、等待前一条同键消息或并发名额的消息数
+        self._waiting = 0
+        self._slots = asyncio.Condition()
+        # --- 批量确认 ---
+        # 处理成功、等待确认的消息 ID，每批处理完成后用一条 XACK 确认
+        self._acks: list[str] = []
+        self._ack_event = asyncio.Event()
 
     async def setup(self) -> None:
         """Setup the consumer group if it doesn't exist."""
-        try:
-            # Create consumer group if not exists
-            # Use $ as start ID to only process new messages
-            await self.redis.xgroup_create(
-                name=self.channel,
-                groupname=self.consumer_group,
-                mkstream=True,
-                id="$",
-            )
-        except aioredis.ResponseError as e:
-            if "BUSYGROUP" not in str(e):
-                raise
-            logger.info(f"Consumer group {self.consumer_group} already exists")
-
-            # 检查是否需要重置消费者组位置
-            stream_info = await self.redis.xinfo_stream(self.channel)
-            if stream_info["length"] > 0:  # 如果队列中有消息
-                group_info = await self.redis.xinfo_groups(self.channel)
-                for group in group_info:
-                    if group["name"] == self.consumer_group:
-                        if group["pending"] == 0:  # 如果没有待处理的消息
-                            try:
-                                # 删除旧的消费者组
-                                await self.redis.xgroup_destroy(self.channel, self.consumer_group)
-                                # 创建新的消费者组，从头开始消费
-                                await self.redis.xgroup_create(
-                                    name=self.channel,
-                                    groupname=self.consumer_group,
-                                    mkstream=True,
-                                    id="0",  # 从头开始
-                                )
-                                logger.info(
-                                    f"Reset consumer group {self.consumer_group} to start from beginning"
-                                )
-                            except Exception as e:
-                                logger.error(f"Failed to reset consumer group: {e}")
-                        break
+        # 消费组已存在时不重置位置：其他副本可能正在消费，
+        # 未确认的消息通过 process_pending / claim_idle 恢复
+        await self.transport.create_group(self.channel, self.consumer_group)
 
     def register_callback(self, callback: Callable[[T], Coroutine[Any, Any, None]]) -> None:
         """Register a callback function to process events.
@@ -125,73 +170,61 @@ class Consumer(Generic[T]):
         """Process any pending messages for this consumer."""
         logger.info(f"Processing pending messages for {self.consumer_name}")
         try:
-            # 首先检查流中的所有消息
-            stream_info = await self.redis.xinfo_stream(self.channel)
-            logger.info(
-                f"Stream info - length: {stream_info['length']}, groups: {stream_info['groups']}, last_id: {stream_info['last-generated-id']}"
-            )
-
-            # 检查消费者组信息
-            group_info = await self.redis.xinfo_groups(self.channel)
-            for group in group_info:
-                logger.info(
-                    f"Group {group['name']} - pending: {group['pending']}, consumers: {group['consumers']}, last_delivered_id: {group['last-delivered-id']}"
-                )
-
-            # 检查消费者信息
-            consumers_info = await self.redis.xinfo_consumers(self.channel, self.consumer_group)
-            for consumer in consumers_info:
-                logger.info(
-                    f"Consumer {consumer['name']} - pending: {consumer['pending']}, idle: {consumer['idle']}"
-                )
+            await self.transport.log_info(self.channel, self.consumer_group)
 
             # 读取待处理的消息
-            pending = await self.redis.xreadgroup(
-                groupname=self.consumer_group,
-                consumername=self.consumer_name,
-                streams={self.channel: "0"},  # 0 means all pending messages
+            pending = await self.transport.read_group(
+                self.channel,
+                self.consumer_group,
+                self.consumer_name,
                 count=self.batch_size,
+                pending=True,
             )
 
-            logger.info(f"Found pending messages: {pending is not None and len(pending) > 0}")
-            if pending:
-                for stream_name, messages in pending:
-                    logger.info(f"Processing {len(messages)} messages from stream {stream_name}")
-                    for message_id, fields in messages:
-                        logger.info(f"Processing pending message {message_id}")
-                        logger.debug(f"Message fields: {fields}")
-                        try:
-                            await self._process_message(message_id, fields)
-                        except Exception as e:
-                            logger.error(f"Error processing pending message {message_id}: {e}")
-            else:
-                # 如果没有待处理的消息，检查是否有新消息
-                new_messages = await self.redis.xread(
-                    streams={self.channel: "0-0"},
-                    count=1,  # 从头开始读取所有消息
-                )
-                if new_messages:
-                    logger.info("Found unassigned messages in the stream")
-                    for stream_name, messages in new_messages:
-                        logger.info(f"Stream {stream_name} has {len(messages)} unassigned messages")
-                else:
-                    logger.info("No messages found in the stream")
+            logger.info(f"Found {len(pending)} pending messages")
+            for message_id, fields in pending:
+                if fields is None:
+                    # 已从 stream 删除的消息直接确认
+                    self._ack(message_id)
+                    continue
+                logger.info(f"Processing pending message {message_id}")
+                logger.debug(f"Message fields: {fields}")
+                try:
+                    await self._process_message(message_id, fields)
+                except Exception as e:
+                    logger.error(f"Error processing pending message {message_id}: {e}")
+            await self.flush_acks()
 
         except Exception as e:
             logger.error(f"Error processing pending messages: {e}")
 
-    async def _process_message(self, message_id: str, fields: dict) -> None:
+    async def _process_message(self, message_id: str, fields: dict, data: T | None = None) -> None:
         """Process a single message and acknowledge it.
 
         Args:
             message_id: ID of the message in Redis Stream
             fields: Message fields containing the event data
+            data: 已经反序列化的消息数据，为 None 时从 fields 中反序列化
         """
         logger.debug(f"Processing message {message_id}: {fields}")
+        self._processing.add(message_id)
+        try:
+            await self._handle_message(message_id, fields, data)
+        finally:
+            self._processing.discard(message_id)
+
+    async def _handle_message(self, message_id: str, fields: dict, data: T | None) -> None:
         retry_count = int(fields.get("retry_count", 0))
         try:
+            if self.filter_func is not None:
+                if data is None:
+                    data = decode_fields(self.data_class, fields)
+                if not self.filter_func(data):
+                    self._ack(message_id)
+                    return
+
             timestamp = float(fields.get("timestamp", 0))
-            if time.time() - timestamp > MAX_PROCESS_TIME:
+            if self.max_process_time is not None and time.time() - timestamp > self.max_process_time:
                 logger.warning(
                     f"Message {message_id} is too old, moving to dead letter queue. Timestamp: {timestamp}"
                 )
@@ -199,11 +232,12 @@ class Consumer(Generic[T]):
                 return
 
             if self.callback is not None:
-                data = self.data_class.from_json(fields["data"])
+                if data is None:
+                    data = decode_fields(self.data_class, fields)
                 await self.callback(data)
 
             # Acknowledge the message on successful processing
-            await self.redis.xack(self.channel, self.consumer_group, message_id)
+            self._ack(message_id)
 
         except Exception as e:
             logger.exception(f"Error processing message {message_id}: {e}")
@@ -220,10 +254,43 @@ class Consumer(Generic[T]):
             fields["last_error"] = str(e)
             fields["last_retry_time"] = str(time.time())
 
-            # Add back to stream for retry
-            await self.redis.xadd(self.channel, fields)
-            # Acknowledge the original message
-            await self.redis.xack(self.channel, self.consumer_group, message_id)
+            # Add back to stream for retry and acknowledge the original message
+            await self._move_message(message_id, fields, self.channel, delete=False)
+
+    def _ack(self, message_id: str) -> None:
+        self._acks.append(message_id)
+        self._ack_event.set()
+
+    async def flush_acks(self) -> None:
+        """用一条 XACK 确认所有处理成功的消息"""
+        if not self._acks:
+            return
+        ids, self._acks = self._acks, []
+        try:
+            await self.transport.ack(self.channel, self.consumer_group, *ids)
+        except Exception as e:
+            logger.error(f"Error acknowledging {len(ids)} messages: {e}")
+            # 下次再确认，确认失败的消息仍在 PEL 中
+            self._acks = ids + self._acks
+
+    async def _ack_flusher(self) -> None:
+        """并发处理时持续确认已完成的消息
+
+        一次 XACK 往返期间完成的消息会在下一次 XACK 中一并确认。
+        """
+        while self.is_running:
+            try:
+                await self._ack_event.wait()
+                self._ack_event.clear()
+                await self.flush_acks()
+            except asyncio.CancelledError:
+                break
+
+    async def _move_message(self, message_id: str, fields: dict, target: str, delete: bool) -> str:
+        """将消息写入 target 并确认（可选删除）原消息，Redis 后端通过 Lua 脚本一次往返完成"""
+        return await self.transport.move(
+            self.channel, self.consumer_group, message_id, target, fields, delete
+        )
 
     async def _move_to_dead_letter(self, message_id: str, fields: dict, error: str) -> None:
         """Move a message to the dead letter queue.
@@ -238,19 +305,216 @@ class Consumer(Generic[T]):
         fields["moved_to_dlq_at"] = str(time.time())
 
         try:
-            # Add to dead letter queue
-            await self.redis.xadd(self.dead_letter_channel, fields)
-            # Acknowledge the original message
-            await self.redis.xack(self.channel, self.consumer_group, message_id)
-            # Delete the message from original stream
-            await self.redis.xdel(self.channel, message_id)
-            logger.info(
-                f"Message {message_id} moved to dead letter queue and deleted from original stream"
+            # Add to dead letter queue, acknowledge and delete the original message
+            # 共享 stream 中的消息其他消费组可能还未读取，不删除
+            await self._move_message(
+                message_id, fields, self.dead_letter_channel, delete=not self.shared_stream
             )
+            logger.info(f"Message {message_id} moved to dead letter queue")
         except Exception as e:
             logger.error(f"Error moving message {message_id} to dead letter queue: {e}")
             raise
 
+    async def heartbeat(self) -> None:
+        """记录本消费者的心跳时间"""
+        await self.transport.heartbeat(self.channel, self.consumer_group, self.consumer_name)
+
+    async def refresh_processing(self) -> None:
+        """重置本消费者正在处理的消息的空闲时间
+
+        处理时间超过 claim_min_idle_ms 的消息不会被其他副本认领并重复处理。
+        """
+        if self._processing:
+            await self.transport.refresh_idle(
+                self.channel, self.consumer_group, self.consumer_name, *self._processing
+            )
+
+    async def claim_idle(self) -> int:
+        """认领其他消费者空闲超过 claim_min_idle_ms 的待处理消息并处理
+
+        用于接管崩溃的副本留下的消息。返回认领的消息数。
+        """
+        start = "0-0"
+        claimed = 0
+        while True:
+            start, messages = await self.transport.claim_idle(
+                self.channel,
+                self.consumer_group,
+                self.consumer_name,
+                self.claim_min_idle_ms,
+                start,
+                self.batch_size,
+            )
+            for message_id, fields in messages:
+                if fields is None:
+                    # 已从 stream 删除的消息直接确认
+                    self._ack(message_id)
+                    continue
+                if message_id in self._processing:
+                    continue
+                claimed += 1
+                logger.info(f"Claimed idle message {message_id} for {self.consumer_name}")
+                if self.max_concurrency > 1:
+                    await self._dispatch(message_id, fields)
+                else:
+                    await self._process_message(message_id, fields)
+            if self.max_concurrency <= 1:
+                await self.flush_acks()
+            if start == "0-0":
+                return claimed
+
+    async def cleanup_dead_consumers(self) -> list[str]:
+        """删除超过 dead_consumer_timeout 没有心跳且没有待处理消息的消费者
+
+        有待处理消息的消费者先由 claim_idle 接管其消息，之后再删除，避免丢失消息。
+        """
+        now = time.time()
+        heartbeats = await self.transport.get_heartbeats(self.channel, self.consumer_group)
+        consumers = await self.transport.get_consumers(self.channel, self.consumer_group)
+        removed = []
+        for consumer in consumers:
+            name = consumer["name"]
+            if name == self.consumer_name:
+                continue
+            last_heartbeat = heartbeats.pop(name, None)
+            if last_heartbeat is not None:
+                alive = now - float(last_heartbeat) < self.dead_consumer_timeout
+            else:
+                alive = consumer["idle"] < self.dead_consumer_timeout * 1000
+            if alive or consumer["pending"] > 0:
+                continue
+            await self.transport.delete_consumer(self.channel, self.consumer_group, name)
+            await self.transport.remove_heartbeats(self.channel, self.consumer_group, name)
+            removed.append(name)
+            logger.info(f"Removed dead consumer {name} from group {self.consumer_group}")
+
+        # 已不在消费组中的消费者的心跳
+        stale = [
+            name
+            for name, last_heartbeat in heartbeats.items()
+            if name != self.consumer_name and now - float(last_heartbeat) >= self.dead_consumer_timeout
+        ]
+        if stale:
+            await self.transport.remove_heartbeats(self.channel, self.consumer_group, *stale)
+        return removed
+
+    async def _maintain(self) -> None:
+        """定期发送心跳、刷新正在处理的消息、认领空闲消息、清理失效的消费者"""
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.maintenance_interval)
+                await self.heartbeat()
+                await self.refresh_processing()
+                await self.claim_idle()
+                await self.cleanup_dead_consumers()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error maintaining consumer {self.consumer_name}: {e}")
+
+    async def _acquire_slot(self) -> None:
+        async with self._slots:
+            await self._slots.wait_for(lambda: self._in_flight < self.concurrency)
+            self._waiting -= 1
+            self._in_flight += 1
+
+    async def _release_slot(self, acquired: bool) -> None:
+        async with self._slots:
+            if acquired:
+                self._in_flight -= 1
+            else:
+                self._waiting -= 1
+            # 分发和占用名额等待的条件不同，全部唤醒
+            self._slots.notify_all()
+
+    async def _dispatch(self, message_id: str, fields: dict) -> None:
+        """并发处理消息，已分发未完成的消息数达到 concurrency + batch_size 时等待
+
+        相同顺序键的消息串成一条链，前一条处理完成（无论成功与否）后才开始处理下一条。
+        等待前一条的消息不占用并发名额，同一个键的突发消息不会阻塞其他键。
+        """
+        data = None
+        key = message_id
+        try:
+            data = decode_fields(self.data_class, fields)
+            if self.key_func is not None:
+                key = self.key_func(data)
+        except Exception:
+            # 无法解析的消息交给 _process_message 走重试/死信流程
+            data = None
+
+        self._processing.add(message_id)
+        async with self._slots:
+            await self._slots.wait_for(
+                lambda: self._in_flight + self._waiting < self.concurrency + self.batch_size
+            )
+            self._waiting += 1
+        previous = self._key_tails.get(key)
+        task = asyncio.create_task(self._process_in_order(previous, message_id, fields, data))
+        self._key_tails[key] = task
+        self.task_pool.add(task)
+        task.add_done_callback(partial(self._on_task_done, key))
+
+    async def _process_in_order(
+        self,
+        previous: asyncio.Task | None,
+        message_id: str,
+        fields: dict,
+        data: T | None,
+    ) -> None:
+        acquired = False
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            # 前一条同键消息完成后才占用并发名额
+            await self._acquire_slot()
+            acquired = True
+            await self._process_message(message_id, fields, data)
+        except Exception as e:
+            logger.exception(f"Error processing message {message_id}: {e}")
+        finally:
+            await self._release_slot(acquired)
+
+    def _on_task_done(self, key: str, task: asyncio.Task) -> None:
+        self.task_pool.discard(task)
+        if self._key_tails.get(key) is task:
+            del self._key_tails[key]
+
+    async def get_lag(self) -> int:
+        """消费组积压的消息数，即 last-delivered-id 之后的消息数
+
+        Redis 7 之前的版本没有 lag 字段，通过 XRANGE 统计，最多统计到 lag_threshold 条。
+        """
+        return await self.transport.lag(
+            self.channel, self.consumer_group, self.lag_threshold or self.batch_size
+        )
+
+    async def _autoscale(self) -> None:
+        """积压达到阈值时将并发数翻倍，积压清空后逐步缩回"""
+        assert self.lag_threshold is not None
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.lag_check_interval)
+                lag = await self.get_lag()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error checking lag of {self.channel}: {e}")
+                continue
+
+            if lag >= self.lag_threshold and self.concurrency < self.max_concurrency:
+                concurrency = min(self.concurrency * 2, self.max_concurrency)
+            elif lag == 0 and self.concurrency > self.base_concurrency:
+                concurrency = max(self.concurrency // 2, self.base_concurrency)
+            else:
+                continue
+            logger.info(
+                f"Scale {self.consumer_name} concurrency {self.concurrency} -> {concurrency}, lag: {lag}"
+            )
+            async with self._slots:
+                self.concurrency = concurrency
+                self._slots.notify_all()
+
     async def start(self) -> None:
         """Start consuming messages from the stream."""
         if not self.callback:
@@ -259,28 +523,47 @@ class Consumer(Generic[T]):
         await self.setup()
         self.is_running = True
 
+        await self.heartbeat()
         # First process any pending messages
         await self.process_pending()
 
-        # Then start processing new messages
+        background_tasks = [asyncio.create_task(self._maintain())]
+        if self.max_concurrency > 1:
+            background_tasks.append(asyncio.create_task(self._ack_flusher()))
+        if self.lag_threshold is not None and self.max_concurrency > self.base_concurrency:
+            background_tasks.append(asyncio.create_task(self._autoscale()))
+
+        try:
+            await self._consume()
+        finally:
+            for task in background_tasks:
+                task.cancel()
+            await self.flush_acks()
+
+    async def _consume(self) -> None:
+        """Start processing new messages."""
         while self.is_running:
             try:
                 # Read new messages
-                messages = await self.redis.xreadgroup(
-                    groupname=self.consumer_group,
-                    consumername=self.consumer_name,
-                    streams={self.channel: ">"},  # > means new messages only
+                messages = await self.transport.read_group(
+                    self.channel,
+                    self.consumer_group,
+                    self.consumer_name,
                     count=self.batch_size,
-                    block=self.poll_timeout_ms,
+                    block_ms=self.poll_timeout_ms,
                 )
 
                 if not messages:
                     continue
 
-                logger.info(f"Processing {len(messages)} messages from stream {messages[0][0]}")
-                for stream, stream_messages in messages:
-                    for message_id, fields in stream_messages:
+                logger.info(f"Processing {len(messages)} messages from stream {self.channel}")
+                for message_id, fields in messages:
+                    if self.max_concurrency > 1:
+                        await self._dispatch(message_id, fields)
+                    else:
                         await self._process_message(message_id, fields)
+                if self.max_concurrency <= 1:
+                    await self.flush_acks()
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -291,6 +574,13 @@ class Consumer(Generic[T]):
         """Stop consuming messages."""
         self.is_running = False
 
+    async def join(self) -> None:
+        """等待正在处理的消息处理完成"""
+        if self.task_pool:
+            logger.info(f"Waiting for {len(self.task_pool)} tasks to complete...")
+            await asyncio.gather(*self.task_pool, return_exceptions=True)
+        await self.flush_acks()
+
 
 class ConsumerProducerBuilder(Generic[T]):
     def __init__(
@@ -311,6 +601,8 @@ class ConsumerProducerBuilder(Generic[T]):
         poll_timeout_ms: int = 5000,
         max_retries: int = 3,
         dead_letter_channel: str | None = None,
+        concurrency: int = 1,
+        key_func: Callable[[T], str] | None = None,
     ) -> Consumer[T]:
         return Consumer(
             channel=self.channel,
@@ -322,6 +614,8 @@ class ConsumerProducerBuilder(Generic[T]):
             poll_timeout_ms=poll_timeout_ms,
             max_retries=max_retries,
             dead_letter_channel=dead_letter_channel,
+            concurrency=concurrency,
+            key_func=key_func,
         )
 
     # def build_producer(self) -> Producer[T]:
@@ -0,0 +1,238 @@
+"""stream 消息的编解码
+
+消息体写在 stream 的 data 字段，编码方式写在 codec 字段，消费端按 codec 字段选择解码器，
+没有 codec 字段的旧消息按 JSON 解码，因此生产端和消费端可以分别升级。
+
+- json: 与 to_json / from_json 一致，可读，便于调试
+- msgpack: 二进制格式，字段名替换为字段标签（整数），公钥、签名以原始字节存储，
+  体积约为 JSON 的一半
+
+msgpack 格式为 [版本号, {字段标签: 值}]。字段标签是字段在 Schema.fields 中的下标，
+新增字段只能追加在末尾，不能调整顺序或删除（删除的字段保留占位）。未登记的字段按字段名写入，
+解码时原样交给 from_dict。
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Protocol, TypeVar
+
+import msgpack
+from pydantic import BaseModel
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+
+from solbot_common.types.swap import SwapEvent, SwapResult
+from solbot_common.types.trace import TraceContext
+from solbot_common.types.tx import TxEvent
+
+T = TypeVar("T")
+
+# stream 中记录编码方式的字段
+CODEC_FIELD = "codec"
+MSGPACK_VERSION = 1
+
+
+class Codec(Protocol):
+    name: str
+
+    def encode(self, data: Any) -> str | bytes: ...
+
+    def decode(self, data_class: type[T], payload: str | bytes) -> T: ...
+
+
+class JsonCodec:
+    name = "json"
+
+    def encode(self, data: Any) -> str:
+        return data.to_json()
+
+    def decode(self, data_class: type[T], payload: str | bytes) -> T:
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        return data_class.from_json(payload)  # type: ignore[attr-defined]
+
+
+@dataclass(frozen=True)
+class Schema:
+    # 字段标签 -> 字段名
+    fields: tuple[str, ...]
+    # 嵌套对象的字段
+    nested: dict[str, "Schema"] = field(default_factory=dict)
+    # 以原始字节存储的 base58 字段
+    base58: frozenset[str] = frozenset()
+    # 字段名 -> 字段标签
+    tags: dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "tags", {name: tag for tag, name in enumerate(self.fields)})
+
+
+TRACE_SCHEMA = Schema(fields=("trace_id", "source", "slot", "stamps"), base58=frozenset({"trace_id"}))
+TX_EVENT_SCHEMA = Schema(
+    fields=(
+        "signature",
+        "from_amount",
+        "from_decimals",
+        "to_amount",
+        "to_decimals",
+        "mint",
+        "who",
+        "tx_type",
+        "tx_direction",
+        "timestamp",
+        "pre_token_amount",
+        "post_token_amount",
+        "program_id",
+        "trace",
+    ),
+    nested={"trace": TRACE_SCHEMA},
+    base58=frozenset({"signature", "mint", "who", "program_id"}),
+)
+SWAP_EVENT_SCHEMA = Schema(
+    fields=(
+        "user_pubkey",
+        "swap_mode",
+        "input_mint",
+        "output_mint",
+        "amount",
+        "ui_amount",
+        "timestamp",
+        "amount_pct",
+        "swap_in_type",
+        "priority_fee",
+        "slippage_bps",
+        "by",
+        "dynamic_slippage",
+        "min_slippage_bps",
+        "max_slippage_bps",
+        "program_id",
+        "tx_event",
+        "trace",
+        "deadline",
+    ),
+    nested={"tx_event": TX_EVENT_SCHEMA, "trace": TRACE_SCHEMA},
+    base58=frozenset({"user_pubkey", "input_mint", "output_mint", "program_id"}),
+)
+SWAP_RESULT_SCHEMA = Schema(
+    fields=(
+        "swap_event",
+        "user_pubkey",
+        "submmit_time",
+        "by",
+        "transaction_hash",
+        "blocks_passed",
+        "swap_record",
+    ),
+    nested={"swap_event": SWAP_EVENT_SCHEMA},
+    base58=frozenset({"user_pubkey", "transaction_hash"}),
+)
+
+SCHEMAS: dict[type, Schema] = {
+    TraceContext: TRACE_SCHEMA,
+    TxEvent: TX_EVENT_SCHEMA,
+    SwapEvent: SWAP_EVENT_SCHEMA,
+    SwapResult: SWAP_RESULT_SCHEMA,
+}
+
+
+def _pack_base58(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    return _base58_to_bytes(value)
+
+
+# 钱包、mint 在消息之间大量重复，签名在同一条消息中出现多次（signature / trace_id）
+@lru_cache(maxsize=4096)
+def _base58_to_bytes(value: str) -> str | bytes:
+    """公钥（32 字节）和签名（64 字节）转为原始字节，其他值原样保留"""
+    try:
+        key = Pubkey.from_string(value) if len(value) <= 44 else Signature.from_string(value)
+    except ValueError:
+        return value
+    # 无法原样还原的写法保留字符串
+    if str(key) != value:
+        return value
+    return bytes(key)
+
+
+@lru_cache(maxsize=4096)
+def _unpack_base58(value: bytes) -> str:
+    if len(value) == 32:
+        return str(Pubkey.from_bytes(value))
+    return str(Signature.from_bytes(value))
+
+
+def _to_tagged(d: dict, schema: Schema) -> dict:
+    tagged: dict[int | str, Any] = {}
+    for key, value in d.items():
+        if key in schema.nested and isinstance(value, dict):
+            value = _to_tagged(value, schema.nested[key])
+        elif key in schema.base58:
+            value = _pack_base58(value)
+        tagged[schema.tags.get(key, key)] = value
+    return tagged
+
+
+def _from_tagged(tagged: dict, schema: Schema) -> dict:
+    d = {}
+    for key, value in tagged.items():
+        if isinstance(key, int):
+            if key >= len(schema.fields):
+                # 新版本增加的字段，旧版本不认识，丢弃
+                continue
+            key = schema.fields[key]
+        if key in schema.nested and isinstance(value, dict):
+            value = _from_tagged(value, schema.nested[key])
+        elif isinstance(value, bytes) and key in schema.base58:
+            value = _unpack_base58(value)
+        d[key] = value
+    return d
+
+
+def _to_dict(data: Any) -> dict:
+    if isinstance(data, BaseModel):
+        return data.model_dump(mode="json")
+    return data.to_dict()
+
+
+class MsgpackCodec:
+    name = "msgpack"
+
+    def encode(self, data: Any) -> bytes:
+        schema = SCHEMAS[type(data)]
+        return msgpack.packb([MSGPACK_VERSION, _to_tagged(_to_dict(data), schema)])
+
+    def decode(self, data_class: type[T], payload: str | bytes) -> T:
+        if isinstance(payload, str):
+            # decode_responses=True 的连接以 surrogateescape 解码二进制内容，这里还原为原始字节
+            payload = payload.encode("utf-8", "surrogateescape")
+        version, tagged = msgpack.unpackb(payload, strict_map_key=False)
+        if version > MSGPACK_VERSION:
+            raise ValueError(f"Unsupported msgpack payload version: {version}")
+        return data_class.from_dict(_from_tagged(tagged, SCHEMAS[data_class]))  # type: ignore[attr-defined]
+
+
+_CODECS: dict[str, Codec] = {}
+
+
+def get_codec(name: str = "json") -> Codec:
+    codec = _CODECS.get(name)
+    if codec is None:
+        if name == JsonCodec.name:
+            codec = JsonCodec()
+        elif name == MsgpackCodec.name:
+            codec = MsgpackCodec()
+        else:
+            raise ValueError(f"Unknown codec: {name}")
+        _CODECS[name] = codec
+    return codec
+
+
+def encode_fields(data: Any, codec: Codec) -> dict[str, str | bytes]:
+    """生成 stream 消息的 data 和 codec 字段"""
+    return {"data": codec.encode(data), CODEC_FIELD: codec.name}
+
+
+def decode_fields(data_class: type[T], fields: dict) -> T:
+    """按消息的 codec 字段解码 data 字段"""
+    return get_codec(fields.get(CODEC_FIELD, JsonCodec.name)).decode(data_class, fields["data"])
@@ -1,35 +1,43 @@
-"""跟单交易通知"""
+"""跟单交易通知
+
+跟单交易不再单独写入通知 stream，通知服务以独立的消费组读取 swap_event:new，
+只处理由跟单发起的交易。
+"""
 
 import aioredis
 
 from solbot_common.types import SwapEvent
 
-from .base import Consumer, Producer
+from .swap_event import DEAD_LETTER_CHANNEL, NOTIFY_COPYTRADE_GROUP, SwapEventConsumer
+from .transport import Transport
 
-NOTIFY_COPYTRADE_CHANNEL = "notify:copytrade"
-MAX_PROCESS_TIME = 15  # s
+# 通知晚于交易到达没有意义，但比交易的过期时间宽松，通知积压时仍然可以补发
+MAX_PROCESS_TIME = 60  # s
 
 
-class NotifyCopyTradeProducer(Producer[SwapEvent]):
-    def __init__(self, redis_client: aioredis.Redis) -> None:
-        super().__init__(redis_client=redis_client, channel=NOTIFY_COPYTRADE_CHANNEL)
+def _is_copytrade(swap_event: SwapEvent) -> bool:
+    return swap_event.by == "copytrade"
 
 
-class NotifyCopyTradeConsumer(Consumer[SwapEvent]):
+class NotifyCopyTradeConsumer(SwapEventConsumer):
     def __init__(
         self,
-        redis_client: aioredis.Redis,
-        consumer_group: str,
+        redis_client: aioredis.Redis | None,
         consumer_name: str,
+        consumer_group: str = NOTIFY_COPYTRADE_GROUP,
         batch_size: int = 10,
         poll_timeout_ms: int = 5000,
+        transport: Transport | None = None,
     ) -> None:
         super().__init__(
-            channel=NOTIFY_COPYTRADE_CHANNEL,
-            data_class=SwapEvent,
             redis_client=redis_client,
             consumer_group=consumer_group,
             consumer_name=consumer_name,
             batch_size=batch_size,
             poll_timeout_ms=poll_timeout_ms,
+            max_concurrent_tasks=1,
+            dead_letter_channel=f"{DEAD_LETTER_CHANNEL}:{consumer_group}",
+            max_process_time=MAX_PROCESS_TIME,
+            filter_func=_is_copytrade,
+            transport=transport,
         )
@@ -0,0 +1,133 @@
+"""两级去重
+
+- 本地：带过期时间的 LRU，命中时不访问 Redis
+- Redis：SET NX EX，多个副本之间共享，本地未命中时才访问
+
+每条规则由若干字段组成去重键，并有各自的去重窗口，例如：
+
+- (signature,)：同一笔交易只处理一次（多个数据源、重连补齐时会重复收到）
+- (who, mint, tx_direction)：同一钱包短时间内对同一 token 的同向交易只处理一次
+
+事件需要通过所有规则才不算重复，按顺序检查，第一条判定为重复的规则生效。
+"""
+
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+from solbot_common.log import logger
+
+from .transport import Transport
+
+
+@dataclass(frozen=True)
+class DedupRule:
+    # 组成去重键的字段
+    fields: tuple[str, ...]
+    # 去重窗口（秒）
+    window: int
+
+    @property
+    def name(self) -> str:
+        return ",".join(self.fields)
+
+
+class TwoTierDeduper:
+    """
+    Args:
+        transport: 第二级（Redis），多个副本共享，通常与事件所在的 stream 使用同一个传输后端
+        rules: 去重规则
+        prefix: Redis 中去重键的前缀
+        local_maxsize: 本地最多保留的去重键数，超出后淘汰最早的键
+        report_interval: 输出命中统计的间隔（秒），0 表示不输出
+    """
+
+    def __init__(
+        self,
+        transport: Transport,
+        rules: list[DedupRule],
+        prefix: str,
+        local_maxsize: int = 100_000,
+        report_interval: float = 60,
+    ) -> None:
+        self.transport = transport
+        self.rules = rules
+        self.prefix = prefix
+        self.local_maxsize = local_maxsize
+        self.report_interval = report_interval
+        # 去重键 -> 过期时间（monotonic）
+        self._local: OrderedDict[str, float] = OrderedDict()
+        # 规则 -> local_hit / remote_hit / miss
+        self.stats: dict[str, Counter[str]] = {rule.name: Counter() for rule in rules}
+        self._last_report = time.monotonic()
+
+    def key(self, rule: DedupRule, event: Any) -> str:
+        values = []
+        for field in rule.fields:
+            value = getattr(event, field)
+            if isinstance(value, Enum):
+                value = value.value
+            values.append(str(value))
+        return f"{self.prefix}:{rule.name}:{':'.join(values)}"
+
+    def _local_contains(self, key: str, now: float) -> bool:
+        expire_at = self._local.get(key)
+        if expire_at is None:
+            return False
+        if expire_at <= now:
+            del self._local[key]
+            return False
+        return True
+
+    def _local_add(self, key: str, expire_at: float) -> None:
+        self._local[key] = expire_at
+        self._local.move_to_end(key)
+        if len(self._local) > self.local_maxsize:
+            self._local.popitem(last=False)
+
+    async def check(self, event: Any) -> bool:
+        """返回事件是否是第一次出现，第一次出现时记录所有规则的去重键"""
+        try:
+            for rule in self.rules:
+                stats = self.stats[rule.name]
+                key = self.key(rule, event)
+                now = time.monotonic()
+                if self._local_contains(key, now):
+                    stats["local_hit"] += 1
+                    return False
+                # 其他副本写入的键剩余的过期时间未知，本地按完整的窗口记录
+                self._local_add(key, now + rule.window)
+                if not await self.transport.set_if_absent(key, ttl=rule.window):
+                    stats["remote_hit"] += 1
+                    return False
+                stats["miss"] += 1
+            return True
+        finally:
+            self._maybe_report()
+
+    def get_stats(self) -> dict[str, dict[str, float]]:
+        """各规则的命中次数，以及被过滤掉的事件比例"""
+        result = {}
+        for name, stats in self.stats.items():
+            total = sum(stats.values())
+            hits = stats["local_hit"] + stats["remote_hit"]
+            result[name] = {
+                "local_hit": stats["local_hit"],
+                "remote_hit": stats["remote_hit"],
+                "miss": stats["miss"],
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+                # 本地命中省去的 Redis 往返占所有重复事件的比例
+                "local_hit_rate": round(stats["local_hit"] / hits, 4) if hits else 0.0,
+            }
+        return result
+
+    def _maybe_report(self) -> None:
+        if self.report_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        logger.info(f"Dedup {self.prefix}: {self.get_stats()}")
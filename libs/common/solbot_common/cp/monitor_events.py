@@ -9,8 +9,11 @@ import aioredis
 import orjson as json
 from aioredis.client import PubSub
 from pydantic import BaseModel
+from solbot_common.config import settings
 from solbot_common.log import logger
 
+from .transport import MemorySubscription, get_transport
+
 
 class MonitorEventType(str, Enum):
     """监听器事件类型"""
@@ -33,13 +36,14 @@ class MonitorEvent(BaseModel):
 class MonitorEventProducer:
     """监听器事件生产者"""
 
-    def __init__(self, redis: aioredis.Redis):
+    def __init__(self, redis: aioredis.Redis | None):
         self.redis = redis
         self.channel = "monitor_events"
+        self.transport = get_transport(redis, settings.db.transport)
 
     async def publish_event(self, event: MonitorEvent):
         """发布监听器事件"""
-        await self.redis.publish(self.channel, json.dumps(event.dict()))
+        await self.transport.publish(self.channel, json.dumps(event.dict()).decode("utf-8"))
 
     async def pause_monitor(self, monitor_id: int, target_wallet: str, owner_id: int):
         """暂停监听器
@@ -101,16 +105,17 @@ class MonitorEventConsumer:
         redis (aioredis.Redis): Redis客户端实例
         channel (str): 订阅的Redis频道名
         _handlers (dict): 事件处理器映射表
-        _pubsub (Optional[aioredis.client.PubSub]): Redis PubSub对象
+        _pubsub (Optional[aioredis.client.PubSub]): Redis PubSub对象，使用进程内传输时为 MemorySubscription
     """
 
-    def __init__(self, redis: aioredis.Redis):
+    def __init__(self, redis: aioredis.Redis | None):
         self.redis = redis
         self.channel = "monitor_events"
+        self.transport = get_transport(redis, settings.db.transport)
         self._handlers: dict[MonitorEventType, Callable] = {}
-        self._pubsub: PubSub | None = None
+        self._pubsub: PubSub | MemorySubscription | None = None
 
-    async def subscribe(self) -> PubSub:
+    async def subscribe(self) -> PubSub | MemorySubscription:
         """订阅监听器事件
 
         Returns:
@@ -122,8 +127,7 @@ class MonitorEventConsumer:
         if self._pubsub is not None:
             raise RuntimeError("Already subscribed to channel")
 
-        self._pubsub = self.redis.pubsub()
-        await self._pubsub.subscribe(self.channel)
+        self._pubsub = await self.transport.subscribe(self.channel)
         return self._pubsub
 
     async def unsubscribe(self) -> None:
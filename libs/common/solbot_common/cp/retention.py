@@ -0,0 +1,117 @@
+"""stream 和列表的保留策略
+
+- stream 按时间窗口保留：写入时以 XADD MINID ~ 近似裁剪，Redis 只在整个宏节点都过期时才删除，
+  裁剪的开销摊到很少的几次写入上；死信队列等经 Lua 脚本写入的 stream 由后台任务裁剪
+- stream 条数上限（MAXLEN ~）只作为兜底，由后台任务定期裁剪
+- 列表按长度保留，写入时以 LTRIM 丢弃最旧的消息
+
+后台任务同时输出各频道的长度和内存占用。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from solbot_common.config import RetentionConfig, settings
+from solbot_common.log import logger
+
+if TYPE_CHECKING:
+    from .transport import Transport
+
+
+@dataclass(frozen=True)
+class Retention:
+    # 保留最近多少秒的消息，为 None 时不按时间裁剪
+    window: float | None = None
+    # 最多保留的消息数，为 None 时不按条数裁剪
+    maxlen: int | None = None
+
+
+def _match_prefix(name: str, overrides: dict[str, int], default: int) -> int:
+    """最长的前缀优先"""
+    best = None
+    for prefix in overrides:
+        if name.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return default if best is None else overrides[best]
+
+
+def stream_retention(stream: str, config: RetentionConfig | None = None) -> Retention:
+    config = config or settings.db.retention
+    return Retention(
+        window=_match_prefix(stream, config.stream_windows, config.stream_window),
+        maxlen=config.stream_maxlen,
+    )
+
+
+def list_maxlen(queue: str, config: RetentionConfig | None = None) -> int:
+    config = config or settings.db.retention
+    return _match_prefix(queue, config.list_maxlens, config.list_maxlen)
+
+
+def min_id(window: float, now: float | None = None) -> str:
+    """时间窗口起点对应的消息 ID，更早的消息可以被裁剪"""
+    now = time.time() if now is None else now
+    return f"{max(int((now - window) * 1000), 0)}-0"
+
+
+class RetentionReporter:
+    """定期裁剪 stream，并输出各频道的长度和内存占用"""
+
+    def __init__(self, transport: Transport, interval: float | None = None) -> None:
+        """
+        Args:
+            transport: 频道默认所在的传输后端
+            interval: 运行间隔（秒），为 None 时使用配置，0 表示不运行
+        """
+        self.transport = transport
+        self.interval = settings.db.retention.report_interval if interval is None else interval
+        self.streams: list[tuple[Transport, str]] = []
+        self.lists: list[tuple[Transport, str]] = []
+        self.is_running = False
+
+    def add_stream(self, stream: str, transport: Transport | None = None) -> None:
+        self.streams.append((transport or self.transport, stream))
+
+    def add_list(self, queue: str, transport: Transport | None = None) -> None:
+        self.lists.append((transport or self.transport, queue))
+
+    async def report(self) -> dict[str, dict]:
+        """裁剪 stream 并统计各频道，返回 频道 -> {type, length, memory, trimmed}"""
+        stats: dict[str, dict] = {}
+        for transport, stream in self.streams:
+            try:
+                trimmed = await transport.trim(stream, stream_retention(stream))
+                usage = await transport.usage(stream)
+            except Exception as e:
+                logger.error(f"Failed to trim stream {stream}: {e}")
+                continue
+            stats[stream] = {"type": "stream", **usage, "trimmed": trimmed}
+        for transport, queue in self.lists:
+            try:
+                usage = await transport.usage(queue)
+            except Exception as e:
+                logger.error(f"Failed to get usage of {queue}: {e}")
+                continue
+            stats[queue] = {"type": "list", **usage, "trimmed": 0}
+
+        for name, item in stats.items():
+            logger.info(
+                f"Channel {name} ({item['type']}) - length: {item['length']}, "
+                f"memory: {item['memory']}, trimmed: {item['trimmed']}"
+            )
+        return stats
+
+    async def start(self) -> None:
+        if self.interval <= 0:
+            return
+        self.is_running = True
+        while self.is_running:
+            await self.report()
+            await asyncio.sleep(self.interval)
+
+    def stop(self) -> None:
+        self.is_running = False
@@ -1,21 +1,34 @@
-import asyncio
 import time
-from collections.abc import Callable, Coroutine
-from typing import Any
+from collections.abc import Callable
 
 import aioredis
 
+from solbot_common.config import settings
 from solbot_common.log import logger
 from solbot_common.types import SwapEvent
 
+from .base import Consumer
+from .codec import encode_fields, get_codec
+from .transport import Transport, get_transport
+
 SWAP_EVENT_CHANNEL = "swap_event:new"
 DEAD_LETTER_CHANNEL = "swap_event:dlq"
 MAX_PROCESS_TIME = 15  # s
 
+# swap_event:new 只写一次，由以下消费组各自独立消费：
+# 每个消费组有自己的消费进度、积压（lag）、过期时间和死信队列，互不影响
+TRADING_GROUP = "trading:swap_event"
+NOTIFY_COPYTRADE_GROUP = "copytrade_notify"
+AUDIT_GROUP = "audit:swap_event"
+
 
 class SwapEventProducer:
-    def __init__(self, redis_client: aioredis.Redis) -> None:
+    def __init__(
+        self, redis_client: aioredis.Redis | None, transport: Transport | None = None
+    ) -> None:
         self.redis = redis_client
+        self.codec = get_codec(settings.db.stream_codec)
+        self.transport = transport or get_transport(redis_client, settings.db.transport)
 
     async def produce(self, swap_event: SwapEvent) -> None:
         """Produces a swap event to Redis Stream.
@@ -24,10 +37,9 @@ class SwapEventProducer:
             swap_event: Swap event data as string
         """
         try:
-            await self.redis.xadd(
-                name=SWAP_EVENT_CHANNEL,
-                fields={"data": swap_event.to_json(), "timestamp": int(time.time())},
-                maxlen=10000,  # Keep last 10k events
+            await self.transport.append(
+                SWAP_EVENT_CHANNEL,
+                {**encode_fields(swap_event, self.codec), "timestamp": int(time.time())},
             )
         except Exception as e:
             # Log error but don't re-raise to avoid disrupting the producer
@@ -36,15 +48,19 @@ class SwapEventProducer:
         return
 
 
-class SwapEventConsumer:
+class SwapEventConsumer(Consumer[SwapEvent]):
     def __init__(
         self,
-        redis_client: aioredis.Redis,
+        redis_client: aioredis.Redis | None,
         consumer_group: str,
         consumer_name: str,
         batch_size: int = 10,
         poll_timeout_ms: int = 5000,
         max_concurrent_tasks: int = 10,
+        dead_letter_channel: str = DEAD_LETTER_CHANNEL,
+        max_process_time: float | None = MAX_PROCESS_TIME,
+        filter_func: Callable[[SwapEvent], bool] | None = None,
+        transport: Transport | None = None,
     ) -> None:
         """Initialize the transaction event consumer.
 
@@ -55,159 +71,25 @@ class SwapEventConsumer:
             batch_size: Number of events to process in one batch
             poll_timeout_ms: Timeout in milliseconds for blocking read
             max_concurrent_tasks: Maximum number of concurrent tasks
+            dead_letter_channel: 本消费组的死信队列
+            max_process_time: 本消费组处理消息的最长等待时间（秒），为 None 时不检查
+            filter_func: 只处理返回 True 的消息
+            transport: 消息传输后端，为 None 时按配置选择
         """
-        self.redis = redis_client
-        self.consumer_group = consumer_group
-        self.consumer_name = consumer_name
-        self.batch_size = batch_size
-        self.poll_timeout_ms = poll_timeout_ms
-        self.is_running = False
-        self.callback: Callable[[SwapEvent], Coroutine[Any, Any, None]] | None = None
-        self.task_pool = set()
-        self.semaphore = asyncio.Semaphore(max_concurrent_tasks)
-
-    async def setup(self) -> None:
-        """Setup the consumer group if it doesn't exist."""
-        try:
-            # Create consumer group if not exists
-            # Use $ as start ID to only process new messages
-            await self.redis.xgroup_create(
-                name=SWAP_EVENT_CHANNEL,
-                groupname=self.consumer_group,
-                mkstream=True,
-                id="$",
-            )
-        except aioredis.ResponseError as e:
-            if "BUSYGROUP" not in str(e):
-                raise
-            logger.info(f"Consumer group {self.consumer_group} already exists")
-
-    def register_callback(self, callback: Callable[[SwapEvent], Coroutine[Any, Any, None]]) -> None:
-        """Register a callback function to process events.
-
-        Args:
-            callback: Function that takes a dictionary of event data and processes it
-        """
-        self.callback = callback
-
-    async def process_pending(self) -> None:
-        """Process any pending messages for this consumer."""
-        try:
-            # Read pending messages from > start
-            pending = await self.redis.xreadgroup(
-                groupname=self.consumer_group,
-                consumername=self.consumer_name,
-                streams={SWAP_EVENT_CHANNEL: "0"},  # 0 means all pending messages
-                count=self.batch_size,
-            )
-
-            if pending and self.callback:
-                for _, messages in pending:
-                    for message_id, fields in messages:
-                        try:
-                            logger.info(f"Processing pending message {message_id}")
-                            await self._process_message(message_id, fields)
-                        except Exception as e:
-                            logger.error(f"Error processing pending message {message_id}: {e}")
-        except Exception as e:
-            logger.error(f"Error processing pending messages: {e}")
-
-    async def _process_message(self, message_id: str, fields: dict) -> None:
-        """Process a single message and acknowledge it.
-
-        Args:
-            message_id: ID of the message in Redis Stream
-            fields: Message fields containing the event data
-        """
-        async with self.semaphore:
-            try:
-                timestamp = float(fields.get("timestamp", 0))
-                if time.time() - timestamp > MAX_PROCESS_TIME:
-                    logger.warning(
-                        f"Message {message_id} is too old, discard it. Timestamp: {timestamp}"
-                    )
-                elif self.callback is not None:
-                    swap_event = SwapEvent.from_json(fields["data"])
-                    await self.callback(swap_event)
-
-                # Acknowledge the message
-                await self.redis.xack(SWAP_EVENT_CHANNEL, self.consumer_group, message_id)
-            except Exception as e:
-                logger.exception(f"Error processing message {message_id}: {e}")
-                await self._move_to_dead_letter(message_id, fields, str(e))
-
-    async def _move_to_dead_letter(self, message_id: str, fields: dict, error: str) -> None:
-        """Move a message to the dead letter queue.
-
-        Args:
-            message_id: Original message ID
-            fields: Message fields
-            error: Error message
-        """
-        fields["original_id"] = message_id
-        fields["error"] = error
-        fields["moved_to_dlq_at"] = str(time.time())
-
-        try:
-            # Add to dead letter queue
-            await self.redis.xadd(DEAD_LETTER_CHANNEL, fields)
-            # Acknowledge the original message
-            await self.redis.xack(SWAP_EVENT_CHANNEL, self.consumer_group, message_id)
-            # Delete the message from original stream
-            await self.redis.xdel(SWAP_EVENT_CHANNEL, message_id)
-            logger.info(
-                f"Message {message_id} moved to dead letter queue and deleted from original stream"
-            )
-        except Exception as e:
-            logger.error(f"Error moving message {message_id} to dead letter queue: {e}")
-            raise
-
-    def _create_task(self, message_id: str, fields: dict) -> None:
-        """创建新的异步任务来处理消息"""
-        logger.info(f"Creating task for message {message_id}")
-        task = asyncio.create_task(self._process_message(message_id, fields))
-        self.task_pool.add(task)
-        task.add_done_callback(self.task_pool.discard)
-
-    async def start(self) -> None:
-        """Start consuming messages from the stream."""
-        if not self.callback:
-            raise ValueError("No callback registered. Call register_callback first.")
-
-        await self.setup()
-        self.is_running = True
-
-        # First process any pending messages
-        await self.process_pending()
-
-        # Then start processing new messages
-        while self.is_running:
-            try:
-                # Read new messages
-                messages = await self.redis.xreadgroup(
-                    groupname=self.consumer_group,
-                    consumername=self.consumer_name,
-                    streams={SWAP_EVENT_CHANNEL: ">"},  # > means new messages only
-                    count=self.batch_size,
-                    block=self.poll_timeout_ms,
-                )
-
-                if messages is None:
-                    continue
-
-                for stream, stream_messages in messages:
-                    for message_id, fields in stream_messages:
-                        self._create_task(message_id, fields)
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error reading from stream: {e}")
-                await asyncio.sleep(1)
-
-    async def stop(self) -> None:
-        """Stop consuming messages and wait for all tasks to complete."""
-        self.is_running = False
-        if self.task_pool:
-            logger.info(f"Waiting for {len(self.task_pool)} tasks to complete...")
-            await asyncio.gather(*self.task_pool, return_exceptions=True)
-            logger.info("All tasks completed")
+        super().__init__(
+            channel=SWAP_EVENT_CHANNEL,
+            data_class=SwapEvent,
+            redis_client=redis_client,
+            consumer_group=consumer_group,
+            consumer_name=consumer_name,
+            batch_size=batch_size,
+            poll_timeout_ms=poll_timeout_ms,
+            # 交易失败不重试，直接移入死信队列
+            max_retries=0,
+            dead_letter_channel=dead_letter_channel,
+            concurrency=max_concurrent_tasks,
+            max_process_time=max_process_time,
+            transport=transport or get_transport(redis_client, settings.db.transport),
+            shared_stream=True,
+            filter_func=filter_func,
+        )
@@ -5,23 +5,31 @@
 
 import aioredis
 
+from solbot_common.config import settings
 from solbot_common.types import SwapResult
 
 from .base import Consumer, Producer
+from .codec import get_codec
+from .transport import get_transport
 
 SWAP_EVENT_CHANNEL = "swap_event:result"
 MAX_PROCESS_TIME = 15  # s
 
 
 class SwapResultProducer(Producer[SwapResult]):
-    def __init__(self, redis_client: aioredis.Redis) -> None:
-        super().__init__(redis_client=redis_client, channel=SWAP_EVENT_CHANNEL)
+    def __init__(self, redis_client: aioredis.Redis | None) -> None:
+        super().__init__(
+            redis_client=redis_client,
+            channel=SWAP_EVENT_CHANNEL,
+            codec=get_codec(settings.db.stream_codec),
+            transport=get_transport(redis_client, settings.db.transport),
+        )
 
 
 class SwapResultConsumer(Consumer[SwapResult]):
     def __init__(
         self,
-        redis_client: aioredis.Redis,
+        redis_client: aioredis.Redis | None,
         consumer_group: str,
         consumer_name: str,
         batch_size: int = 10,
@@ -35,6 +43,7 @@ class SwapResultConsumer(Consumer[SwapResult]):
             consumer_name=consumer_name,
             batch_size=batch_size,
             poll_timeout_ms=poll_timeout_ms,
+            transport=get_transport(redis_client, settings.db.transport),
         )
 
 
@@ -0,0 +1,609 @@
+"""消息传输后端
+
+Producer / Consumer、TxEventProducer、MonitorEventProducer 等通过 Transport 读写消息，
+不直接依赖 Redis：
+
+- RedisTransport: 默认后端，stream 对应 XADD / XREADGROUP，队列对应 LPUSH / BRPOP，
+  广播对应 PUBLISH / SUBSCRIBE，适用于多进程、多主机部署
+- MemoryTransport: 进程内 asyncio 实现，所有服务运行在同一个进程中时使用（见
+  scripts/run-standalone.py），省去每一跳的 Redis 往返。消息不持久化，进程退出后丢失，
+  也没有多副本相关的功能（心跳、认领其他消费者的消息）
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+import aioredis
+from loguru import logger
+
+from .retention import Retention, list_maxlen, min_id, stream_retention
+
+# 将消息移动到另一个 stream（重试时为原 stream，或死信队列）并确认原消息，一次往返完成
+# KEYS[1]: 原 stream, KEYS[2]: 目标 stream
+# ARGV[1]: 消费组, ARGV[2]: 原消息 ID, ARGV[3]: 是否删除原消息, ARGV[4..]: 字段和值
+MOVE_MESSAGE_SCRIPT = """
+local fields = {}
+for i = 4, #ARGV do
+    fields[#fields + 1] = ARGV[i]
+end
+local new_id = redis.call('XADD', KEYS[2], '*', unpack(fields))
+redis.call('XACK', KEYS[1], ARGV[1], ARGV[2])
+if ARGV[3] == '1' then
+    redis.call('XDEL', KEYS[1], ARGV[2])
+end
+return new_id
+"""
+
+# stream 消息：(消息 ID, 字段)，已被删除的消息字段为 None
+Message = tuple[str, dict | None]
+
+
+class Transport(ABC):
+    # --- stream：消费组、确认、重试 ---
+
+    @abstractmethod
+    async def append(self, stream: str, fields: dict, retention: Retention | None = None) -> str:
+        """写入一条消息，按 retention 近似裁剪，返回消息 ID
+
+        retention 为 None 时使用配置中该 stream 的保留策略
+        """
+
+    @abstractmethod
+    async def trim(self, stream: str, retention: Retention) -> int:
+        """按时间窗口和条数上限近似裁剪，返回删除的消息数"""
+
+    @abstractmethod
+    async def create_group(self, stream: str, group: str) -> None:
+        """创建消费组，从之后写入的消息开始消费，已存在时不做任何修改"""
+
+    @abstractmethod
+    async def read_group(
+        self,
+        stream: str,
+        group: str,
+        consumer: str,
+        count: int,
+        block_ms: int | None = None,
+        pending: bool = False,
+    ) -> list[Message]:
+        """读取新消息；pending 为 True 时读取已投递给该消费者、尚未确认的消息"""
+
+    @abstractmethod
+    async def ack(self, stream: str, group: str, *message_ids: str) -> None: ...
+
+    @abstractmethod
+    async def move(
+        self,
+        stream: str,
+        group: str,
+        message_id: str,
+        target: str,
+        fields: dict,
+        delete: bool,
+    ) -> str:
+        """将消息写入 target 并确认（可选删除）原消息，返回新消息 ID"""
+
+    @abstractmethod
+    async def lag(self, stream: str, group: str, limit: int) -> int:
+        """消费组积压的消息数，统计方式可能有上限 limit"""
+
+    @abstractmethod
+    async def log_info(self, stream: str, group: str) -> None:
+        """输出 stream 和消费组的状态，用于排查问题"""
+
+    # --- stream：多副本 ---
+
+    async def claim_idle(
+        self, stream: str, group: str, consumer: str, min_idle_ms: int, start: str, count: int
+    ) -> tuple[str, list[Message]]:
+        """认领其他消费者空闲超过 min_idle_ms 的消息，返回 (下一页起点, 消息)，起点为 0-0 时结束
+
+        已从 stream 删除的消息字段为 None，由调用方确认。
+        """
+        return "0-0", []
+
+    async def refresh_idle(self, stream: str, group: str, consumer: str, *message_ids: str) -> None:
+        """重置正在处理的消息的空闲时间，避免处理时间较长的消息被其他消费者认领"""
+        return None
+
+    async def heartbeat(self, stream: str, group: str, consumer: str) -> None:
+        return None
+
+    async def get_heartbeats(self, stream: str, group: str) -> dict[str, str]:
+        return {}
+
+    async def remove_heartbeats(self, stream: str, group: str, *consumers: str) -> None:
+        return None
+
+    async def get_consumers(self, stream: str, group: str) -> list[dict]:
+        """消费组中的消费者，包含 name / pending / idle（毫秒）"""
+        return []
+
+    async def delete_consumer(self, stream: str, group: str, consumer: str) -> None:
+        return None
+
+    # --- 队列（FIFO） ---
+
+    @abstractmethod
+    async def push(self, queue: str, item: str, maxlen: int | None = None) -> None:
+        """写入队列，超过 maxlen 时丢弃最旧的消息，maxlen 为 None 时使用配置中该队列的上限"""
+
+    @abstractmethod
+    async def pop(self, queue: str, count: int = 1, timeout: float = 1) -> list[str]:
+        """取出最多 count 条，队列为空时最多等待 timeout 秒"""
+
+    @abstractmethod
+    async def usage(self, name: str) -> dict:
+        """stream 或队列的长度和内存占用（字节，无法统计时为 None）"""
+
+    # --- 广播 ---
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str) -> None: ...
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> Any:
+        """订阅频道，返回的对象支持 get_message / unsubscribe / close（与 aioredis PubSub 一致）"""
+
+    # --- 去重 ---
+
+    @abstractmethod
+    async def set_if_absent(self, key: str, ttl: int) -> bool:
+        """key 不存在时写入并返回 True，ttl 秒后过期"""
+
+
+class RedisTransport(Transport):
+    def __init__(self, redis_client: aioredis.Redis) -> None:
+        self.redis = redis_client
+        # 只有消费者需要，第一次移动消息时注册
+        self._move_script = None
+
+    @staticmethod
+    def heartbeat_key(stream: str, group: str) -> str:
+        return f"{stream}:heartbeat:{group}"
+
+    async def append(self, stream: str, fields: dict, retention: Retention | None = None) -> str:
+        retention = retention or stream_retention(stream)
+        # MINID 和 MAXLEN 只能指定一个，条数上限由后台任务兜底
+        if retention.window is not None:
+            trim_args: tuple = ("MINID", "~", min_id(retention.window))
+        elif retention.maxlen is not None:
+            trim_args = ("MAXLEN", "~", retention.maxlen)
+        else:
+            trim_args = ()
+        args: list = []
+        for key, value in fields.items():
+            args.extend((key, value))
+        # XADD key MINID ~ threshold * field value ...，需要 Redis >= 6.2
+        message_id = await self.redis.execute_command("XADD", stream, *trim_args, "*", *args)
+        if isinstance(message_id, bytes):
+            message_id = message_id.decode()
+        return message_id
+
+    async def trim(self, stream: str, retention: Retention) -> int:
+        trimmed = 0
+        if retention.window is not None:
+            trimmed += await self.redis.execute_command(
+                "XTRIM", stream, "MINID", "~", min_id(retention.window)
+            )
+        if retention.maxlen is not None:
+            trimmed += await self.redis.execute_command(
+                "XTRIM", stream, "MAXLEN", "~", retention.maxlen
+            )
+        return trimmed
+
+    async def create_group(self, stream: str, group: str) -> None:
+        try:
+            # Use $ as start ID to only process new messages
+            await self.redis.xgroup_create(name=stream, groupname=group, mkstream=True, id="$")
+        except aioredis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+            logger.info(f"Consumer group {group} already exists")
+
+    async def read_group(
+        self,
+        stream: str,
+        group: str,
+        consumer: str,
+        count: int,
+        block_ms: int | None = None,
+        pending: bool = False,
+    ) -> list[Message]:
+        result = await self.redis.xreadgroup(
+            groupname=group,
+            consumername=consumer,
+            # 0 means all pending messages, > means new messages only
+            streams={stream: "0" if pending else ">"},
+            count=count,
+            block=block_ms,
+        )
+        return [message for _, messages in result or [] for message in messages]
+
+    async def ack(self, stream: str, group: str, *message_ids: str) -> None:
+        await self.redis.xack(stream, group, *message_ids)
+
+    async def move(
+        self,
+        stream: str,
+        group: str,
+        message_id: str,
+        target: str,
+        fields: dict,
+        delete: bool,
+    ) -> str:
+        if self._move_script is None:
+            self._move_script = self.redis.register_script(MOVE_MESSAGE_SCRIPT)
+        args = [group, message_id, "1" if delete else "0"]
+        for key, value in fields.items():
+            args.extend((key, value))
+        return await self._move_script(keys=[stream, target], args=args)
+
+    async def lag(self, stream: str, group: str, limit: int) -> int:
+        """Redis 7 之前的版本没有 lag 字段，通过 XRANGE 统计，最多统计到 limit 条"""
+        for info in await self.redis.xinfo_groups(stream):
+            if info["name"] != group:
+                continue
+            lag = info.get("lag")
+            if lag is not None:
+                return int(lag)
+            entries = await self.redis.xrange(
+                stream, min=f"({info['last-delivered-id']}", max="+", count=limit
+            )
+            return len(entries)
+        return 0
+
+    async def log_info(self, stream: str, group: str) -> None:
+        stream_info = await self.redis.xinfo_stream(stream)
+        logger.info(
+            f"Stream info - length: {stream_info['length']}, groups: {stream_info['groups']}, last_id: {stream_info['last-generated-id']}"
+        )
+        for info in await self.redis.xinfo_groups(stream):
+            logger.info(
+                f"Group {info['name']} - pending: {info['pending']}, consumers: {info['consumers']}, last_delivered_id: {info['last-delivered-id']}"
+            )
+        for consumer in await self.redis.xinfo_consumers(stream, group):
+            logger.info(
+                f"Consumer {consumer['name']} - pending: {consumer['pending']}, idle: {consumer['idle']}"
+            )
+
+    async def claim_idle(
+        self, stream: str, group: str, consumer: str, min_idle_ms: int, start: str, count: int
+    ) -> tuple[str, list[Message]]:
+        # XAUTOCLAIM key group consumer min-idle-time start COUNT count JUSTID，需要 Redis >= 6.2
+        # Redis 6.2 中已删除的消息以不带 ID 的 nil 返回，无法确认，因此只认领 ID，再读取字段
+        result = await self.redis.execute_command(
+            "XAUTOCLAIM", stream, group, consumer, min_idle_ms, start, "COUNT", count, "JUSTID"
+        )
+        message_ids = result[1]
+        messages: list[Message] = []
+        if message_ids:
+            pipe = self.redis.pipeline(transaction=False)
+            for message_id in message_ids:
+                pipe.xrange(stream, min=message_id, max=message_id, count=1)
+            entries = await pipe.execute()
+            for message_id, entry in zip(message_ids, entries, strict=True):
+                # 已删除或被裁剪的消息字段为 None
+                messages.append((message_id, entry[0][1] if entry else None))
+        next_start = result[0]
+        if isinstance(next_start, bytes):
+            next_start = next_start.decode()
+        return next_start, messages
+
+    async def refresh_idle(self, stream: str, group: str, consumer: str, *message_ids: str) -> None:
+        # XCLAIM min-idle-time 为 0 时重置空闲时间，JUSTID 不增加投递次数；已确认的 ID 被忽略
+        await self.redis.execute_command(
+            "XCLAIM", stream, group, consumer, 0, *message_ids, "JUSTID"
+        )
+
+    async def heartbeat(self, stream: str, group: str, consumer: str) -> None:
+        await self.redis.hset(self.heartbeat_key(stream, group), consumer, str(time.time()))
+
+    async def get_heartbeats(self, stream: str, group: str) -> dict[str, str]:
+        return await self.redis.hgetall(self.heartbeat_key(stream, group)) or {}
+
+    async def remove_heartbeats(self, stream: str, group: str, *consumers: str) -> None:
+        await self.redis.hdel(self.heartbeat_key(stream, group), *consumers)
+
+    async def get_consumers(self, stream: str, group: str) -> list[dict]:
+        return await self.redis.xinfo_consumers(stream, group)
+
+    async def delete_consumer(self, stream: str, group: str, consumer: str) -> None:
+        await self.redis.xgroup_delconsumer(stream, group, consumer)
+
+    async def push(self, queue: str, item: str, maxlen: int | None = None) -> None:
+        maxlen = list_maxlen(queue) if maxlen is None else maxlen
+        # LPUSH 写入队首，BRPOP 从队尾取出，LTRIM 保留最新的 maxlen 条，一次往返完成
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lpush(queue, item)
+        pipe.ltrim(queue, 0, maxlen - 1)
+        await pipe.execute()
+
+    async def pop(self, queue: str, count: int = 1, timeout: float = 1) -> list[str]:
+        result = await self.redis.brpop(queue, timeout=timeout)
+        if result is None:
+            return []
+        items = [result[1]]
+        if count > 1:
+            # BRPOP 只能取一条，队列中剩余的消息用 RPOP count 一次取出（需要 Redis >= 6.2）
+            rest = await self.redis.execute_command("RPOP", queue, count - 1)
+            if rest:
+                items.extend(rest)
+        return items
+
+    async def usage(self, name: str) -> dict:
+        kind = await self.redis.type(name)
+        if isinstance(kind, bytes):
+            kind = kind.decode()
+        if kind == "stream":
+            length = await self.redis.xlen(name)
+        elif kind == "list":
+            length = await self.redis.llen(name)
+        else:
+            return {"length": 0, "memory": None}
+        # MEMORY USAGE 默认只抽样 5 个节点估算，开销固定
+        memory = await self.redis.execute_command("MEMORY", "USAGE", name)
+        return {"length": length, "memory": memory}
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.redis.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> Any:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+        return pubsub
+
+    async def set_if_absent(self, key: str, ttl: int) -> bool:
+        return bool(await self.redis.set(key, "1", nx=True, ex=ttl))
+
+
+@dataclass
+class _MemoryGroup:
+    # 下一条要投递的消息序号
+    next_seq: int
+    # 已投递未确认的消息：消息 ID -> 消费者
+    pending: dict[str, str] = field(default_factory=dict)
+
+
+class _MemoryStream:
+    def __init__(self) -> None:
+        # 消息序号 -> (消息 ID, 字段)，按写入顺序排列
+        self.entries: dict[int, tuple[str, dict]] = {}
+        self.next_seq = 0
+        self.groups: dict[str, _MemoryGroup] = {}
+        self.changed = asyncio.Condition()
+
+
+class MemorySubscription:
+    """进程内的订阅，接口与 aioredis PubSub 中用到的部分一致"""
+
+    def __init__(self, transport: "MemoryTransport", channel: str) -> None:
+        self.transport = transport
+        self.channel = channel
+        self.queue: asyncio.Queue[dict] = asyncio.Queue()
+
+    async def get_message(
+        self, ignore_subscribe_messages: bool = False, timeout: float = 0.0
+    ) -> dict | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def unsubscribe(self, *channels: str) -> None:
+        self.transport._subscriptions.get(self.channel, set()).discard(self)
+
+    async def close(self) -> None:
+        await self.unsubscribe()
+
+
+class MemoryTransport(Transport):
+    """进程内传输，同一进程中的所有生产者和消费者共享一个实例"""
+
+    _instance: "MemoryTransport | None" = None
+
+    def __init__(self) -> None:
+        self._streams: dict[str, _MemoryStream] = {}
+        self._queues: dict[str, deque[str]] = {}
+        self._queue_events: dict[str, asyncio.Event] = {}
+        self._subscriptions: dict[str, set[MemorySubscription]] = {}
+        self._keys: dict[str, float] = {}
+
+    @classmethod
+    def get_instance(cls) -> "MemoryTransport":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _stream(self, stream: str) -> _MemoryStream:
+        s = self._streams.get(stream)
+        if s is None:
+            s = self._streams[stream] = _MemoryStream()
+        return s
+
+    @staticmethod
+    def _seq(message_id: str) -> int:
+        return int(message_id.rsplit("-", 1)[1])
+
+    async def append(self, stream: str, fields: dict, retention: Retention | None = None) -> str:
+        s = self._stream(stream)
+        seq = s.next_seq
+        # 与 Redis 的消息 ID 格式一致：毫秒时间戳-序号
+        message_id = f"{int(time.time() * 1000)}-{seq}"
+        s.entries[seq] = (message_id, dict(fields))
+        s.next_seq += 1
+        self._trim(s, retention or stream_retention(stream))
+        async with s.changed:
+            s.changed.notify_all()
+        return message_id
+
+    @staticmethod
+    def _trim(s: _MemoryStream, retention: Retention) -> int:
+        trimmed = 0
+        threshold = None
+        if retention.window is not None:
+            threshold = int(min_id(retention.window).split("-")[0])
+        while s.entries:
+            seq = next(iter(s.entries))
+            message_id = s.entries[seq][0]
+            expired = threshold is not None and int(message_id.split("-")[0]) < threshold
+            overflow = retention.maxlen is not None and len(s.entries) > retention.maxlen
+            if not expired and not overflow:
+                break
+            del s.entries[seq]
+            trimmed += 1
+        return trimmed
+
+    async def trim(self, stream: str, retention: Retention) -> int:
+        return self._trim(self._stream(stream), retention)
+
+    async def create_group(self, stream: str, group: str) -> None:
+        s = self._stream(stream)
+        if group not in s.groups:
+            s.groups[group] = _MemoryGroup(next_seq=s.next_seq)
+
+    def _pending(self, s: _MemoryStream, group: _MemoryGroup, consumer: str, count: int):
+        messages: list[Message] = []
+        for message_id, owner in group.pending.items():
+            if len(messages) >= count:
+                break
+            if owner != consumer:
+                continue
+            entry = s.entries.get(self._seq(message_id))
+            messages.append((message_id, None if entry is None else dict(entry[1])))
+        return messages
+
+    def _deliver(self, s: _MemoryStream, group: _MemoryGroup, consumer: str, count: int):
+        messages: list[Message] = []
+        # 已被裁剪的消息直接跳过
+        seq = max(group.next_seq, next(iter(s.entries), s.next_seq))
+        while seq < s.next_seq and len(messages) < count:
+            entry = s.entries.get(seq)
+            seq += 1
+            if entry is None:
+                continue
+            message_id, fields = entry
+            group.pending[message_id] = consumer
+            # 交给消费者的是副本，重试时修改字段不影响 stream 中的消息
+            messages.append((message_id, dict(fields)))
+        group.next_seq = seq
+        return messages
+
+    async def read_group(
+        self,
+        stream: str,
+        group: str,
+        consumer: str,
+        count: int,
+        block_ms: int | None = None,
+        pending: bool = False,
+    ) -> list[Message]:
+        s = self._stream(stream)
+        g = s.groups[group]
+        if pending:
+            return self._pending(s, g, consumer, count)
+        messages = self._deliver(s, g, consumer, count)
+        if messages or not block_ms:
+            return messages
+        async with s.changed:
+            try:
+                await asyncio.wait_for(
+                    s.changed.wait_for(lambda: g.next_seq < s.next_seq), block_ms / 1000
+                )
+            except asyncio.TimeoutError:
+                return []
+        return self._deliver(s, g, consumer, count)
+
+    async def ack(self, stream: str, group: str, *message_ids: str) -> None:
+        g = self._stream(stream).groups.get(group)
+        if g is None:
+            return
+        for message_id in message_ids:
+            g.pending.pop(message_id, None)
+
+    async def move(
+        self,
+        stream: str,
+        group: str,
+        message_id: str,
+        target: str,
+        fields: dict,
+        delete: bool,
+    ) -> str:
+        new_id = await self.append(target, fields)
+        await self.ack(stream, group, message_id)
+        if delete:
+            self._stream(stream).entries.pop(self._seq(message_id), None)
+        return new_id
+
+    async def lag(self, stream: str, group: str, limit: int) -> int:
+        s = self._stream(stream)
+        g = s.groups.get(group)
+        if g is None:
+            return 0
+        return sum(1 for seq in s.entries if seq >= g.next_seq)
+
+    async def log_info(self, stream: str, group: str) -> None:
+        s = self._stream(stream)
+        g = s.groups.get(group)
+        logger.info(
+            f"Memory stream {stream} - length: {len(s.entries)}, "
+            f"group {group} pending: {len(g.pending) if g else 0}"
+        )
+
+    async def push(self, queue: str, item: str, maxlen: int | None = None) -> None:
+        maxlen = list_maxlen(queue) if maxlen is None else maxlen
+        items = self._queues.setdefault(queue, deque())
+        items.append(item)
+        # 队首是最旧的消息
+        while len(items) > maxlen:
+            items.popleft()
+        self._queue_events.setdefault(queue, asyncio.Event()).set()
+
+    async def pop(self, queue: str, count: int = 1, timeout: float = 1) -> list[str]:
+        items = self._queues.setdefault(queue, deque())
+        event = self._queue_events.setdefault(queue, asyncio.Event())
+        if not items:
+            event.clear()
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        return [items.popleft() for _ in range(min(count, len(items)))]
+
+    async def usage(self, name: str) -> dict:
+        if name in self._streams:
+            return {"length": len(self._streams[name].entries), "memory": None}
+        return {"length": len(self._queues.get(name, ())), "memory": None}
+
+    async def publish(self, channel: str, message: str) -> None:
+        for subscription in self._subscriptions.get(channel, ()):
+            subscription.queue.put_nowait({"type": "message", "channel": channel, "data": message})
+
+    async def subscribe(self, channel: str) -> MemorySubscription:
+        subscription = MemorySubscription(self, channel)
+        self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    async def set_if_absent(self, key: str, ttl: int) -> bool:
+        now = time.monotonic()
+        expire_at = self._keys.get(key)
+        if expire_at is not None and expire_at > now:
+            return False
+        if len(self._keys) > 100_000:
+            self._keys = {k: v for k, v in self._keys.items() if v > now}
+        self._keys[key] = now + ttl
+        return True
+
+
+def get_transport(redis_client: aioredis.Redis | None, name: str = "redis") -> Transport:
+    """按名称选择传输后端，memory 时所有调用方共享同一个进程内实例"""
+    if name == "memory":
+        return MemoryTransport.get_instance()
+    if redis_client is None:
+        raise ValueError("redis_client is required for the redis transport")
+    return RedisTransport(redis_client)
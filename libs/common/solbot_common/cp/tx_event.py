@@ -1,19 +1,32 @@
-import asyncio
-from collections.abc import Callable, Coroutine
-from typing import Any
-
 import aioredis
 
+from solbot_common.config import settings
 from solbot_common.log import logger
 from solbot_common.types.tx import TxEvent
 
+from .base import Consumer
+from .codec import encode_fields, get_codec
+from .dedup import DedupRule, TwoTierDeduper
+from .transport import get_transport
+
 NEW_TX_EVENT_CHANNEL = "tx_event:new"
 
 
 class TxEventProducer:
-    def __init__(self, redis_client: aioredis.Redis) -> None:
+    def __init__(self, redis_client: aioredis.Redis | None) -> None:
         self.redis = redis_client
-    
+        self.codec = get_codec(settings.db.stream_codec)
+        self.transport = get_transport(redis_client, settings.db.transport)
+        self.deduper = TwoTierDeduper(
+            self.transport,
+            [
+                DedupRule(fields=tuple(rule.fields), window=rule.window)
+                for rule in settings.monitor.tx_event_dedup
+            ],
+            prefix="tx_event_dedup",
+            local_maxsize=settings.monitor.tx_event_dedup_local_size,
+        )
+
     async def produce(self, tx_event: TxEvent) -> None:
         """Produces a transaction event to Redis Stream.
 
@@ -21,157 +34,65 @@ class TxEventProducer:
             tx_event: Transaction event data as string
         """
         try:
-            logger.info(f"process tx_event_dedup {tx_event.mint}")
-            dedup_key = f"tx_event_dedup:{tx_event.mint}"
-            # if not await self.redis.sadd(dedup_key):
-            result = await self.redis.set(dedup_key, "1", nx=True, ex=4 * 60 * 60)
-            if not result:
-                logger.info(f"tx_event with key {tx_event.mint} already exists, skipping.")
+            if not await self.deduper.check(tx_event):
+                logger.info(f"tx_event {tx_event.signature} is a duplicate, skipping.")
             else:
-                await self.redis.xadd(
-                    name=NEW_TX_EVENT_CHANNEL,
-                    fields={"data": tx_event.to_json()},
-                    maxlen=10000,  # Keep last 10k events
+                await self.transport.append(
+                    NEW_TX_EVENT_CHANNEL,
+                    encode_fields(tx_event, self.codec),
                 )
         except Exception as e:
             # Log error but don't re-raise to avoid disrupting the producer
             logger.error(f"Error producing tx event to Redis Stream: {e}")
 
+    def get_dedup_stats(self) -> dict[str, dict[str, float]]:
+        """各去重规则的本地 / Redis 命中次数和过滤比例"""
+        return self.deduper.get_stats()
+
 
-class TxEventConsumer:
+class TxEventConsumer(Consumer[TxEvent]):
     def __init__(
         self,
-        redis_client: aioredis.Redis,
+        redis_client: aioredis.Redis | None,
         consumer_group: str,
         consumer_name: str,
         batch_size: int = 10,
         poll_timeout_ms: int = 5000,
         max_concurrent_tasks: int = 10,
+        max_concurrency: int | None = None,
+        lag_threshold: int | None = None,
     ) -> None:
         """Initialize the transaction event consumer.
 
+        同一目标钱包的交易事件按顺序处理，不同钱包的交易事件并发处理。
+
         Args:
             redis_client: Redis client instance
             consumer_group: Name of the consumer group
             consumer_name: Unique name for this consumer instance
             batch_size: Number of events to process in one batch
             poll_timeout_ms: Timeout in milliseconds for blocking read
+            max_concurrent_tasks: 同时处理的最大交易事件数
+            max_concurrency: 积压时自动扩容的并发上限，为 None 时不扩容
+            lag_threshold: 消费组积压的消息数达到该值时扩容
         """
-        self.redis = redis_client
-        self.consumer_group = consumer_group
-        self.consumer_name = consumer_name
-        self.batch_size = batch_size
-        self.poll_timeout_ms = poll_timeout_ms
-        self.is_running = False
-        self.callback: Callable[[TxEvent], Coroutine[Any, Any, None]] | None = None
-        self.task_pool = set()
-        self.semaphore = asyncio.Semaphore(max_concurrent_tasks)
-
-    async def setup(self) -> None:
-        """Setup the consumer group if it doesn't exist."""
-        try:
-            # Create consumer group if not exists
-            # Use $ as start ID to only process new messages
-            await self.redis.xgroup_create(
-                name=NEW_TX_EVENT_CHANNEL,
-                groupname=self.consumer_group,
-                mkstream=True,
-                id="$",
-            )
-        except aioredis.ResponseError as e:
-            if "BUSYGROUP" not in str(e):
-                raise
-            logger.info(f"Consumer group {self.consumer_group} already exists")
-
-    def register_callback(self, callback: Callable[[TxEvent], Coroutine[Any, Any, None]]) -> None:
-        """Register a callback function to process events.
-
-        Args:
-            callback: Function that takes a dictionary of event data and processes it
-        """
-        self.callback = callback
-
-    async def process_pending(self) -> None:
-        """Process any pending messages for this consumer."""
-        try:
-            # Read pending messages from > start
-            pending = await self.redis.xreadgroup(
-                groupname=self.consumer_group,
-                consumername=self.consumer_name,
-                streams={NEW_TX_EVENT_CHANNEL: "0"},  # 0 means all pending messages
-                count=self.batch_size,
-            )
-
-            if pending and self.callback:
-                for _, messages in pending:
-                    for message_id, fields in messages:
-                        try:
-                            await self._process_message(message_id, fields)
-                        except Exception as e:
-                            logger.error(f"Error processing pending message {message_id}: {e}")
-        except Exception as e:
-            logger.error(f"Error processing pending messages: {e}")
-
-    async def _process_message(self, message_id: str, fields: dict) -> None:
-        """Process a single message and acknowledge it.
-
-        Args:
-            message_id: ID of the message in Redis Stream
-            fields: Message fields containing the event data
-        """
-        try:
-            if self.callback is not None:
-                data = fields["data"]
-                if data is None:
-                    logger.warning(f"Data is None, message_id: {message_id}")
-                    return
-                tx_event = TxEvent.from_json(data)
-                await self.callback(tx_event)
-            # Acknowledge the message
-            await self.redis.xack(NEW_TX_EVENT_CHANNEL, self.consumer_group, message_id)
-        except Exception as e:
-            logger.exception(f"Error processing message {message_id}: {e}")
-            # Could implement retry logic here
-
-    def _create_task(self, message_id: str, fields: dict) -> None:
-        """创建新的异步任务来处理消息"""
-        task = asyncio.create_task(self._process_message(message_id, fields))
-        self.task_pool.add(task)
-        task.add_done_callback(self.task_pool.discard)
-
-    async def start(self) -> None:
-        """Start consuming messages from the stream."""
-        if not self.callback:
-            raise ValueError("No callback registered. Call register_callback first.")
-
-        await self.setup()
-        self.is_running = True
-
-        # First process any pending messages
-        await self.process_pending()
-
-        # Then start processing new messages
-        while self.is_running:
-            try:
-                # Read new messages
-                messages = await self.redis.xreadgroup(
-                    groupname=self.consumer_group,
-                    consumername=self.consumer_name,
-                    streams={NEW_TX_EVENT_CHANNEL: ">"},  # > means new messages only
-                    count=self.batch_size,
-                    block=self.poll_timeout_ms,
-                )
-
-                if messages:
-                    for stream, stream_messages in messages:
-                        for message_id, fields in stream_messages:
-                            self._create_task(message_id, fields)
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error reading from stream: {e}")
-                await asyncio.sleep(1)  # Avoid tight loop on errors
-
-    def stop(self) -> None:
-        """Stop consuming messages."""
-        self.is_running = False
+        super().__init__(
+            channel=NEW_TX_EVENT_CHANNEL,
+            data_class=TxEvent,
+            redis_client=redis_client,
+            consumer_group=consumer_group,
+            consumer_name=consumer_name,
+            batch_size=batch_size,
+            poll_timeout_ms=poll_timeout_ms,
+            concurrency=max_concurrent_tasks,
+            key_func=_target_wallet,
+            max_concurrency=max_concurrency,
+            lag_threshold=lag_threshold,
+            # 交易事件没有写入 timestamp 字段
+            max_process_time=None,
+            transport=get_transport(redis_client, settings.db.transport),
+        )
+
+
+def _target_wallet(tx_event: TxEvent) -> str:
+    return tx_event.who
@@ -0,0 +1,117 @@
+"""
+User event producer and consumer for notifying wallet changes
+"""
+
+from enum import Enum
+
+import aioredis
+import orjson as json
+from aioredis.client import PubSub
+from pydantic import BaseModel
+
+from solbot_common.config import settings
+from solbot_common.log import logger
+
+from .transport import MemorySubscription, get_transport
+
+USER_EVENT_CHANNEL = "user_events"
+
+
+class UserEventType(str, Enum):
+    """用户钱包事件类型"""
+
+    UPSERT = "upsert"  # 新增或导入钱包、启用钱包
+    DELETE = "delete"  # 删除或停用钱包
+
+
+class UserEvent(BaseModel):
+    """用户钱包事件，只包含钱包地址，私钥由订阅方自行从数据库读取"""
+
+    event_type: UserEventType
+    pubkey: str
+
+
+class UserEventProducer:
+    """用户钱包事件生产者
+
+    事件需要在数据库事务提交之后发布，否则订阅方可能读到旧的数据。
+    """
+
+    def __init__(self, redis: aioredis.Redis | None):
+        self.redis = redis
+        self.channel = USER_EVENT_CHANNEL
+        self.transport = get_transport(redis, settings.db.transport)
+
+    async def publish_event(self, event: UserEvent):
+        """发布用户钱包事件"""
+        await self.transport.publish(self.channel, json.dumps(event.model_dump()).decode("utf-8"))
+
+    async def wallet_changed(self, pubkey: str):
+        """钱包新增或启用
+
+        Args:
+            pubkey: 钱包地址
+        """
+        await self.publish_event(UserEvent(event_type=UserEventType.UPSERT, pubkey=pubkey))
+        logger.info(f"Published wallet changed event: {pubkey}")
+
+    async def wallet_deleted(self, pubkey: str):
+        """钱包删除或停用
+
+        Args:
+            pubkey: 钱包地址
+        """
+        await self.publish_event(UserEvent(event_type=UserEventType.DELETE, pubkey=pubkey))
+        logger.info(f"Published wallet deleted event: {pubkey}")
+
+
+class UserEventConsumer:
+    """用户钱包事件消费者"""
+
+    def __init__(self, redis: aioredis.Redis | None):
+        self.redis = redis
+        self.channel = USER_EVENT_CHANNEL
+        self.transport = get_transport(redis, settings.db.transport)
+        self._pubsub: PubSub | MemorySubscription | None = None
+
+    async def subscribe(self) -> PubSub | MemorySubscription:
+        """订阅用户钱包事件
+
+        Raises:
+            RuntimeError: 如果重复调用subscribe
+        """
+        if self._pubsub is not None:
+            raise RuntimeError("Already subscribed to channel")
+
+        self._pubsub = await self.transport.subscribe(self.channel)
+        return self._pubsub
+
+    async def unsubscribe(self) -> None:
+        """取消订阅并清理资源"""
+        if self._pubsub is None:
+            return
+
+        await self._pubsub.unsubscribe(self.channel)
+        await self._pubsub.close()
+        self._pubsub = None
+
+    async def get_event(self, timeout: float = 0.5) -> UserEvent | None:
+        """读取下一个事件，超时或收到非事件消息时返回 None
+
+        Raises:
+            RuntimeError: 如果未订阅就调用
+        """
+        if self._pubsub is None:
+            raise RuntimeError("Not subscribed to any channel")
+
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None or message.get("type") != "message":
+            return None
+        data = message.get("data")
+        if not data:
+            return None
+        try:
+            return UserEvent(**json.loads(data))
+        except Exception as e:
+            logger.error(f"Invalid user event: {data!r}, cause: {e}")
+            return None
@@ -1,5 +1,6 @@
 from .bonding_curve_account import BondingCurveAccount
 from .global_account import GlobalAccount
 from .layouts import *
+from .pump_trade_event import PumpTradeEvent
 
-__all__ = ["BondingCurveAccount", "GlobalAccount"]
+__all__ = ["BondingCurveAccount", "GlobalAccount", "PumpTradeEvent"]
@@ -0,0 +1,69 @@
+import struct
+from dataclasses import dataclass
+
+from solders.pubkey import Pubkey  # type: ignore
+
+# sha256("event:TradeEvent")[:8]
+PUMP_TRADE_EVENT_DISCRIMINATOR = bytes.fromhex("bddb7fd34ee661ee")
+
+_LAYOUT = struct.Struct("<8s32sQQ?32sqQQ")
+
+
+@dataclass
+class PumpTradeEvent:
+    mint: Pubkey
+    sol_amount: int
+    token_amount: int
+    is_buy: bool
+    user: Pubkey
+    timestamp: int
+    virtual_sol_reserves: int
+    virtual_token_reserves: int
+
+    @classmethod
+    def from_buffer(cls, buffer: bytes) -> "PumpTradeEvent":
+        """
+        从 `Program data:` 日志中的事件数据解析 TradeEvent
+        格式: <8s 32s Q Q ? 32s q Q Q，之后新增的字段会被忽略
+        """
+        try:
+            (
+                discriminator,
+                mint,
+                sol_amount,
+                token_amount,
+                is_buy,
+                user,
+                timestamp,
+                virtual_sol_reserves,
+                virtual_token_reserves,
+            ) = _LAYOUT.unpack_from(buffer)
+        except struct.error as e:
+            raise ValueError(f"Failed to decode buffer: {e}")
+
+        if discriminator != PUMP_TRADE_EVENT_DISCRIMINATOR:
+            raise ValueError("Not a pump.fun TradeEvent")
+
+        return cls(
+            mint=Pubkey.from_bytes(mint),
+            sol_amount=sol_amount,
+            token_amount=token_amount,
+            is_buy=is_buy,
+            user=Pubkey.from_bytes(user),
+            timestamp=timestamp,
+            virtual_sol_reserves=virtual_sol_reserves,
+            virtual_token_reserves=virtual_token_reserves,
+        )
+
+    def to_buffer(self) -> bytes:
+        return _LAYOUT.pack(
+            PUMP_TRADE_EVENT_DISCRIMINATOR,
+            bytes(self.mint),
+            self.sol_amount,
+            self.token_amount,
+            self.is_buy,
+            bytes(self.user),
+            self.timestamp,
+            self.virtual_sol_reserves,
+            self.virtual_token_reserves,
+        )
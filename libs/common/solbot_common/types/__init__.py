@@ -1,4 +1,5 @@
 from .swap import SwapEvent, SwapResult
+from .trace import TraceContext
 from .tx import SolAmountChange, TokenAmountChange, TxEvent, TxType
 
 __all__ = [
@@ -6,6 +7,7 @@ __all__ = [
     "SwapEvent",
     "SwapResult",
     "TokenAmountChange",
+    "TraceContext",
     "TxEvent",
     "TxType",
 ]
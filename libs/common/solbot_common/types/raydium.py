@@ -36,6 +36,9 @@ class AmmV4PoolKeys:
     ray_authority_v4: Pubkey
     open_book_program: Pubkey
     token_program_id: Pubkey
+    # 兑换手续费，AMM v4 池子默认为 25 / 10000
+    swap_fee_numerator: int = 25
+    swap_fee_denominator: int = 10000
 
     @classmethod
     def from_pool_data(cls, pool_id: str | Pubkey, amm_data: bytes, market_data: bytes) -> Self:
@@ -77,6 +80,8 @@ class AmmV4PoolKeys:
             ray_authority_v4=ray_authority_v4,
             open_book_program=open_book_program,
             token_program_id=token_program_id,
+            swap_fee_numerator=amm_data_decoded.swapFeeNumerator,
+            swap_fee_denominator=amm_data_decoded.swapFeeDenominator,
         )
 
         return pool_keys
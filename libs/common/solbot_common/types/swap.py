@@ -4,6 +4,7 @@ from pydantic import BaseModel
 from typing_extensions import Self
 
 from solbot_common.models.swap_record import SwapRecord
+from solbot_common.types.trace import TraceContext
 from solbot_common.types.tx import TxEvent
 
 
@@ -27,6 +28,10 @@ class SwapEvent(BaseModel):
     program_id: str | None = None
     # --- copytrade, 如果 by 为 copytrade, 则不为空 ---
     tx_event: TxEvent | None = None
+    # --- 链路追踪，由链上交易触发时不为空 ---
+    trace: TraceContext | None = None
+    # --- 截止时间（unix timestamp），超过后交易事件不再执行，为空时使用默认的处理时限 ---
+    deadline: float | None = None
 
     def to_dict(self) -> dict:
         return self.model_dump()
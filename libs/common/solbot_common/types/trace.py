@@ -0,0 +1,76 @@
+"""交易链路追踪上下文
+
+从 Geyser / WSS 收到链上交易开始，随 TxEvent、SwapEvent 在各个进程之间传递，
+每经过一个环节记录一次时间点，用于定位一笔跟单交易的耗时花在了哪里。
+
+时间点使用 time.monotonic()，CLOCK_MONOTONIC 在同一主机的进程之间是共享的，
+跨主机部署时不同主机上的时间点之间不可比较。
+"""
+
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TraceContext:
+    # 源交易签名
+    trace_id: str
+    # 来源，如 geyser:geyser-0 / wss / wss_log
+    source: str
+    slot: int | None = None
+    # 环节 -> 到达该环节的时间点，按经过的顺序排列
+    stamps: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def start(
+        cls,
+        trace_id: str,
+        source: str,
+        slot: int | None = None,
+        received_at: float | None = None,
+    ) -> "TraceContext":
+        if received_at is None:
+            received_at = time.monotonic()
+        return cls(trace_id=trace_id, source=source, slot=slot, stamps={"received": received_at})
+
+    def stamp(self, stage: str, at: float | None = None) -> None:
+        self.stamps[stage] = time.monotonic() if at is None else at
+
+    def fork(self) -> "TraceContext":
+        """复制一份上下文，一笔交易触发多个跟单时各自独立记录"""
+        return TraceContext(
+            trace_id=self.trace_id, source=self.source, slot=self.slot, stamps=dict(self.stamps)
+        )
+
+    def breakdown(self) -> dict[str, float]:
+        """每个环节相对上一个环节的耗时（毫秒）"""
+        result = {}
+        previous = None
+        for stage, at in self.stamps.items():
+            if previous is not None:
+                result[stage] = round((at - previous) * 1000, 3)
+            previous = at
+        return result
+
+    def elapsed_ms(self) -> float:
+        if len(self.stamps) < 2:
+            return 0.0
+        values = list(self.stamps.values())
+        return round((values[-1] - values[0]) * 1000, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "source": self.source,
+            "slot": self.slot,
+            "stamps": self.stamps,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "TraceContext":
+        return cls(
+            trace_id=d["trace_id"],
+            source=d["source"],
+            slot=d.get("slot"),
+            stamps=dict(d.get("stamps") or {}),
+        )
@@ -1,9 +1,11 @@
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, fields
 from enum import Enum
 from typing import Literal, TypedDict
 
 import orjson as json
 
+from solbot_common.types.trace import TraceContext
+
 
 class TxType(Enum):
     OPEN_POSITION = "open_position"  # 开仓
@@ -28,16 +30,31 @@ class TxEvent:
     pre_token_amount: int
     post_token_amount: int
     program_id: str | None = None
+    trace: TraceContext | None = None
+
+    def to_dict(self) -> dict:
+        # 除 trace 外都是标量，逐个取值比 asdict 的递归深拷贝快得多
+        d = {f.name: getattr(self, f.name) for f in fields(self)}
+        d["tx_type"] = self.tx_type.value
+        if self.trace is not None:
+            d["trace"] = self.trace.to_dict()
+        return d
 
     def to_json(self) -> str:
-        return json.dumps(asdict(self)).decode("utf-8")
+        return json.dumps(self.to_dict()).decode("utf-8")
 
     @classmethod
-    def from_json(cls, tx_detail: str) -> "TxEvent":
-        obj = cls(**json.loads(tx_detail))
+    def from_dict(cls, d: dict) -> "TxEvent":
+        obj = cls(**d)
         obj.tx_type = TxType(obj.tx_type)
+        if isinstance(obj.trace, dict):
+            obj.trace = TraceContext.from_dict(obj.trace)
         return obj
 
+    @classmethod
+    def from_json(cls, tx_detail: str) -> "TxEvent":
+        return cls.from_dict(json.loads(tx_detail))
+
 
 class TokenAmountChange(TypedDict):
     change_amount: int
@@ -0,0 +1,139 @@
+"""延迟统计
+
+LatencyHistogram 是 HDR 风格的延迟直方图：按 2 的幂划分区间，每个区间再线性划分为
+64 个子桶，相对误差不超过 1/64，内存占用与记录次数无关。数值以微秒为单位记录。
+
+TraceRecorder 汇总已完成的链路追踪，按环节统计延迟分位数。
+"""
+
+import time
+from collections import Counter, OrderedDict
+
+from loguru import logger
+
+from solbot_common.types.trace import TraceContext
+
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS  # 128
+_SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1  # 64
+
+
+def _bucket_index(value: int) -> int:
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS
+    return _SUB_BUCKET_COUNT + (shift - 1) * _SUB_BUCKET_HALF + (value >> shift) - _SUB_BUCKET_HALF
+
+
+def _bucket_value(index: int) -> int:
+    """桶的下界"""
+    if index < _SUB_BUCKET_COUNT:
+        return index
+    shift, offset = divmod(index - _SUB_BUCKET_COUNT, _SUB_BUCKET_HALF)
+    return (offset + _SUB_BUCKET_HALF) << (shift + 1)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts: Counter[int] = Counter()
+        self.count = 0
+        self.total_us = 0
+        self.min_us: int | None = None
+        self.max_us = 0
+
+    def record(self, seconds: float) -> None:
+        value = max(int(seconds * 1_000_000), 0)
+        self.counts[_bucket_index(value)] += 1
+        self.count += 1
+        self.total_us += value
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+        self.max_us = max(self.max_us, value)
+
+    def percentile(self, q: float) -> float:
+        """返回第 q 百分位的延迟（毫秒）"""
+        if self.count == 0:
+            return 0.0
+        rank = max(int(self.count * q / 100 + 0.5), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_value(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self, percentiles: tuple[float, ...] = (50, 90, 99)) -> dict[str, float]:
+        result: dict[str, float] = {"count": self.count}
+        if self.count == 0:
+            return result
+        result["min_ms"] = (self.min_us or 0) / 1000
+        result["mean_ms"] = round(self.total_us / self.count / 1000, 3)
+        for q in percentiles:
+            result[f"p{q:g}_ms"] = self.percentile(q)
+        result["max_ms"] = self.max_us / 1000
+        return result
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+class TraceRecorder:
+    """记录已完成的链路追踪
+
+    Args:
+        maxsize: 最多保留的追踪数，超出后淘汰最早的追踪
+        report_interval: 输出各环节延迟分位数的间隔（秒），0 表示不输出
+    """
+
+    def __init__(self, maxsize: int = 1000, report_interval: float = 60):
+        self.maxsize = maxsize
+        self.report_interval = report_interval
+        self.histograms: dict[str, LatencyHistogram] = {}
+        # trace_id -> 追踪，一笔源交易触发多个跟单时有多条
+        self.traces: OrderedDict[str, list[TraceContext]] = OrderedDict()
+        self._last_report = time.monotonic()
+
+    def record(self, trace: TraceContext) -> None:
+        for stage, elapsed_ms in trace.breakdown().items():
+            self._histogram(stage).record(elapsed_ms / 1000)
+        self._histogram("total").record(trace.elapsed_ms() / 1000)
+
+        traces = self.traces.get(trace.trace_id)
+        if traces is None:
+            traces = self.traces[trace.trace_id] = []
+            if len(self.traces) > self.maxsize:
+                self.traces.popitem(last=False)
+        traces.append(trace)
+        self._maybe_report()
+
+    def _histogram(self, stage: str) -> LatencyHistogram:
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms[stage] = LatencyHistogram()
+        return hist
+
+    def get_breakdown(self, trace_id: str) -> list[dict]:
+        """单笔源交易的各环节耗时（毫秒）"""
+        return [
+            {
+                "source": trace.source,
+                "slot": trace.slot,
+                "stages": trace.breakdown(),
+                "total_ms": trace.elapsed_ms(),
+            }
+            for trace in self.traces.get(trace_id, [])
+        ]
+
+    def get_percentiles(
+        self, percentiles: tuple[float, ...] = (50, 90, 99)
+    ) -> dict[str, dict[str, float]]:
+        """各环节的延迟统计（毫秒）"""
+        return {stage: hist.summary(percentiles) for stage, hist in self.histograms.items()}
+
+    def _maybe_report(self) -> None:
+        if self.report_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        logger.info(f"Trace latency: {self.get_percentiles()}")
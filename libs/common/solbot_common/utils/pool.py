@@ -105,6 +105,8 @@ async def fetch_amm_v4_pool_keys(pool_id: str) -> AmmV4PoolKeys | None:
         ray_authority_v4=ray_authority_v4,
         open_book_program=open_book_program,
         token_program_id=token_program_id,
+        swap_fee_numerator=amm_data_decoded.swapFeeNumerator,
+        swap_fee_denominator=amm_data_decoded.swapFeeDenominator,
     )
 
     return pool_keys
@@ -373,28 +375,25 @@ def make_clmm_swap_instruction(
 
 
 async def get_amm_v4_reserves(pool_keys: AmmV4PoolKeys) -> tuple:
-    quote_vault = pool_keys.quote_vault
-    quote_decimal = pool_keys.quote_decimals
-    quote_mint = pool_keys.quote_mint
-
-    base_vault = pool_keys.base_vault
-    base_decimal = pool_keys.base_decimals
-    base_mint = pool_keys.base_mint
-
     client = get_async_client()
     balances_response = await client.get_multiple_accounts_json_parsed(
-        [quote_vault, base_vault], Processed
+        [pool_keys.quote_vault, pool_keys.base_vault], Processed
     )
     balances = balances_response.value
+    return parse_amm_v4_reserves(pool_keys, balances[0], balances[1])
 
-    balances_response = await client.get_multiple_accounts_json_parsed(
-        [quote_vault, base_vault], Processed
-    )
-    balances = balances_response.value
+
+def parse_amm_v4_reserves(pool_keys: AmmV4PoolKeys, quote_account, base_account) -> tuple:
+    """从 jsonParsed 格式的 quote vault、base vault 账户计算池子储备量
+
+    Returns:
+        tuple: (代币储备量, SOL 储备量, 代币精度)
+    """
+    quote_decimal = pool_keys.quote_decimals
+    base_decimal = pool_keys.base_decimals
+    base_mint = pool_keys.base_mint
 
     try:
-        quote_account = balances[0]
-        base_account = balances[1]
         quote_account_balance = quote_account.data.parsed["info"]["tokenAmount"][  # type: ignore
             "uiAmount"
         ]
@@ -0,0 +1,275 @@
+"""AMM 报价
+
+按链上程序的整数运算计算 Raydium AMM v4 和 pump.fun bonding curve 的兑换数量：
+
+- Raydium AMM v4：手续费按 swap_fee_numerator / swap_fee_denominator 向上取整扣除，
+  剩余数量按恒定乘积向下取整
+- pump.fun：与 BondingCurveAccount.get_buy_price / get_sell_price 一致，
+  买入时先从输入的 SOL 中扣除手续费
+
+同一个储备快照需要为多个数量报价时（同一笔交易的所有跟单者、同一代币的所有持仓），
+使用 quote_batch 一次计算。数量足够多时在 NumPy 数组上计算：先用 float64 估算商，
+再用 uint64 的回绕乘法得到精确的余数来修正估算值，结果仍是精确的整数；
+数量较少或数值可能超出 64 位时回退到 Python 整数逐个计算。
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+from solbot_common.constants import WSOL
+from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
+from solbot_common.types.raydium import AmmV4PoolKeys
+
+Direction = Literal["buy", "sell"]
+
+# pump.fun 全局账户中的默认手续费
+PUMP_FEE_BASIS_POINTS = 100
+# 数组路径要求输入和储备量小于该值，保证估算的余数（不超过除数的 3 倍）不会超出 int64
+_ARRAY_INPUT_LIMIT = 1 << 60
+# float64 可以精确表示的整数范围，商超出该范围时估算误差无法保证
+_ARRAY_QUOTIENT_LIMIT = 1 << 52
+# 数组运算有固定的开销，数量少于该值时逐个计算更快（见 scripts/benchmark-quote.py）
+_ARRAY_MIN_SIZE = 256
+
+
+def mul_div(a: int, b: int, d: int, ceil: bool = False) -> int:
+    """a * b / d 取整（默认向下取整）"""
+    q, r = divmod(a * b, d)
+    return q + 1 if ceil and r else q
+
+
+def _mul_div_array(a, b, d, ceil: bool = False):
+    """数组形式的 mul_div，a、d 为 int64 数组，b 为整数或 int64 数组，无法保证精确时返回 None"""
+    if np.any(d <= 0):
+        return None
+    b = np.asarray(b, dtype=np.int64)
+    with np.errstate(over="ignore"):
+        estimate = np.floor(a.astype(np.float64) * b.astype(np.float64) / d.astype(np.float64))
+        if estimate.size and estimate.max() >= _ARRAY_QUOTIENT_LIMIT:
+            return None
+        q = estimate.astype(np.int64)
+        # 真实余数 a * b - q * d 很小，乘积在 uint64 上回绕后相减仍得到精确值
+        r = (
+            a.astype(np.uint64) * b.astype(np.uint64) - q.astype(np.uint64) * d.astype(np.uint64)
+        ).astype(np.int64)
+    # 估算误差不超过 2
+    for _ in range(2):
+        low = r < 0
+        q, r = np.where(low, q - 1, q), np.where(low, r + d, r)
+        high = r >= d
+        q, r = np.where(high, q + 1, q), np.where(high, r - d, r)
+    if np.any((r < 0) | (r >= d)):
+        return None
+    return q + (r > 0) if ceil else q
+
+
+def _as_array(values: Sequence[int]):
+    """转换为 int64 数组，数量太少或数值超出范围时返回 None"""
+    if len(values) < _ARRAY_MIN_SIZE:
+        return None
+    try:
+        array = np.asarray(values, dtype=np.int64)
+    except (OverflowError, TypeError, ValueError):
+        return None
+    if array.min() < 0 or array.max() >= _ARRAY_INPUT_LIMIT:
+        return None
+    return array
+
+
+@dataclass(frozen=True)
+class AmmV4Curve:
+    """Raydium AMM v4 池子的储备快照，储备量为 vault 中的原始数量"""
+
+    token_reserve: int
+    sol_reserve: int
+    fee_numerator: int = 25
+    fee_denominator: int = 10000
+
+    @classmethod
+    def from_vault_amounts(
+        cls, pool_keys: AmmV4PoolKeys, quote_amount: int, base_amount: int
+    ) -> "AmmV4Curve":
+        if pool_keys.base_mint == WSOL:
+            token_reserve, sol_reserve = quote_amount, base_amount
+        else:
+            token_reserve, sol_reserve = base_amount, quote_amount
+        return cls(
+            token_reserve=token_reserve,
+            sol_reserve=sol_reserve,
+            fee_numerator=pool_keys.swap_fee_numerator,
+            fee_denominator=pool_keys.swap_fee_denominator,
+        )
+
+    def reserves(self, direction: Direction) -> tuple[int, int]:
+        """(输入方向的储备量, 输出方向的储备量)"""
+        if direction == "buy":
+            return self.sol_reserve, self.token_reserve
+        return self.token_reserve, self.sol_reserve
+
+    def amount_out(self, amount_in: int, direction: Direction) -> int:
+        reserve_in, reserve_out = self.reserves(direction)
+        amount_in -= mul_div(amount_in, self.fee_numerator, self.fee_denominator, ceil=True)
+        return mul_div(amount_in, reserve_out, reserve_in + amount_in)
+
+    def amounts_out(self, amounts_in: Sequence[int], direction: Direction) -> list[int]:
+        array = _as_array(amounts_in)
+        if array is not None and self.fee_denominator < _ARRAY_INPUT_LIMIT:
+            reserve_in, reserve_out = self.reserves(direction)
+            fee = _mul_div_array(
+                array, self.fee_numerator, np.full_like(array, self.fee_denominator), ceil=True
+            )
+            if fee is not None and max(reserve_in, reserve_out) < _ARRAY_INPUT_LIMIT:
+                net = array - fee
+                out = _mul_div_array(net, reserve_out, net + reserve_in)
+                if out is not None:
+                    return out.tolist()
+        return [self.amount_out(amount_in, direction) for amount_in in amounts_in]
+
+
+@dataclass(frozen=True)
+class PumpCurve:
+    """pump.fun bonding curve 的储备快照"""
+
+    virtual_token_reserves: int
+    virtual_sol_reserves: int
+    real_token_reserves: int
+    fee_basis_points: int = PUMP_FEE_BASIS_POINTS
+
+    @classmethod
+    def from_account(
+        cls, account: BondingCurveAccount, fee_basis_points: int = PUMP_FEE_BASIS_POINTS
+    ) -> "PumpCurve":
+        if account.complete:
+            raise ValueError("Curve is complete")
+        return cls(
+            virtual_token_reserves=account.virtual_token_reserves,
+            virtual_sol_reserves=account.virtual_sol_reserves,
+            real_token_reserves=account.real_token_reserves,
+            fee_basis_points=fee_basis_points,
+        )
+
+    def reserves(self, direction: Direction) -> tuple[int, int]:
+        """(输入方向的储备量, 输出方向的储备量)"""
+        if direction == "buy":
+            return self.virtual_sol_reserves, self.virtual_token_reserves
+        return self.virtual_token_reserves, self.virtual_sol_reserves
+
+    def amount_out(self, amount_in: int, direction: Direction) -> int:
+        if amount_in <= 0:
+            return 0
+        if direction == "buy":
+            # 手续费在 SOL 成本之外另收，可用于买入的 SOL 为 amount_in / (1 + fee)
+            sol_in = mul_div(amount_in, 10000, 10000 + self.fee_basis_points)
+            # virtual_token_reserves - (k // (virtual_sol_reserves + sol_in) + 1)
+            tokens = (
+                mul_div(
+                    sol_in, self.virtual_token_reserves, self.virtual_sol_reserves + sol_in, True
+                )
+                - 1
+            )
+            return max(0, min(tokens, self.real_token_reserves))
+        sol_out = mul_div(
+            amount_in, self.virtual_sol_reserves, self.virtual_token_reserves + amount_in
+        )
+        return sol_out - mul_div(sol_out, self.fee_basis_points, 10000)
+
+    def amounts_out(self, amounts_in: Sequence[int], direction: Direction) -> list[int]:
+        array = _as_array(amounts_in)
+        if array is not None and max(self.reserves(direction)) < _ARRAY_INPUT_LIMIT:
+            out = self._amounts_out_array(array, direction)
+            if out is not None:
+                return out.tolist()
+        return [self.amount_out(amount_in, direction) for amount_in in amounts_in]
+
+    def _amounts_out_array(self, array, direction: Direction):
+        fee_bps = self.fee_basis_points
+        if direction == "buy":
+            sol_in = _mul_div_array(array, 10000, np.full_like(array, 10000 + fee_bps))
+            if sol_in is None:
+                return None
+            tokens = _mul_div_array(
+                sol_in, self.virtual_token_reserves, sol_in + self.virtual_sol_reserves, ceil=True
+            )
+            if tokens is None:
+                return None
+            tokens = np.clip(tokens - 1, 0, self.real_token_reserves)
+            return np.where(array > 0, tokens, 0)
+        sol_out = _mul_div_array(
+            array, self.virtual_sol_reserves, array + self.virtual_token_reserves
+        )
+        if sol_out is None:
+            return None
+        fee = _mul_div_array(sol_out, fee_bps, np.full_like(sol_out, 10000))
+        if fee is None:
+            return None
+        return sol_out - fee
+
+
+Curve = AmmV4Curve | PumpCurve
+
+
+def min_amount_out(amount_out: int, slippage_bps: int) -> int:
+    """按滑点计算的最小输出数量"""
+    return amount_out * (10000 - slippage_bps) // 10000
+
+
+def price_impact(curve: Curve, amount_in: int, direction: Direction) -> float:
+    """成交均价相对当前价格的偏离（0~1 的小数，不含手续费）"""
+    reserve_in, _ = curve.reserves(direction)
+    return amount_in / (reserve_in + amount_in) if amount_in > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class QuoteBatch:
+    amounts_in: list[int]
+    amounts_out: list[int]
+    min_amounts_out: list[int]
+    price_impacts: list[float]
+
+
+def quote_batch(
+    curve: Curve,
+    amounts_in: Sequence[int],
+    direction: Direction,
+    slippage_bps: int | Sequence[int] = 0,
+) -> QuoteBatch:
+    """在同一个储备快照上为多个数量报价
+
+    Args:
+        curve: 储备快照
+        amounts_in: 输入数量（最小单位）
+        direction: buy 为 SOL 买入代币，sell 为卖出代币换 SOL
+        slippage_bps: 滑点，可以为每个数量分别指定
+    """
+    amounts_in = list(amounts_in)
+    amounts_out = curve.amounts_out(amounts_in, direction)
+    slippages = (
+        [slippage_bps] * len(amounts_in) if isinstance(slippage_bps, int) else list(slippage_bps)
+    )
+    if len(slippages) != len(amounts_in):
+        raise ValueError("slippage_bps must have the same length as amounts_in")
+
+    reserve_in, _ = curve.reserves(direction)
+    array, out_array = _as_array(amounts_in), _as_array(amounts_out)
+    in_range = 0 <= min(slippages) <= max(slippages) <= 10000
+    if array is not None and out_array is not None and in_range:
+        slippage_array = np.asarray(slippages, dtype=np.int64)
+        min_array = _mul_div_array(
+            out_array, 10000 - slippage_array, np.full_like(out_array, 10000)
+        )
+        if min_array is not None:
+            impacts = array / (array + float(reserve_in))
+            return QuoteBatch(amounts_in, amounts_out, min_array.tolist(), impacts.tolist())
+
+    return QuoteBatch(
+        amounts_in,
+        amounts_out,
+        [
+            min_amount_out(amount_out, slippage)
+            for amount_out, slippage in zip(amounts_out, slippages, strict=True)
+        ],
+        [price_impact(curve, amount_in, direction) for amount_in in amounts_in],
+    )
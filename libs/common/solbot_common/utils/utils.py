@@ -167,6 +167,24 @@ async def get_token_balance(token_account: Pubkey, client: AsyncClient) -> float
     return resp.value.ui_amount
 
 
+def slippage_bps_from_price_impact(
+    price_impact: float,
+    min_slippage_bps: int = 250,
+    max_slippage_bps: int = 3000,
+    price_impact_multiplier: float = 1.5,
+) -> int:
+    """按 price impact（0~1 的小数）计算滑点，返回 bps
+
+    滑点为 price impact 的 price_impact_multiplier 倍，
+    限制在 [min_slippage_bps, max_slippage_bps] 之间
+    """
+    # 转换为百分比，基础滑点为 price impact 的倍数
+    slippage = price_impact * 100 * price_impact_multiplier
+    slippage = max(slippage, min_slippage_bps / 100)
+    slippage = min(slippage, max_slippage_bps / 100)
+    return int(slippage * 100)  # 转换为 bps
+
+
 # FIXME: jupiter 的报价 API 有请求频率的限制
 #  后续需要重构该函数为独立的模块，并使用令牌桶来限制请求频率
 #  每秒最多 1 次，每分钟最多 60 次，每小时最多 3600 次
@@ -229,19 +247,18 @@ async def calculate_auto_slippage(
 
         # price_impact 是 0~1 的小数
         price_impact = Decimal(quote["priceImpactPct"])
-        # 转换为百分比
-        price_impact_pct = float(price_impact * 100)
-
-        # 基础滑点为 price impact 的倍数
-        slippage = price_impact_pct * price_impact_multiplier
-        slippage = max(slippage, min_slippage_bps / 100)
-        slippage = min(slippage, max_slippage_bps / 100)
+        slippage_bps = slippage_bps_from_price_impact(
+            float(price_impact),
+            min_slippage_bps=min_slippage_bps,
+            max_slippage_bps=max_slippage_bps,
+            price_impact_multiplier=price_impact_multiplier,
+        )
 
         logger.info(
-            f"Slippage calculation: price_impact={price_impact_pct}%, "
-            f"multiplier={price_impact_multiplier}, final_slippage={slippage}%"
+            f"Slippage calculation: price_impact={float(price_impact * 100)}%, "
+            f"multiplier={price_impact_multiplier}, final_slippage={slippage_bps / 100}%"
         )
-        return int(slippage * 100)  # 转换为 bps
+        return slippage_bps
     except Exception as e:
         logger.warning(f"Unexpected error while calculating slippage: {e}")
         return default_slippage_bps
@@ -11,7 +11,11 @@ class RedisClient:
         if cls._instance is None:
             try:
                 cls._instance = Redis.from_url(
-                    str(settings.db.redis), encoding="utf-8", decode_responses=True
+                    str(settings.db.redis),
+                    encoding="utf-8",
+                    # msgpack 编码的 stream 消息不是合法的 UTF-8，以 surrogateescape 解码后可无损还原
+                    encoding_errors="surrogateescape",
+                    decode_responses=True,
                 )
                 logger.info("Redis connection established")
             except Exception as e:
@@ -141,6 +141,42 @@ class GeyserClient:
 
         return request_queue, response_generator()
 
+    async def subscribe_raw_with_request(
+        self,
+        request: geyser_pb2.SubscribeRequest | None = None,
+    ) -> tuple[
+        asyncio.Queue[geyser_pb2.SubscribeRequest],
+        AsyncGenerator[bytes, None],
+    ]:
+        """与 subscribe_with_request 相同，但响应不做反序列化，直接返回原始字节
+
+        用于将 protobuf 解码放到其他进程中执行。
+        """
+        request_queue = asyncio.Queue()
+
+        if request:
+            await request_queue.put(request)
+
+        async def request_iterator():
+            while True:
+                try:
+                    yield await request_queue.get()
+                except asyncio.CancelledError:
+                    break
+
+        subscribe = self._channel.stream_stream(
+            "/geyser.Geyser/Subscribe",
+            request_serializer=geyser_pb2.SubscribeRequest.SerializeToString,
+            response_deserializer=None,
+        )
+        call = subscribe(request_iterator())
+
+        async def response_generator():
+            async for response in call:
+                yield response
+
+        return request_queue, response_generator()
+
     async def ping(self, count: int) -> geyser_pb2.PongResponse:
         request = geyser_pb2.PingRequest(count=count)
         return await self.geyser.Ping(request)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""比较 stream 消息编解码方式的耗时和体积
+
+    python scripts/benchmark-codec.py
+    python scripts/benchmark-codec.py --redis-url redis://127.0.0.1:6380/0
+
+指定 --redis-url 时，分别用每种编码方式向临时 stream 写入 --entries 条消息，
+用 MEMORY USAGE 统计 stream 占用的内存，结束后删除临时 stream。
+"""
+
+import argparse
+import asyncio
+import time
+import timeit
+from functools import partial
+
+from solbot_common.cp.codec import JsonCodec, MsgpackCodec, encode_fields
+from solbot_common.types import SwapEvent, SwapResult, TraceContext, TxEvent, TxType
+
+WALLET = "5Q544fKrFoe6tsEbD7S8EmxGTJYAKtTVhAW5Q5pge4j1"
+MINT = "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN"
+SIGNATURE = (
+    "5VERv8NMvzbJMEkV8xnrLkEaWRtSz9CosKDYjCJjBRnbJLgp8uirBgmQpjKhoR4tjF3ZpRzrFmBV6UjKdiSZkQUW"
+)
+CODECS = [JsonCodec(), MsgpackCodec()]
+
+
+def sample_events() -> list[TxEvent | SwapEvent | SwapResult]:
+    """构造与线上结构一致的消息：跟单 SwapEvent 嵌套 TxEvent，SwapResult 嵌套 SwapEvent"""
+    trace = TraceContext.start(SIGNATURE, "geyser:geyser-0", slot=300_000_000)
+    for stage in ("decoded", "parsed", "tx_event_consumed"):
+        trace.stamp(stage)
+    tx_event = TxEvent(
+        signature=SIGNATURE,
+        from_amount=1_000_000_000,
+        from_decimals=9,
+        to_amount=35_000_000_000,
+        to_decimals=6,
+        mint=MINT,
+        who=WALLET,
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=int(time.time()),
+        pre_token_amount=0,
+        post_token_amount=35_000_000_000,
+        program_id="6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P",
+        trace=trace,
+    )
+    swap_event = SwapEvent(
+        user_pubkey=WALLET,
+        swap_mode="ExactIn",
+        input_mint="So11111111111111111111111111111111111111112",
+        output_mint=MINT,
+        amount=50_000_000,
+        ui_amount=0.05,
+        timestamp=int(time.time()),
+        priority_fee=0.002,
+        slippage_bps=1000,
+        by="copytrade",
+        program_id=tx_event.program_id,
+        tx_event=tx_event,
+        trace=trace.fork(),
+    )
+    swap_result = SwapResult(
+        swap_event=swap_event,
+        user_pubkey=WALLET,
+        submmit_time=int(time.time()),
+        by="copytrade",
+        transaction_hash=SIGNATURE,
+        blocks_passed=2,
+    )
+    return [tx_event, swap_event, swap_result]
+
+
+def bench_codecs(number: int) -> None:
+    print(f"{'type':<12}{'codec':<10}{'bytes':>8}{'encode us':>12}{'decode us':>12}")
+    for event in sample_events():
+        data_class = type(event)
+        for codec in CODECS:
+            payload = codec.encode(event)
+            assert codec.decode(data_class, payload) == event
+            encode = timeit.timeit(partial(codec.encode, event), number=number)
+            decode = timeit.timeit(partial(codec.decode, data_class, payload), number=number)
+            print(
+                f"{data_class.__name__:<12}{codec.name:<10}{len(payload):>8}"
+                f"{encode / number * 1e6:>12.2f}{decode / number * 1e6:>12.2f}"
+            )
+
+
+async def bench_stream_memory(redis_url: str, entries: int) -> None:
+    from aioredis import Redis
+
+    redis = Redis.from_url(redis_url)
+    print(f"\n{'type':<12}{'codec':<10}{'stream bytes':>14}{'per entry':>12}")
+    try:
+        for event in sample_events():
+            for codec in CODECS:
+                key = f"benchmark:codec:{type(event).__name__}:{codec.name}"
+                fields = {**encode_fields(event, codec), "timestamp": int(time.time())}
+                pipe = redis.pipeline(transaction=False)
+                for _ in range(entries):
+                    pipe.xadd(key, fields)
+                await pipe.execute()
+                usage = await redis.execute_command("MEMORY", "USAGE", key, "SAMPLES", "0")
+                await redis.delete(key)
+                print(
+                    f"{type(event).__name__:<12}{codec.name:<10}{usage:>14}{usage / entries:>12.1f}"
+                )
+    finally:
+        await redis.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=10000, help="每项计时的执行次数")
+    parser.add_argument("--redis-url", help="统计 stream 内存占用使用的 Redis")
+    parser.add_argument("--entries", type=int, default=10000, help="写入临时 stream 的消息数")
+    args = parser.parse_args()
+
+    bench_codecs(args.number)
+    if args.redis_url:
+        asyncio.run(bench_stream_memory(args.redis_url, args.entries))
+
+
+if __name__ == "__main__":
+    main()
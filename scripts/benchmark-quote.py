@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""比较逐个报价和批量报价的耗时
+
+    python scripts/benchmark-quote.py
+    python scripts/benchmark-quote.py --sizes 10 100 1000
+
+在同一个储备快照上为 N 个数量报价（N 个跟单者或持仓），
+逐个调用 amount_out / min_amount_out 与一次 quote_batch 对比，并校验两者结果一致。
+"""
+
+import argparse
+import random
+import timeit
+from functools import partial
+
+from solbot_common.utils.quote import AmmV4Curve, PumpCurve, min_amount_out, quote_batch
+
+CURVES = {
+    "amm_v4": AmmV4Curve(token_reserve=206_900_000 * 10**6, sol_reserve=85 * 10**9),
+    "pump": PumpCurve(
+        virtual_token_reserves=1_073_000_000 * 10**6,
+        virtual_sol_reserves=30 * 10**9,
+        real_token_reserves=793_100_000 * 10**6,
+    ),
+}
+
+
+def loop(curve, amounts: list[int], slippages: list[int]) -> list[int]:
+    return [
+        min_amount_out(curve.amount_out(amount, "buy"), slippage)
+        for amount, slippage in zip(amounts, slippages, strict=True)
+    ]
+
+
+def batch(curve, amounts: list[int], slippages: list[int]) -> list[int]:
+    return quote_batch(curve, amounts, "buy", slippages).min_amounts_out
+
+
+def bench(size: int, number: int) -> None:
+    rng = random.Random(size)
+    amounts = [rng.randrange(10**6, 10**10) for _ in range(size)]
+    slippages = [rng.randrange(0, 3000) for _ in range(size)]
+    for name, curve in CURVES.items():
+        args = (curve, amounts, slippages)
+        assert loop(*args) == batch(*args)
+        loop_time = timeit.timeit(partial(loop, *args), number=number) / number
+        batch_time = timeit.timeit(partial(batch, *args), number=number) / number
+        print(
+            f"{name:<10}{size:>8}{loop_time * 1e6:>12.1f}{batch_time * 1e6:>12.1f}"
+            f"{loop_time / batch_time:>10.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--number", type=int, default=200, help="每项计时的执行次数")
+    args = parser.parse_args()
+
+    print(f"{'curve':<10}{'size':>8}{'loop us':>12}{'batch us':>12}{'speedup':>11}")
+    for size in args.sizes:
+        bench(size, args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""比较使用指令模板前后构建 pump 交易的耗时
+
+    python scripts/benchmark-swap-template.py
+    python scripts/benchmark-swap-template.py --rpc-latency 30 --number 50
+
+不访问 RPC：getMultipleAccounts 和 global account 的查询被替换为等待 --rpc-latency 毫秒后
+返回固定结果，blockhash 和签名同样被跳过，只统计构建指令本身和 RPC 往返的耗时。
+关闭模板（ttl=0）时每笔交易都会重新读取 global account、推导 PDA、解析 IDL；
+开启模板时只读取 bonding curve。两种情况下互不依赖的查询都并发执行，RPC 往返只有一次。
+"""
+
+import argparse
+import asyncio
+import struct
+import time
+from types import SimpleNamespace
+
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.log import logger
+from solbot_common.utils.latency import LatencyHistogram
+from solders.account import Account  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from trading.swap import SwapDirection
+from trading.transaction.builders import pump
+
+MINT = "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN"
+# discriminator, virtual token/sol reserves, real token/sol reserves, total supply, complete
+BONDING_CURVE_DATA = struct.pack(
+    "<QQQQQQ?",
+    0,
+    1_000_000_000_000_000,
+    30_000_000_000,
+    800_000_000_000_000,
+    0,
+    1_000_000_000_000_000,
+    False,
+)
+
+
+class FakeRpc:
+    """getMultipleAccounts 等待固定延迟后返回 bonding curve，其他账户（ATA）不存在"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+
+    async def get_multiple_accounts_json_parsed(self, pubkeys, commitment=None):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        bonding_curve = pump.get_bonding_curve_pda(Pubkey.from_string(MINT), PUMP_FUN_PROGRAM)
+        return SimpleNamespace(
+            value=[
+                Account(lamports=1, data=BONDING_CURVE_DATA, owner=PUMP_FUN_PROGRAM)
+                if pubkey == bonding_curve
+                else None
+                for pubkey in pubkeys
+            ]
+        )
+
+
+def patch_rpc(latency: float) -> None:
+    """把 global account 的查询和交易签名替换为假实现"""
+    global_account = SimpleNamespace(fee_recipient=Pubkey.new_unique())
+
+    async def get_global_account(client, program):
+        await asyncio.sleep(latency)
+        return global_account
+
+    async def build_transaction(keypair, instructions, priority_fee=None, use_jito=False):
+        return instructions
+
+    pump.get_global_account = get_global_account
+    pump.build_transaction = build_transaction
+
+
+def new_builder(ttl: float, latency: float) -> pump.PumpTransactionBuilder:
+    builder = pump.PumpTransactionBuilder(FakeRpc(latency))  # type: ignore[arg-type]
+    builder.templates.ttl = ttl
+    return builder
+
+
+async def bench(number: int, latency: float) -> None:
+    patch_rpc(latency)
+    keypair = Keypair()
+    print(f"{'template':<10}{'requests':>10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, ttl in (("off", 0), ("on", 300)):
+        builder = new_builder(ttl, latency)
+        # 预热：开启模板时第一笔交易创建模板
+        await builder.build_swap_transaction(keypair, MINT, 0.01, SwapDirection.Buy, 100)
+        builder.rpc_client.requests = 0
+        hist = LatencyHistogram()
+        for i in range(number):
+            start = time.perf_counter()
+            await builder.build_swap_transaction(
+                keypair, MINT, 0.01 + i * 1e-6, SwapDirection.Buy, 100
+            )
+            hist.record(time.perf_counter() - start)
+        summary = hist.summary((50, 99))
+        print(
+            f"{name:<10}{builder.rpc_client.requests / number:>10.1f}{summary['mean_ms']:>10.2f}"
+            f"{summary['p50_ms']:>10.2f}{summary['p99_ms']:>10.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100, help="每种方式构建的交易数")
+    parser.add_argument("--rpc-latency", type=float, default=0, help="模拟的单次 RPC 延迟（毫秒）")
+    args = parser.parse_args()
+
+    # 构建交易时的 debug 日志会淹没结果
+    logger.remove()
+    asyncio.run(bench(args.number, args.rpc_latency / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""在同一个进程中运行 wallet-tracker、trading 和 tg-bot
+
+单机部署时配合 db.transport = "memory" 使用，服务之间的消息在进程内传递，
+不再经过 Redis；Redis 仍用于缓存和失败队列。
+
+    python scripts/run-standalone.py
+"""
+
+import asyncio
+
+from loguru import logger
+from solbot_common.config import settings
+from solbot_common.prestart import pre_start
+from solders.pubkey import Pubkey  # type: ignore
+from tg_bot.main import start_bot
+from trading.main import Trading
+from wallet_tracker.main import WalletTracker
+
+
+async def main() -> None:
+    # 从配置中获取被监听钱包，以及需要被监听的跟单目标钱包
+    wallets: set[Pubkey] = set(settings.monitor.wallets)
+    for copytrade in settings.copytrades:
+        wallets.add(copytrade.target_wallet)
+
+    tracker = WalletTracker(list(wallets))
+    trading = Trading()
+    try:
+        await asyncio.gather(tracker.start(), trading.start(), start_bot())
+    finally:
+        await trading.stop()
+        await tracker.stop()
+
+
+if __name__ == "__main__":
+    pre_start()
+    if settings.db.transport != "memory":
+        logger.warning("db.transport is not memory, services still talk through Redis")
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
@@ -0,0 +1,160 @@
+import struct
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from cache_preloader.caches.pool_state import MirroredAccount, PoolStateMirror
+from solbot_cache.pool_state import PoolAccountKind, PoolStateCache
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.utils.quote import PumpCurve
+from solbot_common.utils.utils import get_bonding_curve_pda
+from solders.pubkey import Pubkey
+
+
+def _curve(virtual_sol_reserves: int, complete: bool = False) -> bytes:
+    return struct.pack("<QQQQQQ?", 1, 10**15, virtual_sol_reserves, 10**14, 0, 10**15, complete)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def mget(self, *keys):
+        return [self.values.get(key) for key in keys]
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zremrangebyscore(self, key, min, max):
+        zset = self.zsets.get(key, {})
+        for member in [m for m, score in zset.items() if score <= max]:
+            del zset[member]
+
+    async def zrangebyscore(self, key, min, max):
+        return [m.encode() for m, score in self.zsets.get(key, {}).items() if score >= min]
+
+
+class FakeRpc:
+    def __init__(self):
+        self.accounts: dict[Pubkey, bytes] = {}
+        self.slot = 100
+
+    async def get_multiple_accounts(self, pubkeys, commitment=None):
+        return SimpleNamespace(
+            context=SimpleNamespace(slot=self.slot),
+            value=[
+                SimpleNamespace(data=self.accounts[pubkey]) if pubkey in self.accounts else None
+                for pubkey in pubkeys
+            ],
+        )
+
+
+class FakeWebsocket:
+    def __init__(self):
+        self.counter = 0
+        self.sent: list = []
+        self.unsubscribed: list[int] = []
+
+    def increment_counter_and_get_id(self):
+        self.counter += 1
+        return self.counter
+
+    async def send_data(self, message):
+        self.sent.append(message)
+
+    async def account_unsubscribe(self, subscription):
+        self.unsubscribed.append(subscription)
+
+
+@pytest.fixture
+def mirror():
+    redis, rpc = FakeRedis(), FakeRpc()
+    with patch("cache_preloader.caches.pool_state.get_async_client", return_value=rpc):
+        mirror = PoolStateMirror(redis)  # type: ignore[arg-type]
+    mirror._session = "s1"
+    mirror._websocket = FakeWebsocket()  # type: ignore[assignment]
+    return mirror, redis, rpc
+
+
+@pytest.mark.asyncio
+async def test_mirror_subscribes_tracked_curves_and_serves_fresh_state(mirror, monkeypatch):
+    mirror, redis, rpc = mirror
+    mint = Pubkey.new_unique()
+    curve = get_bonding_curve_pda(mint, PUMP_FUN_PROGRAM)
+    rpc.accounts[curve] = _curve(30 * 10**9)
+
+    async def held_mints(self):
+        return set()
+
+    monkeypatch.setattr(PoolStateMirror, "_get_held_mints", held_mints)
+    reader = PoolStateCache(redis, max_age=5)  # type: ignore[arg-type]
+    await reader.track(mint)
+    await mirror.sync()
+
+    # 一次发送所有订阅请求，快照写入镜像
+    assert [[request.account for request in batch] for batch in mirror._websocket.sent] == [[curve]]
+    await mirror.store.heartbeat(mirror._session, mirror._slot)
+    state = await reader.get_bonding_curve(curve)
+    assert state is not None and state.virtual_sol_reserves == 30 * 10**9
+
+    # 推送更新储备量，旧的 slot 被忽略
+    await mirror.update(curve, 101, _curve(31 * 10**9))
+    await mirror.update(curve, 99, _curve(1))
+    state = await reader.get_bonding_curve(curve)
+    assert state is not None and state.virtual_sol_reserves == 31 * 10**9
+    assert mirror.accounts[curve].slot == 101
+
+    # 订阅中断后条目立即失效；新的 session 不承认旧的条目
+    await mirror._invalidate()
+    assert await reader.get_bonding_curve(curve) is None
+    await mirror.store.heartbeat("s2", 102)
+    assert await reader.get_bonding_curve(curve) is None
+
+
+@pytest.mark.asyncio
+async def test_mirror_expires_without_heartbeat_and_reads_vault_amounts(mirror):
+    mirror, redis, _ = mirror
+    vaults = [Pubkey.new_unique(), Pubkey.new_unique()]
+    for vault, amount in zip(vaults, (5, 7), strict=True):
+        mirror.accounts[vault] = MirroredAccount(mint="m", kind=PoolAccountKind.TOKEN_ACCOUNT)
+        data = bytes(64) + amount.to_bytes(8, "little") + bytes(93)
+        await mirror.update(vault, 1, data)
+    await mirror.store.heartbeat(mirror._session, 1)
+
+    reader = PoolStateCache(redis, max_age=5)  # type: ignore[arg-type]
+    assert await reader.get_token_amounts(*vaults) == [5, 7]
+    assert await reader.get_token_amounts(vaults[0], Pubkey.new_unique()) is None
+    # 心跳过期（镜像停止）时回退到 RPC
+    expired = PoolStateCache(redis, max_age=-1)  # type: ignore[arg-type]
+    assert await expired.get_token_amounts(*vaults) is None
+
+
+@pytest.mark.asyncio
+async def test_get_curve_reads_bonding_curve_or_tracks_missing_mint(mirror, monkeypatch):
+    mirror, redis, _ = mirror
+    mint = Pubkey.new_unique()
+    curve = get_bonding_curve_pda(mint, PUMP_FUN_PROGRAM)
+    mirror.accounts[curve] = MirroredAccount(mint=str(mint), kind=PoolAccountKind.BONDING_CURVE)
+    await mirror.update(curve, 1, _curve(30 * 10**9))
+    await mirror.store.heartbeat(mirror._session, 1)
+
+    reader = PoolStateCache(redis, max_age=5)  # type: ignore[arg-type]
+    state = await reader.get_curve(str(mint))
+    assert isinstance(state, PumpCurve) and state.virtual_sol_reserves == 30 * 10**9
+
+    async def no_pool(mint):
+        return None
+
+    # 镜像中没有的代币返回 None，并在下次同步时订阅
+    monkeypatch.setattr("solbot_cache.pool_state.get_preferred_pool", no_pool)
+    other = Pubkey.new_unique()
+    assert await reader.get_curve(other) is None
+    assert await reader.get_tracked_mints(60) == [str(other)]
@@ -0,0 +1,87 @@
+import pytest
+from solbot_common.cp.codec import (
+    JsonCodec,
+    MsgpackCodec,
+    decode_fields,
+    encode_fields,
+)
+from solbot_common.types import SwapEvent, SwapResult, TraceContext, TxEvent, TxType
+
+pytest.importorskip("msgpack")
+
+WALLET = "5Q544fKrFoe6tsEbD7S8EmxGTJYAKtTVhAW5Q5pge4j1"
+MINT = "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN"
+SIGNATURE = (
+    "5VERv8NMvzbJMEkV8xnrLkEaWRtSz9CosKDYjCJjBRnbJLgp8uirBgmQpjKhoR4tjF3ZpRzrFmBV6UjKdiSZkQUW"
+)
+
+
+def _swap_event() -> SwapEvent:
+    trace = TraceContext.start(SIGNATURE, "geyser:geyser-0", slot=1, received_at=10.0)
+    trace.stamp("parsed", 10.002)
+    tx_event = TxEvent(
+        signature=SIGNATURE,
+        from_amount=1_000_000_000,
+        from_decimals=9,
+        to_amount=1_000_000,
+        to_decimals=6,
+        mint=MINT,
+        who=WALLET,
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=1_700_000_000,
+        pre_token_amount=0,
+        post_token_amount=1_000_000,
+        program_id="6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P",
+        trace=trace,
+    )
+    return SwapEvent(
+        user_pubkey=WALLET,
+        swap_mode="ExactIn",
+        input_mint="So11111111111111111111111111111111111111112",
+        output_mint=MINT,
+        amount=50_000_000,
+        ui_amount=0.05,
+        timestamp=1_700_000_000,
+        slippage_bps=1000,
+        by="copytrade",
+        tx_event=tx_event,
+        trace=trace.fork(),
+    )
+
+
+@pytest.mark.parametrize("codec", [JsonCodec(), MsgpackCodec()])
+def test_round_trip(codec):
+    swap_event = _swap_event()
+    swap_result = SwapResult(
+        swap_event=swap_event,
+        user_pubkey=WALLET,
+        submmit_time=1_700_000_001,
+        by="copytrade",
+        transaction_hash=SIGNATURE,
+    )
+    for data in (swap_event.tx_event, swap_event, swap_result):
+        assert codec.decode(type(data), codec.encode(data)) == data
+
+
+def test_msgpack_is_smaller_than_json():
+    swap_event = _swap_event()
+    assert len(MsgpackCodec().encode(swap_event)) < len(JsonCodec().encode(swap_event)) / 2
+
+
+def test_msgpack_survives_surrogateescape_decoding():
+    # decode_responses=True 的连接读回的是以 surrogateescape 解码的字符串
+    fields = encode_fields(_swap_event(), MsgpackCodec())
+    payload = fields["data"].decode("utf-8", "surrogateescape")
+    assert decode_fields(SwapEvent, {**fields, "data": payload}) == _swap_event()
+
+
+def test_fields_without_codec_are_json():
+    swap_event = _swap_event()
+    assert decode_fields(SwapEvent, {"data": swap_event.to_json()}) == swap_event
+
+
+def test_non_base58_values_are_kept_as_strings():
+    swap_event = _swap_event().model_copy(update={"user_pubkey": "user-1", "input_mint": "0x"})
+    codec = MsgpackCodec()
+    assert codec.decode(SwapEvent, codec.encode(swap_event)) == swap_event
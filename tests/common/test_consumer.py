@@ -0,0 +1,301 @@
+import asyncio
+import time
+
+import pytest
+from solbot_common.cp.base import Consumer
+from solbot_common.types import SwapEvent
+
+
+class FakeRedis:
+    def __init__(self, groups: list[dict] | None = None, entries: int = 0):
+        self.acked: list[str] = []
+        self.xack_calls = 0
+        self.moves: list[tuple[list, list]] = []
+        self.groups = groups or []
+        self.entries = entries
+        self.autoclaim_pages: dict[str, list] = {}
+        self.stream: dict[str, dict] = {}
+        self.refreshed: list[str] = []
+        self.heartbeats: dict[str, str] = {}
+        self.consumers: list[dict] = []
+        self.deleted_consumers: list[str] = []
+
+    async def xack(self, channel, group, *message_ids):
+        self.xack_calls += 1
+        self.acked.extend(message_ids)
+
+    async def execute_command(self, command, *args):
+        if command == "XCLAIM":
+            assert args[3] == 0 and args[-1] == "JUSTID"
+            self.refreshed.extend(args[4:-1])
+            return list(args[4:-1])
+        assert command == "XAUTOCLAIM" and args[-1] == "JUSTID"
+        start = args[4]
+        return self.autoclaim_pages[start]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def hset(self, key, field, value):
+        self.heartbeats[field] = value
+
+    async def hgetall(self, key):
+        return dict(self.heartbeats)
+
+    async def hdel(self, key, *fields):
+        for field in fields:
+            self.heartbeats.pop(field, None)
+
+    async def xinfo_consumers(self, channel, group):
+        return self.consumers
+
+    async def xgroup_delconsumer(self, channel, group, name):
+        self.deleted_consumers.append(name)
+
+    def register_script(self, script):
+        async def run(keys, args):
+            self.moves.append((keys, args))
+            return "new-id"
+
+        return run
+
+    async def xinfo_groups(self, channel):
+        return self.groups
+
+    async def xrange(self, channel, count, **kwargs):
+        return [("id", {})] * min(self.entries, count)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands: list[str] = []
+
+    def xrange(self, channel, min, max, count):
+        assert min == max and count == 1
+        self.commands.append(min)
+
+    async def execute(self):
+        return [
+            [(message_id, self.redis.stream[message_id])] if message_id in self.redis.stream else []
+            for message_id in self.commands
+        ]
+
+
+def _fields(user: str, amount: int) -> dict:
+    swap_event = SwapEvent(
+        user_pubkey=user,
+        swap_mode="ExactIn",
+        input_mint="in",
+        output_mint="out",
+        amount=amount,
+        ui_amount=amount,
+        timestamp=0,
+    )
+    return {"data": swap_event.to_json(), "timestamp": str(time.time())}
+
+
+def _consumer(redis: FakeRedis, **kwargs) -> Consumer[SwapEvent]:
+    return Consumer(
+        channel="test",
+        data_class=SwapEvent,
+        redis_client=redis,  # type: ignore[arg-type]
+        consumer_group="group",
+        consumer_name="consumer",
+        key_func=lambda e: e.user_pubkey,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_same_key_in_order_different_keys_in_parallel():
+    redis = FakeRedis()
+    consumer = _consumer(redis, concurrency=4)
+    events: list[tuple[str, str, int]] = []
+
+    async def callback(swap_event: SwapEvent):
+        events.append(("start", swap_event.user_pubkey, swap_event.amount))
+        # 第一条消息最慢，同一用户的后续消息必须等待它完成
+        await asyncio.sleep(0.05 if swap_event.amount == 1 else 0.01)
+        events.append(("end", swap_event.user_pubkey, swap_event.amount))
+
+    consumer.register_callback(callback)
+    for i, (user, amount) in enumerate([("a", 1), ("a", 2), ("b", 3)]):
+        await consumer._dispatch(f"{i}-0", _fields(user, amount))
+    await consumer.join()
+
+    a_events = [(kind, amount) for kind, user, amount in events if user == "a"]
+    assert a_events == [("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+    # b 不需要等待 a
+    assert events.index(("end", "b", 3)) < events.index(("end", "a", 1))
+    assert sorted(redis.acked) == ["0-0", "1-0", "2-0"]
+    assert consumer._key_tails == {}
+
+
+@pytest.mark.asyncio
+async def test_in_flight_is_bounded():
+    consumer = _consumer(FakeRedis(), concurrency=2)
+    running = 0
+    peak = 0
+
+    async def callback(swap_event: SwapEvent):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    consumer.register_callback(callback)
+    for i in range(6):
+        await consumer._dispatch(f"{i}-0", _fields(f"user{i}", i))
+    await consumer.join()
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_same_key_burst_does_not_block_other_keys():
+    consumer = _consumer(FakeRedis(), concurrency=2)
+    release_a = asyncio.Event()
+    done: list[tuple[str, int]] = []
+
+    async def callback(swap_event: SwapEvent):
+        if swap_event.user_pubkey == "a":
+            await release_a.wait()
+        done.append((swap_event.user_pubkey, swap_event.amount))
+
+    consumer.register_callback(callback)
+    # 同一个键的突发消息只有第一条占用并发名额
+    async def dispatch():
+        for i in range(5):
+            await consumer._dispatch(f"{i}-0", _fields("a", i))
+        await consumer._dispatch("5-0", _fields("b", 5))
+
+    await asyncio.wait_for(dispatch(), 1)
+    await asyncio.sleep(0.01)
+    assert done == [("b", 5)]
+
+    release_a.set()
+    await consumer.join()
+    assert done[1:] == [("a", i) for i in range(5)]
+    assert (consumer._in_flight, consumer._waiting) == (0, 0)
+
+@pytest.mark.asyncio
+async def test_lag_falls_back_to_xrange():
+    groups = [{"name": "group", "last-delivered-id": "1-0", "pending": 0}]
+    consumer = _consumer(FakeRedis(groups, entries=50), lag_threshold=20)
+    assert await consumer.get_lag() == 20
+
+    groups[0]["lag"] = 7
+    assert await consumer.get_lag() == 7
+
+
+@pytest.mark.asyncio
+async def test_sequential_batch_is_acked_once():
+    redis = FakeRedis()
+    consumer = _consumer(redis)
+
+    async def callback(swap_event: SwapEvent):
+        pass
+
+    consumer.register_callback(callback)
+    for i in range(3):
+        await consumer._process_message(f"{i}-0", _fields("a", i))
+    assert redis.acked == []
+    await consumer.flush_acks()
+    assert redis.acked == ["0-0", "1-0", "2-0"]
+    assert redis.xack_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_and_dead_letter_use_one_script_call():
+    redis = FakeRedis()
+    consumer = _consumer(redis, max_retries=1)
+
+    async def callback(swap_event: SwapEvent):
+        raise RuntimeError("boom")
+
+    consumer.register_callback(callback)
+    fields = _fields("a", 1)
+    await consumer._process_message("1-0", fields)
+    keys, args = redis.moves[-1]
+    assert keys == ["test", "test"]
+    assert args[:3] == ["group", "1-0", "0"]
+    assert dict(zip(args[3::2], args[4::2], strict=True))["retry_count"] == "1"
+
+    await consumer._process_message("2-0", fields)
+    keys, args = redis.moves[-1]
+    assert keys == ["test", "test:dead"]
+    assert args[:3] == ["group", "2-0", "1"]
+    assert redis.xack_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_claim_idle_processes_other_consumers_messages():
+    redis = FakeRedis()
+    redis.stream = {"1-0": _fields("a", 1), "6-0": _fields("a", 1)}
+    # 2-0 已从 stream 删除
+    redis.autoclaim_pages = {
+        "0-0": ["5-0", ["1-0", "2-0"]],
+        "5-0": ["0-0", ["6-0"]],
+    }
+    consumer = _consumer(redis)
+    processed = []
+
+    async def callback(swap_event: SwapEvent):
+        processed.append(swap_event.amount)
+
+    consumer.register_callback(callback)
+    assert await consumer.claim_idle() == 2
+    assert processed == [1, 1]
+    # 已删除的消息直接确认
+    assert sorted(redis.acked) == ["1-0", "2-0", "6-0"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_processing_resets_idle_of_in_flight_messages():
+    redis = FakeRedis()
+    consumer = _consumer(redis, concurrency=2)
+    release = asyncio.Event()
+
+    async def callback(swap_event: SwapEvent):
+        await release.wait()
+
+    consumer.register_callback(callback)
+    await consumer.refresh_processing()
+    assert redis.refreshed == []
+
+    await consumer._dispatch("1-0", _fields("a", 1))
+    await consumer._dispatch("2-0", _fields("b", 2))
+    await asyncio.sleep(0.01)
+    # 处理时间较长的消息重置空闲时间，不会被其他消费者认领
+    await consumer.refresh_processing()
+    assert sorted(redis.refreshed) == ["1-0", "2-0"]
+
+    release.set()
+    await consumer.join()
+    redis.refreshed.clear()
+    await consumer.refresh_processing()
+    assert redis.refreshed == []
+
+
+@pytest.mark.asyncio
+async def test_cleanup_only_removes_dead_consumers_without_pending():
+    redis = FakeRedis()
+    now = time.time()
+    redis.heartbeats = {
+        "alive": str(now),
+        "dead": str(now - 600),
+        "dead-with-pending": str(now - 600),
+        "gone": str(now - 600),
+    }
+    redis.consumers = [
+        {"name": "consumer", "pending": 0, "idle": 0},
+        {"name": "alive", "pending": 0, "idle": 600_000},
+        {"name": "dead", "pending": 0, "idle": 600_000},
+        {"name": "dead-with-pending", "pending": 2, "idle": 600_000},
+        {"name": "no-heartbeat", "pending": 0, "idle": 600_000},
+    ]
+    consumer = _consumer(redis, dead_consumer_timeout=300)
+
+    assert await consumer.cleanup_dead_consumers() == ["dead", "no-heartbeat"]
+    assert set(redis.heartbeats) == {"alive", "dead-with-pending"}
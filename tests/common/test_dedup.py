@@ -0,0 +1,96 @@
+import pytest
+from solbot_common.cp.dedup import DedupRule, TwoTierDeduper
+from solbot_common.cp.transport import MemoryTransport
+from solbot_common.types.tx import TxEvent, TxType
+
+
+class CountingTransport(MemoryTransport):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def set_if_absent(self, key: str, ttl: int) -> bool:
+        self.calls += 1
+        return await super().set_if_absent(key, ttl)
+
+
+def _tx_event(signature: str, who: str = "wallet", mint: str = "mint") -> TxEvent:
+    return TxEvent(
+        signature=signature,
+        from_amount=1,
+        from_decimals=9,
+        to_amount=1,
+        to_decimals=6,
+        mint=mint,
+        who=who,
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=0,
+        pre_token_amount=0,
+        post_token_amount=1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_local_tier_skips_redis_round_trip():
+    transport = CountingTransport()
+    deduper = TwoTierDeduper(
+        transport, [DedupRule(fields=("signature",), window=60)], prefix="t", report_interval=0
+    )
+
+    assert await deduper.check(_tx_event("a"))
+    assert not await deduper.check(_tx_event("a"))
+    assert not await deduper.check(_tx_event("a"))
+    # 同一 mint 的其他交易不再被过滤
+    assert await deduper.check(_tx_event("b"))
+    assert transport.calls == 2
+    assert deduper.get_stats()["signature"] == {
+        "local_hit": 2,
+        "remote_hit": 0,
+        "miss": 2,
+        "hit_rate": 0.5,
+        "local_hit_rate": 1.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_remote_tier_is_shared_between_replicas_and_rules_combine():
+    transport = CountingTransport()
+    rules = [
+        DedupRule(fields=("signature",), window=60),
+        DedupRule(fields=("who", "mint", "tx_direction"), window=30),
+    ]
+    replica_a = TwoTierDeduper(transport, rules, prefix="t", report_interval=0)
+    replica_b = TwoTierDeduper(transport, rules, prefix="t", report_interval=0)
+
+    assert replica_a.key(rules[1], _tx_event("a")) == "t:who,mint,tx_direction:wallet:mint:buy"
+    assert await replica_a.check(_tx_event("a"))
+    # 另一个副本收到同一笔交易，由 Redis 判定重复
+    assert not await replica_b.check(_tx_event("a"))
+    assert replica_b.get_stats()["signature"]["remote_hit"] == 1
+    # 同一钱包对同一 mint 的另一笔买入被第二条规则过滤
+    assert not await replica_a.check(_tx_event("b"))
+    assert replica_a.get_stats()["who,mint,tx_direction"]["local_hit"] == 1
+    # 其他钱包不受影响
+    assert await replica_a.check(_tx_event("c", who="other"))
+
+
+@pytest.mark.asyncio
+async def test_local_tier_is_bounded_and_expires():
+    transport = CountingTransport()
+    deduper = TwoTierDeduper(
+        transport,
+        [DedupRule(fields=("signature",), window=60)],
+        prefix="t",
+        local_maxsize=2,
+        report_interval=0,
+    )
+    for signature in ("a", "b", "c"):
+        await deduper.check(_tx_event(signature))
+    assert list(deduper._local) == ["t:signature:b", "t:signature:c"]
+
+    # 本地记录过期或被淘汰后由 Redis 判断
+    deduper._local["t:signature:b"] = 0
+    assert not await deduper.check(_tx_event("b"))
+    assert not await deduper.check(_tx_event("a"))
+    assert deduper.get_stats()["signature"]["remote_hit"] == 2
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
+from solbot_common.utils import quote
+from solbot_common.utils.quote import (
+    AmmV4Curve,
+    PumpCurve,
+    min_amount_out,
+    price_impact,
+    quote_batch,
+)
+from solbot_common.utils.utils import slippage_bps_from_price_impact
+
+BONDING_CURVE = BondingCurveAccount(
+    discriminator=0,
+    virtual_token_reserves=1_073_000_000 * 10**6,
+    virtual_sol_reserves=30 * 10**9,
+    real_token_reserves=793_100_000 * 10**6,
+    real_sol_reserves=0,
+    token_total_supply=10**15,
+    complete=False,
+)
+AMM_CURVE = AmmV4Curve(token_reserve=206_900_000 * 10**6, sol_reserve=85 * 10**9)
+
+
+def _amounts(n: int, high: int) -> list[int]:
+    rng = random.Random(42)
+    return [0, 1, high] + [rng.randrange(1, high) for _ in range(n)]
+
+
+def test_amm_v4_matches_on_chain_integer_math():
+    # 手续费向上取整：1 * 25 / 10000 向上取整为 1，输入全部作为手续费
+    assert AMM_CURVE.amount_out(1, "buy") == 0
+    amount_in = 10**9
+    fee = (amount_in * 25 + 9999) // 10000
+    net = amount_in - fee
+    expected = net * AMM_CURVE.token_reserve // (AMM_CURVE.sol_reserve + net)
+    assert AMM_CURVE.amount_out(amount_in, "buy") == expected
+    assert AMM_CURVE.reserves("sell") == (AMM_CURVE.token_reserve, AMM_CURVE.sol_reserve)
+
+
+def test_pump_matches_bonding_curve_account():
+    curve = PumpCurve.from_account(BONDING_CURVE)
+    for amount in _amounts(200, 10**12):
+        sol_in = amount * 10000 // (10000 + curve.fee_basis_points)
+        assert curve.amount_out(amount, "buy") == BONDING_CURVE.get_buy_price(sol_in)
+        assert curve.amount_out(amount, "sell") == BONDING_CURVE.get_sell_price(amount, 100)
+    # 买入数量不超过 real_token_reserves
+    assert curve.amount_out(10**15, "buy") == BONDING_CURVE.real_token_reserves
+
+    with pytest.raises(ValueError):
+        PumpCurve.from_account(
+            BondingCurveAccount(**{**BONDING_CURVE.__dict__, "complete": True})
+        )
+
+
+@pytest.mark.parametrize(
+    "curve", [AMM_CURVE, PumpCurve.from_account(BONDING_CURVE)], ids=["amm_v4", "pump"]
+)
+@pytest.mark.parametrize("direction", ["buy", "sell"])
+def test_batch_matches_scalar_quotes(curve, direction):
+    amounts = _amounts(500, 10**14)
+    expected = [curve.amount_out(amount, direction) for amount in amounts]
+    assert curve.amounts_out(amounts, direction) == expected
+
+    slippages = [i % 5000 for i in range(len(amounts))]
+    batch = quote_batch(curve, amounts, direction, slippages)
+    assert batch.amounts_out == expected
+    assert batch.min_amounts_out == [
+        min_amount_out(out, slippage) for out, slippage in zip(expected, slippages, strict=True)
+    ]
+    assert batch.price_impacts == pytest.approx(
+        [price_impact(curve, amount, direction) for amount in amounts]
+    )
+
+
+def test_batch_falls_back_for_small_batches_or_beyond_int64(monkeypatch):
+    monkeypatch.setattr(quote, "_ARRAY_MIN_SIZE", 1)
+    curve = AmmV4Curve(token_reserve=10**30, sol_reserve=10**30)
+    amounts = [10**20, 10**25]
+    batch = quote_batch(curve, amounts, "buy", 100)
+    assert batch.amounts_out == [curve.amount_out(amount, "buy") for amount in amounts]
+
+    # 数量少于 _ARRAY_MIN_SIZE 时逐个计算
+    monkeypatch.setattr(quote, "_ARRAY_MIN_SIZE", 256)
+    monkeypatch.setattr(quote, "_mul_div_array", None)
+    batch = quote_batch(AMM_CURVE, [10**9, 2 * 10**9], "buy", 100)
+    assert batch.amounts_out == [AMM_CURVE.amount_out(a, "buy") for a in (10**9, 2 * 10**9)]
+    assert batch.min_amounts_out == [out * 9900 // 10000 for out in batch.amounts_out]
+
+    with pytest.raises(ValueError):
+        quote_batch(AMM_CURVE, [1, 2], "buy", [100])
+
+
+def test_slippage_bps_from_price_impact():
+    assert slippage_bps_from_price_impact(0) == 250
+    assert slippage_bps_from_price_impact(0.1) == 1500
+    assert slippage_bps_from_price_impact(0.5) == 3000
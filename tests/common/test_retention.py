@@ -0,0 +1,117 @@
+import time
+
+import pytest
+from solbot_common.config import RetentionConfig
+from solbot_common.cp.retention import (
+    Retention,
+    RetentionReporter,
+    list_maxlen,
+    min_id,
+    stream_retention,
+)
+from solbot_common.cp.transport import MemoryTransport, RedisTransport
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands: list[tuple] = []
+
+    def lpush(self, key, item):
+        self.commands.append(("LPUSH", key, item))
+
+    def ltrim(self, key, start, end):
+        self.commands.append(("LTRIM", key, start, end))
+
+    async def execute(self):
+        self.redis.pipelines.append(self.commands)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.commands: list[tuple] = []
+        self.pipelines: list[list[tuple]] = []
+
+    async def execute_command(self, *args):
+        self.commands.append(args)
+        if args[0] == "XADD":
+            return b"1-0"
+        return 2
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return FakePipeline(self)
+
+
+def test_retention_matches_longest_prefix():
+    config = RetentionConfig(
+        stream_window=60,
+        stream_windows={"swap_event:dlq": 3600, "swap_event:dlq:audit": 10},
+        stream_maxlen=100,
+        list_maxlen=5,
+        list_maxlens={"tx_detail": 3},
+    )
+    assert stream_retention("swap_event:new", config) == Retention(window=60, maxlen=100)
+    assert stream_retention("swap_event:dlq:copytrade_notify", config).window == 3600
+    assert stream_retention("swap_event:dlq:audit:swap_event", config).window == 10
+    assert list_maxlen("tx_detail:failed", config) == 3
+    assert list_maxlen("rpc:tx_signature:new", config) == 5
+    assert min_id(10, now=100.5) == "90500-0"
+
+
+@pytest.mark.asyncio
+async def test_redis_append_trims_by_min_id_and_push_is_bounded():
+    redis = FakeRedis()
+    transport = RedisTransport(redis)  # type: ignore[arg-type]
+
+    message_id = await transport.append("s", {"data": "x"}, Retention(window=60, maxlen=100))
+    assert message_id == "1-0"
+    command, stream, *args = redis.commands[-1]
+    assert (command, stream, args[:2], args[3:]) == ("XADD", "s", ["MINID", "~"], ["*", "data", "x"])
+    assert int(args[2].split("-")[0]) <= time.time() * 1000 - 60_000
+
+    await transport.append("s", {"data": "y"}, Retention(maxlen=100))
+    assert redis.commands[-1] == ("XADD", "s", "MAXLEN", "~", 100, "*", "data", "y")
+
+    assert await transport.trim("s", Retention(window=60, maxlen=100)) == 4
+    minid_trim, maxlen_trim = redis.commands[-2:]
+    assert minid_trim[:4] == ("XTRIM", "s", "MINID", "~")
+    assert maxlen_trim == ("XTRIM", "s", "MAXLEN", "~", 100)
+
+    await transport.push("q", "item", maxlen=3)
+    assert redis.pipelines == [[("LPUSH", "q", "item"), ("LTRIM", "q", 0, 2)]]
+
+
+@pytest.mark.asyncio
+async def test_memory_transport_retention():
+    transport = MemoryTransport()
+    await transport.create_group("s", "g")
+    for i in range(5):
+        await transport.append("s", {"data": str(i)}, Retention(maxlen=3))
+    assert [f["data"] for _, f in await transport.read_group("s", "g", "c", 10)] == ["2", "3", "4"]
+
+    # 时间窗口之外的消息被裁剪
+    stream = transport._streams["s"]
+    old_seq = next(iter(stream.entries))
+    stream.entries[old_seq] = ("1000-0", stream.entries[old_seq][1])
+    assert await transport.trim("s", Retention(window=60)) == 1
+    assert (await transport.usage("s"))["length"] == 2
+
+    for item in ("1", "2", "3", "4"):
+        await transport.push("q", item, maxlen=2)
+    assert await transport.pop("q", count=10) == ["3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_reporter_trims_streams_and_reports_lists():
+    transport = MemoryTransport()
+    for i in range(3):
+        await transport.append("s", {"data": str(i)}, Retention())
+        await transport.push("q", str(i), maxlen=10)
+
+    reporter = RetentionReporter(transport, interval=0)
+    reporter.add_stream("s")
+    reporter.add_list("q")
+    stats = await reporter.report()
+    assert stats["s"] == {"type": "stream", "length": 3, "memory": None, "trimmed": 0}
+    assert stats["q"] == {"type": "list", "length": 3, "memory": None, "trimmed": 0}
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import pytest
+from solbot_common.cp.base import Consumer
+from solbot_common.cp.copytrade_event import NotifyCopyTradeConsumer
+from solbot_common.cp.swap_event import (
+    DEAD_LETTER_CHANNEL,
+    SWAP_EVENT_CHANNEL,
+    TRADING_GROUP,
+    SwapEventConsumer,
+    SwapEventProducer,
+)
+from solbot_common.cp.transport import MemoryTransport
+from solbot_common.types import SwapEvent
+
+
+def _swap_event(amount: int) -> SwapEvent:
+    return SwapEvent(
+        user_pubkey=f"user{amount % 3}",
+        swap_mode="ExactIn",
+        input_mint="in",
+        output_mint="out",
+        amount=amount,
+        ui_amount=amount,
+        timestamp=int(time.time()),
+        by="copytrade" if amount % 2 == 0 else "user",
+    )
+
+
+async def _wait_for(predicate, timeout: float = 2) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_trading_group_is_not_slowed_by_backlogged_notify_group():
+    transport = MemoryTransport()
+    trading = SwapEventConsumer(
+        None, TRADING_GROUP, "trading-0", poll_timeout_ms=10, transport=transport
+    )
+    notify = NotifyCopyTradeConsumer(None, "notify-0", poll_timeout_ms=10, transport=transport)
+    traded: list[int] = []
+    notified: list[int] = []
+    notify_blocked = asyncio.Event()
+
+    async def trade(swap_event: SwapEvent):
+        traded.append(swap_event.amount)
+        if swap_event.amount == 3:
+            raise RuntimeError("swap failed")
+
+    async def notify_user(swap_event: SwapEvent):
+        # 通知服务卡住，消息在通知消费组中积压
+        await notify_blocked.wait()
+        notified.append(swap_event.amount)
+
+    trading.register_callback(trade)
+    notify.register_callback(notify_user)
+    await trading.setup()
+    await notify.setup()
+
+    producer = SwapEventProducer(None, transport=transport)
+    for amount in range(40):
+        await producer.produce(_swap_event(amount))
+
+    tasks = [asyncio.create_task(trading.start()), asyncio.create_task(notify.start())]
+    await _wait_for(lambda: len(traded) == 40)
+    await trading.flush_acks()
+
+    assert await trading.get_lag() == 0
+    assert await notify.get_lag() > 0
+    assert notified == []
+
+    notify_blocked.set()
+    await _wait_for(lambda: len(notified) == 20)
+    # 通知消费组只处理跟单交易，交易消费组移入死信队列的消息仍然会通知
+    assert notified == list(range(0, 40, 2))
+    assert len(transport._streams[DEAD_LETTER_CHANNEL].entries) == 1
+    assert len(transport._streams[SWAP_EVENT_CHANNEL].entries) == 40
+
+    trading.stop()
+    notify.stop()
+    await asyncio.wait_for(asyncio.gather(*tasks), 1)
+
+
+def test_shared_stream_rejects_retries():
+    # 重试会把消息重新写入 stream，其他消费组会再收到一次
+    with pytest.raises(ValueError):
+        Consumer(
+            channel=SWAP_EVENT_CHANNEL,
+            data_class=SwapEvent,
+            redis_client=None,
+            consumer_group="g",
+            consumer_name="c",
+            max_retries=1,
+            transport=MemoryTransport(),
+            shared_stream=True,
+        )
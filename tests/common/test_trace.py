@@ -0,0 +1,77 @@
+import pytest
+from solbot_common.types import SwapEvent, TraceContext, TxEvent, TxType
+from solbot_common.utils.latency import TraceRecorder
+
+
+def _tx_event(trace: TraceContext | None = None) -> TxEvent:
+    return TxEvent(
+        signature="sig",
+        from_amount=1_000_000_000,
+        from_decimals=9,
+        to_amount=1_000_000,
+        to_decimals=6,
+        mint="mint",
+        who="wallet",
+        tx_type=TxType.OPEN_POSITION,
+        tx_direction="buy",
+        timestamp=0,
+        pre_token_amount=0,
+        post_token_amount=1_000_000,
+        trace=trace,
+    )
+
+
+def test_breakdown_is_relative_to_previous_stage():
+    trace = TraceContext.start("sig", "geyser:geyser-0", slot=1, received_at=10.0)
+    trace.stamp("parsed", 10.002)
+    trace.stamp("sent", 10.1)
+
+    assert trace.breakdown() == {"parsed": 2.0, "sent": 98.0}
+    assert trace.elapsed_ms() == 100.0
+
+
+def test_trace_travels_through_tx_event_and_swap_event():
+    trace = TraceContext.start("sig", "wss", slot=1, received_at=10.0)
+    trace.stamp("parsed", 10.5)
+
+    tx_event = TxEvent.from_json(_tx_event(trace).to_json())
+    assert tx_event.trace == trace
+
+    forked = tx_event.trace.fork()
+    forked.stamp("swap_event_produced", 11.0)
+    swap_event = SwapEvent(
+        user_pubkey="user",
+        swap_mode="ExactIn",
+        input_mint="in",
+        output_mint="out",
+        amount=1,
+        ui_amount=1,
+        timestamp=0,
+        by="copytrade",
+        tx_event=tx_event,
+        trace=forked,
+    )
+    decoded = SwapEvent.from_json(swap_event.to_json())
+    assert decoded.trace is not None
+    assert list(decoded.trace.stamps) == ["received", "parsed", "swap_event_produced"]
+    # fork 之后原上下文不受影响
+    assert "swap_event_produced" not in trace.stamps
+
+
+def test_tx_event_without_trace():
+    assert TxEvent.from_json(_tx_event().to_json()).trace is None
+
+
+def test_recorder_aggregates_stages():
+    recorder = TraceRecorder(maxsize=1, report_interval=0)
+    for i in range(2):
+        trace = TraceContext.start(f"sig{i}", "wss", received_at=0.0)
+        trace.stamp("sent", 0.01)
+        recorder.record(trace)
+
+    percentiles = recorder.get_percentiles()
+    assert percentiles["sent"]["count"] == 2
+    assert percentiles["total"]["p99_ms"] == pytest.approx(10, rel=1 / 64)
+    # 超出 maxsize 后淘汰最早的追踪
+    assert recorder.get_breakdown("sig0") == []
+    assert recorder.get_breakdown("sig1")[0]["total_ms"] == 10.0
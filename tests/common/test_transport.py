@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from solbot_common.cp.base import Consumer, Producer
+from solbot_common.cp.transport import MemoryTransport
+from solbot_common.types import SwapEvent
+
+
+def _swap_event(amount: int) -> SwapEvent:
+    return SwapEvent(
+        user_pubkey="user",
+        swap_mode="ExactIn",
+        input_mint="in",
+        output_mint="out",
+        amount=amount,
+        ui_amount=amount,
+        timestamp=0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_memory_stream_groups_are_independent():
+    transport = MemoryTransport()
+    await transport.create_group("s", "a")
+    await transport.append("s", {"data": "1"})
+    await transport.create_group("s", "b")
+    await transport.append("s", {"data": "2"})
+
+    # 消费组只能读到创建之后写入的消息
+    a = await transport.read_group("s", "a", "c", count=10)
+    b = await transport.read_group("s", "b", "c", count=10)
+    assert [fields["data"] for _, fields in a] == ["1", "2"]
+    assert [fields["data"] for _, fields in b] == ["2"]
+
+    # 未确认的消息可以重新读取
+    assert await transport.read_group("s", "a", "c", count=10, pending=True) == a
+    await transport.ack("s", "a", *(message_id for message_id, _ in a))
+    assert await transport.read_group("s", "a", "c", count=10, pending=True) == []
+    assert await transport.lag("s", "a", 10) == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_stream_read_blocks_until_append():
+    transport = MemoryTransport()
+    await transport.create_group("s", "g")
+    reader = asyncio.create_task(transport.read_group("s", "g", "c", count=1, block_ms=1000))
+    await asyncio.sleep(0)
+    await transport.append("s", {"data": "x"})
+    [(_, fields)] = await asyncio.wait_for(reader, 1)
+    assert fields == {"data": "x"}
+
+    assert await transport.read_group("s", "g", "c", count=1, block_ms=10) == []
+
+
+@pytest.mark.asyncio
+async def test_memory_queue_is_fifo_and_pops_in_batches():
+    transport = MemoryTransport()
+    for item in ("1", "2", "3"):
+        await transport.push("q", item)
+    assert await transport.pop("q", count=2) == ["1", "2"]
+    assert await transport.pop("q", count=2) == ["3"]
+    assert await transport.pop("q", timeout=0.01) == []
+
+
+@pytest.mark.asyncio
+async def test_memory_pubsub_and_dedup():
+    transport = MemoryTransport()
+    subscription = await transport.subscribe("events")
+    await transport.publish("events", "hello")
+    message = await subscription.get_message(ignore_subscribe_messages=True, timeout=0.1)
+    assert message["data"] == "hello"
+    await subscription.close()
+    await transport.publish("events", "ignored")
+    assert await subscription.get_message(timeout=0.01) is None
+
+    assert await transport.set_if_absent("k", ttl=60)
+    assert not await transport.set_if_absent("k", ttl=60)
+
+
+@pytest.mark.asyncio
+async def test_consumer_over_memory_transport_retries_then_dead_letters():
+    transport = MemoryTransport()
+    producer = Producer(None, "swap", transport=transport)
+    consumer = Consumer(
+        channel="swap",
+        data_class=SwapEvent,
+        redis_client=None,
+        consumer_group="trading",
+        consumer_name="trading-0",
+        poll_timeout_ms=10,
+        max_retries=1,
+        transport=transport,
+    )
+    received = []
+
+    async def callback(swap_event: SwapEvent):
+        received.append(swap_event.amount)
+        if swap_event.amount == 2:
+            raise RuntimeError("boom")
+
+    consumer.register_callback(callback)
+    await consumer.setup()
+    await producer.produce(_swap_event(1))
+    await producer.produce(_swap_event(2))
+
+    task = asyncio.create_task(consumer.start())
+    for _ in range(100):
+        if len(received) >= 3:
+            break
+        await asyncio.sleep(0.01)
+    consumer.stop()
+    await asyncio.wait_for(task, 1)
+
+    # 第二条失败后重试一次，再次失败移入死信队列
+    assert received == [1, 2, 2]
+    dead = transport._streams["swap:dead"].entries
+    assert len(dead) == 1
+    assert await transport.read_group("swap", "trading", "trading-0", 10, pending=True) == []
@@ -0,0 +1,156 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from solbot_common.types.holding import TokenAccountBalance
+from solbot_common.utils.quote import AmmV4Curve
+from trading import copytrade
+from trading.copytrade import CopyTradeOrder, CopyTradeProcessor
+
+CURVE = AmmV4Curve(token_reserve=10**15, sol_reserve=100 * 10**9)
+
+
+class FakePoolState:
+    def __init__(self, curve):
+        self.curve = curve
+        self.calls = 0
+
+    async def get_curve(self, mint):
+        self.calls += 1
+        return self.curve
+
+
+def _processor(pool_state) -> CopyTradeProcessor:
+    processor = CopyTradeProcessor.__new__(CopyTradeProcessor)
+    processor.pool_state = pool_state
+    return processor
+
+
+def _orders() -> list[CopyTradeOrder]:
+    return [
+        CopyTradeOrder(copytrade=SimpleNamespace(), amount=amount, ui_amount=0, slippage_bps=bps)
+        for amount, bps in ((10**9, None), (50 * 10**9, None), (10**9, 500))
+    ]
+
+
+async def _produce_auto(
+    processor: CopyTradeProcessor, orders: list[CopyTradeOrder], direction: str = "buy"
+):
+    produced = []
+
+    async def produce(order):
+        produced.append(order)
+
+    await processor._produce_auto_slippage(
+        [order for order in orders if order.slippage_bps is None],
+        produce,
+        swap_mode="ExactIn" if direction == "buy" else "ExactOut",
+        tx_event=SimpleNamespace(mint="mint", tx_direction=direction),  # type: ignore[arg-type]
+        input_mint="in",
+        output_mint="mint",
+    )
+    return produced
+
+
+@pytest.mark.asyncio
+async def test_auto_slippage_is_quoted_once_from_pool_state(monkeypatch):
+    async def jupiter(**kwargs):
+        raise AssertionError("should not request jupiter")
+
+    monkeypatch.setattr(copytrade, "calculate_auto_slippage", jupiter)
+    pool_state = FakePoolState(CURVE)
+    produced = await _produce_auto(_processor(pool_state), _orders())
+
+    assert pool_state.calls == 1
+    # price impact: 1 / 101 -> 最小滑点 2.5%；50 / 150 * 1.5 -> 50%，限制为 30%
+    assert [order.slippage_bps for order in produced] == [250, 3000]
+
+
+@pytest.mark.asyncio
+async def test_sell_amount_is_quoted_in_raw_token_units():
+    processor = _processor(FakePoolState(CURVE))
+    balances = {"holder": TokenAccountBalance(balance=200_000_000.5, decimals=6)}
+    balances["empty"] = TokenAccountBalance(balance=0, decimals=6)
+
+    async def get_setting(chat_id, owner):
+        return SimpleNamespace()
+
+    async def get_balance(mint, wallet):
+        return balances[wallet]
+
+    processor.setting_service = SimpleNamespace(get=get_setting)  # type: ignore[assignment]
+    processor.holding_service = SimpleNamespace(get_token_account_balance=get_balance)  # type: ignore[assignment]
+
+    async def prepare(owner: str):
+        copytrade = SimpleNamespace(
+            chat_id=1, owner=owner, auto_follow=True, anti_sandwich=False, auto_slippage=True
+        )
+        return await processor._prepare_copytrade(
+            swap_mode="ExactOut",
+            tx_event=SimpleNamespace(mint="mint"),  # type: ignore[arg-type]
+            sell_pct=0.5,
+            copytrade=copytrade,  # type: ignore[arg-type]
+        )
+
+    assert await prepare("empty") is None
+    order = await prepare("holder")
+    assert order is not None
+    assert order.amount == 100_000_000_250_000
+    assert order.ui_amount == 100_000_000.25
+
+    produced = await _produce_auto(processor, [order], direction="sell")
+    # price impact: 1e14 / 1.1e15 -> 9.09% * 1.5
+    assert [order.slippage_bps for order in produced] == [1363]
+
+
+@pytest.mark.asyncio
+async def test_auto_slippage_falls_back_to_jupiter(monkeypatch):
+    async def jupiter(amount, **kwargs):
+        if amount > 10**9:
+            raise RuntimeError("quote failed")
+        return 800
+
+    monkeypatch.setattr(copytrade, "calculate_auto_slippage", jupiter)
+    produced = await _produce_auto(_processor(FakePoolState(None)), _orders())
+
+    # 报价失败的跟单被跳过
+    assert [(order.amount, order.slippage_bps) for order in produced] == [(10**9, 800)]
+
+
+@pytest.mark.asyncio
+async def test_orders_are_produced_without_waiting_for_other_quotes(monkeypatch):
+    slow_quote = asyncio.Event()
+
+    async def jupiter(amount, **kwargs):
+        if amount > 10**9:
+            await slow_quote.wait()
+        return 800
+
+    monkeypatch.setattr(copytrade, "calculate_auto_slippage", jupiter)
+    orders = {id(order.copytrade): order for order in _orders()}
+    processor = _processor(FakePoolState(None))
+    processor.copytrade_service = SimpleNamespace(
+        get_by_target_wallet=lambda who: asyncio.sleep(0, [o.copytrade for o in orders.values()])
+    )
+
+    async def prepare(copytrade, **kwargs):
+        return orders[id(copytrade)]
+
+    produced = []
+
+    async def produce(order, **kwargs):
+        produced.append((order.amount, order.slippage_bps))
+
+    processor._prepare_copytrade = prepare  # type: ignore[method-assign]
+    processor._produce_copytrade = produce  # type: ignore[method-assign]
+    tx_event = SimpleNamespace(
+        trace=None, who="w", mint="mint", tx_direction="buy", program_id=None, timestamp=0
+    )
+    task = asyncio.create_task(processor._process_tx_event(tx_event))  # type: ignore[arg-type]
+    await asyncio.sleep(0.01)
+
+    # 固定滑点和已拿到报价的跟单已经发送，不等待仍在报价的跟单
+    assert produced == [(10**9, 500), (10**9, 800)]
+    slow_quote.set()
+    await asyncio.wait_for(task, 1)
+    assert produced[-1] == (50 * 10**9, 800)
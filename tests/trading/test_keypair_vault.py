@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from solbot_common.config import settings
+from solbot_common.cp.user_events import UserEventProducer
+from solders.keypair import Keypair
+from trading import keypair_vault
+from trading.keypair_vault import KeypairVault
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """钱包地址 -> 私钥，代替 bot_users 表"""
+    rows: dict[str, bytes] = {}
+    queries = []
+
+    async def fetch_all(self, *, session=None):
+        return list(rows.items())
+
+    async def fetch(self, pubkey, *, session=None):
+        queries.append(pubkey)
+        return rows.get(pubkey)
+
+    async def refresh(self, pubkey, *, session=None):
+        queries.append(pubkey)
+        if pubkey in rows:
+            self._store(pubkey, rows[pubkey])
+
+    monkeypatch.setattr(KeypairVault, "_fetch_all", fetch_all)
+    monkeypatch.setattr(KeypairVault, "_fetch", fetch)
+    monkeypatch.setattr(KeypairVault, "_refresh", refresh)
+    monkeypatch.setattr(settings.db, "transport", "memory")
+    monkeypatch.setattr(keypair_vault.RedisClient, "get_instance", classmethod(lambda cls: None))
+    return rows, queries
+
+
+@pytest.mark.parametrize("seal", [False, True])
+@pytest.mark.asyncio
+async def test_vault_hit_skips_database_and_miss_falls_back(database, seal):
+    rows, queries = database
+    preloaded, added = Keypair(), Keypair()
+    rows[str(preloaded.pubkey())] = bytes(preloaded)
+
+    vault = KeypairVault(seal=seal)
+    await vault.load()
+    assert await vault.get(str(preloaded.pubkey())) == preloaded
+    assert queries == []
+    if seal:
+        assert bytes(preloaded) not in vault._keys.values()
+
+    # 启动后新增的钱包从数据库读取，之后命中缓存
+    rows[str(added.pubkey())] = bytes(added)
+    assert await vault.get(str(added.pubkey())) == added
+    assert await vault.get(str(added.pubkey())) == added
+    assert queries == [str(added.pubkey())]
+    assert vault.get_stats() == {"size": 2, "hit": 2, "miss": 1, "removed": 0}
+
+    with pytest.raises(ValueError):
+        await vault.get(str(Keypair().pubkey()))
+
+
+@pytest.mark.asyncio
+async def test_vault_follows_user_events(database):
+    rows, _ = database
+    old, new = Keypair(), Keypair()
+    rows[str(old.pubkey())] = bytes(old)
+
+    vault = KeypairVault()
+    task = asyncio.create_task(vault.start())
+    await asyncio.sleep(0.01)
+    assert len(vault) == 1
+
+    # 导入新钱包：旧钱包被删除，新钱包写入数据库
+    del rows[str(old.pubkey())]
+    rows[str(new.pubkey())] = bytes(new)
+    producer = UserEventProducer(None)
+    await producer.wallet_deleted(str(old.pubkey()))
+    await producer.wallet_changed(str(new.pubkey()))
+    await asyncio.sleep(0.01)
+    assert set(vault._keys) == {str(new.pubkey())}
+
+    vault.stop()
+    await asyncio.wait_for(task, 1)
+
+
+@pytest.mark.asyncio
+async def test_vault_reload_drops_inactive_wallets(database):
+    rows, _ = database
+    kept, dropped = Keypair(), Keypair()
+    rows[str(kept.pubkey())] = bytes(kept)
+    rows[str(dropped.pubkey())] = bytes(dropped)
+
+    vault = KeypairVault(reload_interval=0.05)
+    task = asyncio.create_task(vault.start())
+    await asyncio.sleep(0.01)
+    assert len(vault) == 2
+
+    # 错过了停用事件，定期重新加载时移除
+    del rows[str(dropped.pubkey())]
+    await asyncio.sleep(0.6)
+    assert set(vault._keys) == {str(kept.pubkey())}
+    assert vault.get_stats()["removed"] == 1
+
+    vault.stop()
+    await asyncio.wait_for(task, 1)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+from solbot_common.types import SwapEvent
+from trading.scheduler import DeadlineScheduler
+
+
+def _swap_event(amount: int, deadline: float | None, by: str = "copytrade") -> SwapEvent:
+    return SwapEvent(
+        user_pubkey="user",
+        swap_mode="ExactIn",
+        input_mint="in",
+        output_mint="out",
+        amount=amount,
+        ui_amount=amount,
+        timestamp=int(time.time()),
+        by=by,
+        deadline=deadline,
+    )
+
+
+@pytest.mark.asyncio
+async def test_earliest_deadline_first():
+    executed: list[int] = []
+    release = asyncio.Event()
+
+    async def handler(swap_event: SwapEvent):
+        await release.wait()
+        executed.append(swap_event.amount)
+
+    scheduler = DeadlineScheduler(handler, concurrency=1)
+    now = time.time()
+    # 第一个交易事件占住唯一的 worker，其余的在队列中按截止时间排序
+    await scheduler.submit(_swap_event(0, now + 10))
+    scheduler.start()
+    await asyncio.sleep(0)
+    await scheduler.submit(_swap_event(3, now + 9))
+    await scheduler.submit(_swap_event(1, now + 3))
+    await scheduler.submit(_swap_event(4, None, by="user"))  # timestamp + 15s
+    await scheduler.submit(_swap_event(2, now + 5))
+    release.set()
+    await scheduler.join()
+    await scheduler.stop()
+
+    assert executed == [0, 1, 2, 3, 4]
+    assert scheduler.get_stats()["shed_total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_shed_expired_before_handling():
+    executed: list[int] = []
+    shed: list[int] = []
+    release = asyncio.Event()
+
+    async def handler(swap_event: SwapEvent):
+        await release.wait()
+        executed.append(swap_event.amount)
+
+    async def on_shed(swap_event: SwapEvent):
+        shed.append(swap_event.amount)
+
+    scheduler = DeadlineScheduler(handler, on_shed=on_shed, concurrency=1)
+    scheduler.start()
+    now = time.time()
+    # 提交时已经过期
+    assert not await scheduler.submit(_swap_event(0, now - 1))
+    await scheduler.submit(_swap_event(1, now + 10))
+    await asyncio.sleep(0)
+    # 排队期间过期
+    await scheduler.submit(_swap_event(2, now + 0.05))
+    await asyncio.sleep(0.1)
+    release.set()
+    await scheduler.join()
+    await scheduler.stop()
+
+    assert executed == [1]
+    assert shed == [0, 2]
+    stats = scheduler.get_stats()
+    assert stats["shed"] == {"copytrade": 2}
+    assert stats["scheduled"] == 2
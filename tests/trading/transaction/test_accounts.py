@@ -0,0 +1,199 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from solbot_common.constants import WSOL
+from solbot_common.types.raydium import AmmV4PoolKeys
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.rpc.responses import GetMultipleAccountsMaybeJsonParsedResp
+from spl.token.instructions import create_idempotent_associated_token_account
+from trading.swap import SwapInType
+from trading.transaction.accounts import AccountBatch, fan_out, token_amount
+from trading.transaction.builders import ray_v4
+
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+
+
+def _token_account(amount: int, decimals: int):
+    """jsonParsed 格式的 SPL token 账户"""
+    ui_amount = amount / 10**decimals
+    value = {
+        "data": {
+            "parsed": {
+                "info": {
+                    "tokenAmount": {
+                        "amount": str(amount),
+                        "decimals": decimals,
+                        "uiAmount": ui_amount,
+                        "uiAmountString": str(ui_amount),
+                    }
+                },
+                "type": "account",
+            },
+            "program": "spl-token",
+            "space": 165,
+        },
+        "executable": False,
+        "lamports": 2039280,
+        "owner": TOKEN_PROGRAM,
+        "rentEpoch": 0,
+        "space": 165,
+    }
+    resp = {"jsonrpc": "2.0", "id": 1, "result": {"context": {"slot": 1}, "value": [value]}}
+    return GetMultipleAccountsMaybeJsonParsedResp.from_json(json.dumps(resp)).value[0]
+
+
+class FakeRpc:
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.accounts: dict[Pubkey, object] = {}
+        self.requests: list[list[Pubkey]] = []
+
+    async def get_multiple_accounts_json_parsed(self, pubkeys, commitment=None):
+        self.requests.append(list(pubkeys))
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(value=[self.accounts.get(pubkey) for pubkey in pubkeys])
+
+
+@pytest.mark.asyncio
+async def test_account_batch_dedupes_and_splits_large_requests():
+    rpc = FakeRpc(latency=0.05)
+    pubkeys = [Pubkey.new_unique() for _ in range(150)]
+    rpc.accounts[pubkeys[0]] = _token_account(5, 0)
+
+    batch = AccountBatch(rpc).add(*pubkeys).add(pubkeys[0])  # type: ignore[arg-type]
+    start = time.perf_counter()
+    accounts = await batch.fetch()
+    elapsed = time.perf_counter() - start
+
+    assert [len(request) for request in rpc.requests] == [100, 50]
+    # 拆分后的请求并发执行
+    assert elapsed < 0.09
+    assert len(accounts) == 150
+    assert token_amount(accounts[pubkeys[0]])["amount"] == "5"  # type: ignore[arg-type]
+    assert accounts[pubkeys[1]] is None
+
+
+@pytest.mark.asyncio
+async def test_fan_out_runs_lookups_concurrently():
+    async def lookup(value):
+        await asyncio.sleep(0.05)
+        return value
+
+    start = time.perf_counter()
+    assert await fan_out(lookup(1), None, lookup(3)) == [1, None, 3]
+    assert time.perf_counter() - start < 0.09
+
+
+class FakePoolState:
+    """池子状态镜像，vault 余额 -> 原始数量"""
+
+    def __init__(self, amounts: dict[Pubkey, int]):
+        self.amounts = amounts
+
+    async def get_token_amounts(self, *token_accounts):
+        if not all(account in self.amounts for account in token_accounts):
+            return None
+        return [self.amounts[account] for account in token_accounts]
+
+    async def track(self, mint):
+        pass
+
+
+def _raydium_builder(monkeypatch, keypair, rpc):
+    token_mint = Pubkey.new_unique()
+    pool_keys = AmmV4PoolKeys(
+        **{
+            name: Pubkey.new_unique()
+            for name, f in AmmV4PoolKeys.__dataclass_fields__.items()
+            if f.type in (Pubkey, "Pubkey") and name not in ("base_mint", "quote_mint")
+        },
+        base_mint=token_mint,
+        quote_mint=WSOL,
+        base_decimals=6,
+        quote_decimals=9,
+    )
+    ata = ray_v4.get_associated_token_address(keypair.pubkey(), token_mint)
+
+    async def get_min_balance_rent():
+        return 2039280
+
+    monkeypatch.setattr(ray_v4, "get_min_balance_rent", get_min_balance_rent)
+    builder = ray_v4.RaydiumV4TransactionBuilder(rpc)  # type: ignore[arg-type]
+    builder.templates.put(
+        keypair.pubkey(),
+        str(token_mint),
+        ray_v4.RaydiumV4SwapTemplate(
+            pool_keys=pool_keys,
+            token_mint=token_mint,
+            token_account=ata,
+        ),
+    )
+    return builder, pool_keys, token_mint, ata
+
+
+@pytest.mark.asyncio
+async def test_raydium_sell_reads_vaults_and_ata_in_one_request(monkeypatch):
+    keypair = Keypair()
+    rpc = FakeRpc()
+    builder, pool_keys, token_mint, ata = _raydium_builder(monkeypatch, keypair, rpc)
+    rpc.accounts[pool_keys.base_vault] = _token_account(1_000_000_000_000, 6)
+    rpc.accounts[pool_keys.quote_vault] = _token_account(30_000_000_000, 9)
+    rpc.accounts[ata] = _token_account(2_000_000, 6)
+
+    instructions = await builder.build_sell_instructions(
+        keypair, str(token_mint), 50, SwapInType.Pct, 100
+    )
+
+    assert rpc.requests == [[pool_keys.quote_vault, pool_keys.base_vault, ata]]
+    swap_ix = instructions[2]
+    # 卖出余额的一半：2 个代币中的 1 个
+    assert int.from_bytes(bytes(swap_ix.data)[1:9], "little") == 1_000_000
+
+
+@pytest.mark.asyncio
+async def test_raydium_reads_reserves_from_pool_state_mirror(monkeypatch):
+    keypair = Keypair()
+    rpc = FakeRpc()
+    builder, pool_keys, token_mint, ata = _raydium_builder(monkeypatch, keypair, rpc)
+    rpc.accounts[ata] = _token_account(2_000_000, 6)
+    builder.pool_state = FakePoolState(  # type: ignore[assignment]
+        {pool_keys.quote_vault: 30_000_000_000, pool_keys.base_vault: 1_000_000_000_000}
+    )
+
+    # 镜像命中时有模板的买入不需要 RPC 查询，卖出只读取 ATA
+    buy = await builder.build_buy_instructions(keypair, str(token_mint), 0.1, 100)
+    assert rpc.requests == []
+    sell = await builder.build_sell_instructions(keypair, str(token_mint), 50, SwapInType.Pct, 100)
+    assert rpc.requests == [[ata]]
+
+    # 与通过 RPC 读取 vault 时的最小输出一致
+    builder.pool_state = None
+    rpc.accounts[pool_keys.base_vault] = _token_account(1_000_000_000_000, 6)
+    rpc.accounts[pool_keys.quote_vault] = _token_account(30_000_000_000, 9)
+    assert bytes(sell[2].data) == bytes(
+        (await builder.build_sell_instructions(keypair, str(token_mint), 50, SwapInType.Pct, 100))[
+            2
+        ].data
+    )
+    rpc_buy = await builder.build_buy_instructions(keypair, str(token_mint), 0.1, 100)
+    assert bytes(buy[3].data) == bytes(rpc_buy[3].data)
+
+
+@pytest.mark.asyncio
+async def test_raydium_buy_always_creates_ata_idempotently(monkeypatch):
+    keypair = Keypair()
+    rpc = FakeRpc()
+    builder, pool_keys, token_mint, _ = _raydium_builder(monkeypatch, keypair, rpc)
+    rpc.accounts[pool_keys.base_vault] = _token_account(1_000_000_000_000, 6)
+    rpc.accounts[pool_keys.quote_vault] = _token_account(30_000_000_000, 9)
+
+    # 模板由卖出创建（ATA 当时存在），ATA 之后可能在其他地方被关闭
+    instructions = await builder.build_buy_instructions(keypair, str(token_mint), 0.1, 100)
+    create_ata = create_idempotent_associated_token_account(
+        keypair.pubkey(), keypair.pubkey(), token_mint
+    )
+    assert instructions[2] == create_ata
@@ -0,0 +1,148 @@
+import struct
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.layouts.bonding_curve_account import BondingCurveAccount
+from solbot_common.utils.utils import get_bonding_curve_pda
+from solders.account import Account
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from spl.token.instructions import (
+    create_idempotent_associated_token_account,
+    get_associated_token_address,
+)
+from trading.exceptions import BondingCurveNotFound
+from trading.swap import SwapDirection
+from trading.transaction.builders import pump
+from trading.transaction.protocol import TradingRoute
+from trading.transaction.template import TemplateCache
+
+MINT = "6p6xgHyF7AeE6TZkSmFsko444wqoP15icUSqi2jfGiPN"
+
+
+def _curve(complete: bool = False) -> BondingCurveAccount:
+    return BondingCurveAccount(
+        discriminator=0,
+        virtual_token_reserves=1_000_000_000_000_000,
+        virtual_sol_reserves=30_000_000_000,
+        real_token_reserves=800_000_000_000_000,
+        real_sol_reserves=0,
+        token_total_supply=1_000_000_000_000_000,
+        complete=complete,
+    )
+
+
+def test_template_cache_expires_and_invalidates(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("trading.transaction.template.time.monotonic", lambda: now[0])
+    cache: TemplateCache[str] = TemplateCache(TradingRoute.PUMP, ttl=10, maxsize=2)
+
+    cache.put("user", MINT, "a")
+    assert cache.get("user", MINT) == "a"
+    now[0] += 10
+    assert cache.get("user", MINT) is None
+
+    cache.put("user", "m1", "b")
+    cache.put("user", "m2", "c")
+    cache.put("user", "m3", "d")
+    assert len(cache) == 2
+    cache.invalidate("user", "m3")
+    assert cache.get_stats() == {"size": 1, "hit": 1, "miss": 1, "invalidated": 1}
+
+
+class FakeRpc:
+    """按地址返回账户，记录每次 getMultipleAccounts 读取的地址"""
+
+    def __init__(self):
+        self.accounts: dict[Pubkey, Account] = {}
+        self.requests: list[list[Pubkey]] = []
+
+    async def get_multiple_accounts_json_parsed(self, pubkeys, commitment=None):
+        self.requests.append(list(pubkeys))
+        return SimpleNamespace(value=[self.accounts.get(pubkey) for pubkey in pubkeys])
+
+
+def _curve_account(curve: BondingCurveAccount) -> Account:
+    data = struct.pack(
+        "<QQQQQQ?",
+        curve.discriminator,
+        curve.virtual_token_reserves,
+        curve.virtual_sol_reserves,
+        curve.real_token_reserves,
+        curve.real_sol_reserves,
+        curve.token_total_supply,
+        curve.complete,
+    )
+    return Account(lamports=1, data=data, owner=PUMP_FUN_PROGRAM)
+
+
+@pytest.fixture
+def pump_builder(monkeypatch):
+    global_account = SimpleNamespace(fee_recipient=Pubkey.new_unique(), fee_basis_points=100)
+    get_global_account = AsyncMock(return_value=global_account)
+
+    async def build_transaction(keypair, instructions, priority_fee=None, use_jito=False):
+        return instructions
+
+    monkeypatch.setattr(pump, "get_global_account", get_global_account)
+    monkeypatch.setattr(pump, "build_transaction", build_transaction)
+
+    rpc = FakeRpc()
+    bonding_curve = get_bonding_curve_pda(Pubkey.from_string(MINT), PUMP_FUN_PROGRAM)
+    rpc.accounts[bonding_curve] = _curve_account(_curve())
+    builder = pump.PumpTransactionBuilder(rpc)  # type: ignore[arg-type]
+    return builder, rpc, get_global_account
+
+
+@pytest.mark.asyncio
+async def test_pump_template_patches_amounts_only(pump_builder):
+    builder, rpc, get_global_account = pump_builder
+    keypair = Keypair()
+
+    cold = await builder.build_swap_transaction(keypair, MINT, 0.1, SwapDirection.Buy, 100)
+    warm = await builder.build_swap_transaction(keypair, MINT, 0.1, SwapDirection.Buy, 100)
+    other = await builder.build_swap_transaction(keypair, MINT, 0.2, SwapDirection.Buy, 100)
+
+    # 第二次起不再查询 global account，也不再解析 IDL；买入不读取 ATA，只读取 bonding curve
+    assert get_global_account.await_count == 1
+    assert [len(pubkeys) for pubkeys in rpc.requests] == [1, 1, 1]
+    assert cold == warm
+    # 只有指令数据中的数量不同
+    assert other[-1].accounts == cold[-1].accounts
+    assert other[-1].data[:8] == cold[-1].data[:8]
+    assert other[-1].data != cold[-1].data
+
+
+@pytest.mark.asyncio
+async def test_pump_template_invalidated_on_migration(pump_builder):
+    builder, rpc, get_global_account = pump_builder
+    keypair = Keypair()
+    bonding_curve = get_bonding_curve_pda(Pubkey.from_string(MINT), PUMP_FUN_PROGRAM)
+
+    await builder.build_swap_transaction(keypair, MINT, 0.1, SwapDirection.Buy, 100)
+    rpc.accounts[bonding_curve] = _curve_account(_curve(complete=True))
+    with pytest.raises(BondingCurveNotFound):
+        await builder.build_swap_transaction(keypair, MINT, 0.1, SwapDirection.Buy, 100)
+    assert builder.templates.get(keypair.pubkey(), MINT) is None
+
+    rpc.accounts[bonding_curve] = _curve_account(_curve())
+    builder.invalidate_template(keypair.pubkey(), MINT)
+    await builder.build_swap_transaction(keypair, MINT, 0.1, SwapDirection.Buy, 100)
+    assert get_global_account.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_pump_warm_buy_always_creates_ata_idempotently(pump_builder):
+    builder, rpc, _ = pump_builder
+    keypair = Keypair()
+    owner, mint = keypair.pubkey(), Pubkey.from_string(MINT)
+    ata = get_associated_token_address(owner, mint)
+    # 创建模板时 ATA 已存在，之后在其他地方被关闭
+    rpc.accounts[ata] = Account(lamports=1, data=bytes(165), owner=Pubkey.new_unique())
+    await builder.build_swap_transaction(keypair, MINT, 0.1, SwapDirection.Buy, 100)
+    del rpc.accounts[ata]
+    warm = await builder.build_swap_transaction(keypair, MINT, 0.1, SwapDirection.Buy, 100)
+
+    assert create_idempotent_associated_token_account(owner, owner, mint) in warm
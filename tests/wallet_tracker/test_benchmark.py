@@ -0,0 +1,85 @@
+import pytest
+from wallet_tracker.benchmark import BenchmarkService, LatencyHistogram
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands: list[tuple] = []
+
+    def hset(self, key, mapping):
+        self.commands.append(("hset", key, mapping))
+
+    def expire(self, key, ttl):
+        self.commands.append(("expire", key, ttl))
+
+    async def execute(self):
+        self.redis.executed.append(self.commands)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.executed: list[list[tuple]] = []
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(BenchmarkService, "_instance", None)
+    service = BenchmarkService(batch_size=4, ttl=60, maxsize=8, report_interval=0)
+    service.redis = FakeRedis()
+    return service
+
+
+def test_histogram_percentiles():
+    hist = LatencyHistogram()
+    for ms in range(1, 1001):
+        hist.record(ms / 1000)
+
+    summary = hist.summary()
+    assert summary["count"] == 1000
+    assert summary["max_ms"] == 1000.0
+    # 每个桶的相对误差不超过 1/64
+    assert summary["p50_ms"] == pytest.approx(500, rel=1 / 64)
+    assert summary["p99_ms"] == pytest.approx(990, rel=1 / 64)
+
+
+def test_histogram_empty():
+    assert LatencyHistogram().summary() == {"count": 0}
+    assert LatencyHistogram().percentile(99) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_markers_are_flushed_in_one_pipeline(service):
+    for step, timestamp in [
+        ("block_time", 100),
+        ("tx_detected", 100.5),
+        ("tx_start_parse", 101.0),
+        ("tx_end_parse", 101.002),
+    ]:
+        await service.add({"tx_hash": "sig", "step": step, "timestamp": timestamp})
+
+    await service._flush(service._drain(service.q.get_nowait()))
+
+    assert len(service.redis.executed) == 1
+    commands = service.redis.executed[0]
+    assert commands[0][0] == "hset" and commands[0][1] == "benchmark:sig"
+    assert set(commands[0][2]) == {"block_time", "tx_detected", "tx_start_parse", "tx_end_parse"}
+    assert commands[1] == ("expire", "benchmark:sig", 60)
+
+    percentiles = service.get_percentiles()
+    assert percentiles["detect"]["count"] == 1
+    assert percentiles["detect"]["p50_ms"] == pytest.approx(500, rel=1 / 64)
+    assert percentiles["parse"]["p99_ms"] == pytest.approx(2, rel=1 / 64)
+    assert percentiles["fetch"]["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_markers_are_dropped_when_queue_is_full(service):
+    for i in range(10):
+        await service.add({"tx_hash": f"sig{i}", "step": "tx_detected", "timestamp": i + 1})
+    assert service.q.qsize() == 8
+    assert service.dropped == 2
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+from wallet_tracker.geyser.backfill import GapBackfiller, SignatureDeduper
+
+WALLET = str(Pubkey.new_unique())
+
+
+def _signature(i: int) -> Signature:
+    return Signature(bytes([i]) * 64)
+
+
+class FakeRPCClient:
+    """按 slot 从新到旧返回签名，与 getSignaturesForAddress 一致"""
+
+    def __init__(self, slots: list[int], current_slot: int = 200):
+        self.current_slot = current_slot
+        self.infos = [
+            SimpleNamespace(slot=slot, signature=_signature(i), err=None)
+            for i, slot in enumerate(sorted(slots, reverse=True), start=1)
+        ]
+
+    async def get_slot(self, commitment=None):
+        return SimpleNamespace(value=self.current_slot)
+
+    async def get_signatures_for_address(self, account, before=None, limit=None, commitment=None):
+        start = 0
+        if before is not None:
+            start = [info.signature for info in self.infos].index(before) + 1
+        return SimpleNamespace(value=self.infos[start : start + limit])
+
+
+def test_deduper_evicts_oldest():
+    deduper = SignatureDeduper(maxsize=2)
+    assert deduper.add("a") is True
+    assert deduper.add("a") is False
+    deduper.add("b")
+    deduper.add("c")
+    assert "a" not in deduper
+    assert len(deduper) == 2
+
+
+@pytest.mark.asyncio
+async def test_backfill_processes_gap_in_slot_order_and_skips_seen():
+    deduper = SignatureDeduper()
+    rpc_client = FakeRPCClient([90, 100, 105, 108, 110])
+    seen = str(rpc_client.infos[0].signature)  # slot 110 已经由实时订阅处理
+    deduper.add(seen)
+
+    async def fetch(signature: Signature) -> dict:
+        slot = next(info.slot for info in rpc_client.infos if info.signature == signature)
+        return {"slot": slot, "transaction": {"signatures": [str(signature)]}}
+
+    processed = []
+
+    async def process(tx_detail: dict):
+        deduper.add(tx_detail["transaction"]["signatures"][0])
+        processed.append(tx_detail["slot"])
+
+    backfiller = GapBackfiller(deduper, rpc_client=rpc_client, fetch=fetch, max_signatures=3)
+    count = await backfiller.backfill([WALLET], 100, process)
+
+    # 检查点所在的 slot 100 已经处理过，只补齐之后的交易
+    assert count == 2
+    assert processed == [105, 108]
+
+    # 再次补齐时不会重复处理
+    assert await backfiller.backfill([WALLET], 100, fetch) == 0
+
+
+@pytest.mark.asyncio
+async def test_backfill_skips_gap_beyond_max_slot_gap():
+    rpc_client = FakeRPCClient([100, 105], current_slot=20_000)
+
+    async def fetch(signature: Signature) -> dict:
+        raise AssertionError("should not backfill")
+
+    backfiller = GapBackfiller(
+        SignatureDeduper(), rpc_client=rpc_client, fetch=fetch, max_slot_gap=9000
+    )
+    assert await backfiller.backfill([WALLET], 100, fetch) == 0
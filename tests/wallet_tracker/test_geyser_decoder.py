@@ -0,0 +1,100 @@
+import json
+from pathlib import Path
+
+import base58
+import pytest
+from wallet_tracker.geyser.decode_pool import decode_update
+from wallet_tracker.geyser.decoder import decode_transaction, prefilter_transaction
+from wallet_tracker.parser.raw_tx import RawTXParser
+from wallet_tracker.prefilter import SwapPrefilter
+from yellowstone_grpc.grpc import geyser_pb2
+
+
+def read_raw_tx(name: str) -> dict:
+    path = Path(__file__).parent / "tx_examples" / f"{name}.json"
+    with open(path) as f:
+        data = json.load(f)
+    # transfer.json 保存的是交易详情本身，没有 RPC 响应的外层结构
+    return data.get("result", data)
+
+
+def _token_balance(token_balance: dict) -> dict:
+    return {
+        "account_index": token_balance["accountIndex"],
+        "mint": token_balance["mint"],
+        "owner": token_balance["owner"],
+        "program_id": token_balance["programId"],
+        "ui_token_amount": {
+            "amount": token_balance["uiTokenAmount"]["amount"],
+            "decimals": token_balance["uiTokenAmount"]["decimals"],
+        },
+    }
+
+
+def to_geyser_update(tx: dict) -> geyser_pb2.SubscribeUpdateTransaction:
+    """将 RPC 返回的交易详情转换为 Geyser 推送的 protobuf 结构"""
+    meta = tx["meta"]
+    update = geyser_pb2.SubscribeUpdateTransaction(slot=tx["slot"])
+    info = update.transaction
+    info.signature = base58.b58decode(tx["transaction"]["signatures"][0])
+    info.transaction.signatures.extend(
+        base58.b58decode(signature) for signature in tx["transaction"]["signatures"]
+    )
+    info.transaction.message.account_keys.extend(
+        base58.b58decode(key if isinstance(key, str) else key["pubkey"])
+        for key in tx["transaction"]["message"]["accountKeys"]
+    )
+    info.meta.pre_balances.extend(meta["preBalances"])
+    info.meta.post_balances.extend(meta["postBalances"])
+    info.meta.log_messages.extend(meta["logMessages"])
+    for token_balance in meta["preTokenBalances"]:
+        info.meta.pre_token_balances.add(**_token_balance(token_balance))
+    for token_balance in meta["postTokenBalances"]:
+        info.meta.post_token_balances.add(**_token_balance(token_balance))
+    return update
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["raw/open", "raw/open3", "raw/add", "raw/reduce", "raw/close", "raw/fail2"],
+)
+def test_decode_transaction_matches_rpc_parse(name: str):
+    tx = read_raw_tx(name)
+    expected = RawTXParser(tx).parse()
+
+    tx_detail = decode_transaction(to_geyser_update(tx))
+    parsed = RawTXParser(tx_detail).parse()
+
+    assert parsed is not None and expected is not None
+    assert parsed.signature == expected.signature
+    assert parsed.who == expected.who
+    assert parsed.mint == expected.mint
+    assert parsed.from_amount == expected.from_amount
+    assert parsed.to_amount == expected.to_amount
+    assert parsed.tx_type == expected.tx_type
+    assert parsed.program_id == expected.program_id
+    assert tx_detail["slot"] == tx["slot"]
+
+
+def test_decode_update_from_raw_bytes():
+    tx = read_raw_tx("raw/open")
+    raw = geyser_pb2.SubscribeUpdate(transaction=to_geyser_update(tx)).SerializeToString()
+
+    tx_detail = decode_update(raw)
+    expected = decode_transaction(to_geyser_update(tx))
+
+    assert tx_detail is not None
+    assert tx_detail["transaction"] == expected["transaction"]
+    assert tx_detail["meta"] == expected["meta"]
+
+
+def test_decode_update_skips_non_transaction():
+    raw = geyser_pb2.SubscribeUpdate(ping=geyser_pb2.SubscribeUpdatePing()).SerializeToString()
+    assert decode_update(raw) is None
+
+
+@pytest.mark.parametrize("name", ["raw/open", "raw/reduce", "raw/transfer", "raw/fail"])
+def test_prefilter_transaction_matches_tx_detail_check(name: str):
+    tx = read_raw_tx(name)
+    expected = SwapPrefilter().check_tx_detail(tx)
+    assert prefilter_transaction(SwapPrefilter(), to_geyser_update(tx)) == expected
@@ -0,0 +1,33 @@
+from wallet_tracker.geyser.racing import ArrivalTracker
+
+
+def test_only_first_arrival_is_processed():
+    tracker = ArrivalTracker()
+    assert tracker.arrive("sig", "geyser-0", 1.0) is True
+    assert tracker.arrive("sig", "geyser-1", 1.05) is False
+    assert tracker.arrive("sig", "geyser-0", 1.1) is False
+
+    stats = tracker.get_stats()
+    assert stats["geyser-0"]["first"] == 1
+    assert stats["geyser-0"]["avg_lead_ms"] == 50.0
+    assert stats["geyser-1"]["first"] == 0
+    assert stats["geyser-1"]["received"] == 1
+
+
+def test_lead_follows_arrival_time_when_recorded_out_of_order():
+    tracker = ArrivalTracker()
+    # geyser-1 先被解码，但 geyser-0 实际更早到达
+    assert tracker.arrive("sig", "geyser-1", 2.0) is True
+    assert tracker.arrive("sig", "geyser-0", 1.9) is False
+
+    stats = tracker.get_stats()
+    assert stats["geyser-0"]["first"] == 1
+    assert stats["geyser-1"]["first"] == 0
+    assert stats["geyser-0"]["max_lead_ms"] == 100.0
+
+
+def test_signatures_are_bounded():
+    tracker = ArrivalTracker(maxsize=2)
+    for sig in ("a", "b", "c"):
+        tracker.arrive(sig, "geyser-0", 0.0)
+    assert tracker.arrive("a", "geyser-0", 0.0) is True
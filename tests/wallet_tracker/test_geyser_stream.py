@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from wallet_tracker.geyser import stream as stream_module
+from wallet_tracker.geyser.stream import GeyserStream
+
+
+class FakeGeyserClient:
+    def __init__(self, responses: list[str]):
+        self.responses = responses
+
+    async def subscribe_with_request(self, request):
+        async def responses():
+            for response in self.responses:
+                yield response
+            # 保持连接
+            await asyncio.Event().wait()
+
+        return asyncio.Queue(), responses()
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_stream_keeps_reconnecting_until_connected(monkeypatch):
+    attempts = 0
+
+    async def connect(endpoint, x_token=None):
+        nonlocal attempts
+        attempts += 1
+        if attempts <= 3:
+            raise ConnectionError("unavailable")
+        return FakeGeyserClient(["update"])
+
+    monkeypatch.setattr(stream_module.GeyserClient, "connect", connect)
+    stream = GeyserStream("geyser-1", "endpoint", "key")
+    stream.retry_delay = 0
+    stream.max_retries = 1
+
+    # 启动时连接失败的节点
+    with pytest.raises(ConnectionError):
+        await stream.connect()
+
+    out: asyncio.Queue = asyncio.Queue()
+    reconnected = []
+    task = asyncio.create_task(
+        stream.run(out, lambda: None, lambda s: None, lambda s: reconnected.append(s.name))
+    )
+    name, _, response = await asyncio.wait_for(out.get(), 1)
+
+    assert (name, response) == ("geyser-1", "update")
+    assert attempts == 4
+    assert reconnected == ["geyser-1"]
+    assert stream.connected
+    task.cancel()
+    await task
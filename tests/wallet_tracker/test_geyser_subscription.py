@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from wallet_tracker.geyser.subscription import SubscriptionManager
+
+
+def test_build_request_without_wallets_sends_ping():
+    manager = SubscriptionManager()
+    request = manager.build_request()
+    assert request.HasField("ping")
+    assert len(request.transactions) == 0
+
+
+def test_build_request_shards_wallets():
+    wallets = [f"wallet{i:02d}" for i in range(25)]
+    manager = SubscriptionManager(wallets, max_accounts_per_filter=10)
+
+    request = manager.build_request()
+
+    assert sorted(request.transactions.keys()) == ["wallets_0", "wallets_1", "wallets_2"]
+    assert [len(request.transactions[f"wallets_{i}"].account_include) for i in range(3)] == [
+        10,
+        10,
+        5,
+    ]
+    included = [w for f in request.transactions.values() for w in f.account_include]
+    assert sorted(included) == wallets
+
+
+def test_add_and_remove_report_changes():
+    manager = SubscriptionManager(["a"])
+    assert manager.add(["a"]) is False
+    assert manager.add(["b"]) is True
+    assert manager.remove(["c"]) is False
+    assert manager.remove(["a"]) is True
+    assert "b" in manager and len(manager) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_coalesces_changes_within_window():
+    manager = SubscriptionManager(debounce_interval=0.05)
+    sent = []
+
+    async def send(request):
+        sent.append(request)
+
+    task = asyncio.create_task(manager.run(send))
+    for i in range(100):
+        manager.add([f"wallet{i}"])
+    manager.remove(["wallet0"])
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    assert len(sent) == 1
+    assert len(sent[0].transactions["wallets_0"].account_include) == 99
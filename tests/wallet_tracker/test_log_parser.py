@@ -0,0 +1,159 @@
+import asyncio
+import base64
+from types import SimpleNamespace
+
+import pytest
+from solbot_common.constants import PUMP_FUN_PROGRAM
+from solbot_common.layouts.pump_trade_event import PumpTradeEvent
+from solbot_common.types import TxType
+from solders.pubkey import Pubkey  # type: ignore
+from wallet_tracker.parser.log import (
+    find_pump_trade_events,
+    parse_pump_buy_logs,
+    set_holder_balance,
+)
+from wallet_tracker.wss.account_log_monitor import AccountLogMonitor
+
+PUMP = str(PUMP_FUN_PROGRAM)
+USER = Pubkey.new_unique()
+MINT = Pubkey.new_unique()
+OTHER_PROGRAM = str(Pubkey.new_unique())
+
+
+def trade_event(is_buy: bool = True, user: Pubkey = USER) -> PumpTradeEvent:
+    return PumpTradeEvent(
+        mint=MINT,
+        sol_amount=1_000_000_000,
+        token_amount=35_000_000_000_000,
+        is_buy=is_buy,
+        user=user,
+        timestamp=1735000000,
+        virtual_sol_reserves=31_000_000_000,
+        virtual_token_reserves=1_000_000_000_000_000,
+    )
+
+
+def pump_logs(*events: PumpTradeEvent, emitter: str = PUMP) -> list[str]:
+    logs = [
+        "Program ComputeBudget111111111111111111111111111111 invoke [1]",
+        "Program ComputeBudget111111111111111111111111111111 success",
+        f"Program {emitter} invoke [1]",
+        "Program log: Instruction: Buy",
+        "Program 11111111111111111111111111111111 invoke [2]",
+        "Program 11111111111111111111111111111111 success",
+    ]
+    for event in events:
+        # 新版本的 TradeEvent 在末尾追加了字段，解析时需要忽略
+        data = event.to_buffer() + bytes(64)
+        logs.append(f"Program data: {base64.b64encode(data).decode()}")
+    logs += [
+        f"Program {emitter} consumed 30000 of 200000 compute units",
+        f"Program {emitter} success",
+    ]
+    return logs
+
+
+def test_trade_event_round_trip():
+    event = trade_event()
+    assert PumpTradeEvent.from_buffer(event.to_buffer()) == event
+
+
+def test_parse_pump_buy_logs():
+    tx_event = parse_pump_buy_logs("sig", pump_logs(trade_event()), {str(USER)})
+
+    assert tx_event is not None
+    assert tx_event.who == str(USER)
+    assert tx_event.mint == str(MINT)
+    assert tx_event.tx_type == TxType.OPEN_POSITION
+    assert tx_event.tx_direction == "buy"
+    assert tx_event.from_amount == 1_000_000_000
+    assert tx_event.to_amount == 35_000_000_000_000
+    assert tx_event.program_id == PUMP
+    assert tx_event.timestamp == 1735000000
+
+
+def test_sell_falls_back():
+    assert parse_pump_buy_logs("sig", pump_logs(trade_event(is_buy=False)), {str(USER)}) is None
+
+
+def test_untracked_or_ambiguous_falls_back():
+    other = Pubkey.new_unique()
+    assert parse_pump_buy_logs("sig", pump_logs(trade_event(user=other)), {str(USER)}) is None
+    logs = pump_logs(trade_event(), trade_event())
+    assert parse_pump_buy_logs("sig", logs, {str(USER)}) is None
+
+
+def test_events_from_other_programs_are_ignored():
+    assert find_pump_trade_events(pump_logs(trade_event(), emitter=OTHER_PROGRAM)) == []
+
+
+def test_set_holder_balance_distinguishes_open_and_add():
+    tx_event = parse_pump_buy_logs("sig", pump_logs(trade_event()), {str(USER)})
+    assert tx_event is not None
+
+    set_holder_balance(tx_event, 35_000_000_000_000)
+    assert tx_event.tx_type == TxType.OPEN_POSITION
+    assert tx_event.pre_token_amount == 0
+
+    set_holder_balance(tx_event, 50_000_000_000_000)
+    assert tx_event.tx_type == TxType.ADD_POSITION
+    assert tx_event.pre_token_amount == 15_000_000_000_000
+    assert tx_event.post_token_amount == 50_000_000_000_000
+
+
+class FakeProducer:
+    def __init__(self):
+        self.events = []
+
+    async def produce(self, tx_event):
+        self.events.append(tx_event)
+
+
+class FakeTransport:
+    def __init__(self):
+        self.pushed = []
+
+    async def push(self, channel, signature):
+        self.pushed.append(signature)
+
+
+def _monitor(max_fast_path_tasks: int = 10) -> AccountLogMonitor:
+    monitor = AccountLogMonitor.__new__(AccountLogMonitor)
+    monitor.log_fast_path = True
+    monitor.subscribed_wallets = {str(USER)}
+    monitor.max_fast_path_tasks = max_fast_path_tasks
+    monitor.fast_path_tasks = set()
+    monitor.max_traces = 10
+    monitor.traces = {}  # type: ignore[assignment]
+    monitor.redis_channel = "signatures"
+    monitor.transport = FakeTransport()  # type: ignore[assignment]
+    monitor.tx_event_producer = FakeProducer()  # type: ignore[assignment]
+    return monitor
+
+
+def _message(signature: str):
+    value = SimpleNamespace(err=None, signature=signature, logs=pump_logs(trade_event()))
+    return SimpleNamespace(result=SimpleNamespace(value=value, context=SimpleNamespace(slot=1)))
+
+
+@pytest.mark.asyncio
+async def test_fast_path_does_not_block_log_processing():
+    monitor = _monitor(max_fast_path_tasks=2)
+    balance_ready = asyncio.Event()
+
+    async def get_holder_balance(owner, mint):
+        await balance_ready.wait()
+        return 0
+
+    monitor.get_holder_balance = get_holder_balance  # type: ignore[method-assign]
+
+    # 读取持仓期间继续处理后续日志，在途任务达到上限时回退到签名队列
+    for signature in ("a", "b", "c"):
+        await asyncio.wait_for(monitor.process_log(_message(signature)), 0.1)  # type: ignore[arg-type]
+    assert len(monitor.fast_path_tasks) == 2
+    assert monitor.transport.pushed == ["c"]  # type: ignore[attr-defined]
+
+    balance_ready.set()
+    await asyncio.gather(*monitor.fast_path_tasks)
+    assert [event.signature for event in monitor.tx_event_producer.events] == ["a", "b"]  # type: ignore[attr-defined]
+    assert not monitor.fast_path_tasks
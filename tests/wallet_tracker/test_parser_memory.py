@@ -0,0 +1,42 @@
+import json
+import tracemalloc
+from pathlib import Path
+
+from wallet_tracker.parser.raw_tx import RawTXParser
+
+TOTAL = 100_000
+WARMUP = 10_000
+
+
+def load_raw_txs() -> list[dict]:
+    txs = []
+    for path in sorted((Path(__file__).parent / "tx_examples" / "raw").glob("*.json")):
+        with open(path) as f:
+            data = json.load(f)
+        txs.append(data.get("result", data))
+    return txs
+
+
+def parse_all(txs: list[dict], count: int) -> None:
+    for i in range(count):
+        try:
+            RawTXParser(txs[i % len(txs)]).parse()
+        except Exception:
+            pass
+
+
+def test_parser_memory_is_flat():
+    """解析 100k 笔交易后内存不应随解析次数增长"""
+    txs = load_raw_txs()
+
+    tracemalloc.start()
+    try:
+        parse_all(txs, WARMUP)
+        baseline, _ = tracemalloc.get_traced_memory()
+        parse_all(txs, TOTAL - WARMUP)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # 旧实现中 functools.cache 会为每个解析器保留缓存项，90k 次解析会增长数十 MB
+    assert current - baseline < 256 * 1024
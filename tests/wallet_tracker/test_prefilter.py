@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+import pytest
+from solbot_common.types import TxType
+from wallet_tracker.exceptions import NotSwapTransaction, ZeroChangeAmountError
+from wallet_tracker.parser.raw_tx import RawTXParser
+from wallet_tracker.prefilter import SwapPrefilter
+
+RAW_EXAMPLES = sorted(
+    path.stem for path in (Path(__file__).parent / "tx_examples" / "raw").glob("*.json")
+)
+
+
+def read_raw_tx(name: str) -> dict:
+    path = Path(__file__).parent / "tx_examples" / "raw" / f"{name}.json"
+    with open(path) as f:
+        data = json.load(f)
+    # transfer.json 保存的是交易详情本身，没有 RPC 响应的外层结构
+    return data.get("result", data)
+
+
+def parser_accepts(tx_detail: dict) -> bool:
+    try:
+        tx_event = RawTXParser(tx_detail).parse()
+    except (NotSwapTransaction, ZeroChangeAmountError):
+        return False
+    return tx_event is not None and tx_event.tx_type != TxType.ERROR_ORDER
+
+
+@pytest.mark.parametrize("name", RAW_EXAMPLES)
+def test_prefilter_agrees_with_parser(name: str):
+    tx_detail = read_raw_tx(name)
+    assert SwapPrefilter().check_tx_detail(tx_detail) == parser_accepts(tx_detail)
+
+
+def test_prefilter_counts_drops():
+    prefilter = SwapPrefilter()
+    tx_detail = read_raw_tx("open")
+    tx_detail["meta"]["postTokenBalances"] = tx_detail["meta"]["preTokenBalances"]
+
+    assert prefilter.check_tx_detail(tx_detail) is False
+    assert prefilter.check_tx_detail(read_raw_tx("open")) is True
+    assert prefilter.stats() == {"passed": 1, "dropped_no_token_change": 1}
+
+
+def test_require_swap_program():
+    tx_detail = read_raw_tx("open")
+    tx_detail["meta"]["logMessages"] = []
+
+    assert SwapPrefilter().check_tx_detail(tx_detail) is True
+    prefilter = SwapPrefilter(require_swap_program=True)
+    assert prefilter.check_tx_detail(tx_detail) is False
+    assert prefilter.stats()["dropped_no_swap_program"] == 1
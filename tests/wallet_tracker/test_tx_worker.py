@@ -0,0 +1,88 @@
+import pytest
+from wallet_tracker import tx_worker
+from wallet_tracker.constants import NEW_TX_DETAIL_CHANNEL
+from wallet_tracker.exceptions import NotSwapTransaction
+from wallet_tracker.tx_worker import TransactionWorker
+
+
+class FakeRedis:
+    """只实现出队需要的命令，列表尾部为队首，与 LPUSH/RPOP 一致"""
+
+    def __init__(self, items: list[bytes]):
+        self.items = list(items)
+        self.rpop_counts: list[int] = []
+
+    async def brpop(self, key, timeout=0):
+        assert key == NEW_TX_DETAIL_CHANNEL
+        if not self.items:
+            return None
+        return key, self.items.pop()
+
+    async def execute_command(self, command, key, count):
+        assert command == "RPOP" and key == NEW_TX_DETAIL_CHANNEL
+        self.rpop_counts.append(count)
+        popped = [self.items.pop() for _ in range(min(count, len(self.items)))]
+        return popped or None
+
+
+@pytest.mark.asyncio
+async def test_dequeue_drains_up_to_batch_size():
+    redis = FakeRedis([b"5", b"4", b"3", b"2", b"1"])
+    worker = TransactionWorker(redis, batch_size=3)  # type: ignore[arg-type]
+
+    assert await worker.dequeue() == [b"1", b"2", b"3"]
+    assert await worker.dequeue() == [b"4", b"5"]
+    assert await worker.dequeue() == []
+    assert redis.rpop_counts == [2, 2]
+
+    metrics = worker.get_metrics()
+    assert metrics["pops"] == 2
+    assert metrics["items"] == 5
+    assert metrics["batch_sizes"] == {2: 1, 3: 1}
+
+
+@pytest.mark.asyncio
+async def test_dequeue_without_batching_pops_single_item():
+    redis = FakeRedis([b"2", b"1"])
+    worker = TransactionWorker(redis)  # type: ignore[arg-type]
+
+    assert await worker.dequeue() == [b"1"]
+    assert redis.rpop_counts == []
+
+
+class FakeParser:
+    def __init__(self, tx_detail: dict):
+        self.tx_detail = tx_detail
+
+    def get_tx_hash(self) -> str:
+        return self.tx_detail["transaction"]["signatures"][0]
+
+    def get_block_time(self) -> int:
+        return self.tx_detail["blockTime"]
+
+    def parse(self):
+        raise NotSwapTransaction()
+
+
+@pytest.mark.asyncio
+async def test_block_time_is_not_recorded_for_geyser_transactions(monkeypatch):
+    recorded = []
+
+    async def record_block_time(tx_hash, block_time):
+        recorded.append((tx_hash, block_time))
+
+    monkeypatch.setattr(tx_worker, "RawTXParser", FakeParser)
+    monkeypatch.setattr(tx_worker.benchmark, "record_block_time", record_block_time)
+    worker = TransactionWorker(FakeRedis([]))  # type: ignore[arg-type]
+
+    def tx_detail(signature: str, source: str | None) -> dict:
+        detail = {"blockTime": 100, "transaction": {"signatures": [signature]}}
+        if source is not None:
+            detail["trace"] = {"trace_id": signature, "source": source, "stamps": {}}
+        return detail
+
+    # Geyser 交易的 blockTime 是收到时的时间，不能作为出块时间
+    await worker.process_transaction(tx_detail("geyser", "geyser:geyser-0"))
+    await worker.process_transaction(tx_detail("wss", "wss"))
+    await worker.process_transaction(tx_detail("backfill", None))
+    assert recorded == [("wss", 100), ("backfill", 100)]